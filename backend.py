@@ -21,13 +21,38 @@ import sqlite3
 from typing import Optional, Dict
 import sqlite3
 import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Tuple, Any
+import atexit
+import base64
+import bisect
+import codecs
+import collections
 import csv
+import gzip
 import io
+import itertools
 import json
+import operator
+import re
 import urllib.parse
+import zipfile
 import os
+import copy
+import queue
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from xml.sax.saxutils import escape as xml_escape
+
+# Opsiyonel: Parquet/Arrow export için (pip install pyarrow)
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 # ============================================================================
 # VERİTABANI AYARLARI
@@ -43,23 +68,381 @@ def get_db_path():
 
 DB_NAME = get_db_path()
 
-def get_db_connection():
-    """Veritabanı bağlantısı oluşturur."""
+# Okuma havuzunda aynı anda açık tutulabilecek en fazla bağlantı sayısı
+DB_POOL_SIZE = int(os.environ.get('BORC_TAKIP_DB_POOL_SIZE', '8'))
+# Havuz doluyken yeni bağlantı için beklenecek süre (saniye)
+DB_POOL_TIMEOUT = 30
+
+# Her bağlantıda bir kez uygulanan performans profili
+DB_PROFILE = {
+    'journal_mode': 'WAL',          # Okuyucular yazıcıyı, yazıcı okuyucuları bloklamaz
+    'synchronous': 'NORMAL',        # WAL ile güvenli, her commit'te fsync yok
+    'mmap_size': 256 * 1024 * 1024, # 256 MB bellek eşlemeli okuma
+    'cache_size': -32000,           # ~32 MB sayfa önbelleği (negatif = KB)
+    'temp_store': 'MEMORY',         # Geçici tablolar/sıralamalar bellekte
+    'busy_timeout': 5000,           # Kilitli veritabanında 5 sn bekle
+}
+
+def _apply_db_profile(conn: sqlite3.Connection, readonly: bool = False):
+    """Bağlantıya DB_PROFILE PRAGMA'larını uygular."""
+    for pragma in ('busy_timeout', 'synchronous', 'mmap_size', 'cache_size', 'temp_store'):
+        conn.execute(f"PRAGMA {pragma} = {DB_PROFILE[pragma]}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    else:
+        # journal_mode dosyaya kalıcı yazılır; yazıcı bağlantısı ayarlar
+        conn.execute(f"PRAGMA journal_mode = {DB_PROFILE['journal_mode']}")
+
+def get_db_connection(readonly: bool = False):
+    """Veritabanı bağlantısı oluşturur (PRAGMA ayarları bir kez yapılır)."""
     try:
         conn = sqlite3.connect(DB_NAME, check_same_thread=False)
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
+        _apply_db_profile(conn, readonly)
         return conn
     except sqlite3.Error as e:
         print(f"❌ Veritabanı bağlantı hatası: {e}")
         raise
 
+class ConnectionPool:
+    """
+    Thread'e bağlı SQLite bağlantı havuzu.
+    Aynı thread içindeki iç içe çağrılar aynı bağlantıyı paylaşır;
+    en dıştaki kullanım bittiğinde bağlantı havuza geri döner.
+    """
+    
+    def __init__(self, factory, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.factory = factory
+        self.size = max(1, size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._local = threading.local()
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Thread'in bağlantısını döndürür, yoksa havuzdan alır."""
+        local = self._local
+        if getattr(local, 'conn', None) is not None:
+            local.depth += 1
+            return local.conn
+        
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Bağlantı havuzu dolu (zaman aşımı)")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self.factory()
+            except Exception:
+                self._slots.release()
+                raise
+        
+        local.conn = conn
+        local.depth = 1
+        return conn
+    
+    def release(self):
+        """En dıştaki kullanım bittiğinde bağlantıyı havuza iade eder."""
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+        
+        conn = local.conn
+        local.conn = None
+        try:
+            # Commit edilmemiş değişiklikler (eski conn.close() davranışı gibi) geri alınır
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except sqlite3.Error:
+            conn.close()
+        finally:
+            self._slots.release()
+    
+    def is_held(self) -> bool:
+        """Mevcut thread bu havuzdan bağlantı tutuyor mu?"""
+        return getattr(self._local, 'conn', None) is not None
+    
+    def close_all(self):
+        """Boştaki tüm bağlantıları kapatır."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+# Tek, sıralı (serialized) yazıcı bağlantısı + salt okunur okuyucu havuzu
+_write_pool = ConnectionPool(get_db_connection, size=1)
+_read_pool = ConnectionPool(lambda: get_db_connection(readonly=True))
+
+@contextmanager
+def db_connection(readonly: bool = False):
+    """
+    Havuzdan bağlantı verir.
+    
+    readonly=True rapor/liste sorguları içindir ve okuyucu havuzunu kullanır;
+    yazma işlemleri tek yazıcı bağlantısında sırayla çalışır. Yazıcıyı tutan
+    thread içindeki okumalar kendi (commit edilmemiş) değişikliklerini görsün
+    diye yine yazıcıyı kullanır.
+    
+    Kullanım:
+        with db_connection(readonly=True) as conn:
+            conn.execute(...)
+    """
+    pool = _read_pool if readonly and not _write_pool.is_held() else _write_pool
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release()
+
+# Birim iş (unit of work) durumu: thread başına açık transaction ve
+# commit sonrası geçersiz kılınacak önbellek alanları
+_uow_state = threading.local()
+
+@contextmanager
+def transaction(*domains: str):
+    """
+    Birim iş: bloktaki tüm yazmalar yazıcı bağlantısında tek transaction
+    (BEGIN IMMEDIATE ... COMMIT) ile yapılır. Yazma kilidi baştan alındığı için
+    okuma-sonra-yazma adımları başka yazıcılarla yarışmaz. Hata olursa hepsi
+    geri alınır; başarılı commit'ten sonra verilen önbellek alanları
+    geçersiz kılınır. İç içe kullanımda en dıştaki blok commit eder.
+    
+    Blok içinde kendi commit'ini yapan public fonksiyonlar yerine cursor alan
+    yardımcılar kullanılır (_apply_customer_balance, _write_activity, ...).
+    Commit sonrasına bırakılacak işler _uow_state.after_commit listesine
+    eklenir; geri alınan transaction'da çalıştırılmaz.
+    
+    Kullanım:
+        with transaction('checks', 'cash') as cursor:
+            cursor.execute(...)
+    """
+    with db_connection() as conn:
+        if getattr(_uow_state, 'domains', None) is not None:
+            _uow_state.domains.update(domains)
+            yield conn.cursor()
+            return
+        
+        if conn.in_transaction:
+            raise sqlite3.ProgrammingError("transaction() commit edilmemiş yazmaların içinde çağrıldı")
+        
+        conn.execute("BEGIN IMMEDIATE")
+        _uow_state.domains = set(domains)
+        _uow_state.after_commit = []
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+            _invalidate(*_uow_state.domains)
+            after_commit = _uow_state.after_commit
+        finally:
+            _uow_state.domains = None
+            _uow_state.after_commit = None
+        # Sadece commit edilen işlerin yan etkileri (ör. kuyruğa alınan aktivite kaydı)
+        for action in after_commit:
+            action()
+
+def close_db_connections():
+    """Havuzdaki boş bağlantıları kapatır (ör. geri yükleme sonrası)."""
+    _write_pool.close_all()
+    _read_pool.close_all()
+
 def dict_from_row(row) -> Optional[Dict]:
     """SQLite Row objesini dict'e çevirir."""
     if row is None:
         return None
     return dict(row)
 
+# ============================================================================
+# SAYFALAMA (KEYSET)
+# ============================================================================
+# Liste sayfaları OFFSET yerine bir önceki sayfanın son satırından devam eder:
+# "WHERE (anahtarlar) > (son değerler) ORDER BY anahtarlar LIMIT n". Böylece
+# her sayfanın maliyeti, listenin kaçıncı sayfasında olunduğundan bağımsızdır.
+#
+# Sıralama anahtarları (sql_ifadesi, satır_alanı, azalan_mı, null_değeri)
+# demetleridir ve benzersiz olmaları için id ile biter. NULL olabilen kolonlar
+# sorguda COALESCE ile sıralanır; null_değeri imleçte aynı karşılığı verir.
+# İmleç (cursor), son satırın anahtar değerlerinin base64 JSON halidir.
+# ============================================================================
+
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 500
+
+def clamp_page_size(page_size: Any = None) -> int:
+    """Sayfa boyutunu 1..PAGE_SIZE_MAX aralığına çeker (geçersizse varsayılan)."""
+    try:
+        page_size = int(page_size)
+    except (TypeError, ValueError):
+        return PAGE_SIZE_DEFAULT
+    return max(1, min(page_size, PAGE_SIZE_MAX))
+
+def encode_cursor(values: List) -> str:
+    """Sıralama anahtarı değerlerini URL'de taşınabilir imlece çevirir."""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, size: int) -> Optional[List]:
+    """İmleci çözer; bozuk ya da başka bir sıralamaya ait imleçte None döner."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+def _keyset_clause(keys: List[Tuple], values: List) -> Tuple[str, List]:
+    """İmleçteki satırdan SONRA gelen satırlar için WHERE koşulu üretir."""
+    directions = {desc for _, _, desc, _ in keys}
+    if len(directions) == 1:
+        # Tek yönlü sıralamada satır değeri karşılaştırması indeksle çalışır
+        op = '<' if directions.pop() else '>'
+        exprs = ', '.join(expr for expr, _, _, _ in keys)
+        marks = ', '.join('?' for _ in keys)
+        return f"({exprs}) {op} ({marks})", list(values)
+    
+    # Karışık yönlerde: (k1 ileri) OR (k1 = v1 AND k2 ileri) OR ...
+    terms = []
+    params = []
+    for i, (expr, _, desc, _) in enumerate(keys):
+        parts = [f"{prev} = ?" for prev, _, _, _ in keys[:i]]
+        parts.append(f"{expr} {'<' if desc else '>'} ?")
+        terms.append('(' + ' AND '.join(parts) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(terms) + ')', params
+
+def _empty_page(page_size: int = None) -> Dict:
+    """Hata durumunda döndürülen boş sayfa."""
+    return {'items': [], 'next_cursor': None, 'has_more': False,
+            'page_size': clamp_page_size(page_size)}
+
+def _fetch_page(conn: sqlite3.Connection, query: str, params: List, keys: List[Tuple],
+                cursor: str = None, page_size: int = None) -> Dict:
+    """
+    WHERE ile biten sorguya keyset koşulu, ORDER BY ve LIMIT ekleyip bir sayfa döndürür.
+    Sonuç: {'items', 'next_cursor', 'has_more', 'page_size'}
+    """
+    page_size = clamp_page_size(page_size)
+    params = list(params)
+    
+    values = decode_cursor(cursor, len(keys))
+    if values is not None:
+        clause, extra = _keyset_clause(keys, values)
+        query += f" AND {clause}"
+        params.extend(extra)
+    
+    query += " ORDER BY " + ', '.join(
+        f"{expr} {'DESC' if desc else 'ASC'}" for expr, _, desc, _ in keys)
+    # Sonraki sayfa var mı diye bir satır fazla okunur
+    query += " LIMIT ?"
+    params.append(page_size + 1)
+    
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+    items = rows[:page_size]
+    has_more = len(rows) > page_size
+    next_cursor = None
+    if has_more:
+        last = items[-1]
+        next_cursor = encode_cursor([
+            null if last[field] is None else last[field] for _, field, _, null in keys])
+    
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'page_size': page_size,
+    }
+
+# ============================================================================
+# TARİH KOŞULLARI (SARGABLE)
+# ============================================================================
+# Vade filtreleri kolonu fonksiyona sarmadan yazılır: date(due_date) < date('now')
+# yerine due_date < '2025-01-05'. Böylece (status, due_date) gibi indeksler
+# aralık araması yapabilir. Gün sınırları istek başına bir kez Python'da
+# hesaplanır; 'bugün' SQLite'ın date('now') değeriyle aynıdır (UTC).
+# Aralıklar yarı açıktır [başlangıç, bitiş): date(x) <= D koşulu x < D+1 olur,
+# böylece saat içeren değerler ('YYYY-MM-DD SS:DD:ss') de aynı güne düşer.
+# ============================================================================
+
+# Dönem adı -> (başlangıç sınırı, bitiş sınırı); None açık uç demektir
+DUE_PERIODS = {
+    'overdue': (None, 'today'),             # date(x) < bugün
+    'until_today': (None, 'tomorrow'),      # date(x) <= bugün
+    'today': ('today', 'tomorrow'),         # date(x) = bugün
+    'tomorrow': ('tomorrow', 'day_after'),  # date(x) = yarın
+    'after_today': ('tomorrow', None),      # date(x) > bugün
+    'next_7_days': ('today', 'week_end'),   # bugün <= date(x) <= bugün+7
+    'rest_of_week': ('tomorrow', 'week_end'),   # bugün < date(x) <= bugün+7
+    'this_month': ('month_start', 'month_end'),
+}
+
+def date_bounds() -> Dict[str, str]:
+    """Sorguların kullandığı gün sınırları ('YYYY-MM-DD'; bitişler hariç tutulur)."""
+    today = datetime.now(timezone.utc).date()
+    month_start = today.replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1)
+    return {
+        'today': today.isoformat(),
+        'tomorrow': (today + timedelta(days=1)).isoformat(),
+        'day_after': (today + timedelta(days=2)).isoformat(),
+        'week_end': (today + timedelta(days=8)).isoformat(),
+        'month_start': month_start.isoformat(),
+        'month_end': month_end.isoformat(),
+    }
+
+def date_range_sql(column: str, start: str = None, end: str = None) -> Tuple[str, List]:
+    """[start, end) aralığını ham kolon üzerinde koşul ve parametre olarak döndürür."""
+    terms, params = [], []
+    if start:
+        terms.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        terms.append(f"{column} < ?")
+        params.append(end)
+    return ' AND '.join(terms) or f"{column} IS NOT NULL", params
+
+def due_period_sql(column: str, period: str, bounds: Dict[str, str] = None) -> Tuple[str, List]:
+    """DUE_PERIODS'taki dönem için koşul; bounds verilmezse o an hesaplanır."""
+    bounds = bounds or date_bounds()
+    start, end = DUE_PERIODS[period]
+    return date_range_sql(column, bounds[start] if start else None, bounds[end] if end else None)
+
+# ============================================================================
+# ÖNBELLEK (CACHE) ALTYAPISI
+# ============================================================================
+# Her veri alanı için süreç içi sürüm sayacı tutulur. Yazma fonksiyonları
+# commit'ten SONRA ilgili alanları _invalidate() ile artırır; önbellekler
+# anahtarlarına bu sayaçları katar, böylece sayaç değişince kayıt bayatlar.
+# Sayaç, hesaplamaya başlamadan ÖNCE okunmalıdır (yarış durumunda kayıt en
+# fazla bir kez gereksiz yere yeniden hesaplanır, asla bayat kalmaz).
+# ============================================================================
+
+CACHE_DOMAINS = ('customers', 'checks', 'cash', 'reminders', 'notes', 'settings')
+
+_cache_lock = threading.Lock()
+_cache_generations = dict.fromkeys(CACHE_DOMAINS, 0)
+
+def cache_generation(*domains: str) -> Tuple[int, ...]:
+    """Verilen alanların güncel sürüm sayaçlarını döndürür."""
+    with _cache_lock:
+        return tuple(_cache_generations.get(d, 0) for d in domains)
+
+def _invalidate(*domains: str):
+    """Alanların sürüm sayaçlarını artırır (commit sonrası çağrılır)."""
+    with _cache_lock:
+        for domain in domains:
+            _cache_generations[domain] = _cache_generations.get(domain, 0) + 1
+
 # ============================================================================
 # VERİTABANI BAŞLATMA
 # ============================================================================
@@ -67,359 +450,364 @@ def dict_from_row(row) -> Optional[Dict]:
 def init_db():
     """Tüm tabloları oluşturur."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # ================================================================
-        # 1. KULLANICILAR TABLOSU
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                full_name TEXT NOT NULL,
-                role TEXT DEFAULT 'user',
-                phone TEXT,
-                email TEXT,
-                avatar TEXT,
-                last_login TIMESTAMP,
-                login_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                is_active INTEGER DEFAULT 1
-            )
-        ''')
-        
-        # ================================================================
-        # 2. MÜŞTERİLER / CARİ HESAPLAR TABLOSU
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                -- Temel Bilgiler
-                name TEXT NOT NULL,
-                short_name TEXT,
-                customer_type TEXT DEFAULT 'customer',
-                customer_group TEXT,
-                -- İletişim
-                phone TEXT,
-                phone2 TEXT,
-                whatsapp_phone TEXT,
-                email TEXT,
-                website TEXT,
-                -- Adres
-                address TEXT,
-                city TEXT,
-                district TEXT,
-                postal_code TEXT,
-                country TEXT DEFAULT 'Türkiye',
-                -- Ticari Bilgiler
-                tax_office TEXT,
-                tax_number TEXT,
-                id_number TEXT,
-                -- Finansal
-                credit_limit REAL DEFAULT 0,
-                balance REAL DEFAULT 0.0,
-                currency TEXT DEFAULT 'TL',
-                payment_term INTEGER DEFAULT 0,
-                -- Diğer
-                notes TEXT,
-                tags TEXT,
-                whatsapp_enabled INTEGER DEFAULT 1,
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                is_active INTEGER DEFAULT 1,
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 3. CARİ HESAP HAREKETLERİ
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS account_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER NOT NULL,
-                transaction_type TEXT NOT NULL,
-                amount REAL NOT NULL,
-                balance_after REAL,
-                description TEXT,
-                reference_type TEXT,
-                reference_id INTEGER,
-                transaction_date DATE DEFAULT CURRENT_DATE,
-                due_date DATE,
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE CASCADE,
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 4. ÇEK/SENET TABLOSU
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS checks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                -- Temel Bilgiler
-                check_type TEXT NOT NULL,
-                payment_type TEXT NOT NULL,
-                customer_id INTEGER,
-                check_number TEXT NOT NULL,
-                -- Banka Bilgileri
-                bank_name TEXT,
-                bank_branch TEXT,
-                bank_code TEXT,
-                account_number TEXT,
-                iban TEXT,
-                -- Tutar Bilgileri
-                amount REAL NOT NULL,
-                paid_amount REAL DEFAULT 0,
-                currency TEXT DEFAULT 'TL',
-                -- Tarihler
-                issue_date DATE,
-                due_date DATE NOT NULL,
-                -- Durum
-                status TEXT DEFAULT 'pending',
-                -- Ciro Bilgileri
-                is_endorsed INTEGER DEFAULT 0,
-                endorser_name TEXT,
-                endorser_tax_no TEXT,
-                endorser_phone TEXT,
-                endorsement_date DATE,
-                endorsed_to TEXT,
-                -- Ek Bilgiler
-                drawer_name TEXT,
-                drawer_tax_no TEXT,
-                notes TEXT,
-                -- Sistem
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id),
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 5. ÇEK/SENET HAREKETLERİ
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS check_transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                check_id INTEGER NOT NULL,
-                transaction_type TEXT NOT NULL,
-                amount REAL NOT NULL,
-                description TEXT,
-                transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_by INTEGER,
-                FOREIGN KEY (check_id) REFERENCES checks (id) ON DELETE CASCADE,
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 6. KASA HAREKETLERİ
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cash_flow (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                transaction_type TEXT NOT NULL,
-                category TEXT NOT NULL,
-                subcategory TEXT,
-                amount REAL NOT NULL,
-                currency TEXT DEFAULT 'TL',
-                exchange_rate REAL DEFAULT 1,
-                description TEXT,
-                customer_id INTEGER,
-                check_id INTEGER,
-                payment_method TEXT DEFAULT 'cash',
-                reference_no TEXT,
-                receipt_no TEXT,
-                transaction_date DATE DEFAULT CURRENT_DATE,
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id),
-                FOREIGN KEY (check_id) REFERENCES checks (id),
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 7. GELİR/GİDER KATEGORİLERİ
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                parent_id INTEGER,
-                icon TEXT,
-                color TEXT,
-                is_default INTEGER DEFAULT 0,
-                sort_order INTEGER DEFAULT 0,
-                is_active INTEGER DEFAULT 1,
-                FOREIGN KEY (parent_id) REFERENCES categories (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 8. HATIRLATICILAR / AJANDA
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                reminder_type TEXT DEFAULT 'general',
-                priority TEXT DEFAULT 'normal',
-                due_date DATE NOT NULL,
-                due_time TIME,
-                -- Tekrarlama
-                is_recurring INTEGER DEFAULT 0,
-                recurrence_type TEXT,
-                recurrence_interval INTEGER DEFAULT 1,
-                recurrence_end_date DATE,
-                -- İlişkiler
-                related_customer_id INTEGER,
-                related_check_id INTEGER,
-                -- Bildirim
-                notify_before_days INTEGER DEFAULT 1,
-                notify_via_whatsapp INTEGER DEFAULT 0,
-                -- Durum
-                status TEXT DEFAULT 'pending',
-                snoozed_until TIMESTAMP,
-                completed_at TIMESTAMP,
-                -- Sistem
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                FOREIGN KEY (related_customer_id) REFERENCES customers (id),
-                FOREIGN KEY (related_check_id) REFERENCES checks (id),
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 9. NOT DEFTERİ / GÖREVLER
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT,
-                note_type TEXT DEFAULT 'note',
-                category TEXT,
-                color TEXT DEFAULT '#ffffff',
-                is_pinned INTEGER DEFAULT 0,
-                is_archived INTEGER DEFAULT 0,
-                -- Görev özellikleri
-                is_task INTEGER DEFAULT 0,
-                task_status TEXT DEFAULT 'pending',
-                task_priority TEXT DEFAULT 'normal',
-                task_due_date DATE,
-                task_completed_at TIMESTAMP,
-                -- İlişkiler
-                related_customer_id INTEGER,
-                -- Etiketler (JSON array)
-                tags TEXT,
-                -- Sistem
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                FOREIGN KEY (related_customer_id) REFERENCES customers (id),
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 10. WHATSAPP MESAJ GEÇMİŞİ
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS whatsapp_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER,
-                phone_number TEXT NOT NULL,
-                message_type TEXT DEFAULT 'manual',
-                message_template TEXT,
-                message_content TEXT NOT NULL,
-                related_type TEXT,
-                related_id INTEGER,
-                status TEXT DEFAULT 'pending',
-                sent_at TIMESTAMP,
-                error_message TEXT,
-                created_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (customer_id) REFERENCES customers (id),
-                FOREIGN KEY (created_by) REFERENCES users (id)
-            )
-        ''')
-        
-        # ================================================================
-        # 11. WHATSAPP ŞABLONLARI
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS whatsapp_templates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                template_type TEXT NOT NULL,
-                content TEXT NOT NULL,
-                variables TEXT,
-                is_active INTEGER DEFAULT 1,
-                usage_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # ================================================================
-        # 12. AYARLAR TABLOSU
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT NOT NULL,
-                setting_key TEXT NOT NULL,
-                setting_value TEXT,
-                setting_type TEXT DEFAULT 'string',
-                display_name TEXT,
-                description TEXT,
-                options TEXT,
-                is_system INTEGER DEFAULT 0,
-                sort_order INTEGER DEFAULT 0,
-                updated_at TIMESTAMP,
-                UNIQUE(category, setting_key)
-            )
-        ''')
-        
-        # ================================================================
-        # 13. AKTİVİTE LOGLARI
-        # ================================================================
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS activity_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT NOT NULL,
-                entity_type TEXT,
-                entity_id INTEGER,
-                old_values TEXT,
-                new_values TEXT,
-                ip_address TEXT,
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        conn.commit()
-        
-        # ================================================================
-        # VARSAYILAN VERİLERİ EKLE
-        # ================================================================
-        _insert_default_data(cursor, conn)
-        
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # ================================================================
+            # 1. KULLANICILAR TABLOSU
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    full_name TEXT NOT NULL,
+                    role TEXT DEFAULT 'user',
+                    phone TEXT,
+                    email TEXT,
+                    avatar TEXT,
+                    last_login TIMESTAMP,
+                    login_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    is_active INTEGER DEFAULT 1
+                )
+            ''')
+            
+            # ================================================================
+            # 2. MÜŞTERİLER / CARİ HESAPLAR TABLOSU
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS customers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    -- Temel Bilgiler
+                    name TEXT NOT NULL,
+                    short_name TEXT,
+                    customer_type TEXT DEFAULT 'customer',
+                    customer_group TEXT,
+                    -- İletişim
+                    phone TEXT,
+                    phone2 TEXT,
+                    whatsapp_phone TEXT,
+                    email TEXT,
+                    website TEXT,
+                    -- Adres
+                    address TEXT,
+                    city TEXT,
+                    district TEXT,
+                    postal_code TEXT,
+                    country TEXT DEFAULT 'Türkiye',
+                    -- Ticari Bilgiler
+                    tax_office TEXT,
+                    tax_number TEXT,
+                    id_number TEXT,
+                    -- Finansal
+                    credit_limit REAL DEFAULT 0,
+                    balance REAL DEFAULT 0.0,
+                    currency TEXT DEFAULT 'TL',
+                    payment_term INTEGER DEFAULT 0,
+                    -- Diğer
+                    notes TEXT,
+                    tags TEXT,
+                    whatsapp_enabled INTEGER DEFAULT 1,
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    is_active INTEGER DEFAULT 1,
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 3. CARİ HESAP HAREKETLERİ
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS account_transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_id INTEGER NOT NULL,
+                    transaction_type TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    balance_after REAL,
+                    description TEXT,
+                    reference_type TEXT,
+                    reference_id INTEGER,
+                    transaction_date DATE DEFAULT CURRENT_DATE,
+                    due_date DATE,
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (customer_id) REFERENCES customers (id) ON DELETE CASCADE,
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 4. ÇEK/SENET TABLOSU
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS checks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    -- Temel Bilgiler
+                    check_type TEXT NOT NULL,
+                    payment_type TEXT NOT NULL,
+                    customer_id INTEGER,
+                    check_number TEXT NOT NULL,
+                    -- Banka Bilgileri
+                    bank_name TEXT,
+                    bank_branch TEXT,
+                    bank_code TEXT,
+                    account_number TEXT,
+                    iban TEXT,
+                    -- Tutar Bilgileri
+                    amount REAL NOT NULL,
+                    paid_amount REAL DEFAULT 0,
+                    currency TEXT DEFAULT 'TL',
+                    -- Tarihler
+                    issue_date DATE,
+                    due_date DATE NOT NULL,
+                    -- Durum
+                    status TEXT DEFAULT 'pending',
+                    -- Ciro Bilgileri
+                    is_endorsed INTEGER DEFAULT 0,
+                    endorser_name TEXT,
+                    endorser_tax_no TEXT,
+                    endorser_phone TEXT,
+                    endorsement_date DATE,
+                    endorsed_to TEXT,
+                    -- Ek Bilgiler
+                    drawer_name TEXT,
+                    drawer_tax_no TEXT,
+                    notes TEXT,
+                    -- Sistem
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    FOREIGN KEY (customer_id) REFERENCES customers (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 5. ÇEK/SENET HAREKETLERİ
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS check_transactions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    check_id INTEGER NOT NULL,
+                    transaction_type TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    description TEXT,
+                    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    created_by INTEGER,
+                    FOREIGN KEY (check_id) REFERENCES checks (id) ON DELETE CASCADE,
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 6. KASA HAREKETLERİ
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cash_flow (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    transaction_type TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    subcategory TEXT,
+                    amount REAL NOT NULL,
+                    currency TEXT DEFAULT 'TL',
+                    exchange_rate REAL DEFAULT 1,
+                    description TEXT,
+                    customer_id INTEGER,
+                    check_id INTEGER,
+                    payment_method TEXT DEFAULT 'cash',
+                    reference_no TEXT,
+                    receipt_no TEXT,
+                    transaction_date DATE DEFAULT CURRENT_DATE,
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (customer_id) REFERENCES customers (id),
+                    FOREIGN KEY (check_id) REFERENCES checks (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 7. GELİR/GİDER KATEGORİLERİ
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS categories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    parent_id INTEGER,
+                    icon TEXT,
+                    color TEXT,
+                    is_default INTEGER DEFAULT 0,
+                    sort_order INTEGER DEFAULT 0,
+                    is_active INTEGER DEFAULT 1,
+                    FOREIGN KEY (parent_id) REFERENCES categories (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 8. HATIRLATICILAR / AJANDA
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS reminders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    reminder_type TEXT DEFAULT 'general',
+                    priority TEXT DEFAULT 'normal',
+                    due_date DATE NOT NULL,
+                    due_time TIME,
+                    -- Tekrarlama
+                    is_recurring INTEGER DEFAULT 0,
+                    recurrence_type TEXT,
+                    recurrence_interval INTEGER DEFAULT 1,
+                    recurrence_end_date DATE,
+                    -- İlişkiler
+                    related_customer_id INTEGER,
+                    related_check_id INTEGER,
+                    -- Bildirim
+                    notify_before_days INTEGER DEFAULT 1,
+                    notify_via_whatsapp INTEGER DEFAULT 0,
+                    -- Durum
+                    status TEXT DEFAULT 'pending',
+                    snoozed_until TIMESTAMP,
+                    completed_at TIMESTAMP,
+                    -- Sistem
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    FOREIGN KEY (related_customer_id) REFERENCES customers (id),
+                    FOREIGN KEY (related_check_id) REFERENCES checks (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 9. NOT DEFTERİ / GÖREVLER
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS notes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    content TEXT,
+                    note_type TEXT DEFAULT 'note',
+                    category TEXT,
+                    color TEXT DEFAULT '#ffffff',
+                    is_pinned INTEGER DEFAULT 0,
+                    is_archived INTEGER DEFAULT 0,
+                    -- Görev özellikleri
+                    is_task INTEGER DEFAULT 0,
+                    task_status TEXT DEFAULT 'pending',
+                    task_priority TEXT DEFAULT 'normal',
+                    task_due_date DATE,
+                    task_completed_at TIMESTAMP,
+                    -- İlişkiler
+                    related_customer_id INTEGER,
+                    -- Etiketler (JSON array)
+                    tags TEXT,
+                    -- Sistem
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    FOREIGN KEY (related_customer_id) REFERENCES customers (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 10. WHATSAPP MESAJ GEÇMİŞİ
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS whatsapp_messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_id INTEGER,
+                    phone_number TEXT NOT NULL,
+                    message_type TEXT DEFAULT 'manual',
+                    message_template TEXT,
+                    message_content TEXT NOT NULL,
+                    related_type TEXT,
+                    related_id INTEGER,
+                    status TEXT DEFAULT 'pending',
+                    sent_at TIMESTAMP,
+                    error_message TEXT,
+                    created_by INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (customer_id) REFERENCES customers (id),
+                    FOREIGN KEY (created_by) REFERENCES users (id)
+                )
+            ''')
+            
+            # ================================================================
+            # 11. WHATSAPP ŞABLONLARI
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS whatsapp_templates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    template_type TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    variables TEXT,
+                    is_active INTEGER DEFAULT 1,
+                    usage_count INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # ================================================================
+            # 12. AYARLAR TABLOSU
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT NOT NULL,
+                    setting_key TEXT NOT NULL,
+                    setting_value TEXT,
+                    setting_type TEXT DEFAULT 'string',
+                    display_name TEXT,
+                    description TEXT,
+                    options TEXT,
+                    is_system INTEGER DEFAULT 0,
+                    sort_order INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP,
+                    UNIQUE(category, setting_key)
+                )
+            ''')
+            
+            # ================================================================
+            # 13. AKTİVİTE LOGLARI
+            # ================================================================
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS activity_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    action TEXT NOT NULL,
+                    entity_type TEXT,
+                    entity_id INTEGER,
+                    old_values TEXT,
+                    new_values TEXT,
+                    ip_address TEXT,
+                    user_agent TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                )
+            ''')
+            
+            conn.commit()
+            
+            # ================================================================
+            # VARSAYILAN VERİLERİ EKLE
+            # ================================================================
+            _insert_default_data(cursor, conn)
+            
+            # ================================================================
+            # ŞEMA GEÇİŞLERİ (PRAGMA user_version)
+            # ================================================================
+            run_migrations()
+            
+        _invalidate(*CACHE_DOMAINS)
         print("✅ Veritabanı başarıyla başlatıldı!")
         return True
         
@@ -427,6 +815,568 @@ def init_db():
         print(f"❌ Veritabanı başlatma hatası: {e}")
         return False
 
+# ============================================================================
+# ŞEMA GEÇİŞLERİ (MIGRATION)
+# ============================================================================
+# init_db() içindeki CREATE TABLE IF NOT EXISTS blokları sürüm 0 (temel şema)
+# kabul edilir. Sonraki her şema değişikliği MIGRATIONS listesine yeni bir
+# adım olarak eklenir ve PRAGMA user_version ile takip edilir.
+#
+# Adım alanları:
+#   version      : Artan tam sayı (user_version bu değere yükseltilir)
+#   description  : Açıklama
+#   statements   : Tek transaction'da çalışan DDL listesi (tekrar çalıştırılabilir
+#                  olmalı: IF NOT EXISTS, DELETE + yeniden doldurma vb.)
+#   backfill     : (Opsiyonel) Büyük tabloları rowid aralıklarıyla dolduran
+#                  işler: {'table': ..., 'sql': ... WHERE id BETWEEN ? AND ?}
+#                  Her parti ayrı commit edilir; yazıcı kilidi partiler arasında
+#                  serbest kalır. Üst sınır adım başında sabitlenir, sonradan
+#                  eklenen satırlar uygulamanın yazma yolları tarafından işlenir.
+# ============================================================================
+
+# Sık filtrelenen kolonlar için ikincil indeksler (sürüm 1)
+DB_INDEXES = [
+    # Çekler: durum/vade filtreleri, cari bazlı listeler
+    ('idx_checks_status_due',
+     "CREATE INDEX IF NOT EXISTS idx_checks_status_due ON checks (status, due_date)"),
+    ('idx_checks_pending_due',
+     "CREATE INDEX IF NOT EXISTS idx_checks_pending_due ON checks (check_type, due_date) "
+     "WHERE status = 'pending'"),
+    ('idx_checks_customer',
+     "CREATE INDEX IF NOT EXISTS idx_checks_customer ON checks (customer_id, status)"),
+    ('idx_check_transactions_check',
+     "CREATE INDEX IF NOT EXISTS idx_check_transactions_check ON check_transactions (check_id)"),
+    # Kasa: tarih aralığı, kategori, tür ve cari filtreleri
+    ('idx_cash_flow_date',
+     "CREATE INDEX IF NOT EXISTS idx_cash_flow_date ON cash_flow (transaction_date, transaction_type)"),
+    ('idx_cash_flow_category',
+     "CREATE INDEX IF NOT EXISTS idx_cash_flow_category ON cash_flow (category, transaction_date)"),
+    ('idx_cash_flow_type_date',
+     "CREATE INDEX IF NOT EXISTS idx_cash_flow_type_date ON cash_flow (transaction_type, transaction_date)"),
+    ('idx_cash_flow_customer',
+     "CREATE INDEX IF NOT EXISTS idx_cash_flow_customer ON cash_flow (customer_id)"),
+    # Cari hareketler: müşteri ekstresi
+    ('idx_account_tx_customer',
+     "CREATE INDEX IF NOT EXISTS idx_account_tx_customer ON account_transactions (customer_id, created_at)"),
+    # Hatırlatıcılar: durum/vade, çeke bağlı bekleyenler
+    ('idx_reminders_status_due',
+     "CREATE INDEX IF NOT EXISTS idx_reminders_status_due ON reminders (status, due_date)"),
+    ('idx_reminders_pending_check',
+     "CREATE INDEX IF NOT EXISTS idx_reminders_pending_check ON reminders (related_check_id) "
+     "WHERE status = 'pending'"),
+    # Görevler
+    ('idx_notes_task_due',
+     "CREATE INDEX IF NOT EXISTS idx_notes_task_due ON notes (task_status, task_due_date) "
+     "WHERE is_task = 1"),
+]
+
+# Tam metin arama (FTS5) gölge tabloları: (fts tablosu, kaynak tablo, kolonlar)
+# Metin Türkçe'ye duyarlı katlanarak saklanır: ı/İ -> i, geri kalanı (I -> i,
+# Ş -> s, ğ -> g, ü -> u ...) unicode61 tokenizer'ının büyük/küçük harf ve
+# aksan katlaması yapar. Aynı katlama arama metnine de uygulanır (fts_query).
+FTS_TABLES = [
+    ('customers_fts', 'customers', ['name', 'short_name', 'phone', 'email', 'tax_number']),
+    ('checks_fts', 'checks', ['check_number', 'bank_name']),
+    ('cash_flow_fts', 'cash_flow', ['description', 'reference_no']),
+    ('notes_fts', 'notes', ['title', 'content', 'tags']),
+]
+
+def _fts_fold_sql(expr: str) -> str:
+    """SQL tarafında ı/İ katlaması (tetikleyiciler ve backfill için)."""
+    return f"replace(replace(COALESCE({expr}, ''), 'ı', 'i'), 'İ', 'i')"
+
+def _fts_migration(fts: str, table: str, columns: List[str]) -> Tuple[List[str], Dict]:
+    """FTS tablosu, senkron tetikleyicileri ve backfill işini üretir."""
+    cols = ', '.join(columns)
+    new_values = ', '.join(_fts_fold_sql(f"new.{c}") for c in columns)
+    insert_new = f"INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_values});"
+    delete_old = f"DELETE FROM {fts} WHERE rowid = old.id;"
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, tokenize = 'unicode61 remove_diacritics 2')",
+        f"DELETE FROM {fts}",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+    backfill = {
+        'table': table,
+        # Adım sırasında tetikleyicinin eklediği satırlar üzerine yazılır
+        'sql': f"INSERT OR REPLACE INTO {fts} (rowid, {cols}) "
+               f"SELECT id, {', '.join(_fts_fold_sql(c) for c in columns)} "
+               f"FROM {table} WHERE id BETWEEN ? AND ?",
+    }
+    return statements, backfill
+
+_FTS_STEPS = [_fts_migration(*spec) for spec in FTS_TABLES]
+
+def fold_search_text(text: str) -> str:
+    """Arama metnine FTS tablolarındaki ı/İ katlamasını uygular."""
+    return text.replace('İ', 'i').replace('ı', 'i')
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Kullanıcı aramasını FTS5 önek sorgusuna çevirir: 'Ahmet Yıl' -> '"Ahmet"* "Yil"*'
+    (tüm kelimeler, herhangi bir kolonda kelime başıyla eşleşmeli).
+    Aranabilir kelime yoksa None döner.
+    """
+    tokens = re.findall(r'\w+', fold_search_text(text or ''))
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def _fts_filter(fts: str, id_expr: str) -> str:
+    """id_expr'i FTS eşleşmeleriyle sınırlayan koşul (parametre: fts_query sonucu)."""
+    return f"{id_expr} IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)"
+
+# ----------------------------------------------------------------------------
+# CARİ BAKİYE KONTROL NOKTALARI (AYLIK)
+# Her (cari, ay) için borç/alacak toplamı, hareket sayısı ve ayın son
+# hareketinin (created_at, id sırasıyla) bakiyesi tutulur. Ekstre, tam aylar
+# için bu tablodan, baştaki ve sondaki kısmi aylar için ham hareketlerden
+# okur; müşterinin toplam hareket sayısından bağımsız, sınırlı bir aralıktır.
+# Tetikleyicilerle güncel tutulur (hareket ekleyen her yol otomatik kapsanır).
+# ----------------------------------------------------------------------------
+
+def _checkpoint_period_sql(row: str) -> str:
+    """Hareketin ait olduğu ay ('YYYY-MM'); tarihsiz hareketler '' dönemine düşer."""
+    return f"COALESCE(substr({row}.transaction_date, 1, 7), '')"
+
+# Yeni satırı toplamlara ekler; ayın son hareketi (created_at, id) ile seçilir
+_CHECKPOINT_MERGE_SQL = '''
+    ON CONFLICT (customer_id, period) DO UPDATE SET
+        debit_total = debit_total + excluded.debit_total,
+        credit_total = credit_total + excluded.credit_total,
+        tx_count = tx_count + excluded.tx_count,
+        last_created_at = CASE WHEN (excluded.last_created_at, excluded.last_id) > (last_created_at, last_id)
+                               THEN excluded.last_created_at ELSE last_created_at END,
+        last_id = CASE WHEN (excluded.last_created_at, excluded.last_id) > (last_created_at, last_id)
+                       THEN excluded.last_id ELSE last_id END,
+        last_balance = CASE WHEN (excluded.last_created_at, excluded.last_id) > (last_created_at, last_id)
+                            THEN excluded.last_balance ELSE last_balance END
+'''
+
+_CHECKPOINT_ADD_NEW = f'''
+    INSERT INTO account_balance_checkpoints
+        (customer_id, period, debit_total, credit_total, tx_count, last_created_at, last_id, last_balance)
+    VALUES (new.customer_id, {_checkpoint_period_sql('new')},
+            CASE WHEN new.transaction_type = 'debit' THEN new.amount ELSE 0 END,
+            CASE WHEN new.transaction_type = 'credit' THEN new.amount ELSE 0 END,
+            1, new.created_at, new.id, new.balance_after)
+    {_CHECKPOINT_MERGE_SQL};
+'''
+
+# Silinen satırı toplamlardan düşer; ayın son hareketi silindiyse sıradakini bulur
+_CHECKPOINT_REMOVE_OLD = f'''
+    UPDATE account_balance_checkpoints SET
+        debit_total = debit_total - CASE WHEN old.transaction_type = 'debit' THEN old.amount ELSE 0 END,
+        credit_total = credit_total - CASE WHEN old.transaction_type = 'credit' THEN old.amount ELSE 0 END,
+        tx_count = tx_count - 1
+    WHERE customer_id = old.customer_id AND period = {_checkpoint_period_sql('old')};
+    DELETE FROM account_balance_checkpoints
+    WHERE customer_id = old.customer_id AND period = {_checkpoint_period_sql('old')} AND tx_count <= 0;
+    UPDATE account_balance_checkpoints SET (last_created_at, last_id, last_balance) = (
+        SELECT created_at, id, balance_after FROM account_transactions
+        WHERE customer_id = old.customer_id
+          AND {_checkpoint_period_sql('account_transactions')} = {_checkpoint_period_sql('old')}
+          AND transaction_date >= substr(old.transaction_date, 1, 7) || '-01'
+          AND transaction_date < date(substr(old.transaction_date, 1, 7) || '-01', '+1 month')
+        ORDER BY created_at DESC, id DESC LIMIT 1)
+    WHERE customer_id = old.customer_id AND period = {_checkpoint_period_sql('old')} AND last_id = old.id;
+'''
+
+_CHECKPOINT_STEPS = [
+    '''CREATE TABLE IF NOT EXISTS account_balance_checkpoints (
+        customer_id INTEGER NOT NULL,
+        period TEXT NOT NULL,
+        debit_total REAL NOT NULL DEFAULT 0,
+        credit_total REAL NOT NULL DEFAULT 0,
+        tx_count INTEGER NOT NULL DEFAULT 0,
+        last_created_at TIMESTAMP,
+        last_id INTEGER,
+        last_balance REAL,
+        PRIMARY KEY (customer_id, period)
+    ) WITHOUT ROWID''',
+    "DELETE FROM account_balance_checkpoints",
+    # Kısmi ay taramaları ve tarih filtreli ekstre listesi için
+    "CREATE INDEX IF NOT EXISTS idx_account_tx_customer_date ON account_transactions (customer_id, transaction_date)",
+    f"CREATE TRIGGER IF NOT EXISTS account_checkpoints_ai AFTER INSERT ON account_transactions "
+    f"BEGIN {_CHECKPOINT_ADD_NEW} END",
+    f"CREATE TRIGGER IF NOT EXISTS account_checkpoints_ad AFTER DELETE ON account_transactions "
+    f"BEGIN {_CHECKPOINT_REMOVE_OLD} END",
+    f"CREATE TRIGGER IF NOT EXISTS account_checkpoints_au AFTER UPDATE OF customer_id, transaction_type, "
+    f"amount, balance_after, transaction_date, created_at ON account_transactions "
+    f"BEGIN {_CHECKPOINT_REMOVE_OLD} {_CHECKPOINT_ADD_NEW} END",
+]
+
+_CHECKPOINT_BACKFILL = {
+    'table': 'account_transactions',
+    # Tetikleyiciler kurulduktan sonra commit edilen partiler arasında yazılan
+    # bir UPDATE/DELETE, henüz taranmamış satırı iki kez sayardı; bu yüzden
+    # partiler DDL ile aynı yazma transaction'ında çalışır
+    'atomic': True,
+    # Partiler aynı (cari, ay) anahtarına düşebildiği için toplamlar birleştirilir
+    'sql': f'''
+        INSERT INTO account_balance_checkpoints
+            (customer_id, period, debit_total, credit_total, tx_count, last_created_at, last_id, last_balance)
+        SELECT customer_id, period, SUM(debit), SUM(credit), COUNT(*),
+               MAX(CASE WHEN rn = 1 THEN created_at END), MAX(CASE WHEN rn = 1 THEN id END),
+               MAX(CASE WHEN rn = 1 THEN balance_after END)
+        FROM (
+            SELECT customer_id, {_checkpoint_period_sql('t')} AS period, created_at, id, balance_after,
+                   CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END AS debit,
+                   CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END AS credit,
+                   ROW_NUMBER() OVER (PARTITION BY customer_id, {_checkpoint_period_sql('t')}
+                                      ORDER BY created_at DESC, id DESC) AS rn
+            FROM account_transactions t WHERE id BETWEEN ? AND ?
+        )
+        WHERE true
+        GROUP BY customer_id, period
+        {_CHECKPOINT_MERGE_SQL}
+    ''',
+}
+
+# Aktivite logu bölümleri (sürüm 9): sıcak tablonun tarih indeksi ve ay
+# bölümlerinin kaydı (bkz. AKTİVİTE LOG BÖLÜMLERİ)
+_ACTIVITY_PARTITION_STEPS = [
+    "CREATE INDEX IF NOT EXISTS idx_activity_logs_created ON activity_logs (created_at)",
+    '''CREATE TABLE IF NOT EXISTS activity_log_partitions (
+        period TEXT PRIMARY KEY,
+        table_name TEXT,
+        archive_file TEXT,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        first_at TEXT,
+        last_at TEXT,
+        archived_at TEXT
+    )''',
+]
+
+# ----------------------------------------------------------------------------
+# VADE TAKVİMİ (GÜNLÜK)
+# Bekleyen çekler (tür bazında), hatırlatıcılar ve görevler için gün başına
+# adet ve kalan tutar tutulur: due_calendar (kind, day). Gün, vade değerinin
+# ilk on karakteridir (saatli değerler aynı güne düşer; vadesiz görevler ''
+# gününde durur). Tetikleyicilerle güncel tutulur: kaydı ekleyen, durumunu
+# ya da vadesini değiştiren her yol otomatik kapsanır.
+# ----------------------------------------------------------------------------
+
+# Kaynak tablo -> (tür, gün, tutar, bekleyen koşulu, izlenen kolonlar); {row}: new/old/t
+_DUE_CALENDAR_SOURCES = {
+    'checks': ("'check_' || {row}.check_type", "COALESCE(substr({row}.due_date, 1, 10), '')",
+               "COALESCE({row}.amount - {row}.paid_amount, 0)", "{row}.status = 'pending'",
+               'status, check_type, due_date, amount, paid_amount'),
+    'reminders': ("'reminder'", "COALESCE(substr({row}.due_date, 1, 10), '')", "0",
+                  "{row}.status = 'pending'", 'status, due_date'),
+    'notes': ("'task'", "COALESCE(substr({row}.task_due_date, 1, 10), '')", "0",
+              "{row}.is_task = 1 AND {row}.task_status = 'pending'", 'is_task, task_status, task_due_date'),
+}
+
+def _due_calendar_sql(table: str, row: str) -> Tuple[str, str, str, str]:
+    kind, day, amount, pending, _ = _DUE_CALENDAR_SOURCES[table]
+    return tuple(part.format(row=row) for part in (kind, day, amount, pending))
+
+def _due_calendar_add(table: str) -> str:
+    kind, day, amount, pending = _due_calendar_sql(table, 'new')
+    return f'''
+        INSERT INTO due_calendar (kind, day, item_count, amount)
+        SELECT {kind}, {day}, 1, {amount} WHERE {pending}
+        ON CONFLICT (kind, day) DO UPDATE SET
+            item_count = item_count + 1, amount = amount + excluded.amount;
+    '''
+
+def _due_calendar_remove(table: str) -> str:
+    kind, day, amount, pending = _due_calendar_sql(table, 'old')
+    return f'''
+        UPDATE due_calendar SET item_count = item_count - 1, amount = amount - {amount}
+        WHERE kind = {kind} AND day = {day} AND {pending};
+        DELETE FROM due_calendar WHERE kind = {kind} AND day = {day} AND item_count <= 0;
+    '''
+
+def _due_calendar_backfill(table: str) -> Dict:
+    kind, day, amount, pending = _due_calendar_sql(table, 't')
+    return {
+        'table': table,
+        # Toplamlar tetikleyicilerle aynı transaction'da kurulur (bkz. _CHECKPOINT_BACKFILL)
+        'atomic': True,
+        'sql': f'''
+            INSERT INTO due_calendar (kind, day, item_count, amount)
+            SELECT {kind}, {day}, COUNT(*), SUM({amount})
+            FROM {table} t WHERE t.id BETWEEN ? AND ? AND {pending}
+            GROUP BY 1, 2
+            ON CONFLICT (kind, day) DO UPDATE SET
+                item_count = item_count + excluded.item_count,
+                amount = amount + excluded.amount
+        ''',
+    }
+
+def _due_calendar_triggers(table: str) -> List[str]:
+    columns = _DUE_CALENDAR_SOURCES[table][4]
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_due_calendar_ai AFTER INSERT ON {table} "
+        f"BEGIN {_due_calendar_add(table)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_due_calendar_ad AFTER DELETE ON {table} "
+        f"BEGIN {_due_calendar_remove(table)} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_due_calendar_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {_due_calendar_remove(table)} {_due_calendar_add(table)} END",
+    ]
+
+_DUE_CALENDAR_STEPS = [
+    '''CREATE TABLE IF NOT EXISTS due_calendar (
+        kind TEXT NOT NULL,
+        day TEXT NOT NULL,
+        item_count INTEGER NOT NULL DEFAULT 0,
+        amount REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (kind, day)
+    ) WITHOUT ROWID''',
+    "DELETE FROM due_calendar",
+] + [ddl for table in _DUE_CALENDAR_SOURCES for ddl in _due_calendar_triggers(table)]
+
+MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'Sıcak filtre kolonları için indeks seti',
+        'statements': [ddl for _, ddl in DB_INDEXES],
+    },
+    {
+        'version': 2,
+        'description': 'Çek özeti için kapsayan indeks',
+        'statements': [
+            "CREATE INDEX IF NOT EXISTS idx_checks_summary ON checks "
+            "(status, check_type, due_date, amount, paid_amount)",
+        ],
+    },
+    {
+        'version': 3,
+        'description': 'Kasa için günlük toplam (rollup) tablosu',
+        'statements': [
+            '''CREATE TABLE IF NOT EXISTS cash_flow_daily (
+                transaction_date DATE NOT NULL,
+                transaction_type TEXT NOT NULL,
+                category TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                tx_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (transaction_date, transaction_type, category)
+            ) WITHOUT ROWID''',
+            "DELETE FROM cash_flow_daily",
+        ],
+        'backfill': [
+            {
+                'table': 'cash_flow',
+                'sql': '''
+                    INSERT INTO cash_flow_daily (transaction_date, transaction_type, category, total, tx_count)
+                    SELECT transaction_date, transaction_type, category, SUM(amount), COUNT(*)
+                    FROM cash_flow WHERE id BETWEEN ? AND ?
+                    GROUP BY transaction_date, transaction_type, category
+                    ON CONFLICT (transaction_date, transaction_type, category) DO UPDATE SET
+                        total = total + excluded.total,
+                        tx_count = tx_count + excluded.tx_count
+                ''',
+            },
+        ],
+    },
+    {
+        'version': 4,
+        'description': 'Süreçler arası önbellek sürüm tablosu',
+        'statements': [
+            '''CREATE TABLE IF NOT EXISTS cache_versions (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )''',
+            "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('settings', 0)",
+        ],
+    },
+    {
+        'version': 5,
+        'description': 'Keyset sayfalama için sıralama indeksleri',
+        'statements': [
+            # (anahtar, id) sırasını veren indeksler; id, rowid olarak indekste saklıdır
+            "CREATE INDEX IF NOT EXISTS idx_customers_active_name ON customers (is_active, name)",
+            "CREATE INDEX IF NOT EXISTS idx_checks_due ON checks (due_date)",
+            "CREATE INDEX IF NOT EXISTS idx_cash_flow_tx_date ON cash_flow (transaction_date)",
+            "CREATE INDEX IF NOT EXISTS idx_notes_archived_pinned ON notes (is_archived, is_pinned)",
+            "CREATE INDEX IF NOT EXISTS idx_reminders_due ON reminders (due_date)",
+        ],
+    },
+    {
+        'version': 6,
+        'description': 'Tam metin arama (FTS5) tabloları ve tetikleyicileri',
+        'statements': [ddl for statements, _ in _FTS_STEPS for ddl in statements],
+        'backfill': [job for _, job in _FTS_STEPS],
+    },
+    {
+        'version': 7,
+        'description': 'Müşteri otomatik tamamlama indeksi için önbellek sürümü',
+        'statements': [
+            "INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('customers', 0)",
+        ],
+    },
+    {
+        'version': 8,
+        'description': 'Cari ekstre için aylık bakiye kontrol noktaları',
+        'statements': _CHECKPOINT_STEPS,
+        'backfill': [_CHECKPOINT_BACKFILL],
+    },
+    {
+        'version': 9,
+        'description': 'Aktivite logu için tarih indeksi ve aylık bölüm kaydı',
+        'statements': _ACTIVITY_PARTITION_STEPS,
+    },
+    {
+        'version': 10,
+        'description': 'Yaşlandırma için vadeli cari hareket indeksi',
+        'statements': [
+            "CREATE INDEX IF NOT EXISTS idx_account_tx_due ON account_transactions "
+            "(customer_id, due_date, transaction_date, transaction_type, reference_type, amount) "
+            "WHERE due_date IS NOT NULL",
+        ],
+    },
+    {
+        'version': 11,
+        'description': 'Bekleyen çek, hatırlatıcı ve görevler için günlük vade takvimi',
+        'statements': _DUE_CALENDAR_STEPS,
+        'backfill': [_due_calendar_backfill(table) for table in _DUE_CALENDAR_SOURCES],
+    },
+    {
+        'version': 12,
+        'description': 'NULL olabilen sayfalama anahtarları için ifade indeksleri',
+        'statements': [
+            # CASH_FLOW_PAGE_KEYS / NOTE_PAGE_KEYS'teki COALESCE ifadeleriyle birebir aynı
+            "CREATE INDEX IF NOT EXISTS idx_cash_flow_tx_date_key ON cash_flow "
+            "(COALESCE(transaction_date, ''))",
+            "CREATE INDEX IF NOT EXISTS idx_notes_archived_pinned_key ON notes "
+            "(is_archived, COALESCE(is_pinned, 0))",
+        ],
+    },
+]
+
+# Dry-run süre tahmini için kaba hızlar (satır/sn)
+MIGRATION_INDEX_ROWS_PER_SEC = 500_000
+MIGRATION_BACKFILL_ROWS_PER_SEC = 100_000
+MIGRATION_BATCH_SIZE = 10_000
+
+def get_schema_version() -> int:
+    """Veritabanının şema sürümünü (PRAGMA user_version) döndürür."""
+    with db_connection(readonly=True) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def _table_row_count(conn: sqlite3.Connection, table: str) -> int:
+    """Tablodaki yaklaşık satır sayısı (MAX(rowid), tam sayımdan çok daha hızlı)."""
+    return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+
+def _estimate_migration(conn: sqlite3.Connection, step: Dict) -> Tuple[int, float]:
+    """Adımın etkileyeceği satır sayısını ve tahmini süresini hesaplar."""
+    rows = 0
+    seconds = 0.0
+    for ddl in step.get('statements', []):
+        words = ddl.split()
+        upper = [w.upper() for w in words]
+        if 'INDEX' in upper and 'ON' in upper:
+            table = words[upper.index('ON') + 1].strip('(')
+            count = _table_row_count(conn, table)
+            rows += count
+            seconds += count / MIGRATION_INDEX_ROWS_PER_SEC
+    for job in step.get('backfill', []):
+        count = _table_row_count(conn, job['table'])
+        rows += count
+        seconds += count / MIGRATION_BACKFILL_ROWS_PER_SEC
+    return rows, seconds
+
+def _run_backfill(job: Dict, upper: int, batch_size: int, conn: sqlite3.Connection = None) -> int:
+    """
+    Backfill işini 1..upper rowid aralığında, her parti ayrı commit ile çalıştırır.
+    conn verilirse partiler o bağlantının açık transaction'ında, commit'siz çalışır.
+    """
+    done = 0
+    start = 1
+    while start <= upper:
+        end = min(start + batch_size - 1, upper)
+        if conn is not None:
+            conn.execute(job['sql'], (start, end))
+        else:
+            with db_connection() as batch_conn:
+                batch_conn.execute(job['sql'], (start, end))
+                batch_conn.commit()
+        done += end - start + 1
+        start = end + 1
+    return done
+
+def run_migrations(dry_run: bool = False, target_version: int = None,
+                   batch_size: int = MIGRATION_BATCH_SIZE) -> Dict:
+    """
+    Bekleyen şema geçişlerini sırayla uygular.
+    dry_run=True ise hiçbir şey değiştirmez; adımları, etkilenecek satır
+    sayılarını ve tahmini süreyi raporlar.
+    """
+    if target_version is None:
+        target_version = MIGRATIONS[-1]['version'] if MIGRATIONS else 0
+    
+    with db_connection(readonly=dry_run) as conn:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    report = {
+        'current_version': current,
+        'target_version': target_version,
+        'dry_run': dry_run,
+        'steps': [],
+        'estimated_seconds': 0.0,
+    }
+    
+    pending = [m for m in MIGRATIONS if current < m['version'] <= target_version]
+    for step in pending:
+        with db_connection(readonly=dry_run) as conn:
+            rows, estimate = _estimate_migration(conn, step)
+        info = {
+            'version': step['version'],
+            'description': step['description'],
+            'rows': rows,
+            'estimated_seconds': round(estimate, 2),
+        }
+        report['estimated_seconds'] += estimate
+        
+        if dry_run:
+            print(f"🔎 [{step['version']}] {step['description']} - ~{rows:,} satır, ~{estimate:.1f} sn")
+            report['steps'].append(info)
+            continue
+        
+        started = datetime.now()
+        with db_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            for ddl in step.get('statements', []):
+                conn.execute(ddl)
+            # Backfill üst sınırları DDL ile aynı transaction'da sabitlenir
+            bounds = [_table_row_count(conn, job['table']) for job in step.get('backfill', [])]
+            # Tetikleyici bakımlı toplamlar ('atomic') tetikleyicilerle birlikte
+            # commit edilir; arada gelen yazma hem tetikleyiciden hem backfill'den sayılmaz
+            for job, upper in zip(step.get('backfill', []), bounds):
+                if job.get('atomic'):
+                    _run_backfill(job, upper, batch_size, conn)
+            conn.commit()
+        
+        for job, upper in zip(step.get('backfill', []), bounds):
+            if not job.get('atomic'):
+                _run_backfill(job, upper, batch_size)
+        
+        with db_connection() as conn:
+            conn.execute(f"PRAGMA user_version = {step['version']}")
+            conn.commit()
+        
+        info['duration_seconds'] = round((datetime.now() - started).total_seconds(), 2)
+        report['steps'].append(info)
+        print(f"✅ Şema geçişi [{step['version']}] uygulandı: {step['description']}")
+    
+    report['estimated_seconds'] = round(report['estimated_seconds'], 2)
+    
+    if pending and not dry_run:
+        # Sorgu planlayıcısı için istatistikleri güncelle (örneklemeli, büyük tablolarda hızlı)
+        with db_connection() as conn:
+            conn.execute("PRAGMA analysis_limit = 1000")
+            conn.execute("ANALYZE")
+            conn.commit()
+    
+    return report
+
 def _insert_default_data(cursor, conn):
     """Varsayılan verileri ekler."""
     
@@ -513,6 +1463,12 @@ def _insert_default_data(cursor, conn):
         ('backup', 'auto_backup', '1', 'boolean', 'Otomatik Yedekleme', None, None, 0, 1),
         ('backup', 'backup_interval', 'daily', 'select', 'Yedekleme Sıklığı', None, '["daily","weekly","monthly"]', 0, 2),
         ('backup', 'backup_retention_days', '30', 'integer', 'Yedek Saklama (Gün)', None, None, 0, 3),
+        
+        # Aktivite Logu Ayarları
+        ('activity_log', 'hot_months', '3', 'integer', 'Veritabanında Tutulan Ay',
+         'Daha eski aylar sıkıştırılmış arşiv dosyalarına taşınır', None, 0, 1),
+        ('activity_log', 'retention_months', '0', 'integer', 'Log Saklama (Ay)',
+         'Daha eski aktivite kayıtları silinir (0 = sınırsız)', None, 0, 2),
     ]
     
     for category, key, value, stype, display, desc, options, is_system, sort in default_settings:
@@ -567,27 +1523,24 @@ def verify_password(password: str, hashed: str) -> bool:
 def login_user(username: str, password: str) -> Optional[Dict]:
     """Kullanıcı girişi yapar."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        hashed = hash_password(password)
-        cursor.execute('''
-            SELECT id, username, full_name, role, email, phone, is_active
-            FROM users WHERE username = ? AND password = ? AND is_active = 1
-        ''', (username, hashed))
-        user = cursor.fetchone()
-        
-        if user:
-            # Login bilgilerini güncelle
-            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with transaction() as cursor:
+            hashed = hash_password(password)
             cursor.execute('''
-                UPDATE users SET last_login = ?, login_count = login_count + 1 WHERE id = ?
-            ''', (now, user['id']))
-            conn.commit()
+                SELECT id, username, full_name, role, email, phone, is_active
+                FROM users WHERE username = ? AND password = ? AND is_active = 1
+            ''', (username, hashed))
+            user = cursor.fetchone()
+            
+            if user:
+                # Login bilgilerini güncelle
+                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                cursor.execute('''
+                    UPDATE users SET last_login = ?, login_count = login_count + 1 WHERE id = ?
+                ''', (now, user['id']))
+                
+                # Log kaydet
+                log_activity(user['id'], 'login', 'user', user['id'])
             
-            # Log kaydet
-            log_activity(user['id'], 'login', 'user', user['id'])
-        
-        conn.close()
         return dict_from_row(user)
     except sqlite3.Error as e:
         print(f"❌ Login hatası: {e}")
@@ -596,11 +1549,10 @@ def login_user(username: str, password: str) -> Optional[Dict]:
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """ID ile kullanıcı getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+            user = cursor.fetchone()
         return dict_from_row(user)
     except sqlite3.Error:
         return None
@@ -608,15 +1560,14 @@ def get_user_by_id(user_id: int) -> Optional[Dict]:
 def get_all_users(active_only: bool = True) -> List[Dict]:
     """Tüm kullanıcıları listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = "SELECT id, username, full_name, role, email, phone, last_login, is_active, created_at FROM users"
-        if active_only:
-            query += " WHERE is_active = 1"
-        query += " ORDER BY full_name"
-        cursor.execute(query)
-        users = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            query = "SELECT id, username, full_name, role, email, phone, last_login, is_active, created_at FROM users"
+            if active_only:
+                query += " WHERE is_active = 1"
+            query += " ORDER BY full_name"
+            cursor.execute(query)
+            users = [dict(row) for row in cursor.fetchall()]
         return users
     except sqlite3.Error:
         return []
@@ -625,15 +1576,14 @@ def add_user(username: str, password: str, full_name: str, role: str = 'user',
              email: str = "", phone: str = "") -> Tuple[bool, str]:
     """Yeni kullanıcı ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        hashed = hash_password(password)
-        cursor.execute('''
-            INSERT INTO users (username, password, full_name, role, email, phone)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (username, hashed, full_name, role, email, phone))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            hashed = hash_password(password)
+            cursor.execute('''
+                INSERT INTO users (username, password, full_name, role, email, phone)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (username, hashed, full_name, role, email, phone))
+            conn.commit()
         return True, "Kullanıcı eklendi!"
     except sqlite3.IntegrityError:
         return False, "Bu kullanıcı adı zaten mevcut!"
@@ -643,24 +1593,23 @@ def add_user(username: str, password: str, full_name: str, role: str = 'user',
 def update_user(user_id: int, **kwargs) -> Tuple[bool, str]:
     """Kullanıcı günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if 'password' in kwargs and kwargs['password']:
-            kwargs['password'] = hash_password(kwargs['password'])
-        else:
-            kwargs.pop('password', None)
-        
-        if not kwargs:
-            return False, "Güncellenecek alan yok!"
-        
-        kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [user_id]
-        
-        cursor.execute(f"UPDATE users SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            if 'password' in kwargs and kwargs['password']:
+                kwargs['password'] = hash_password(kwargs['password'])
+            else:
+                kwargs.pop('password', None)
+            
+            if not kwargs:
+                return False, "Güncellenecek alan yok!"
+            
+            kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [user_id]
+            
+            cursor.execute(f"UPDATE users SET {fields} WHERE id = ?", values)
+            conn.commit()
         return True, "Kullanıcı güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -668,22 +1617,20 @@ def update_user(user_id: int, **kwargs) -> Tuple[bool, str]:
 def change_password(user_id: int, old_password: str, new_password: str) -> Tuple[bool, str]:
     """Şifre değiştirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Eski şifreyi kontrol et
-        cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
-        user = cursor.fetchone()
-        if not user or user['password'] != hash_password(old_password):
-            conn.close()
-            return False, "Mevcut şifre hatalı!"
-        
-        # Yeni şifreyi kaydet
-        new_hashed = hash_password(new_password)
-        cursor.execute("UPDATE users SET password = ?, updated_at = ? WHERE id = ?",
-                      (new_hashed, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), user_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Eski şifreyi kontrol et
+            cursor.execute("SELECT password FROM users WHERE id = ?", (user_id,))
+            user = cursor.fetchone()
+            if not user or user['password'] != hash_password(old_password):
+                return False, "Mevcut şifre hatalı!"
+            
+            # Yeni şifreyi kaydet
+            new_hashed = hash_password(new_password)
+            cursor.execute("UPDATE users SET password = ?, updated_at = ? WHERE id = ?",
+                          (new_hashed, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), user_id))
+            conn.commit()
         return True, "Şifre başarıyla değiştirildi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -695,32 +1642,31 @@ def change_password(user_id: int, old_password: str, new_password: str) -> Tuple
 def add_customer(name: str, customer_type: str = 'customer', **kwargs) -> Tuple[bool, str, int]:
     """Yeni müşteri/cari hesap ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Varsayılan değerler
-        kwargs['name'] = name
-        kwargs['customer_type'] = customer_type
-        
-        # WhatsApp numarasını otomatik ayarla
-        if not kwargs.get('whatsapp_phone') and kwargs.get('phone'):
-            kwargs['whatsapp_phone'] = kwargs['phone']
-        
-        columns = ', '.join(kwargs.keys())
-        placeholders = ', '.join(['?' for _ in kwargs])
-        values = list(kwargs.values())
-        
-        cursor.execute(f'''
-            INSERT INTO customers ({columns}) VALUES ({placeholders})
-        ''', values)
-        
-        customer_id = cursor.lastrowid
-        conn.commit()
-        
-        # Log
-        log_activity(kwargs.get('created_by', 1), 'create', 'customer', customer_id)
+        with transaction('customers') as cursor:
+            # Varsayılan değerler
+            kwargs['name'] = name
+            kwargs['customer_type'] = customer_type
+            
+            # WhatsApp numarasını otomatik ayarla
+            if not kwargs.get('whatsapp_phone') and kwargs.get('phone'):
+                kwargs['whatsapp_phone'] = kwargs['phone']
+            
+            columns = ', '.join(kwargs.keys())
+            placeholders = ', '.join(['?' for _ in kwargs])
+            values = list(kwargs.values())
+            
+            cursor.execute(f'''
+                INSERT INTO customers ({columns}) VALUES ({placeholders})
+            ''', values)
+            
+            customer_id = cursor.lastrowid
+            _bump_cache_version(cursor, 'customers')
+            version = _read_cache_version(cursor.connection, 'customers')
+            
+            # Log (sıkı denetim modunda aynı transaction'da)
+            log_activity(kwargs.get('created_by', 1), 'create', 'customer', customer_id)
         
-        conn.close()
+        customer_index.refresh(customer_id, version)
         return True, "Cari hesap başarıyla eklendi!", customer_id
     except sqlite3.Error as e:
         return False, f"Hata: {e}", 0
@@ -728,19 +1674,18 @@ def add_customer(name: str, customer_type: str = 'customer', **kwargs) -> Tuple[
 def update_customer(customer_id: int, **kwargs) -> Tuple[bool, str]:
     """Müşteri günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [customer_id]
-        
-        cursor.execute(f"UPDATE customers SET {fields} WHERE id = ?", values)
-        conn.commit()
-        
-        log_activity(kwargs.get('updated_by', 1), 'update', 'customer', customer_id)
+        with transaction('customers') as cursor:
+            kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [customer_id]
+            
+            cursor.execute(f"UPDATE customers SET {fields} WHERE id = ?", values)
+            _bump_cache_version(cursor, 'customers')
+            version = _read_cache_version(cursor.connection, 'customers')
+            
+            log_activity(kwargs.get('updated_by', 1), 'update', 'customer', customer_id)
         
-        conn.close()
+        customer_index.refresh(customer_id, version)
         return True, "Cari hesap güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -748,279 +1693,649 @@ def update_customer(customer_id: int, **kwargs) -> Tuple[bool, str]:
 def delete_customer(customer_id: int, soft_delete: bool = True) -> Tuple[bool, str]:
     """Müşteri siler (soft delete varsayılan)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if soft_delete:
-            cursor.execute("UPDATE customers SET is_active = 0, updated_at = ? WHERE id = ?",
-                          (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), customer_id))
-        else:
-            cursor.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
+        with transaction('customers') as cursor:
+            if soft_delete:
+                cursor.execute("UPDATE customers SET is_active = 0, updated_at = ? WHERE id = ?",
+                              (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), customer_id))
+            else:
+                cursor.execute("DELETE FROM customers WHERE id = ?", (customer_id,))
+            
+            _bump_cache_version(cursor, 'customers')
+            version = _read_cache_version(cursor.connection, 'customers')
         
-        conn.commit()
-        conn.close()
+        customer_index.refresh(customer_id, version)
         return True, "Cari hesap silindi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+# Müşteri sayfaları: ada göre, aynı adlarda id ile kararlı sıralama
+CUSTOMER_PAGE_KEYS = [('c.name', 'name', False, None), ('c.id', 'id', False, None)]
+
+CUSTOMER_CHECK_TOTALS_SQL = '''
+    SELECT customer_id,
+           COUNT(*) as pending_checks,
+           SUM(CASE WHEN check_type = 'incoming' THEN amount - paid_amount ELSE 0 END) as incoming_checks_total,
+           SUM(CASE WHEN check_type = 'outgoing' THEN amount - paid_amount ELSE 0 END) as outgoing_checks_total
+    FROM checks
+    WHERE status = 'pending' AND customer_id IS NOT NULL
+'''
+
+def _customer_list_query(customer_type: str = None, active_only: bool = True,
+                         search: str = None, balance_type: str = None,
+                         with_check_totals: bool = True) -> Tuple[str, List]:
+    """Müşteri listesi sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    if not with_check_totals:
+        query = "SELECT c.* FROM customers c WHERE 1=1"
+    else:
+        # Bekleyen çek toplamları müşteri başına alt sorgu yerine tek
+        # gruplanmış geçişte hesaplanıp birleştirilir
+        query = f'''
+            SELECT c.*,
+                   COALESCE(cs.pending_checks, 0) as pending_checks,
+                   COALESCE(cs.incoming_checks_total, 0) as incoming_checks_total,
+                   COALESCE(cs.outgoing_checks_total, 0) as outgoing_checks_total
+            FROM customers c
+            LEFT JOIN ({CUSTOMER_CHECK_TOTALS_SQL} GROUP BY customer_id) cs ON cs.customer_id = c.id
+            WHERE 1=1
+        '''
+    params = []
+    
+    if active_only:
+        query += " AND c.is_active = 1"
+    if customer_type:
+        query += " AND c.customer_type = ?"
+        params.append(customer_type)
+    if balance_type == 'receivable':
+        query += " AND c.balance > 0"
+    elif balance_type == 'payable':
+        query += " AND c.balance < 0"
+    match = fts_query(search)
+    if match:
+        query += " AND " + _fts_filter('customers_fts', 'c.id')
+        params.append(match)
+    
+    return query, params
+
 def get_all_customers(customer_type: str = None, active_only: bool = True,
-                      search: str = None, order_by: str = 'name') -> List[Dict]:
+                      search: str = None, order_by: str = 'name',
+                      balance_type: str = None) -> List[Dict]:
     """Müşterileri listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT c.*, 
-                   (SELECT COUNT(*) FROM checks WHERE customer_id = c.id AND status = 'pending') as pending_checks,
-                   (SELECT COALESCE(SUM(amount - paid_amount), 0) FROM checks 
-                    WHERE customer_id = c.id AND check_type = 'incoming' AND status = 'pending') as incoming_checks_total,
-                   (SELECT COALESCE(SUM(amount - paid_amount), 0) FROM checks 
-                    WHERE customer_id = c.id AND check_type = 'outgoing' AND status = 'pending') as outgoing_checks_total
-            FROM customers c WHERE 1=1
-        '''
-        params = []
-        
-        if active_only:
-            query += " AND c.is_active = 1"
-        if customer_type:
-            query += " AND c.customer_type = ?"
-            params.append(customer_type)
-        if search:
-            query += " AND (c.name LIKE ? OR c.phone LIKE ? OR c.email LIKE ? OR c.tax_number LIKE ?)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param, search_param])
-        
-        query += f" ORDER BY c.{order_by}"
-        
-        cursor.execute(query, params)
-        customers = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _customer_list_query(customer_type, active_only, search, balance_type)
+            query += f" ORDER BY c.{order_by}"
+            
+            cursor.execute(query, params)
+            customers = [dict(row) for row in cursor.fetchall()]
         return customers
     except sqlite3.Error as e:
         print(f"❌ Müşteri listeleme hatası: {e}")
         return []
 
-def get_customer_by_id(customer_id: int) -> Optional[Dict]:
-    """ID ile müşteri getirir."""
+def get_customers_page(customer_type: str = None, active_only: bool = True,
+                       search: str = None, balance_type: str = None,
+                       cursor: str = None, page_size: int = None) -> Dict:
+    """Müşterileri ada göre sayfa sayfa listeler (bkz. _fetch_page)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT c.*,
-                   (SELECT COUNT(*) FROM checks WHERE customer_id = c.id) as total_checks,
-                   (SELECT COUNT(*) FROM account_transactions WHERE customer_id = c.id) as total_transactions
-            FROM customers c WHERE c.id = ?
-        ''', (customer_id,))
-        customer = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            query, params = _customer_list_query(customer_type, active_only, search,
+                                                 balance_type, with_check_totals=False)
+            page = _fetch_page(conn, query, params, CUSTOMER_PAGE_KEYS, cursor, page_size)
+            
+            # Çek toplamları tüm tablo yerine sadece bu sayfadaki müşteriler için hesaplanır
+            totals = {}
+            ids = [c['id'] for c in page['items']]
+            if ids:
+                marks = ', '.join('?' for _ in ids)
+                totals = {row['customer_id']: dict(row) for row in conn.execute(
+                    f"{CUSTOMER_CHECK_TOTALS_SQL} AND customer_id IN ({marks}) GROUP BY customer_id", ids)}
+            for customer in page['items']:
+                row = totals.get(customer['id'], {})
+                customer['pending_checks'] = row.get('pending_checks', 0)
+                customer['incoming_checks_total'] = row.get('incoming_checks_total') or 0
+                customer['outgoing_checks_total'] = row.get('outgoing_checks_total') or 0
+        return page
+    except sqlite3.Error as e:
+        print(f"❌ Müşteri listeleme hatası: {e}")
+        return _empty_page(page_size)
+
+def get_customer_choices(customer_type: str = None, active_only: bool = True) -> List[Dict]:
+    """Açılır listeler için sadece id/ad döndürür (çek toplamları hesaplanmaz)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            query = "SELECT id, name FROM customers WHERE 1=1"
+            params = []
+            if active_only:
+                query += " AND is_active = 1"
+            if customer_type:
+                query += " AND customer_type = ?"
+                params.append(customer_type)
+            query += " ORDER BY name"
+            customers = [dict(row) for row in conn.execute(query, params).fetchall()]
+        return customers
+    except sqlite3.Error as e:
+        print(f"❌ Müşteri listeleme hatası: {e}")
+        return []
+
+def get_customer_by_id(customer_id: int) -> Optional[Dict]:
+    """ID ile müşteri getirir."""
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT c.*,
+                       (SELECT COUNT(*) FROM checks WHERE customer_id = c.id) as total_checks,
+                       (SELECT COALESCE(SUM(tx_count), 0) FROM account_balance_checkpoints
+                        WHERE customer_id = c.id) as total_transactions
+                FROM customers c WHERE c.id = ?
+            ''', (customer_id,))
+            customer = cursor.fetchone()
         return dict_from_row(customer)
     except sqlite3.Error:
         return None
 
 def search_customers(query: str, limit: int = 10) -> List[Dict]:
-    """Müşteri arar (autocomplete için)."""
+    """Müşteri arar (autocomplete için), en iyi eşleşenler önce."""
+    match = fts_query(query)
+    if not match:
+        return []
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        search = f"%{query}%"
-        cursor.execute('''
-            SELECT id, name, phone, balance, customer_type
-            FROM customers 
-            WHERE is_active = 1 AND (name LIKE ? OR phone LIKE ? OR short_name LIKE ?)
-            ORDER BY name LIMIT ?
-        ''', (search, search, search, limit))
-        customers = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            # bm25 ağırlıkları: ad > kısa ad > telefon > e-posta/vergi no
+            cursor.execute('''
+                SELECT c.id, c.name, c.phone, c.balance, c.customer_type
+                FROM customers_fts f
+                JOIN customers c ON c.id = f.rowid
+                WHERE customers_fts MATCH ? AND c.is_active = 1
+                ORDER BY bm25(customers_fts, 10.0, 5.0, 2.0, 1.0, 1.0), c.name
+                LIMIT ?
+            ''', (match, limit))
+            customers = [dict(row) for row in cursor.fetchall()]
         return customers
     except sqlite3.Error:
         return []
 
+# ----------------------------------------------------------------------------
+# Otomatik tamamlama için bellek içi önek indeksi
+# ----------------------------------------------------------------------------
+# Aktif müşterilerin ad/kısa ad kelimeleri ve telefon rakamları sıralı bir
+# (anahtar, id) listesinde tutulur; arama bisect ile ilk eşleşmeye atlar ve
+# önek bitene kadar ilerler (veritabanına gidilmez). add/update/delete_customer
+# commit sonrası sadece ilgili müşteriyi yeniler. Başka süreçlerin yazmaları
+# cache_versions 'customers' sürümü ile en fazla
+# AUTOCOMPLETE_CHECK_INTERVAL saniyede bir kontrol edilir.
+# ----------------------------------------------------------------------------
+
+AUTOCOMPLETE_CHECK_INTERVAL = 2.0
+AUTOCOMPLETE_LIMIT_MAX = 50
+
+# Türkçe harfler doğrudan çevrilir; diğer aksanlı harfler için NFKD'ye düşülür
+_TURKISH_FOLD = str.maketrans('çğıöşüÇĞIİÖŞÜ', 'cgiosucgiiosu')
+_WORD_RE = re.compile(r'\w+')
+_LETTER_RE = re.compile(r'[^\W\d_]')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+def _normalize_prefix_text(text: str) -> str:
+    """Küçük harfe çevirir, ı/İ ve aksanları katlar: 'IŞIK' -> 'isik'."""
+    text = (text or '').translate(_TURKISH_FOLD).lower()
+    if text.isascii():
+        return text
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text)
+                   if not unicodedata.combining(ch))
+
+def _prefix_tokens(text: str) -> List[str]:
+    """Arama metnini önek anahtarlarına böler; harfsiz metin tek telefon anahtarıdır."""
+    text = _normalize_prefix_text(text)
+    if not _LETTER_RE.search(text):
+        digits = _NON_DIGIT_RE.sub('', text)
+        return [digits] if digits else []
+    return _WORD_RE.findall(text)
+
+class CustomerPrefixIndex:
+    """Aktif müşteriler için sıralı dizi tabanlı önek indeksi."""
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = []   # sıralı (anahtar, müşteri id)
+        self._records = {}   # id -> (kayıt, anahtarlar)
+        self._loaded = False
+        self._db_version = None
+        self._checked = 0.0
+    
+    @staticmethod
+    def _keys(record: Dict) -> set:
+        keys = set(_WORD_RE.findall(_normalize_prefix_text(record.get('name'))))
+        if record.get('short_name'):
+            keys.update(_WORD_RE.findall(_normalize_prefix_text(record['short_name'])))
+        phone = _NON_DIGIT_RE.sub('', record.get('phone') or '')
+        if phone:
+            # '0532...' ve '532...' yazımlarının ikisi de bulunsun
+            keys.update({phone, phone.lstrip('0')} - {''})
+        return keys
+    
+    def _add(self, record: Dict):
+        keys = self._keys(record)
+        for key in keys:
+            bisect.insort(self._entries, (key, record['id']))
+        self._records[record['id']] = (record, keys)
+    
+    def _remove(self, customer_id: int):
+        record = self._records.pop(customer_id, None)
+        if record is None:
+            return
+        for key in record[1]:
+            i = bisect.bisect_left(self._entries, (key, customer_id))
+            if i < len(self._entries) and self._entries[i] == (key, customer_id):
+                del self._entries[i]
+    
+    def load(self):
+        """İndeksi customers tablosundan baştan kurar."""
+        # Sürüm satırlardan önce okunur; arada yazma olursa sonraki kontrol yeniden yükler
+        with db_connection(readonly=True) as conn:
+            version = _read_cache_version(conn, 'customers')
+            rows = conn.execute(
+                "SELECT id, name, short_name, phone, customer_type FROM customers "
+                "WHERE is_active = 1").fetchall()
+        
+        entries = []
+        records = {}
+        for row in rows:
+            record = dict(row)
+            keys = self._keys(record)
+            entries.extend((key, record['id']) for key in keys)
+            records[record['id']] = (record, keys)
+        entries.sort()
+        
+        with self._lock:
+            self._entries = entries
+            self._records = records
+            self._loaded = True
+            self._db_version = version
+            self._checked = time.monotonic()
+    
+    def refresh(self, customer_id: int, db_version: int = None):
+        """
+        Tek müşteriyi yeniden okur (commit sonrası çağrılır). db_version,
+        yazmanın kendi transaction'ında okunan sürümdür; beklenenden büyükse
+        araya başka bir süreç yazmıştır ve indeks bir sonraki aramada yeniden kurulur.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+        
+        with db_connection(readonly=True) as conn:
+            row = conn.execute(
+                "SELECT id, name, short_name, phone, customer_type FROM customers "
+                "WHERE id = ? AND is_active = 1", (customer_id,)).fetchone()
+        
+        with self._lock:
+            self._remove(customer_id)
+            if row is not None:
+                self._add(dict(row))
+            if db_version is not None and self._db_version is not None:
+                if db_version == self._db_version + 1:
+                    self._db_version = db_version
+                else:
+                    self._loaded = False
+    
+    def _ensure_fresh(self):
+        with self._lock:
+            loaded, checked, known = self._loaded, self._checked, self._db_version
+        now = time.monotonic()
+        if loaded and now - checked < AUTOCOMPLETE_CHECK_INTERVAL:
+            return
+        if loaded:
+            with db_connection(readonly=True) as conn:
+                version = _read_cache_version(conn, 'customers')
+            if version == known:
+                with self._lock:
+                    self._checked = now
+                return
+        self.load()
+    
+    def lookup(self, query: str, limit: int = 10) -> List[Dict]:
+        """Tüm kelimeleri bir ad/kısa ad kelimesinin ya da telefonun başıyla eşleşen müşteriler."""
+        tokens = _prefix_tokens(query)
+        if not tokens:
+            return []
+        self._ensure_fresh()
+        
+        results = []
+        seen = set()
+        with self._lock:
+            # En az eşleşmesi olan (en seçici) kelimenin aralığı taranır,
+            # diğer kelimeler kaydın anahtarları üzerinde süzülür
+            ranges = sorted((bisect.bisect_left(self._entries, (t + '\uffff',))
+                             - bisect.bisect_left(self._entries, (t,)), t) for t in tokens)
+            head = ranges[0][1]
+            rest = [t for _, t in ranges[1:]]
+            
+            i = bisect.bisect_left(self._entries, (head,))
+            end = i + ranges[0][0]
+            while i < end and len(results) < limit:
+                key, customer_id = self._entries[i]
+                i += 1
+                if customer_id in seen:
+                    continue
+                seen.add(customer_id)
+                record, keys = self._records[customer_id]
+                if all(any(k.startswith(t) for k in keys) for t in rest):
+                    results.append(dict(record))
+        return results
+
+customer_index = CustomerPrefixIndex()
+
+def autocomplete_customers(query: str, limit: int = 10) -> List[Dict]:
+    """Müşteri otomatik tamamlama (bellek içi önek indeksinden)."""
+    limit = max(1, min(int(limit), AUTOCOMPLETE_LIMIT_MAX))
+    try:
+        return customer_index.lookup(query, limit)
+    except sqlite3.Error as e:
+        print(f"❌ Otomatik tamamlama hatası: {e}")
+        return []
+
+def _apply_customer_balance(cursor, customer_id: int, amount: float, description: str = "",
+                            ref_type: str = "", ref_id: int = None,
+                            transaction_date: str = None, due_date: str = None,
+                            created_by: int = 1) -> Optional[float]:
+    """Bakiyeyi değiştirir ve cari hareketi yazar (çağıranın transaction'ında, commit yok)."""
+    # Mevcut bakiyeyi al
+    cursor.execute("SELECT balance FROM customers WHERE id = ?", (customer_id,))
+    result = cursor.fetchone()
+    if not result:
+        return None
+    
+    new_balance = result['balance'] + amount
+    
+    # Bakiyeyi güncelle
+    cursor.execute("UPDATE customers SET balance = ?, updated_at = ? WHERE id = ?",
+                  (new_balance, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), customer_id))
+    
+    # Cari hareket kaydet
+    trans_type = 'credit' if amount > 0 else 'debit'
+    if not transaction_date:
+        transaction_date = datetime.now().strftime('%Y-%m-%d')
+    
+    cursor.execute('''
+        INSERT INTO account_transactions 
+        (customer_id, transaction_type, amount, balance_after, description, 
+         reference_type, reference_id, transaction_date, due_date, created_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (customer_id, trans_type, abs(amount), new_balance, description,
+          ref_type, ref_id, transaction_date, due_date, created_by))
+    return new_balance
+
 def update_customer_balance(customer_id: int, amount: float, description: str = "",
                            ref_type: str = "", ref_id: int = None, 
                            transaction_date: str = None, due_date: str = None,
                            created_by: int = 1) -> Tuple[bool, str]:
     """Müşteri bakiyesini günceller ve hareket kaydeder."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Mevcut bakiyeyi al
-        cursor.execute("SELECT balance FROM customers WHERE id = ?", (customer_id,))
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
-            return False, "Müşteri bulunamadı!"
-        
-        new_balance = result['balance'] + amount
-        
-        # Bakiyeyi güncelle
-        cursor.execute("UPDATE customers SET balance = ?, updated_at = ? WHERE id = ?",
-                      (new_balance, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), customer_id))
-        
-        # Cari hareket kaydet
-        trans_type = 'credit' if amount > 0 else 'debit'
-        if not transaction_date:
-            transaction_date = datetime.now().strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            INSERT INTO account_transactions 
-            (customer_id, transaction_type, amount, balance_after, description, 
-             reference_type, reference_id, transaction_date, due_date, created_by)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (customer_id, trans_type, abs(amount), new_balance, description,
-              ref_type, ref_id, transaction_date, due_date, created_by))
-        
-        conn.commit()
-        conn.close()
+        with transaction('customers') as cursor:
+            new_balance = _apply_customer_balance(cursor, customer_id, amount, description,
+                                                  ref_type, ref_id, transaction_date,
+                                                  due_date, created_by)
+            if new_balance is None:
+                return False, "Müşteri bulunamadı!"
         return True, "Bakiye güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+def _customer_transactions_query(customer_id: int, start_date: str = None,
+                                 end_date: str = None) -> Tuple[str, List]:
+    """Cari hareket sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    query = '''
+        SELECT at.*, u.full_name as created_by_name
+        FROM account_transactions at
+        LEFT JOIN users u ON at.created_by = u.id
+        WHERE at.customer_id = ?
+    '''
+    params = [customer_id]
+    
+    if start_date:
+        query += " AND at.transaction_date >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND at.transaction_date <= ?"
+        params.append(end_date)
+    
+    return query, params
+
 def get_customer_transactions(customer_id: int, start_date: str = None, 
                               end_date: str = None, limit: int = None) -> List[Dict]:
     """Müşteri cari hareketlerini getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT at.*, u.full_name as created_by_name
-            FROM account_transactions at
-            LEFT JOIN users u ON at.created_by = u.id
-            WHERE at.customer_id = ?
-        '''
-        params = [customer_id]
-        
-        if start_date:
-            query += " AND at.transaction_date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND at.transaction_date <= ?"
-            params.append(end_date)
-        
-        query += " ORDER BY at.created_at DESC"
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _customer_transactions_query(customer_id, start_date, end_date)
+            query += " ORDER BY at.created_at DESC"
+            
+            if limit:
+                query += f" LIMIT {limit}"
+            
+            cursor.execute(query, params)
+            transactions = [dict(row) for row in cursor.fetchall()]
         return transactions
     except sqlite3.Error:
         return []
 
+def _next_month_start(day: str) -> str:
+    """'2025-03-14' -> '2025-04-01'."""
+    year, month = int(day[:4]), int(day[5:7])
+    return f"{year + month // 12:04d}-{month % 12 + 1:02d}-01"
+
+def _statement_summary_query(customer_id: int, start_date: str = None,
+                             end_date: str = None) -> Tuple[str, List]:
+    """
+    Açılış bakiyesi ile dönem borç/alacak toplamını tek sorguda hesaplar.
+    Tam aylar account_balance_checkpoints'ten, dönemin başındaki ve sonundaki
+    kısmi aylar idx_account_tx_customer_date aralığından okunur.
+    Tarihler YYYY-MM-DD değilse ValueError yükseltir.
+    """
+    for value in (start_date, end_date):
+        if value:
+            datetime.strptime(value, '%Y-%m-%d')
+    
+    cp_where, cp_params = ["customer_id = ?"], [customer_id]
+    raw_ranges = []
+    if start_date and end_date and start_date > end_date:
+        cp_where.append("0")  # boş dönem: borç/alacak toplamı sıfır
+    elif start_date and end_date and start_date[:7] == end_date[:7]:
+        cp_where.append("0")  # tek ay: sadece ham hareketler
+        raw_ranges.append(("transaction_date >= ? AND transaction_date <= ?", [start_date, end_date]))
+    else:
+        if start_date or end_date:
+            cp_where.append("period != ''")
+        if start_date:
+            cp_where.append("period > ?")
+            cp_params.append(start_date[:7])
+            raw_ranges.append(("transaction_date >= ? AND transaction_date < ?",
+                               [start_date, _next_month_start(start_date)]))
+        if end_date:
+            cp_where.append("period < ?")
+            cp_params.append(end_date[:7])
+            raw_ranges.append(("transaction_date >= ? AND transaction_date <= ?",
+                               [end_date[:7] + '-01', end_date]))
+    
+    parts = [f"SELECT debit_total AS debit, credit_total AS credit FROM account_balance_checkpoints "
+             f"WHERE {' AND '.join(cp_where)}"]
+    params = list(cp_params)
+    for condition, values in raw_ranges:
+        parts.append("SELECT CASE WHEN transaction_type = 'debit' THEN amount ELSE 0 END, "
+                     "CASE WHEN transaction_type = 'credit' THEN amount ELSE 0 END "
+                     f"FROM account_transactions WHERE customer_id = ? AND {condition}")
+        params += [customer_id, *values]
+    
+    # Dönem başı bakiye: başlangıçtan önceki son hareketin (created_at, id) bakiyesi
+    opening_sql = "0"
+    opening_params = []
+    if start_date:
+        opening_sql = '''COALESCE((
+            SELECT balance FROM (
+                SELECT last_created_at AS created_at, last_id AS id, last_balance AS balance
+                FROM account_balance_checkpoints
+                WHERE customer_id = ? AND period != '' AND period < ?
+                UNION ALL
+                SELECT created_at, id, balance_after FROM account_transactions
+                WHERE customer_id = ? AND transaction_date >= ? AND transaction_date < ?
+            ) ORDER BY created_at DESC, id DESC LIMIT 1), 0)'''
+        opening_params = [customer_id, start_date[:7], customer_id, start_date[:7] + '-01', start_date]
+    
+    query = (f"SELECT {opening_sql} AS opening_balance, "
+             f"COALESCE(SUM(debit), 0) AS total_debit, COALESCE(SUM(credit), 0) AS total_credit "
+             f"FROM ({' UNION ALL '.join(parts)})")
+    return query, opening_params + params
+
 def get_customer_statement(customer_id: int, start_date: str = None, end_date: str = None) -> Dict:
     """Müşteri hesap ekstresi getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
         # Müşteri bilgisi
         customer = get_customer_by_id(customer_id)
         if not customer:
             return {}
         
-        # Dönem başı bakiye
-        opening_balance = 0
-        if start_date:
-            cursor.execute('''
-                SELECT COALESCE(
-                    (SELECT balance_after FROM account_transactions 
-                     WHERE customer_id = ? AND transaction_date < ?
-                     ORDER BY created_at DESC LIMIT 1), 0
-                ) as opening
-            ''', (customer_id, start_date))
-            opening_balance = cursor.fetchone()['opening']
-        
-        # Hareketler
-        transactions = get_customer_transactions(customer_id, start_date, end_date)
-        
-        # Özet
-        total_debit = sum(t['amount'] for t in transactions if t['transaction_type'] == 'debit')
-        total_credit = sum(t['amount'] for t in transactions if t['transaction_type'] == 'credit')
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            # Dönem başı bakiye ve dönem toplamları (tek sınırlı aralık sorgusu)
+            query, params = _statement_summary_query(customer_id, start_date, end_date)
+            cursor.execute(query, params)
+            summary = cursor.fetchone()
+            
+            # Hareketler (aynı bağlantıda)
+            query, params = _customer_transactions_query(customer_id, start_date, end_date)
+            cursor.execute(query + " ORDER BY at.created_at DESC", params)
+            transactions = [dict(row) for row in cursor.fetchall()]
         
         return {
             'customer': customer,
-            'opening_balance': opening_balance,
+            'opening_balance': summary['opening_balance'],
             'transactions': transactions,
-            'total_debit': total_debit,
-            'total_credit': total_credit,
+            'total_debit': summary['total_debit'],
+            'total_credit': summary['total_credit'],
             'closing_balance': customer['balance'],
             'period': {'start': start_date, 'end': end_date}
         }
-    except sqlite3.Error:
+    except (sqlite3.Error, ValueError):
         return {}
 
 # ============================================================================
 # AYARLAR YÖNETİMİ
 # ============================================================================
 
+# Ayar önbelleği: settings tablosu ilk kullanımda bir kez, tipleri dönüştürülmüş
+# olarak belleğe alınır. Aynı süreçteki yazmalar 'settings' sayacıyla, başka
+# süreçlerdeki yazmalar cache_versions tablosundaki sürümle fark edilir; sürüm
+# en fazla SETTINGS_CACHE_CHECK_INTERVAL saniyede bir kontrol edilir.
+SETTINGS_CACHE_CHECK_INTERVAL = 2.0
+
+_settings_cache = {'values': None, 'generation': None, 'db_version': None, 'checked': 0.0}
+
+def _convert_setting_value(value: Optional[str], stype: str) -> Any:
+    """Ham ayar değerini tipine çevirir; boş/geçersiz değer için None döner."""
+    if stype == 'boolean':
+        return value == '1'
+    if not value:
+        return None
+    try:
+        if stype == 'integer':
+            return int(value)
+        elif stype == 'json':
+            return json.loads(value)
+        elif stype == 'float':
+            return float(value)
+    except ValueError:
+        return None
+    return value
+
+def _bump_cache_version(cursor, name: str):
+    """Süreçler arası önbellek sürümünü artırır (çağıranın transaction'ında)."""
+    cursor.execute("UPDATE cache_versions SET version = version + 1 WHERE name = ?", (name,))
+
+def _read_cache_version(conn, name: str) -> Optional[int]:
+    """cache_versions tablosundaki sürümü okur (tablo yoksa None)."""
+    try:
+        row = conn.execute("SELECT version FROM cache_versions WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row['version'] if row else None
+
+def _load_settings() -> Dict:
+    """Ayar önbelleğini döndürür; bayatsa settings tablosundan yeniden yükler."""
+    generation = cache_generation('settings')
+    now = time.monotonic()
+    with _cache_lock:
+        cache = dict(_settings_cache)
+    
+    if cache['values'] is not None and cache['generation'] == generation:
+        if now - cache['checked'] < SETTINGS_CACHE_CHECK_INTERVAL:
+            return cache['values']
+        with db_connection(readonly=True) as conn:
+            db_version = _read_cache_version(conn, 'settings')
+        if db_version == cache['db_version']:
+            with _cache_lock:
+                _settings_cache['checked'] = now
+            return cache['values']
+    
+    # Sürüm ayarlardan önce okunur; arada yazma olursa sonraki kontrol yeniden yükler
+    with db_connection(readonly=True) as conn:
+        db_version = _read_cache_version(conn, 'settings')
+        rows = conn.execute(
+            "SELECT category, setting_key, setting_value, setting_type FROM settings").fetchall()
+    
+    values = {(row['category'], row['setting_key']):
+              _convert_setting_value(row['setting_value'], row['setting_type']) for row in rows}
+    with _cache_lock:
+        _settings_cache.update(values=values, generation=generation,
+                               db_version=db_version, checked=now)
+    return values
+
 def get_setting(category: str, key: str, default: Any = None) -> Any:
-    """Tek bir ayarı getirir."""
+    """Tek bir ayarı getirir (süreç içi önbellekten)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT setting_value, setting_type FROM settings 
-            WHERE category = ? AND setting_key = ?
-        ''', (category, key))
-        result = cursor.fetchone()
-        conn.close()
-        
-        if result:
-            value = result['setting_value']
-            stype = result['setting_type']
-            
-            # Tip dönüşümü
-            if stype == 'integer':
-                return int(value) if value else default
-            elif stype == 'boolean':
-                return value == '1'
-            elif stype == 'json':
-                return json.loads(value) if value else default
-            elif stype == 'float':
-                return float(value) if value else default
-            else:
-                return value if value else default
-        return default
+        value = _load_settings().get((category, key))
     except sqlite3.Error:
         return default
+    
+    if value is None:
+        return default
+    # json ayarları değiştirilebilir nesne; önbelleği korumak için kopya verilir
+    return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
 
 def get_settings_by_category(category: str) -> Dict:
     """Kategoriye göre tüm ayarları getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT setting_key, setting_value, setting_type, display_name, description, options
-            FROM settings WHERE category = ? ORDER BY sort_order
-        ''', (category,))
-        
-        settings = {}
-        for row in cursor.fetchall():
-            value = row['setting_value']
-            stype = row['setting_type']
-            
-            if stype == 'integer':
-                value = int(value) if value else 0
-            elif stype == 'boolean':
-                value = value == '1'
-            elif stype == 'json':
-                value = json.loads(value) if value else None
-            
-            settings[row['setting_key']] = {
-                'value': value,
-                'type': stype,
-                'display_name': row['display_name'],
-                'description': row['description'],
-                'options': json.loads(row['options']) if row['options'] else None
-            }
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT setting_key, setting_value, setting_type, display_name, description, options
+                FROM settings WHERE category = ? ORDER BY sort_order
+            ''', (category,))
+            
+            settings = {}
+            for row in cursor.fetchall():
+                value = row['setting_value']
+                stype = row['setting_type']
+                
+                if stype == 'integer':
+                    value = int(value) if value else 0
+                elif stype == 'boolean':
+                    value = value == '1'
+                elif stype == 'json':
+                    value = json.loads(value) if value else None
+                
+                settings[row['setting_key']] = {
+                    'value': value,
+                    'type': stype,
+                    'display_name': row['display_name'],
+                    'description': row['description'],
+                    'options': json.loads(row['options']) if row['options'] else None
+                }
+            
         return settings
     except sqlite3.Error:
         return {}
@@ -1028,11 +2343,10 @@ def get_settings_by_category(category: str) -> Dict:
 def get_all_settings() -> Dict:
     """Tüm ayarları kategorilere göre gruplar."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT category FROM settings ORDER BY category")
-        categories = [row['category'] for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT category FROM settings ORDER BY category")
+            categories = [row['category'] for row in cursor.fetchall()]
         
         all_settings = {}
         for cat in categories:
@@ -1045,24 +2359,25 @@ def get_all_settings() -> Dict:
 def update_setting(category: str, key: str, value: Any) -> Tuple[bool, str]:
     """Ayar günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Boolean değerleri dönüştür
-        if isinstance(value, bool):
-            value = '1' if value else '0'
-        elif isinstance(value, (dict, list)):
-            value = json.dumps(value)
-        else:
-            value = str(value)
-        
-        cursor.execute('''
-            UPDATE settings SET setting_value = ?, updated_at = ?
-            WHERE category = ? AND setting_key = ?
-        ''', (value, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), category, key))
-        
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Boolean değerleri dönüştür
+            if isinstance(value, bool):
+                value = '1' if value else '0'
+            elif isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            else:
+                value = str(value)
+            
+            cursor.execute('''
+                UPDATE settings SET setting_value = ?, updated_at = ?
+                WHERE category = ? AND setting_key = ?
+            ''', (value, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), category, key))
+            _bump_cache_version(cursor, 'settings')
+            
+            conn.commit()
+            _invalidate('settings')
         return True, "Ayar güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -1070,26 +2385,27 @@ def update_setting(category: str, key: str, value: Any) -> Tuple[bool, str]:
 def update_settings_bulk(settings: Dict) -> Tuple[bool, str]:
     """Birden fazla ayarı günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        for category, items in settings.items():
-            for key, value in items.items():
-                if isinstance(value, bool):
-                    value = '1' if value else '0'
-                elif isinstance(value, (dict, list)):
-                    value = json.dumps(value)
-                else:
-                    value = str(value)
-                
-                cursor.execute('''
-                    UPDATE settings SET setting_value = ?, updated_at = ?
-                    WHERE category = ? AND setting_key = ?
-                ''', (value, now, category, key))
-        
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            
+            for category, items in settings.items():
+                for key, value in items.items():
+                    if isinstance(value, bool):
+                        value = '1' if value else '0'
+                    elif isinstance(value, (dict, list)):
+                        value = json.dumps(value)
+                    else:
+                        value = str(value)
+                    
+                    cursor.execute('''
+                        UPDATE settings SET setting_value = ?, updated_at = ?
+                        WHERE category = ? AND setting_key = ?
+                    ''', (value, now, category, key))
+            _bump_cache_version(cursor, 'settings')
+            
+            conn.commit()
+            _invalidate('settings')
         return True, "Ayarlar güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -1098,53 +2414,506 @@ def update_settings_bulk(settings: Dict) -> Tuple[bool, str]:
 # AKTİVİTE LOG
 # ============================================================================
 
+# Aktivite kayıtları varsayılan olarak arka planda, partiler hâlinde yazılır:
+# log_activity satırı tampona bırakır, yazıcı thread'i ACTIVITY_LOG_BATCH_SIZE
+# satır birikince ya da ilk satırdan ACTIVITY_LOG_FLUSH_INTERVAL sn sonra
+# hepsini tek transaction'da (tek fsync) yazar. transaction() içinden gelen
+# kayıtlar commit sonrasında tampona alınır, geri alınan işlemler log bırakmaz.
+# Tampon doluysa kayıt çağıranın thread'inde hemen yazılır (geri basınç:
+# üretici yavaşlar, kayıt kaybolmaz). Süreç kapanırken (atexit) tampon boşaltılır.
+#
+# Sıkı denetim modunda (BORC_TAKIP_STRICT_AUDIT=1) kayıt çağıranın
+# transaction'ı içinde eşzamanlı yazılır ve değişiklikle birlikte commit
+# ya da rollback olur.
+#
+# Zaman damgası kayıt anında alınır (UTC, CURRENT_TIMESTAMP varsayılanıyla aynı),
+# böylece partinin yazıldığı an değil olayın zamanı saklanır.
+
+ACTIVITY_LOG_STRICT = os.environ.get('BORC_TAKIP_STRICT_AUDIT', '0') == '1'
+ACTIVITY_LOG_BATCH_SIZE = 500        # bir transaction'da yazılan en fazla kayıt
+ACTIVITY_LOG_FLUSH_INTERVAL = 1.0    # bir kaydın tamponda bekleyeceği en uzun süre (sn)
+ACTIVITY_LOG_MAX_PENDING = 10_000    # dolunca kayıtlar çağıranın thread'inde yazılır
+ACTIVITY_LOG_RETRIES = 3             # başarısız parti yazımı için deneme sayısı
+
+_ACTIVITY_INSERT_SQL = '''
+    INSERT INTO activity_logs (user_id, action, entity_type, entity_id, old_values, new_values,
+                               created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+def _activity_record(user_id: int, action: str, entity_type: str = None,
+                     entity_id: int = None, old_values: Dict = None,
+                     new_values: Dict = None) -> Tuple:
+    """_ACTIVITY_INSERT_SQL parametreleri."""
+    return (user_id, action, entity_type, entity_id,
+            json.dumps(old_values) if old_values else None,
+            json.dumps(new_values) if new_values else None,
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()))
+
+def _write_activity(cursor, user_id: int, action: str, entity_type: str = None,
+                    entity_id: int = None, old_values: Dict = None,
+                    new_values: Dict = None):
+    """Aktivite kaydını çağıranın transaction'ına yazar (commit yok)."""
+    cursor.execute(_ACTIVITY_INSERT_SQL, _activity_record(user_id, action, entity_type,
+                                                          entity_id, old_values, new_values))
+
+def _write_activity_now(record: Tuple, strict: bool = False):
+    """
+    Kaydı eşzamanlı yazar; thread'in açık bir yazma transaction'ı varsa ona katılır.
+    strict=True (sıkı denetim) iken yazma hatası yükseltilir, böylece çağıranın
+    transaction'ı kayıtsız commit edilmez, geri alınır.
+    """
+    try:
+        if _write_pool.is_held() and getattr(_uow_state, 'domains', None) is None:
+            with db_connection() as conn:
+                if conn.in_transaction:
+                    conn.execute(_ACTIVITY_INSERT_SQL, record)
+                    return
+        with transaction() as cursor:
+            cursor.execute(_ACTIVITY_INSERT_SQL, record)
+    except sqlite3.Error:
+        if strict:
+            raise
+
+class ActivityLogWriter:
+    """
+    Aktivite kayıtları için süreç içi tamponlu yazıcı (tampon + arka plan thread'i).
+    Thread ilk kayıtta başlar; close() tamponu boşaltıp thread'i durdurur.
+    """
+    
+    def __init__(self, batch_size: int = ACTIVITY_LOG_BATCH_SIZE,
+                 flush_interval: float = ACTIVITY_LOG_FLUSH_INTERVAL,
+                 max_pending: int = ACTIVITY_LOG_MAX_PENDING):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self._buffer = collections.deque()
+        self._cond = threading.Condition()
+        self._oldest = 0.0          # tampondaki en eski kaydın zamanı (monotonic)
+        self._in_flight = 0         # yazılmakta olan parti
+        self._flush_requested = False
+        self._closed = False
+        self._thread = None
+        self._stats = {'submitted': 0, 'written': 0, 'batches': 0, 'failed': 0,
+                       'sync_writes': 0, 'max_pending': 0, 'last_batch_ms': 0.0}
+    
+    def submit(self, record: Tuple):
+        """Kaydı tampona bırakır; tampon doluysa ya da yazıcı kapalıysa hemen yazar."""
+        with self._cond:
+            accepted = not self._closed and len(self._buffer) < self.max_pending
+            if accepted:
+                if not self._buffer:
+                    self._oldest = time.monotonic()
+                self._buffer.append(record)
+                self._stats['submitted'] += 1
+                pending = len(self._buffer) + self._in_flight
+                if pending > self._stats['max_pending']:
+                    self._stats['max_pending'] = pending
+                if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+                    self._cond.notify_all()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='activity-log-writer',
+                                                    daemon=True)
+                    self._thread.start()
+            else:
+                self._stats['sync_writes'] += 1
+        if not accepted:
+            _write_activity_now(record)
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Tampondaki kayıtlar yazılana kadar bekler. Yazıcı bağlantısını tutan
+        thread'den çağrılırsa (arka plan thread'i onu bekleyeceği için) beklemez.
+        """
+        if _write_pool.is_held():
+            return False
+        with self._cond:
+            if self._thread is None:
+                return not self._buffer
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._buffer and not self._in_flight,
+                                       timeout)
+    
+    def close(self, timeout: float = 10.0):
+        """Yeni kayıt almayı durdurur, tamponu boşaltır ve thread'i bekler."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        # Thread hiç başlamadıysa ya da zamanında bitmediyse kalanlar burada yazılır
+        with self._cond:
+            leftover = list(self._buffer)
+            self._buffer.clear()
+        if leftover:
+            self._write_batch(leftover)
+    
+    def stats(self) -> Dict:
+        """Geri basınç ve verim sayaçları."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._buffer) + self._in_flight
+            stats['running'] = self._thread is not None and self._thread.is_alive()
+        stats['strict'] = ACTIVITY_LOG_STRICT
+        return stats
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                # Parti dolana, süre dolana ya da flush/close istenene kadar biriktir
+                deadline = self._oldest + self.flush_interval
+                while (len(self._buffer) < self.batch_size and not self._flush_requested
+                       and not self._closed):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._buffer.popleft()
+                         for _ in range(min(self.batch_size, len(self._buffer)))]
+                self._in_flight = len(batch)
+            
+            started = time.perf_counter()
+            written = self._write_batch(batch)
+            with self._cond:
+                self._in_flight = 0
+                self._stats['written' if written else 'failed'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['last_batch_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                if not self._buffer:
+                    self._flush_requested = False
+                self._cond.notify_all()
+    
+    @staticmethod
+    def _write_batch(batch: List[Tuple]) -> bool:
+        for attempt in range(ACTIVITY_LOG_RETRIES):
+            try:
+                with transaction() as cursor:
+                    cursor.executemany(_ACTIVITY_INSERT_SQL, batch)
+                return True
+            except sqlite3.Error as e:
+                error = e
+                time.sleep(0.1 * (attempt + 1))
+        print(f"❌ Aktivite log yazma hatası ({len(batch)} kayıt): {error}")
+        return False
+
+activity_writer = ActivityLogWriter()
+atexit.register(activity_writer.close)
+
 def log_activity(user_id: int, action: str, entity_type: str = None, 
                  entity_id: int = None, old_values: Dict = None, 
                  new_values: Dict = None):
-    """Aktivite loglar."""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+    """Aktivite loglar (sıkı modda eşzamanlı, aksi hâlde arka planda partili)."""
+    record = _activity_record(user_id, action, entity_type, entity_id, old_values, new_values)
+    if ACTIVITY_LOG_STRICT:
+        _write_activity_now(record, strict=True)
+    elif getattr(_uow_state, 'domains', None) is not None:
+        _uow_state.after_commit.append(lambda: activity_writer.submit(record))
+    else:
+        activity_writer.submit(record)
+
+def get_activity_log_stats() -> Dict:
+    """Aktivite log yazıcısının sayaçları."""
+    return activity_writer.stats()
+
+# ============================================================================
+# AKTİVİTE LOG BÖLÜMLERİ (AYLIK)
+# ============================================================================
+#
+# Yazmalar her zaman activity_logs (sıcak tablo) tablosuna yapılır. Bakım işi
+# (maintain_activity_logs) kapanmış ayları activity_logs_YYYY_MM tablolarına
+# taşır, activity_log.hot_months ayından eski bölümleri ACTIVITY_ARCHIVE_DIR
+# altında sıkıştırılmış JSON Lines dosyalarına (activity_logs_YYYY_MM.jsonl.gz)
+# yazıp tabloyu düşürür, activity_log.retention_months ayından eskileri siler
+# (varsayılan 0: denetim kayıtları silinmez, silme isteğe bağlıdır).
+# Bölümler activity_log_partitions tablosunda kayıtlıdır.
+#
+# get_activity_logs sıcak tablodan başlayıp istenen tarih aralığını kapsayan
+# bölümleri yeniden eskiye okur; limit dolduğunda daha eski bölümlere
+# dokunulmaz. Ay sınırları created_at (UTC) değerine göredir.
+
+ACTIVITY_ARCHIVE_DIR = os.path.join(os.path.dirname(DB_NAME), 'activity_archive')
+ACTIVITY_LOG_HOT_MONTHS = 3
+ACTIVITY_LOG_RETENTION_MONTHS = 0     # 0 = sınırsız; silme yalnız ayarla açılır
+ACTIVITY_LOG_MOVE_BATCH = 10_000     # taşıma transaction'ı başına satır
+
+_ACTIVITY_COLUMNS = ('id', 'user_id', 'action', 'entity_type', 'entity_id', 'old_values',
+                     'new_values', 'ip_address', 'user_agent', 'created_at')
+
+def _shift_period(period: str, months: int) -> str:
+    """'YYYY-MM' dönemini verilen ay kadar kaydırır."""
+    year, month = map(int, period.split('-'))
+    index = year * 12 + month - 1 + months
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def _activity_partition_table(period: str) -> str:
+    return f"activity_logs_{period.replace('-', '_')}"
+
+def _create_activity_partition(cursor, table: str):
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            entity_type TEXT,
+            entity_id INTEGER,
+            old_values TEXT,
+            new_values TEXT,
+            ip_address TEXT,
+            user_agent TEXT,
+            created_at TIMESTAMP
+        )
+    ''')
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created ON {table} (created_at)")
+
+def _update_activity_partition(cursor, period: str, table: str):
+    """Bölüm kaydını tablonun güncel satır sayısı ve tarih aralığıyla yazar."""
+    cursor.execute(f"SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM {table}")
+    count, first_at, last_at = cursor.fetchone()
+    cursor.execute('''
+        INSERT INTO activity_log_partitions (period, table_name, row_count, first_at, last_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (period) DO UPDATE SET
+            table_name = excluded.table_name, row_count = excluded.row_count,
+            first_at = excluded.first_at, last_at = excluded.last_at
+    ''', (period, table, count, first_at, last_at))
+
+def _rotate_activity_logs(current: str) -> Dict[str, int]:
+    """Kapanmış ayları sıcak tablodan ay tablolarına partiler hâlinde taşır."""
+    moved = {}
+    with db_connection(readonly=True) as conn:
+        archived = {row[0] for row in conn.execute(
+            "SELECT period FROM activity_log_partitions WHERE table_name IS NULL")}
+    lower = ''
+    while True:
+        with db_connection(readonly=True) as conn:
+            oldest = conn.execute("SELECT MIN(created_at) FROM activity_logs "
+                                  "WHERE created_at >= ? AND created_at < ?",
+                                  (lower, current + '-01')).fetchone()[0]
+        if not oldest:
+            return moved
+        period = oldest[:7]
+        lower = _shift_period(period, 1) + '-01'
+        if period in archived:
+            # Arşivlenmiş aya geç düşen kayıtlar sıcak tabloda kalır (sorgularda yine görünür)
+            continue
+        
+        table = _activity_partition_table(period)
+        columns = ', '.join(_ACTIVITY_COLUMNS)
+        batch_rows = (f"SELECT rowid FROM activity_logs WHERE created_at >= ? AND created_at < ? "
+                      f"ORDER BY created_at, rowid LIMIT {ACTIVITY_LOG_MOVE_BATCH}")
+        bounds = (period + '-01', lower)
+        while True:
+            with transaction() as cursor:
+                # Bölüm ilk partide kaydedilir; taşıma yarıda kalsa da sorgular tabloyu görür
+                _create_activity_partition(cursor, table)
+                cursor.execute("INSERT OR IGNORE INTO activity_log_partitions (period, table_name) "
+                               "VALUES (?, ?)", (period, table))
+                cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} "
+                               f"FROM activity_logs WHERE rowid IN ({batch_rows})", bounds)
+                count = cursor.rowcount
+                cursor.execute(f"DELETE FROM activity_logs WHERE rowid IN ({batch_rows})", bounds)
+                if count < ACTIVITY_LOG_MOVE_BATCH:
+                    _update_activity_partition(cursor, period, table)
+            moved[period] = moved.get(period, 0) + count
+            if count < ACTIVITY_LOG_MOVE_BATCH:
+                break
+
+def _compact_activity_partition(period: str, table: str) -> str:
+    """Ay tablosunu sıkıştırılmış arşiv dosyasına yazar ve tabloyu düşürür."""
+    os.makedirs(ACTIVITY_ARCHIVE_DIR, exist_ok=True)
+    filename = f"{table}.jsonl.gz"
+    path = os.path.join(ACTIVITY_ARCHIVE_DIR, filename)
+    with db_connection(readonly=True) as conn:
+        with open(path + '.tmp', 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for row in conn.execute(f"SELECT * FROM {table} ORDER BY created_at, id"):
+                    # created_at ilk anahtar: okurken satır çözülmeden tarihle elenir
+                    record = {'created_at': row['created_at'], **dict(row)}
+                    f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+    os.replace(path + '.tmp', path)
+    
+    with transaction() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
         cursor.execute('''
-            INSERT INTO activity_logs (user_id, action, entity_type, entity_id, old_values, new_values)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (user_id, action, entity_type, entity_id,
-              json.dumps(old_values) if old_values else None,
-              json.dumps(new_values) if new_values else None))
-        conn.commit()
-        conn.close()
-    except sqlite3.Error:
-        pass
+            UPDATE activity_log_partitions
+            SET table_name = NULL, archive_file = ?, archived_at = ?
+            WHERE period = ?
+        ''', (filename, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), period))
+    return filename
+
+def maintain_activity_logs() -> Dict:
+    """
+    Aktivite logu bakımı (gece işi ya da uygulama açılışı için): kapanmış
+    ayları ay tablolarına taşır, eski bölümleri arşive sıkıştırır ve saklama
+    süresini aşanları siler. Tekrar çalıştırılabilir; yapılacak iş yoksa hızlıdır.
+    
+    Sonuç: {'rotated': {dönem: satır}, 'compacted': [dönem], 'expired': [dönem],
+            'elapsed'}
+    """
+    started = time.perf_counter()
+    result = {'rotated': {}, 'compacted': [], 'expired': [], 'elapsed': 0.0}
+    current = time.strftime('%Y-%m', time.gmtime())
+    try:
+        hot_months = max(1, int(get_setting('activity_log', 'hot_months', ACTIVITY_LOG_HOT_MONTHS)))
+        retention = int(get_setting('activity_log', 'retention_months', ACTIVITY_LOG_RETENTION_MONTHS))
+        activity_writer.flush()
+        result['rotated'] = _rotate_activity_logs(current)
+        
+        with db_connection(readonly=True) as conn:
+            partitions = [dict(row) for row in conn.execute(
+                "SELECT period, table_name, archive_file FROM activity_log_partitions "
+                "ORDER BY period")]
+        
+        expire_before = _shift_period(current, -retention) if retention > 0 else ''
+        compact_before = _shift_period(current, -hot_months)
+        for part in partitions:
+            if part['period'] < expire_before:
+                with transaction() as cursor:
+                    if part['table_name']:
+                        cursor.execute(f"DROP TABLE IF EXISTS {part['table_name']}")
+                    cursor.execute("DELETE FROM activity_log_partitions WHERE period = ?",
+                                   (part['period'],))
+                if part['archive_file']:
+                    path = os.path.join(ACTIVITY_ARCHIVE_DIR, part['archive_file'])
+                    if os.path.exists(path):
+                        os.remove(path)
+                result['expired'].append(part['period'])
+            elif part['table_name'] and part['period'] < compact_before:
+                _compact_activity_partition(part['period'], part['table_name'])
+                result['compacted'].append(part['period'])
+        
+        if expire_before:
+            # Arşivlenmiş aylara geç düşüp sıcak tabloda kalan kayıtlar
+            with transaction() as cursor:
+                cursor.execute("DELETE FROM activity_logs WHERE created_at < ?",
+                               (expire_before + '-01',))
+    except (sqlite3.Error, OSError, ValueError, TypeError) as e:
+        print(f"❌ Aktivite log bakım hatası: {e}")
+        result['error'] = str(e)
+    result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
+
+def _activity_filters(user_id: int = None, entity_type: str = None, start_date: str = None,
+                      end_date: str = None) -> Tuple[str, List]:
+    """Bölüm sorguları için WHERE koşulu (al. önekli) ve parametreleri."""
+    where = " WHERE 1=1"
+    params = []
+    if user_id:
+        where += " AND al.user_id = ?"
+        params.append(user_id)
+    if entity_type:
+        where += " AND al.entity_type = ?"
+        params.append(entity_type)
+    if start_date:
+        where += " AND al.created_at >= ?"
+        params.append(start_date)
+    if end_date:
+        where += " AND al.created_at < date(?, '+1 day')"
+        params.append(end_date)
+    return where, params
+
+_ARCHIVE_DATE_PREFIX = '{"created_at": "'
+
+def _read_activity_archive(filename: str, limit: int, user_id: int = None,
+                           entity_type: str = None, start_date: str = None,
+                           end_date: str = None) -> List[Dict]:
+    """
+    Arşiv dosyasındaki filtreye uyan en yeni limit kayıt. Dosya tarih sırasıyla
+    yazıldığı için akış hâlinde baştan okunur: başlangıçtan önceki satırlar JSON
+    çözülmeden atlanır, bitişe gelince okuma durur. Bellekte en fazla limit
+    kayıt tutulur (dosya tümüyle açılmaz).
+    """
+    end = (datetime.strptime(end_date[:10], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d') \
+        if end_date else None
+    prefix = len(_ARCHIVE_DATE_PREFIX)
+    filtered = bool(user_id or entity_type)
+    newest = collections.deque(maxlen=limit)
+    with gzip.open(os.path.join(ACTIVITY_ARCHIVE_DIR, filename), 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith(_ARCHIVE_DATE_PREFIX):
+                created_at = line[prefix:prefix + 19]
+                if start_date and created_at < start_date:
+                    continue
+                if end and created_at >= end:
+                    break
+            elif not filtered:
+                # Tarih öneki olmayan (created_at boş) satırlar süzgeçte çözülür
+                row = json.loads(line)
+                if ((start_date and (row['created_at'] or '') < start_date)
+                        or (end and (row['created_at'] or '') >= end)):
+                    continue
+            if filtered:
+                row = json.loads(line)
+                if ((user_id and row['user_id'] != user_id)
+                        or (entity_type and row['entity_type'] != entity_type)
+                        or (start_date and (row['created_at'] or '') < start_date)
+                        or (end and (row['created_at'] or '') >= end)):
+                    continue
+                newest.append(row)
+            else:
+                # Süzgeç yoksa sadece kalan son limit satır çözülür
+                newest.append(line)
+    return [row if filtered else json.loads(row) for row in reversed(newest)]
 
 def get_activity_logs(user_id: int = None, entity_type: str = None, 
-                      limit: int = 100) -> List[Dict]:
-    """Aktivite loglarını getirir."""
+                      limit: int = 100, start_date: str = None,
+                      end_date: str = None) -> List[Dict]:
+    """
+    Aktivite loglarını getirir (en yeni önce). Sadece tarih aralığını kapsayan
+    bölümler okunur; limit dolunca daha eski bölümlere bakılmaz. Tampondaki
+    kayıtlar önce yazılır.
+    """
+    activity_writer.flush()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT al.*, u.full_name as user_name
-            FROM activity_logs al
-            LEFT JOIN users u ON al.user_id = u.id
-            WHERE 1=1
-        '''
-        params = []
-        
-        if user_id:
-            query += " AND al.user_id = ?"
-            params.append(user_id)
-        if entity_type:
-            query += " AND al.entity_type = ?"
-            params.append(entity_type)
-        
-        query += f" ORDER BY al.created_at DESC LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        logs = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT period, table_name, archive_file, last_at FROM activity_log_partitions WHERE 1=1"
+            params = []
+            if start_date:
+                query += " AND period >= ?"
+                params.append(start_date[:7])
+            if end_date:
+                query += " AND period <= ?"
+                params.append(end_date[:7])
+            cursor.execute(query + " ORDER BY period DESC", params)
+            partitions = [dict(row) for row in cursor.fetchall()]
+            
+            where, params = _activity_filters(user_id, entity_type, start_date, end_date)
+            logs = []
+            users = None
+            for part in [{'table_name': 'activity_logs', 'last_at': None}] + partitions:
+                if len(logs) >= limit and part['last_at'] and part['last_at'] < logs[-1]['created_at']:
+                    break
+                if part['table_name']:
+                    cursor.execute(f'''
+                        SELECT al.*, u.full_name as user_name
+                        FROM {part['table_name']} al
+                        LEFT JOIN users u ON al.user_id = u.id
+                        {where}
+                        ORDER BY al.created_at DESC, al.id DESC LIMIT ?
+                    ''', params + [limit])
+                    rows = [dict(row) for row in cursor.fetchall()]
+                else:
+                    rows = _read_activity_archive(part['archive_file'], limit, user_id,
+                                                  entity_type, start_date, end_date)
+                    if rows and users is None:
+                        users = dict(cursor.execute("SELECT id, full_name FROM users").fetchall())
+                    for row in rows:
+                        row['user_name'] = (users or {}).get(row['user_id'])
+                logs.extend(rows)
+                logs.sort(key=lambda r: (r['created_at'], r['id']), reverse=True)
+                del logs[limit:]
         return logs
-    except sqlite3.Error:
+    except (sqlite3.Error, OSError, ValueError):
         return []
 
 print("=" * 70)
@@ -1162,6 +2931,189 @@ print("=" * 70)# ===============================================================
 # BACKEND.PY - PARÇA 2/3: ÇEK/SENET + KASA + GELİR/GİDER
 # ============================================================================
 
+# ============================================================================
+# TOPLU İÇE AKTARMA (IMPORT) YARDIMCILARI
+# ============================================================================
+# CSV (virgül/noktalı virgül/sekme ayraçlı, Excel'in Türkçe çıktısı dahil) ya
+# da JSON (nesne listesi) dosyalarını satır sözlüklerine çevirir. Başlıklar
+# küçük harfe çevrilip boşluklar '_' yapılır. Tutar ve tarih ayrıştırıcıları
+# Türkçe biçimleri de kabul eder: '1.234,56', '31.12.2025'.
+# ============================================================================
+
+IMPORT_MAX_ROWS = 50_000
+IMPORT_CHUNK_SIZE = 1000      # akışlı aktarımda transaction başına satır
+IMPORT_MAX_ERRORS = 1000      # sonuçta saklanan hata satırı (error_count hepsini sayar)
+# Desteklenen biçimler: YYYY-MM-DD, GG.AA.YYYY, GG/AA/YYYY, GG-AA-YYYY
+# (satır başına strptime denemek yerine tek regex ile ayrıştırılır)
+_ISO_DATE_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})$')
+_TR_DATE_RE = re.compile(r'(\d{1,2})([./-])(\d{1,2})\2(\d{4})$')
+
+def read_import_file(data: bytes, filename: str = '') -> List[Dict]:
+    """Yüklenen CSV/JSON içeriğini satır listesine çevirir (ValueError: geçersiz dosya)."""
+    text = data.decode('utf-8-sig') if isinstance(data, bytes) else data
+    if filename.lower().endswith('.json') or text.lstrip().startswith(('[', '{')):
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get('rows', [])
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise ValueError("JSON dosyası nesne listesi olmalı")
+    else:
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        rows = list(csv.DictReader(io.StringIO(text), dialect=dialect))
+    
+    if len(rows) > IMPORT_MAX_ROWS:
+        raise ValueError(f"En fazla {IMPORT_MAX_ROWS:,} satır içe aktarılabilir")
+    return [{_import_key(k): (v.strip() if isinstance(v, str) else v)
+             for k, v in row.items() if k is not None} for row in rows]
+
+def _import_key(header: Any) -> str:
+    """Kolon başlığını alan adına çevirir: 'İşlem Tarihi' -> 'islem_tarihi'."""
+    return re.sub(r'[^a-z0-9]+', '_', _normalize_prefix_text(str(header or ''))).strip('_')
+
+def open_import_text(stream) -> io.TextIOWrapper:
+    """
+    Yüklenen ikili dosya akışını metin akışına çevirir (dosya belleğe alınmaz).
+    UTF-8 olmayan dosyalar Windows-1254 kabul edilir (Türk bankalarının CSV çıktıları).
+    """
+    # Werkzeug yüklemeleri SpooledTemporaryFile olarak verir; Python 3.10'da
+    # bu sınıf readable()/seekable() sağlamadığından TextIOWrapper asıl dosya
+    # nesnesine (BytesIO ya da geçici dosya) sarılır.
+    stream = getattr(stream, '_file', stream)
+    sample = stream.read(65536)
+    stream.seek(0)
+    try:
+        # final=False: örneğin sonunda bölünmüş çok baytlı karakter hata sayılmaz
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'cp1254'
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
+def parse_import_amount(value: Any) -> Optional[float]:
+    """'1.234,56', '1,234.56', '1234.56 TL' gibi tutarları float'a çevirir."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = re.sub(r'[^\d,.\-+]', '', str(value or ''))
+    if not text:
+        return None
+    if ',' in text and '.' in text:
+        # Sonda gelen ayraç ondalık ayraçtır
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        text = text.replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def parse_import_date(value: Any) -> Optional[str]:
+    """Desteklenen tarih biçimlerini 'YYYY-MM-DD' metnine çevirir."""
+    text = str(value or '').strip()[:10]
+    match = _ISO_DATE_RE.match(text)
+    if match:
+        year, month, day = match.groups()
+    else:
+        match = _TR_DATE_RE.match(text)
+        if not match:
+            return None
+        day, _, month, year = match.groups()
+    try:
+        datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+def _customer_ids_by_name(cursor) -> Dict[str, Optional[int]]:
+    """
+    İçe aktarmada cari adını id'ye çevirmek için (katlanmış ad -> id). Birden
+    fazla aktif carinin paylaştığı adlar None'a eşlenir (belirsiz eşleşme).
+    """
+    cursor.execute("SELECT id, name FROM customers WHERE is_active = 1 ORDER BY id")
+    customers = {}
+    for row in cursor.fetchall():
+        name = _normalize_prefix_text(row['name']).strip()
+        customers[name] = None if name in customers else row['id']
+    return customers
+
+def _active_customer_ids(cursor) -> set:
+    """İçe aktarmada customer_id doğrulaması için aktif cari id'leri."""
+    cursor.execute("SELECT id FROM customers WHERE is_active = 1")
+    return {row[0] for row in cursor.fetchall()}
+
+def _customer_ids_by_tax_number(cursor) -> Dict[str, int]:
+    """İçe aktarmada VKN/TCKN'yi id'ye çevirmek için (sadece rakamlar -> id)."""
+    cursor.execute("SELECT id, tax_number FROM customers "
+                   "WHERE is_active = 1 AND tax_number IS NOT NULL AND tax_number != '' ORDER BY id")
+    return {_NON_DIGIT_RE.sub('', row['tax_number']): row['id'] for row in cursor.fetchall()}
+
+# Banka ekstresi kolonları: alan -> kabul edilen başlıklar (_import_key ile katlanmış)
+BANK_STATEMENT_COLUMNS = {
+    'transaction_date': ('transaction_date', 'tarih', 'islem_tarihi', 'valor', 'valor_tarihi', 'date'),
+    'description': ('description', 'aciklama', 'islem_aciklamasi', 'aciklamalar'),
+    'amount': ('amount', 'tutar', 'islem_tutari', 'tutar_tl'),
+    'debit': ('debit', 'borc', 'cikan', 'giden_tutar'),
+    'credit': ('credit', 'alacak', 'giren', 'gelen_tutar'),
+    'transaction_type': ('transaction_type', 'islem_turu', 'tur'),
+    'reference_no': ('reference_no', 'dekont_no', 'referans', 'referans_no', 'islem_no', 'fis_no'),
+    'counterparty': ('counterparty', 'karsi_taraf', 'gonderen', 'alici', 'customer_name', 'musteri'),
+    'tax_number': ('tax_number', 'vkn', 'tckn', 'vergi_no', 'vergi_numarasi'),
+    'customer_id': ('customer_id', 'cari_id'),
+    'category': ('category', 'kategori'),
+}
+BANK_STATEMENT_PREAMBLE_MAX = 30
+
+def iter_bank_statement(text_stream, column_map: Dict[str, str] = None):
+    """
+    Banka ekstresi CSV'sini satır satır okur; her satırı BANK_STATEMENT_COLUMNS
+    alanlarına eşlenmiş sözlük olarak üretir (100 bin satırlık dosya da belleğe
+    alınmaz). Başlık satırı, baştaki hesap bilgisi satırları atlanarak tarih ve
+    tutar (ya da borç/alacak) kolonu içeren ilk satırdır.
+    column_map: {'alan': 'Dosyadaki Başlık'} ile otomatik eşleme ezilebilir.
+    Okuma hatalarında ValueError yükseltir.
+    """
+    columns = dict(BANK_STATEMENT_COLUMNS)
+    for field, header in (column_map or {}).items():
+        columns[field] = (_import_key(header),)
+    
+    # Ayraç ilk 8 KB'tan tahmin edilir; örnek akıştan geri sarmadan satır başına tamamlanır
+    sample = text_stream.read(8192)
+    sample += text_stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(itertools.chain(io.StringIO(sample), text_stream), dialect)
+    
+    try:
+        index = None
+        for line_no, cells in enumerate(reader, start=1):
+            keys = [_import_key(cell) for cell in cells]
+            found = {}
+            for field, aliases in columns.items():
+                position = next((keys.index(a) for a in aliases if a in keys), None)
+                if position is not None:
+                    found[field] = position
+            if 'transaction_date' in found and found.keys() & {'amount', 'debit', 'credit'}:
+                index = found
+                break
+            if line_no >= BANK_STATEMENT_PREAMBLE_MAX:
+                break
+        if index is None:
+            raise ValueError("Başlık satırı bulunamadı (tarih ve tutar kolonları gerekli)")
+        
+        for cells in reader:
+            row = {field: cells[i].strip() for field, i in index.items() if i < len(cells)}
+            if any(row.values()):
+                yield row
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"Dosya okunamadı: {e}") from e
+
 # ============================================================================
 # ÇEK/SENET YÖNETİMİ (TAM ÖZELLİKLİ)
 # ============================================================================
@@ -1174,156 +3126,332 @@ def add_check(check_type: str, payment_type: str, check_number: str,
               created_by: int = 1) -> Tuple[bool, str, int]:
     """Yeni çek/senet ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if not issue_date:
-            issue_date = datetime.now().strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            INSERT INTO checks (
-                check_type, payment_type, customer_id, check_number,
-                bank_name, bank_branch, bank_code, account_number, iban,
-                amount, issue_date, due_date, drawer_name, drawer_tax_no,
-                notes, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (check_type, payment_type, customer_id, check_number,
-              bank_name, bank_branch, bank_code, account_number, iban,
-              amount, issue_date, due_date, drawer_name, drawer_tax_no,
-              notes, created_by))
-        
-        check_id = cursor.lastrowid
-        
-        # İlk hareket kaydı
-        cursor.execute('''
-            INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (check_id, 'created', amount, 'Çek/Senet oluşturuldu', created_by))
-        
-        # Otomatik hatırlatıcı oluştur (ayarlardan kontrol)
-        auto_reminder = get_setting('reminder', 'auto_create_check_reminder', True)
-        reminder_days = get_setting('reminder', 'check_reminder_days', 3)
-        
-        if auto_reminder:
-            reminder_date = (datetime.strptime(due_date, '%Y-%m-%d') - timedelta(days=reminder_days)).strftime('%Y-%m-%d')
-            type_text = 'Çek' if payment_type == 'check' else 'Senet'
-            direction_text = 'Alınan' if check_type == 'incoming' else 'Verilen'
+        with transaction('checks', 'reminders') as cursor:
+            if not issue_date:
+                issue_date = datetime.now().strftime('%Y-%m-%d')
             
             cursor.execute('''
-                INSERT INTO reminders (title, description, reminder_type, priority, due_date,
-                                      related_customer_id, related_check_id, created_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (f"{direction_text} {type_text} Vadesi - {check_number}",
-                  f"Tutar: {amount:,.2f} TL\nVade: {due_date}",
-                  'check', 'high', reminder_date, customer_id, check_id, created_by))
-        
-        conn.commit()
-        log_activity(created_by, 'create', 'check', check_id)
-        conn.close()
+                INSERT INTO checks (
+                    check_type, payment_type, customer_id, check_number,
+                    bank_name, bank_branch, bank_code, account_number, iban,
+                    amount, issue_date, due_date, drawer_name, drawer_tax_no,
+                    notes, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (check_type, payment_type, customer_id, check_number,
+                  bank_name, bank_branch, bank_code, account_number, iban,
+                  amount, issue_date, due_date, drawer_name, drawer_tax_no,
+                  notes, created_by))
+            
+            check_id = cursor.lastrowid
+            
+            # İlk hareket kaydı
+            cursor.execute('''
+                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (check_id, 'created', amount, 'Çek/Senet oluşturuldu', created_by))
+            
+            # Otomatik hatırlatıcı oluştur (ayarlardan kontrol)
+            auto_reminder = get_setting('reminder', 'auto_create_check_reminder', True)
+            reminder_days = get_setting('reminder', 'check_reminder_days', 3)
+            
+            if auto_reminder:
+                reminder_date = (datetime.strptime(due_date, '%Y-%m-%d') - timedelta(days=reminder_days)).strftime('%Y-%m-%d')
+                type_text = 'Çek' if payment_type == 'check' else 'Senet'
+                direction_text = 'Alınan' if check_type == 'incoming' else 'Verilen'
+                
+                cursor.execute('''
+                    INSERT INTO reminders (title, description, reminder_type, priority, due_date,
+                                          related_customer_id, related_check_id, created_by)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (f"{direction_text} {type_text} Vadesi - {check_number}",
+                      f"Tutar: {amount:,.2f} TL\nVade: {due_date}",
+                      'check', 'high', reminder_date, customer_id, check_id, created_by))
+            
+            log_activity(created_by, 'create', 'check', check_id)
         
         return True, "Çek/Senet başarıyla eklendi!", check_id
     except sqlite3.Error as e:
         return False, f"Hata: {e}", 0
 
+# İçe aktarmada kabul edilen değerler (Türkçe karşılıkları dahil)
+CHECK_IMPORT_TYPES = {'incoming': 'incoming', 'alinan': 'incoming',
+                      'outgoing': 'outgoing', 'verilen': 'outgoing'}
+CHECK_IMPORT_PAYMENT_TYPES = {'check': 'check', 'cek': 'check',
+                              'promissory_note': 'promissory_note', 'senet': 'promissory_note'}
+CHECK_IMPORT_TEXT_FIELDS = ('bank_name', 'bank_branch', 'bank_code', 'account_number', 'iban',
+                            'drawer_name', 'drawer_tax_no', 'notes')
+
+def _validate_check_import_row(row: Dict, customers: Dict[str, int],
+                               customer_ids: set) -> Tuple[Optional[Dict], Optional[str]]:
+    """Tek satırı doğrular; (temiz satır, None) ya da (None, hata mesajı) döndürür."""
+    if not isinstance(row, dict):
+        return None, "Satır nesne (kolon -> değer) olmalı"
+    check_type = CHECK_IMPORT_TYPES.get(_normalize_prefix_text(str(row.get('check_type') or '')))
+    if not check_type:
+        return None, "check_type 'incoming' ya da 'outgoing' olmalı"
+    payment_type = CHECK_IMPORT_PAYMENT_TYPES.get(
+        _normalize_prefix_text(str(row.get('payment_type') or 'check')))
+    if not payment_type:
+        return None, "payment_type 'check' ya da 'promissory_note' olmalı"
+    
+    check_number = str(row.get('check_number') or '').strip()
+    if not check_number:
+        return None, "check_number boş olamaz"
+    
+    amount = parse_import_amount(row.get('amount'))
+    if amount is None or amount <= 0:
+        return None, f"Geçersiz tutar: {row.get('amount')!r}"
+    
+    due_date = parse_import_date(row.get('due_date'))
+    if not due_date:
+        return None, f"Geçersiz vade tarihi: {row.get('due_date')!r}"
+    issue_date = None
+    if row.get('issue_date'):
+        issue_date = parse_import_date(row.get('issue_date'))
+        if not issue_date:
+            return None, f"Geçersiz düzenleme tarihi: {row.get('issue_date')!r}"
+    
+    customer_id = None
+    if row.get('customer_id'):
+        try:
+            customer_id = int(row['customer_id'])
+        except (TypeError, ValueError):
+            customer_id = None
+        if customer_id not in customer_ids:
+            return None, f"Cari bulunamadı: id={row['customer_id']}"
+    elif row.get('customer_name'):
+        name = _normalize_prefix_text(str(row['customer_name'])).strip()
+        if name not in customers:
+            return None, f"Cari bulunamadı: {row['customer_name']}"
+        customer_id = customers[name]
+        if customer_id is None:
+            return None, f"Birden fazla cari aynı adı taşıyor, customer_id verin: {row['customer_name']}"
+    
+    clean = {field: str(row.get(field) or '') for field in CHECK_IMPORT_TEXT_FIELDS}
+    clean.update(check_type=check_type, payment_type=payment_type, check_number=check_number,
+                 amount=amount, due_date=due_date, issue_date=issue_date, customer_id=customer_id)
+    return clean, None
+
+def import_checks(rows: List[Dict], created_by: int = 1, dry_run: bool = False) -> Dict:
+    """
+    Çek/Senetleri toplu ekler (add_check'in toplu karşılığı).
+    
+    Satırlar önce topluca doğrulanır; geçerli olanlar tek transaction'da
+    executemany ile eklenir, ayarlar bir kez okunur ve hatırlatıcılar çekler
+    eklendikten sonra tek seferde üretilir. Hatalı satırlar atlanır ve
+    raporlanır (satır numaraları 1'den başlar). dry_run=True sadece doğrular.
+    
+    Sonuç: {'total', 'valid', 'imported', 'errors': [{'row', 'error'}], 'check_ids'}
+    """
+    result = {'total': len(rows), 'valid': 0, 'imported': 0, 'errors': [], 'check_ids': []}
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            customers = _customer_ids_by_name(cursor)
+            customer_ids = _active_customer_ids(cursor)
+    except sqlite3.Error as e:
+        result['errors'].append({'row': None, 'error': f"Hata: {e}"})
+        return result
+    
+    valid = []
+    seen = set()
+    for index, row in enumerate(rows, start=1):
+        clean, error = _validate_check_import_row(row, customers, customer_ids)
+        if clean:
+            key = (clean['check_type'], clean['check_number'], clean['bank_name'])
+            if key in seen:
+                clean, error = None, f"Dosyada tekrar eden çek: {clean['check_number']}"
+            seen.add(key)
+        if error:
+            result['errors'].append({'row': index, 'error': error})
+        else:
+            valid.append(clean)
+    
+    result['valid'] = len(valid)
+    if dry_run or not valid:
+        return result
+    
+    try:
+        with transaction('checks', 'reminders') as cursor:
+            today = datetime.now().strftime('%Y-%m-%d')
+            # id'ler burada verilir; yazma kilidi bizde olduğu için başka ekleme araya giremez
+            cursor.execute("SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'checks'), 0), "
+                           "COALESCE((SELECT MAX(id) FROM checks), 0))")
+            first_id = cursor.fetchone()[0] + 1
+            
+            cursor.executemany('''
+                INSERT INTO checks (
+                    id, check_type, payment_type, customer_id, check_number,
+                    bank_name, bank_branch, bank_code, account_number, iban,
+                    amount, issue_date, due_date, drawer_name, drawer_tax_no,
+                    notes, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ((first_id + i, c['check_type'], c['payment_type'], c['customer_id'],
+                   c['check_number'], c['bank_name'], c['bank_branch'], c['bank_code'],
+                   c['account_number'], c['iban'], c['amount'], c['issue_date'] or today,
+                   c['due_date'], c['drawer_name'], c['drawer_tax_no'], c['notes'], created_by)
+                  for i, c in enumerate(valid)))
+            check_ids = list(range(first_id, first_id + len(valid)))
+            
+            cursor.executemany('''
+                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                VALUES (?, 'created', ?, 'Çek/Senet oluşturuldu', ?)
+            ''', ((check_id, c['amount'], created_by) for check_id, c in zip(check_ids, valid)))
+            
+            # Hatırlatıcılar: ayarlar satır başına değil, bir kez okunur
+            if get_setting('reminder', 'auto_create_check_reminder', True):
+                reminder_days = get_setting('reminder', 'check_reminder_days', 3)
+                cursor.executemany('''
+                    INSERT INTO reminders (title, description, reminder_type, priority, due_date,
+                                          related_customer_id, related_check_id, created_by)
+                    VALUES (?, ?, 'check', 'high', ?, ?, ?, ?)
+                ''', ((f"{'Alınan' if c['check_type'] == 'incoming' else 'Verilen'} "
+                       f"{'Çek' if c['payment_type'] == 'check' else 'Senet'} Vadesi - {c['check_number']}",
+                       f"Tutar: {c['amount']:,.2f} TL\nVade: {c['due_date']}",
+                       (datetime.fromisoformat(c['due_date'])
+                        - timedelta(days=reminder_days)).strftime('%Y-%m-%d'),
+                       c['customer_id'], check_id, created_by)
+                      for check_id, c in zip(check_ids, valid)))
+            
+            # add_check gibi her çek için 'create' kaydı + aktarımın özeti
+            cursor.executemany(_ACTIVITY_INSERT_SQL, (
+                _activity_record(created_by, 'create', 'check', check_id) for check_id in check_ids))
+            _write_activity(cursor, created_by, 'import', 'check', None,
+                            new_values={'count': len(valid), 'first_id': first_id,
+                                        'last_id': check_ids[-1]})
+        result['imported'] = len(valid)
+        result['check_ids'] = check_ids
+        return result
+    except sqlite3.Error as e:
+        result['errors'].append({'row': None, 'error': f"Hata: {e}"})
+        return result
+
 def update_check(check_id: int, **kwargs) -> Tuple[bool, str]:
     """Çek/Senet günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [check_id]
-        
-        cursor.execute(f"UPDATE checks SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [check_id]
+            
+            cursor.execute(f"UPDATE checks SET {fields} WHERE id = ?", values)
+            conn.commit()
+            _invalidate('checks')
         return True, "Çek/Senet güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+# Çek sayfaları: vadeye göre, aynı vadede id ile kararlı sıralama
+CHECK_PAGE_KEYS = [('c.due_date', 'due_date', False, None), ('c.id', 'id', False, None)]
+
+def _check_list_query(check_type: str = None, status: str = None,
+                      customer_id: int = None, start_date: str = None,
+                      end_date: str = None, search: str = None) -> Tuple[str, List]:
+    """Çek listesi sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    bounds = date_bounds()
+    query = '''
+        SELECT c.*, 
+               cu.name as customer_name,
+               cu.phone as customer_phone,
+               u.full_name as created_by_name,
+               (c.amount - c.paid_amount) as remaining_amount,
+               CASE 
+                   WHEN c.status = 'pending' AND c.due_date < ? THEN 'overdue'
+                   WHEN c.status = 'pending' AND c.due_date < ? THEN 'upcoming'
+                   ELSE c.status
+               END as display_status,
+               CAST(julianday(c.due_date) - julianday('now') AS INTEGER) as days_until_due
+        FROM checks c
+        LEFT JOIN customers cu ON c.customer_id = cu.id
+        LEFT JOIN users u ON c.created_by = u.id
+        WHERE 1=1
+    '''
+    params = [bounds['today'], bounds['week_end']]
+    
+    if check_type:
+        query += " AND c.check_type = ?"
+        params.append(check_type)
+    
+    if status:
+        if status in ('overdue', 'upcoming'):
+            period = 'overdue' if status == 'overdue' else 'next_7_days'
+            clause, extra = due_period_sql('c.due_date', period, bounds)
+            query += f" AND c.status = 'pending' AND {clause}"
+            params.extend(extra)
+        else:
+            query += " AND c.status = ?"
+            params.append(status)
+    
+    if customer_id:
+        query += " AND c.customer_id = ?"
+        params.append(customer_id)
+    
+    if start_date:
+        query += " AND c.due_date >= ?"
+        params.append(start_date)
+    
+    if end_date:
+        query += " AND c.due_date <= ?"
+        params.append(end_date)
+    
+    match = fts_query(search)
+    if match:
+        # Çek numarası/banka (checks_fts) ya da carinin adı (customers_fts) üzerinden eşleşme
+        query += (f" AND ({_fts_filter('checks_fts', 'c.id')}"
+                  f" OR {_fts_filter('customers_fts', 'c.customer_id')})")
+        params.extend([match, match])
+    
+    return query, params
+
 def get_all_checks(check_type: str = None, status: str = None, 
                    customer_id: int = None, start_date: str = None,
                    end_date: str = None, search: str = None,
                    order_by: str = 'due_date') -> List[Dict]:
     """Çek/Senetleri listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT c.*, 
-                   cu.name as customer_name,
-                   cu.phone as customer_phone,
-                   u.full_name as created_by_name,
-                   (c.amount - c.paid_amount) as remaining_amount,
-                   CASE 
-                       WHEN c.status = 'pending' AND date(c.due_date) < date('now') THEN 'overdue'
-                       WHEN c.status = 'pending' AND date(c.due_date) <= date('now', '+7 days') THEN 'upcoming'
-                       ELSE c.status
-                   END as display_status,
-                   CAST(julianday(c.due_date) - julianday('now') AS INTEGER) as days_until_due
-            FROM checks c
-            LEFT JOIN customers cu ON c.customer_id = cu.id
-            LEFT JOIN users u ON c.created_by = u.id
-            WHERE 1=1
-        '''
-        params = []
-        
-        if check_type:
-            query += " AND c.check_type = ?"
-            params.append(check_type)
-        
-        if status:
-            if status == 'overdue':
-                query += " AND c.status = 'pending' AND date(c.due_date) < date('now')"
-            elif status == 'upcoming':
-                query += " AND c.status = 'pending' AND date(c.due_date) >= date('now') AND date(c.due_date) <= date('now', '+7 days')"
-            else:
-                query += " AND c.status = ?"
-                params.append(status)
-        
-        if customer_id:
-            query += " AND c.customer_id = ?"
-            params.append(customer_id)
-        
-        if start_date:
-            query += " AND c.due_date >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND c.due_date <= ?"
-            params.append(end_date)
-        
-        if search:
-            query += " AND (c.check_number LIKE ? OR c.bank_name LIKE ? OR cu.name LIKE ?)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
-        
-        query += f" ORDER BY c.{order_by}"
-        
-        cursor.execute(query, params)
-        checks = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _check_list_query(check_type, status, customer_id,
+                                              start_date, end_date, search)
+            query += f" ORDER BY c.{order_by}"
+            
+            cursor.execute(query, params)
+            checks = [dict(row) for row in cursor.fetchall()]
         return checks
     except sqlite3.Error as e:
         print(f"❌ Çek listeleme hatası: {e}")
         return []
 
+def get_checks_page(check_type: str = None, status: str = None,
+                    customer_id: int = None, start_date: str = None,
+                    end_date: str = None, search: str = None,
+                    cursor: str = None, page_size: int = None) -> Dict:
+    """Çek/Senetleri vadeye göre sayfa sayfa listeler (bkz. _fetch_page)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            query, params = _check_list_query(check_type, status, customer_id,
+                                              start_date, end_date, search)
+            return _fetch_page(conn, query, params, CHECK_PAGE_KEYS, cursor, page_size)
+    except sqlite3.Error as e:
+        print(f"❌ Çek listeleme hatası: {e}")
+        return _empty_page(page_size)
+
 def get_check_by_id(check_id: int) -> Optional[Dict]:
     """ID ile çek getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT c.*, cu.name as customer_name, cu.phone as customer_phone,
-                   (c.amount - c.paid_amount) as remaining_amount
-            FROM checks c
-            LEFT JOIN customers cu ON c.customer_id = cu.id
-            WHERE c.id = ?
-        ''', (check_id,))
-        check = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT c.*, cu.name as customer_name, cu.phone as customer_phone,
+                       (c.amount - c.paid_amount) as remaining_amount
+                FROM checks c
+                LEFT JOIN customers cu ON c.customer_id = cu.id
+                WHERE c.id = ?
+            ''', (check_id,))
+            check = cursor.fetchone()
         return dict_from_row(check)
     except sqlite3.Error:
         return None
@@ -1335,146 +3463,142 @@ def process_check_payment(check_id: int, amount: float = None, status: str = 'ca
     status: 'cashed' (tam tahsil), 'partial' (kısmi), 'returned' (iade), 'cancelled' (iptal)
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Çeki getir
-        cursor.execute('SELECT * FROM checks WHERE id = ?', (check_id,))
-        check = cursor.fetchone()
-        if not check:
-            conn.close()
-            return False, "Çek/Senet bulunamadı!"
-        check = dict(check)
-        
-        if check['status'] != 'pending':
-            conn.close()
-            return False, "Bu çek zaten işlenmiş!"
-        
-        remaining = check['amount'] - check['paid_amount']
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        if status == 'partial':
-            # Kısmi tahsilat
-            if not amount or amount <= 0:
-                conn.close()
-                return False, "Geçerli bir tutar giriniz!"
-            
-            if amount > remaining:
-                amount = remaining
+        # Çek, hareket, kasa, cari bakiye, hatırlatıcı ve log tek commit'te yazılır
+        with transaction('checks', 'cash', 'customers', 'reminders') as cursor:
+            # Çeki getir
+            cursor.execute('SELECT * FROM checks WHERE id = ?', (check_id,))
+            check = cursor.fetchone()
+            if not check:
+                return False, "Çek/Senet bulunamadı!"
+            check = dict(check)
             
-            new_paid = check['paid_amount'] + amount
-            new_status = 'cashed' if new_paid >= check['amount'] else 'pending'
+            if check['status'] != 'pending':
+                return False, "Bu çek zaten işlenmiş!"
             
-            cursor.execute('''
-                UPDATE checks SET paid_amount = ?, status = ?, updated_at = ? WHERE id = ?
-            ''', (new_paid, new_status, now, check_id))
-            
-            cursor.execute('''
-                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (check_id, 'partial_payment', amount, description or f"Kısmi tahsilat", created_by))
+            remaining = check['amount'] - check['paid_amount']
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            today = datetime.now().strftime('%Y-%m-%d')
             
-            # Kasaya gelir ekle (alınan çek ise)
-            if check['check_type'] == 'incoming':
+            if status == 'partial':
+                # Kısmi tahsilat
+                if not amount or amount <= 0:
+                    return False, "Geçerli bir tutar giriniz!"
+                
+                if amount > remaining:
+                    amount = remaining
+                
+                new_paid = check['paid_amount'] + amount
+                new_status = 'cashed' if new_paid >= check['amount'] else 'pending'
+                
                 cursor.execute('''
-                    INSERT INTO cash_flow (transaction_type, category, amount, description, 
-                                          customer_id, check_id, payment_method, transaction_date, created_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', ('income', 'Çek/Senet Tahsilatı', amount,
-                      f"Çek No: {check['check_number']} - Kısmi Tahsilat",
-                      check['customer_id'], check_id, 'check', today, created_by))
+                    UPDATE checks SET paid_amount = ?, status = ?, updated_at = ? WHERE id = ?
+                ''', (new_paid, new_status, now, check_id))
                 
-                # Müşteri bakiyesini güncelle
-                if check['customer_id']:
-                    update_customer_balance(check['customer_id'], amount,
-                                           f"Çek tahsilatı: {check['check_number']}",
-                                           'check', check_id, today, None, created_by)
-            
-            message = f"Kısmi tahsilat yapıldı: {amount:,.2f} TL"
-            
-        elif status == 'cashed':
-            # Tam tahsilat
-            amount = remaining
-            
-            cursor.execute('''
-                UPDATE checks SET paid_amount = amount, status = 'cashed', updated_at = ? WHERE id = ?
-            ''', (now, check_id))
-            
-            cursor.execute('''
-                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (check_id, 'cashed', amount, description or "Tam tahsilat", created_by))
-            
-            if check['check_type'] == 'incoming' and amount > 0:
                 cursor.execute('''
-                    INSERT INTO cash_flow (transaction_type, category, amount, description, 
-                                          customer_id, check_id, payment_method, transaction_date, created_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', ('income', 'Çek/Senet Tahsilatı', amount,
-                      f"Çek No: {check['check_number']} - Tahsil Edildi",
-                      check['customer_id'], check_id, 'check', today, created_by))
+                    INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (check_id, 'partial_payment', amount, description or f"Kısmi tahsilat", created_by))
+                
+                # Kasaya gelir ekle (alınan çek ise)
+                if check['check_type'] == 'incoming':
+                    cursor.execute('''
+                        INSERT INTO cash_flow (transaction_type, category, amount, description, 
+                                              customer_id, check_id, payment_method, transaction_date, created_by)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', ('income', 'Çek/Senet Tahsilatı', amount,
+                          f"Çek No: {check['check_number']} - Kısmi Tahsilat",
+                          check['customer_id'], check_id, 'check', today, created_by))
+                    _add_cash_rollup(cursor, today, 'income', 'Çek/Senet Tahsilatı', amount)
+                    
+                    # Müşteri bakiyesini güncelle
+                    if check['customer_id']:
+                        _apply_customer_balance(cursor, check['customer_id'], amount,
+                                                f"Çek tahsilatı: {check['check_number']}",
+                                                'check', check_id, today, None, created_by)
+                
+                message = f"Kısmi tahsilat yapıldı: {amount:,.2f} TL"
+                
+            elif status == 'cashed':
+                # Tam tahsilat
+                amount = remaining
                 
-                if check['customer_id']:
-                    update_customer_balance(check['customer_id'], amount,
-                                           f"Çek tahsilatı: {check['check_number']}",
-                                           'check', check_id, today, None, created_by)
-            
-            # İlgili hatırlatıcıları tamamla
-            cursor.execute('''
-                UPDATE reminders SET status = 'completed', completed_at = ?
-                WHERE related_check_id = ? AND status = 'pending'
-            ''', (now, check_id))
-            
-            message = "Çek/Senet tahsil edildi!"
-            
-        elif status == 'returned':
-            # İade/Karşılıksız
-            cursor.execute('''
-                UPDATE checks SET status = 'returned', updated_at = ? WHERE id = ?
-            ''', (now, check_id))
-            
-            cursor.execute('''
-                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (check_id, 'returned', 0, description or "İade/Karşılıksız", created_by))
-            
-            # Daha önce kısmi tahsilat yapıldıysa iade et
-            if check['paid_amount'] > 0 and check['check_type'] == 'incoming':
                 cursor.execute('''
-                    INSERT INTO cash_flow (transaction_type, category, amount, description, 
-                                          customer_id, check_id, payment_method, transaction_date, created_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', ('expense', 'Çek/Senet İadesi', check['paid_amount'],
-                      f"Çek No: {check['check_number']} - Karşılıksız İade",
-                      check['customer_id'], check_id, 'check', today, created_by))
+                    UPDATE checks SET paid_amount = amount, status = 'cashed', updated_at = ? WHERE id = ?
+                ''', (now, check_id))
                 
-                if check['customer_id']:
-                    update_customer_balance(check['customer_id'], -check['paid_amount'],
-                                           f"Karşılıksız çek iadesi: {check['check_number']}",
-                                           'check', check_id, today, None, created_by)
-            
-            message = "Çek/Senet iade edildi!"
-            
-        elif status == 'cancelled':
-            cursor.execute('''
-                UPDATE checks SET status = 'cancelled', updated_at = ? WHERE id = ?
-            ''', (now, check_id))
+                cursor.execute('''
+                    INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (check_id, 'cashed', amount, description or "Tam tahsilat", created_by))
+                
+                if check['check_type'] == 'incoming' and amount > 0:
+                    cursor.execute('''
+                        INSERT INTO cash_flow (transaction_type, category, amount, description, 
+                                              customer_id, check_id, payment_method, transaction_date, created_by)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', ('income', 'Çek/Senet Tahsilatı', amount,
+                          f"Çek No: {check['check_number']} - Tahsil Edildi",
+                          check['customer_id'], check_id, 'check', today, created_by))
+                    _add_cash_rollup(cursor, today, 'income', 'Çek/Senet Tahsilatı', amount)
+                    
+                    if check['customer_id']:
+                        _apply_customer_balance(cursor, check['customer_id'], amount,
+                                                f"Çek tahsilatı: {check['check_number']}",
+                                                'check', check_id, today, None, created_by)
+                
+                # İlgili hatırlatıcıları tamamla
+                cursor.execute('''
+                    UPDATE reminders SET status = 'completed', completed_at = ?
+                    WHERE related_check_id = ? AND status = 'pending'
+                ''', (now, check_id))
+                
+                message = "Çek/Senet tahsil edildi!"
+                
+            elif status == 'returned':
+                # İade/Karşılıksız
+                cursor.execute('''
+                    UPDATE checks SET status = 'returned', updated_at = ? WHERE id = ?
+                ''', (now, check_id))
+                
+                cursor.execute('''
+                    INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (check_id, 'returned', 0, description or "İade/Karşılıksız", created_by))
+                
+                # Daha önce kısmi tahsilat yapıldıysa iade et
+                if check['paid_amount'] > 0 and check['check_type'] == 'incoming':
+                    cursor.execute('''
+                        INSERT INTO cash_flow (transaction_type, category, amount, description, 
+                                              customer_id, check_id, payment_method, transaction_date, created_by)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', ('expense', 'Çek/Senet İadesi', check['paid_amount'],
+                          f"Çek No: {check['check_number']} - Karşılıksız İade",
+                          check['customer_id'], check_id, 'check', today, created_by))
+                    _add_cash_rollup(cursor, today, 'expense', 'Çek/Senet İadesi', check['paid_amount'])
+                    
+                    if check['customer_id']:
+                        _apply_customer_balance(cursor, check['customer_id'], -check['paid_amount'],
+                                                f"Karşılıksız çek iadesi: {check['check_number']}",
+                                                'check', check_id, today, None, created_by)
+                
+                message = "Çek/Senet iade edildi!"
+                
+            elif status == 'cancelled':
+                cursor.execute('''
+                    UPDATE checks SET status = 'cancelled', updated_at = ? WHERE id = ?
+                ''', (now, check_id))
+                
+                cursor.execute('''
+                    INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (check_id, 'cancelled', 0, description or "İptal edildi", created_by))
+                
+                message = "Çek/Senet iptal edildi!"
             
-            cursor.execute('''
-                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (check_id, 'cancelled', 0, description or "İptal edildi", created_by))
+            else:
+                return False, "Geçersiz işlem türü!"
             
-            message = "Çek/Senet iptal edildi!"
-        
-        else:
-            conn.close()
-            return False, "Geçersiz işlem türü!"
-        
-        conn.commit()
-        log_activity(created_by, f'check_{status}', 'check', check_id)
-        conn.close()
+            _write_activity(cursor, created_by, f'check_{status}', 'check', check_id)
         return True, message
         
     except sqlite3.Error as e:
@@ -1485,47 +3609,41 @@ def endorse_check(check_id: int, endorser_name: str, endorser_tax_no: str = "",
                   description: str = "", created_by: int = 1) -> Tuple[bool, str]:
     """Çek ciro eder."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Çeki kontrol et
-        cursor.execute('SELECT * FROM checks WHERE id = ? AND status = ?', (check_id, 'pending'))
-        check = cursor.fetchone()
-        if not check:
-            conn.close()
-            return False, "Çek bulunamadı veya ciro edilemez durumda!"
-        check = dict(check)
-        
-        if check['check_type'] != 'incoming':
-            conn.close()
-            return False, "Sadece alınan çekler ciro edilebilir!"
-        
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            UPDATE checks SET 
-                status = 'endorsed', is_endorsed = 1,
-                endorser_name = ?, endorser_tax_no = ?, endorser_phone = ?,
-                endorsement_date = ?, endorsed_to = ?, updated_at = ?
-            WHERE id = ?
-        ''', (endorser_name, endorser_tax_no, endorser_phone, today, endorsed_to, now, check_id))
-        
-        cursor.execute('''
-            INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (check_id, 'endorsed', check['amount'], 
-              description or f"Ciro: {endorser_name}", created_by))
-        
-        # Hatırlatıcıyı tamamla
-        cursor.execute('''
-            UPDATE reminders SET status = 'completed', completed_at = ?
-            WHERE related_check_id = ? AND status = 'pending'
-        ''', (now, check_id))
-        
-        conn.commit()
-        log_activity(created_by, 'endorse', 'check', check_id)
-        conn.close()
+        with transaction('checks', 'reminders') as cursor:
+            # Çeki kontrol et
+            cursor.execute('SELECT * FROM checks WHERE id = ? AND status = ?', (check_id, 'pending'))
+            check = cursor.fetchone()
+            if not check:
+                return False, "Çek bulunamadı veya ciro edilemez durumda!"
+            check = dict(check)
+            
+            if check['check_type'] != 'incoming':
+                return False, "Sadece alınan çekler ciro edilebilir!"
+            
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            today = datetime.now().strftime('%Y-%m-%d')
+            
+            cursor.execute('''
+                UPDATE checks SET 
+                    status = 'endorsed', is_endorsed = 1,
+                    endorser_name = ?, endorser_tax_no = ?, endorser_phone = ?,
+                    endorsement_date = ?, endorsed_to = ?, updated_at = ?
+                WHERE id = ?
+            ''', (endorser_name, endorser_tax_no, endorser_phone, today, endorsed_to, now, check_id))
+            
+            cursor.execute('''
+                INSERT INTO check_transactions (check_id, transaction_type, amount, description, created_by)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (check_id, 'endorsed', check['amount'], 
+                  description or f"Ciro: {endorser_name}", created_by))
+            
+            # Hatırlatıcıyı tamamla
+            cursor.execute('''
+                UPDATE reminders SET status = 'completed', completed_at = ?
+                WHERE related_check_id = ? AND status = 'pending'
+            ''', (now, check_id))
+            
+            log_activity(created_by, 'endorse', 'check', check_id)
         return True, "Çek başarıyla ciro edildi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -1533,85 +3651,69 @@ def endorse_check(check_id: int, endorser_name: str, endorser_tax_no: str = "",
 def get_check_transactions(check_id: int) -> List[Dict]:
     """Çek hareket geçmişini getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT ct.*, u.full_name as created_by_name
-            FROM check_transactions ct
-            LEFT JOIN users u ON ct.created_by = u.id
-            WHERE ct.check_id = ?
-            ORDER BY ct.transaction_date DESC
-        ''', (check_id,))
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT ct.*, u.full_name as created_by_name
+                FROM check_transactions ct
+                LEFT JOIN users u ON ct.created_by = u.id
+                WHERE ct.check_id = ?
+                ORDER BY ct.transaction_date DESC
+            ''', (check_id,))
+            transactions = [dict(row) for row in cursor.fetchall()]
         return transactions
     except sqlite3.Error:
         return []
 
+# Çek özeti: bekleyen/ciro edilmiş çekler kapsayan indeks üzerinden tek geçişte,
+# durum ve tür bazında gruplanarak toplanır. Tarih sınırları date_bounds() ile
+# sorgu başına bir kez hesaplanıp parametre olarak verilir; vade kolonları
+# fonksiyona sarılmaz.
+CHECKS_SUMMARY_SQL = '''
+    SELECT c.status, c.check_type,
+           COUNT(*) as count,
+           COALESCE(SUM(c.amount), 0) as amount,
+           COALESCE(SUM(c.amount - c.paid_amount), 0) as open_amount,
+           COUNT(*) FILTER (WHERE c.due_date < :today) as overdue_count,
+           COALESCE(SUM(c.amount - c.paid_amount) FILTER (WHERE c.due_date < :today), 0) as overdue_amount,
+           COUNT(*) FILTER (WHERE c.due_date >= :today AND c.due_date < :week_end) as this_week_count,
+           COALESCE(SUM(c.amount - c.paid_amount)
+                    FILTER (WHERE c.due_date >= :today AND c.due_date < :week_end), 0) as this_week_amount,
+           COUNT(*) FILTER (WHERE c.due_date >= :month_start AND c.due_date < :month_end) as this_month_count,
+           COALESCE(SUM(c.amount - c.paid_amount)
+                    FILTER (WHERE c.due_date >= :month_start AND c.due_date < :month_end), 0) as this_month_amount
+    FROM checks c
+    WHERE c.status IN ('pending', 'endorsed')
+    GROUP BY c.status, c.check_type
+'''
+
+CHECKS_SUMMARY_KEYS = ['incoming_pending_amount', 'incoming_pending_count',
+                       'outgoing_pending_amount', 'outgoing_pending_count',
+                       'overdue_count', 'overdue_amount',
+                       'this_week_count', 'this_week_amount',
+                       'this_month_count', 'this_month_amount',
+                       'endorsed_count', 'endorsed_amount']
+
 def get_checks_summary() -> Dict:
-    """Çek/Senet özet istatistikleri."""
+    """Çek/Senet özet istatistikleri (tek sorgu, tek geçiş)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        summary = {}
-        
-        # Alınan bekleyen
-        cursor.execute('''
-            SELECT COALESCE(SUM(amount - paid_amount), 0) as total, COUNT(*) as count
-            FROM checks WHERE check_type = 'incoming' AND status = 'pending'
-        ''')
-        row = cursor.fetchone()
-        summary['incoming_pending_amount'] = row['total']
-        summary['incoming_pending_count'] = row['count']
-        
-        # Verilen bekleyen
-        cursor.execute('''
-            SELECT COALESCE(SUM(amount - paid_amount), 0) as total, COUNT(*) as count
-            FROM checks WHERE check_type = 'outgoing' AND status = 'pending'
-        ''')
-        row = cursor.fetchone()
-        summary['outgoing_pending_amount'] = row['total']
-        summary['outgoing_pending_count'] = row['count']
-        
-        # Vadesi geçenler
-        cursor.execute('''
-            SELECT COUNT(*) as count, COALESCE(SUM(amount - paid_amount), 0) as total
-            FROM checks WHERE status = 'pending' AND date(due_date) < date('now')
-        ''')
-        row = cursor.fetchone()
-        summary['overdue_count'] = row['count']
-        summary['overdue_amount'] = row['total']
-        
-        # Bu hafta vadesi dolanlar
-        cursor.execute('''
-            SELECT COUNT(*) as count, COALESCE(SUM(amount - paid_amount), 0) as total
-            FROM checks WHERE status = 'pending' 
-            AND date(due_date) >= date('now') AND date(due_date) <= date('now', '+7 days')
-        ''')
-        row = cursor.fetchone()
-        summary['this_week_count'] = row['count']
-        summary['this_week_amount'] = row['total']
-        
-        # Bu ay vadesi dolanlar
-        cursor.execute('''
-            SELECT COUNT(*) as count, COALESCE(SUM(amount - paid_amount), 0) as total
-            FROM checks WHERE status = 'pending'
-            AND strftime('%Y-%m', due_date) = strftime('%Y-%m', 'now')
-        ''')
-        row = cursor.fetchone()
-        summary['this_month_count'] = row['count']
-        summary['this_month_amount'] = row['total']
-        
-        # Ciro edilenler
-        cursor.execute('''
-            SELECT COUNT(*) as count, COALESCE(SUM(amount), 0) as total
-            FROM checks WHERE status = 'endorsed'
-        ''')
-        row = cursor.fetchone()
-        summary['endorsed_count'] = row['count']
-        summary['endorsed_amount'] = row['total']
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            rows = conn.execute(CHECKS_SUMMARY_SQL, date_bounds()).fetchall()
+        
+        summary = dict.fromkeys(CHECKS_SUMMARY_KEYS, 0)
+        for row in rows:
+            if row['status'] == 'endorsed':
+                summary['endorsed_count'] += row['count']
+                summary['endorsed_amount'] += row['amount']
+                continue
+            
+            # Bekleyenler: tür bazında kalan tutar, vade bazında toplamlar
+            if row['check_type'] in ('incoming', 'outgoing'):
+                summary[f"{row['check_type']}_pending_amount"] += row['open_amount']
+                summary[f"{row['check_type']}_pending_count"] += row['count']
+            for key in ('overdue', 'this_week', 'this_month'):
+                summary[f'{key}_count'] += row[f'{key}_count']
+                summary[f'{key}_amount'] += row[f'{key}_amount']
         return summary
     except sqlite3.Error:
         return {}
@@ -1619,25 +3721,29 @@ def get_checks_summary() -> Dict:
 def get_upcoming_checks(days: int = 7) -> List[Dict]:
     """Vadesi yaklaşan çek/senetleri getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        today = datetime.now().date()
-        future_date = (today + timedelta(days=days)).strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            SELECT c.*, cu.name as customer_name,
-                   CAST(julianday(c.due_date) - julianday('now') AS INTEGER) as days_left
-            FROM checks c
-            LEFT JOIN customers cu ON c.customer_id = cu.id
-            WHERE c.status = 'pending'
-            AND c.due_date <= ?
-            AND c.due_date >= ?
-            ORDER BY c.due_date ASC
-        ''', (future_date, today.strftime('%Y-%m-%d')))
-        
-        checks = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            today = datetime.now().date()
+            future_date = (today + timedelta(days=days)).strftime('%Y-%m-%d')
+            
+            # Takvimde aralıkta bekleyen çek günü yoksa checks tablosuna inilmez
+            if not get_due_calendar_days(('check_incoming', 'check_outgoing'),
+                                         today.strftime('%Y-%m-%d'), future_date):
+                return []
+            
+            cursor.execute('''
+                SELECT c.*, cu.name as customer_name,
+                       CAST(julianday(c.due_date) - julianday('now') AS INTEGER) as days_left
+                FROM checks c
+                LEFT JOIN customers cu ON c.customer_id = cu.id
+                WHERE c.status = 'pending'
+                AND c.due_date <= ?
+                AND c.due_date >= ?
+                ORDER BY c.due_date ASC
+            ''', (future_date, today.strftime('%Y-%m-%d')))
+            
+            checks = [dict(row) for row in cursor.fetchall()]
         return checks
     except sqlite3.Error as e:
         print(f"❌ Vadesi yaklaşan çek sorgulama hatası: {e}")
@@ -1650,6 +3756,20 @@ def get_overdue_checks() -> List[Dict]:
 # KASA YÖNETİMİ
 # ============================================================================
 
+def _add_cash_rollup(cursor, transaction_date: str, transaction_type: str,
+                     category: str, amount: float):
+    """
+    cash_flow_daily günlük toplamını günceller. cash_flow'a yapılan her
+    INSERT ile aynı transaction içinde çağrılmalıdır (commit çağıran yapar).
+    """
+    cursor.execute('''
+        INSERT INTO cash_flow_daily (transaction_date, transaction_type, category, total, tx_count)
+        VALUES (?, ?, ?, ?, 1)
+        ON CONFLICT (transaction_date, transaction_type, category) DO UPDATE SET
+            total = total + excluded.total,
+            tx_count = tx_count + 1
+    ''', (transaction_date, transaction_type, category, amount))
+
 def add_cash_transaction(transaction_type: str, category: str, amount: float,
                          description: str = "", customer_id: int = None,
                          subcategory: str = "", payment_method: str = "cash",
@@ -1657,165 +3777,356 @@ def add_cash_transaction(transaction_type: str, category: str, amount: float,
                          transaction_date: str = None, created_by: int = 1) -> Tuple[bool, str, int]:
     """Kasa hareketi ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if not transaction_date:
-            transaction_date = datetime.now().strftime('%Y-%m-%d')
-        
-        cursor.execute('''
-            INSERT INTO cash_flow (
-                transaction_type, category, subcategory, amount, description,
-                customer_id, payment_method, reference_no, receipt_no,
-                transaction_date, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (transaction_type, category, subcategory, amount, description,
-              customer_id, payment_method, reference_no, receipt_no,
-              transaction_date, created_by))
-        
-        transaction_id = cursor.lastrowid
-        
-        # Müşteri bakiyesini güncelle
-        if customer_id:
-            balance_change = amount if transaction_type == 'income' else -amount
-            cursor.execute("SELECT balance FROM customers WHERE id = ?", (customer_id,))
-            result = cursor.fetchone()
-            if result:
-                new_balance = result['balance'] - balance_change  # Tahsilat = borç azalır
-                cursor.execute("UPDATE customers SET balance = ? WHERE id = ?", (new_balance, customer_id))
-                
-                # Cari hareket kaydet
-                trans_type = 'credit' if transaction_type == 'income' else 'debit'
-                cursor.execute('''
-                    INSERT INTO account_transactions 
-                    (customer_id, transaction_type, amount, balance_after, description, 
-                     reference_type, reference_id, transaction_date, created_by)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (customer_id, trans_type, amount, new_balance, description,
-                      'cash_flow', transaction_id, transaction_date, created_by))
-        
-        conn.commit()
-        log_activity(created_by, 'create', 'cash_flow', transaction_id)
-        conn.close()
+        with transaction('cash', 'customers') as cursor:
+            if not transaction_date:
+                transaction_date = datetime.now().strftime('%Y-%m-%d')
+            
+            cursor.execute('''
+                INSERT INTO cash_flow (
+                    transaction_type, category, subcategory, amount, description,
+                    customer_id, payment_method, reference_no, receipt_no,
+                    transaction_date, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (transaction_type, category, subcategory, amount, description,
+                  customer_id, payment_method, reference_no, receipt_no,
+                  transaction_date, created_by))
+            
+            transaction_id = cursor.lastrowid
+            _add_cash_rollup(cursor, transaction_date, transaction_type, category, amount)
+            
+            # Müşteri bakiyesini güncelle
+            if customer_id:
+                balance_change = amount if transaction_type == 'income' else -amount
+                cursor.execute("SELECT balance FROM customers WHERE id = ?", (customer_id,))
+                result = cursor.fetchone()
+                if result:
+                    new_balance = result['balance'] - balance_change  # Tahsilat = borç azalır
+                    cursor.execute("UPDATE customers SET balance = ? WHERE id = ?", (new_balance, customer_id))
+                    
+                    # Cari hareket kaydet
+                    trans_type = 'credit' if transaction_type == 'income' else 'debit'
+                    cursor.execute('''
+                        INSERT INTO account_transactions 
+                        (customer_id, transaction_type, amount, balance_after, description, 
+                         reference_type, reference_id, transaction_date, created_by)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (customer_id, trans_type, amount, new_balance, description,
+                          'cash_flow', transaction_id, transaction_date, created_by))
+            
+            log_activity(created_by, 'create', 'cash_flow', transaction_id)
         return True, "Kasa hareketi kaydedildi!", transaction_id
     except sqlite3.Error as e:
         return False, f"Hata: {e}", 0
 
+CASH_IMPORT_TYPES = {'income': 'income', 'gelir': 'income', 'alacak': 'income',
+                     'expense': 'expense', 'gider': 'expense', 'borc': 'expense'}
+
+def _validate_cash_import_row(row: Dict, customers: Dict[str, int], tax_numbers: Dict[str, int],
+                              customer_ids: set) -> Tuple[Optional[Dict], Optional[str]]:
+    """Ekstre satırını cash_flow alanlarına çevirir; (temiz satır, None) ya da (None, hata)."""
+    if not isinstance(row, dict):
+        return None, "Satır nesne (kolon -> değer) olmalı"
+    transaction_date = parse_import_date(row.get('transaction_date'))
+    if not transaction_date:
+        return None, f"Geçersiz tarih: {row.get('transaction_date')!r}"
+    
+    # Tek işaretli tutar kolonu (eksi = gider) ya da ayrı borç/alacak kolonları
+    if row.get('amount') not in (None, ''):
+        signed = parse_import_amount(row.get('amount'))
+    else:
+        debit = parse_import_amount(row.get('debit') or 0)
+        credit = parse_import_amount(row.get('credit') or 0)
+        signed = None if debit is None or credit is None else credit - abs(debit)
+    if signed is None:
+        return None, f"Geçersiz tutar: {row.get('amount') or row.get('debit') or row.get('credit')!r}"
+    if not signed:
+        return None, "Tutar sıfır olamaz"
+    
+    transaction_type = 'income' if signed > 0 else 'expense'
+    if row.get('transaction_type'):
+        transaction_type = CASH_IMPORT_TYPES.get(_import_key(row['transaction_type']))
+        if not transaction_type:
+            return None, "transaction_type 'income' ya da 'expense' olmalı"
+    
+    # Cari eşleme: açık id > VKN/TCKN > karşı taraf adı; eşleşmeyen ya da birden
+    # fazla cariye uyan ad carisiz eklenir
+    customer_id = None
+    if row.get('customer_id'):
+        try:
+            customer_id = int(row['customer_id'])
+        except (TypeError, ValueError):
+            customer_id = None
+        if customer_id not in customer_ids:
+            return None, f"Cari bulunamadı: {row['customer_id']}"
+    elif row.get('tax_number'):
+        customer_id = tax_numbers.get(_NON_DIGIT_RE.sub('', str(row['tax_number'])))
+    if customer_id is None and row.get('counterparty'):
+        customer_id = customers.get(_normalize_prefix_text(str(row['counterparty'])).strip())
+    
+    description = str(row.get('description') or row.get('counterparty') or '').strip()
+    return {'transaction_type': transaction_type,
+            'category': str(row.get('category') or '').strip()
+                        or ('Diğer Gelir' if transaction_type == 'income' else 'Diğer Gider'),
+            'amount': abs(signed), 'description': description, 'customer_id': customer_id,
+            'reference_no': str(row.get('reference_no') or '').strip(),
+            'transaction_date': transaction_date}, None
+
+def _write_cash_import_chunk(cursor, chunk: List[Dict], payment_method: str, created_by: int) -> int:
+    """
+    Bir parça kasa satırını yazar (çağıranın transaction'ında, commit yok).
+    add_cash_transaction ile aynı kayıtları üretir, ama satır başına değil
+    parça başına: cash_flow ve account_transactions executemany ile, günlük
+    toplamlar (tarih, tür, kategori) başına bir kez, her cari bakiyesi bir kez.
+    İlk cash_flow id'sini döndürür.
+    """
+    # id'ler burada verilir; yazma kilidi bizde olduğu için başka ekleme araya giremez
+    cursor.execute("SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'cash_flow'), 0), "
+                   "COALESCE((SELECT MAX(id) FROM cash_flow), 0))")
+    first_id = cursor.fetchone()[0] + 1
+    
+    cursor.executemany('''
+        INSERT INTO cash_flow (
+            id, transaction_type, category, amount, description,
+            customer_id, payment_method, reference_no, transaction_date, created_by
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', ((first_id + i, c['transaction_type'], c['category'], c['amount'], c['description'],
+           c['customer_id'], payment_method, c['reference_no'], c['transaction_date'], created_by)
+          for i, c in enumerate(chunk)))
+    
+    rollup = {}
+    for c in chunk:
+        key = (c['transaction_date'], c['transaction_type'], c['category'])
+        total, count = rollup.get(key, (0.0, 0))
+        rollup[key] = (total + c['amount'], count + 1)
+    cursor.executemany('''
+        INSERT INTO cash_flow_daily (transaction_date, transaction_type, category, total, tx_count)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (transaction_date, transaction_type, category) DO UPDATE SET
+            total = total + excluded.total,
+            tx_count = tx_count + excluded.tx_count
+    ''', ((*key, total, count) for key, (total, count) in rollup.items()))
+    
+    customer_ids = sorted({c['customer_id'] for c in chunk if c['customer_id']})
+    if not customer_ids:
+        return first_id
+    balances = {}
+    for start in range(0, len(customer_ids), 500):
+        part = customer_ids[start:start + 500]
+        cursor.execute(f"SELECT id, balance FROM customers WHERE id IN ({','.join('?' * len(part))})", part)
+        balances.update((row['id'], row['balance']) for row in cursor.fetchall())
+    
+    ledger = []
+    for i, c in enumerate(chunk):
+        if c['customer_id'] not in balances:
+            continue
+        # Tahsilat = borç azalır (add_cash_transaction ile aynı işaret)
+        income = c['transaction_type'] == 'income'
+        balances[c['customer_id']] += -c['amount'] if income else c['amount']
+        ledger.append((c['customer_id'], 'credit' if income else 'debit', c['amount'],
+                       balances[c['customer_id']], c['description'], 'cash_flow', first_id + i,
+                       c['transaction_date'], created_by))
+    cursor.executemany('''
+        INSERT INTO account_transactions 
+        (customer_id, transaction_type, amount, balance_after, description, 
+         reference_type, reference_id, transaction_date, created_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', ledger)
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.executemany("UPDATE customers SET balance = ?, updated_at = ? WHERE id = ?",
+                       ((balance, now, customer_id) for customer_id, balance in balances.items()))
+    return first_id
+
+def import_cash_transactions(rows, created_by: int = 1, payment_method: str = 'bank',
+                             dry_run: bool = False, chunk_size: int = IMPORT_CHUNK_SIZE) -> Dict:
+    """
+    Kasa hareketlerini toplu ekler (add_cash_transaction'ın toplu karşılığı).
+    
+    rows herhangi bir sözlük akışı olabilir (ör. iter_bank_statement); satırlar
+    okundukça doğrulanır ve chunk_size'lık parçalar hâlinde, her parça kendi
+    transaction'ında yazılır, böylece büyük dosyalar belleğe alınmaz. Bir parça
+    hata verirse önceki parçalar kayıtlı kalır ve aktarım orada durur.
+    Hatalı satırlar atlanır (satır numaraları 1'den başlar). dry_run=True sadece doğrular.
+    
+    Sonuç: {'total', 'valid', 'imported', 'error_count', 'errors': [{'row', 'error'}]}
+    """
+    result = {'total': 0, 'valid': 0, 'imported': 0, 'error_count': 0, 'errors': []}
+    
+    def add_error(row_no, error):
+        result['error_count'] += 1
+        if len(result['errors']) < IMPORT_MAX_ERRORS:
+            result['errors'].append({'row': row_no, 'error': error})
+    
+    def write(chunk):
+        with transaction('cash', 'customers') as cursor:
+            first_id = _write_cash_import_chunk(cursor, chunk, payment_method, created_by)
+            _write_activity(cursor, created_by, 'import', 'cash_flow', None,
+                            new_values={'count': len(chunk), 'first_id': first_id})
+        result['imported'] += len(chunk)
+    
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            customers = _customer_ids_by_name(cursor)
+            tax_numbers = _customer_ids_by_tax_number(cursor)
+            customer_ids = _active_customer_ids(cursor)
+    except sqlite3.Error as e:
+        add_error(None, f"Hata: {e}")
+        return result
+    
+    chunk = []
+    try:
+        for index, row in enumerate(rows, start=1):
+            result['total'] = index
+            clean, error = _validate_cash_import_row(row, customers, tax_numbers, customer_ids)
+            if error:
+                add_error(index, error)
+                continue
+            result['valid'] += 1
+            if dry_run:
+                continue
+            chunk.append(clean)
+            if len(chunk) >= chunk_size:
+                write(chunk)
+                chunk = []
+        if chunk:
+            write(chunk)
+    except ValueError as e:
+        add_error(None, str(e))
+    except sqlite3.Error as e:
+        add_error(None, f"Hata: {e}")
+    return result
+
+# Kasa sayfaları: en yeni tarih önce, aynı günde en son eklenen önce
+CASH_FLOW_PAGE_KEYS = [("COALESCE(cf.transaction_date, '')", 'transaction_date', True, ''),
+                       ('cf.id', 'id', True, None)]
+
+def _cash_flow_list_query(start_date: str = None, end_date: str = None,
+                          category: str = None, transaction_type: str = None,
+                          customer_id: int = None, payment_method: str = None,
+                          search: str = None) -> Tuple[str, List]:
+    """Kasa hareketleri sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    query = '''
+        SELECT cf.*, c.name as customer_name, u.full_name as created_by_name,
+               cat.icon as category_icon, cat.color as category_color
+        FROM cash_flow cf
+        LEFT JOIN customers c ON cf.customer_id = c.id
+        LEFT JOIN users u ON cf.created_by = u.id
+        LEFT JOIN categories cat ON cf.category = cat.name AND cat.type = cf.transaction_type
+        WHERE 1=1
+    '''
+    params = []
+    
+    if start_date:
+        query += " AND cf.transaction_date >= ?"
+        params.append(start_date)
+    if end_date:
+        query += " AND cf.transaction_date <= ?"
+        params.append(end_date)
+    if category:
+        query += " AND cf.category = ?"
+        params.append(category)
+    if transaction_type:
+        query += " AND cf.transaction_type = ?"
+        params.append(transaction_type)
+    if customer_id:
+        query += " AND cf.customer_id = ?"
+        params.append(customer_id)
+    if payment_method:
+        query += " AND cf.payment_method = ?"
+        params.append(payment_method)
+    match = fts_query(search)
+    if match:
+        query += (f" AND ({_fts_filter('cash_flow_fts', 'cf.id')}"
+                  f" OR {_fts_filter('customers_fts', 'cf.customer_id')})")
+        params.extend([match, match])
+    
+    return query, params
+
 def get_cash_flow(start_date: str = None, end_date: str = None,
                   category: str = None, transaction_type: str = None,
                   customer_id: int = None, payment_method: str = None,
                   search: str = None, limit: int = None) -> List[Dict]:
     """Kasa hareketlerini listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT cf.*, c.name as customer_name, u.full_name as created_by_name,
-                   cat.icon as category_icon, cat.color as category_color
-            FROM cash_flow cf
-            LEFT JOIN customers c ON cf.customer_id = c.id
-            LEFT JOIN users u ON cf.created_by = u.id
-            LEFT JOIN categories cat ON cf.category = cat.name AND cat.type = cf.transaction_type
-            WHERE 1=1
-        '''
-        params = []
-        
-        if start_date:
-            query += " AND cf.transaction_date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND cf.transaction_date <= ?"
-            params.append(end_date)
-        if category:
-            query += " AND cf.category = ?"
-            params.append(category)
-        if transaction_type:
-            query += " AND cf.transaction_type = ?"
-            params.append(transaction_type)
-        if customer_id:
-            query += " AND cf.customer_id = ?"
-            params.append(customer_id)
-        if payment_method:
-            query += " AND cf.payment_method = ?"
-            params.append(payment_method)
-        if search:
-            query += " AND (cf.description LIKE ? OR cf.reference_no LIKE ? OR c.name LIKE ?)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
-        
-        query += " ORDER BY cf.transaction_date DESC, cf.created_at DESC"
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        transactions = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _cash_flow_list_query(start_date, end_date, category, transaction_type,
+                                                  customer_id, payment_method, search)
+            query += " ORDER BY cf.transaction_date DESC, cf.created_at DESC"
+            
+            if limit:
+                query += f" LIMIT {limit}"
+            
+            cursor.execute(query, params)
+            transactions = [dict(row) for row in cursor.fetchall()]
         return transactions
     except sqlite3.Error as e:
         print(f"❌ Kasa listeleme hatası: {e}")
         return []
 
+def get_cash_flow_page(start_date: str = None, end_date: str = None,
+                       category: str = None, transaction_type: str = None,
+                       customer_id: int = None, payment_method: str = None,
+                       search: str = None, cursor: str = None,
+                       page_size: int = None) -> Dict:
+    """Kasa hareketlerini en yeniden eskiye sayfa sayfa listeler (bkz. _fetch_page)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            query, params = _cash_flow_list_query(start_date, end_date, category, transaction_type,
+                                                  customer_id, payment_method, search)
+            return _fetch_page(conn, query, params, CASH_FLOW_PAGE_KEYS, cursor, page_size)
+    except sqlite3.Error as e:
+        print(f"❌ Kasa listeleme hatası: {e}")
+        return _empty_page(page_size)
+
 def get_cash_balance() -> Dict:
-    """Kasa bakiye özeti."""
+    """Kasa bakiye özeti (cash_flow_daily günlük toplamlarından)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Genel toplam
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as total_income,
-                COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as total_expense
-            FROM cash_flow
-        ''')
-        row = cursor.fetchone()
-        total_income = row['total_income']
-        total_expense = row['total_expense']
-        
-        # Bugünkü hareketler
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as today_income,
-                COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as today_expense
-            FROM cash_flow WHERE transaction_date = date('now')
-        ''')
-        today = cursor.fetchone()
-        
-        # Bu ayki hareketler
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as month_income,
-                COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as month_expense
-            FROM cash_flow WHERE strftime('%Y-%m', transaction_date) = strftime('%Y-%m', 'now')
-        ''')
-        month = cursor.fetchone()
-        
-        # Bu haftaki hareketler
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as week_income,
-                COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as week_expense
-            FROM cash_flow WHERE transaction_date >= date('now', '-7 days')
-        ''')
-        week = cursor.fetchone()
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH bounds AS MATERIALIZED (
+                    SELECT date('now') as today,
+                           date('now', '-7 days') as week_start,
+                           strftime('%Y-%m', 'now') as this_month
+                ),
+                totals AS (
+                    SELECT transaction_type,
+                           SUM(total) as total,
+                           SUM(total) FILTER (WHERE transaction_date = b.today) as today,
+                           SUM(total) FILTER (WHERE transaction_date >= b.week_start) as week,
+                           SUM(total) FILTER (WHERE strftime('%Y-%m', transaction_date) = b.this_month) as month
+                    FROM cash_flow_daily, bounds b
+                    WHERE transaction_type IN ('income', 'expense')
+                    GROUP BY transaction_type
+                )
+                SELECT
+                    COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN total END), 0) as total_income,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN total END), 0) as total_expense,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN today END), 0) as today_income,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN today END), 0) as today_expense,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN week END), 0) as week_income,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN week END), 0) as week_expense,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN month END), 0) as month_income,
+                    COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN month END), 0) as month_expense
+                FROM totals
+            ''')
+            row = cursor.fetchone()
         
         return {
-            'total_income': total_income,
-            'total_expense': total_expense,
-            'balance': total_income - total_expense,
-            'today_income': today['today_income'],
-            'today_expense': today['today_expense'],
-            'today_balance': today['today_income'] - today['today_expense'],
-            'week_income': week['week_income'],
-            'week_expense': week['week_expense'],
-            'week_balance': week['week_income'] - week['week_expense'],
-            'month_income': month['month_income'],
-            'month_expense': month['month_expense'],
-            'month_balance': month['month_income'] - month['month_expense']
+            'total_income': row['total_income'],
+            'total_expense': row['total_expense'],
+            'balance': row['total_income'] - row['total_expense'],
+            'today_income': row['today_income'],
+            'today_expense': row['today_expense'],
+            'today_balance': row['today_income'] - row['today_expense'],
+            'week_income': row['week_income'],
+            'week_expense': row['week_expense'],
+            'week_balance': row['week_income'] - row['week_expense'],
+            'month_income': row['month_income'],
+            'month_expense': row['month_expense'],
+            'month_balance': row['month_income'] - row['month_expense']
         }
     except sqlite3.Error:
         return {
@@ -1829,35 +4140,34 @@ def get_cash_flow_by_category(start_date: str = None, end_date: str = None,
                                transaction_type: str = None) -> List[Dict]:
     """Kategoriye göre kasa özeti."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT cf.category, cf.transaction_type,
-                   COALESCE(SUM(cf.amount), 0) as total,
-                   COUNT(*) as count,
-                   cat.icon, cat.color
-            FROM cash_flow cf
-            LEFT JOIN categories cat ON cf.category = cat.name AND cat.type = cf.transaction_type
-            WHERE 1=1
-        '''
-        params = []
-        
-        if start_date:
-            query += " AND cf.transaction_date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND cf.transaction_date <= ?"
-            params.append(end_date)
-        if transaction_type:
-            query += " AND cf.transaction_type = ?"
-            params.append(transaction_type)
-        
-        query += " GROUP BY cf.category, cf.transaction_type ORDER BY total DESC"
-        
-        cursor.execute(query, params)
-        data = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query = '''
+                SELECT cf.category, cf.transaction_type,
+                       COALESCE(SUM(cf.amount), 0) as total,
+                       COUNT(*) as count,
+                       cat.icon, cat.color
+                FROM cash_flow cf
+                LEFT JOIN categories cat ON cf.category = cat.name AND cat.type = cf.transaction_type
+                WHERE 1=1
+            '''
+            params = []
+            
+            if start_date:
+                query += " AND cf.transaction_date >= ?"
+                params.append(start_date)
+            if end_date:
+                query += " AND cf.transaction_date <= ?"
+                params.append(end_date)
+            if transaction_type:
+                query += " AND cf.transaction_type = ?"
+                params.append(transaction_type)
+            
+            query += " GROUP BY cf.category, cf.transaction_type ORDER BY total DESC"
+            
+            cursor.execute(query, params)
+            data = [dict(row) for row in cursor.fetchall()]
         return data
     except sqlite3.Error:
         return []
@@ -1866,48 +4176,47 @@ def get_cash_flow_by_date(start_date: str = None, end_date: str = None,
                           group_by: str = 'day') -> List[Dict]:
     """Tarihe göre kasa özeti (grafik için)."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if group_by == 'day':
-            date_format = '%Y-%m-%d'
-            date_field = "date(cf.transaction_date)"
-        elif group_by == 'week':
-            date_format = '%Y-%W'
-            date_field = "strftime('%Y-%W', cf.transaction_date)"
-        elif group_by == 'month':
-            date_format = '%Y-%m'
-            date_field = "strftime('%Y-%m', cf.transaction_date)"
-        else:
-            date_format = '%Y'
-            date_field = "strftime('%Y', cf.transaction_date)"
-        
-        query = f'''
-            SELECT {date_field} as period,
-                   COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as income,
-                   COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as expense
-            FROM cash_flow cf
-            WHERE 1=1
-        '''
-        params = []
-        
-        if start_date:
-            query += " AND cf.transaction_date >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND cf.transaction_date <= ?"
-            params.append(end_date)
-        
-        query += f" GROUP BY {date_field} ORDER BY period"
-        
-        cursor.execute(query, params)
-        data = [dict(row) for row in cursor.fetchall()]
-        
-        # Balance hesapla
-        for item in data:
-            item['balance'] = item['income'] - item['expense']
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            if group_by == 'day':
+                date_format = '%Y-%m-%d'
+                date_field = "date(cf.transaction_date)"
+            elif group_by == 'week':
+                date_format = '%Y-%W'
+                date_field = "strftime('%Y-%W', cf.transaction_date)"
+            elif group_by == 'month':
+                date_format = '%Y-%m'
+                date_field = "strftime('%Y-%m', cf.transaction_date)"
+            else:
+                date_format = '%Y'
+                date_field = "strftime('%Y', cf.transaction_date)"
+            
+            query = f'''
+                SELECT {date_field} as period,
+                       COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as income,
+                       COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as expense
+                FROM cash_flow cf
+                WHERE 1=1
+            '''
+            params = []
+            
+            if start_date:
+                query += " AND cf.transaction_date >= ?"
+                params.append(start_date)
+            if end_date:
+                query += " AND cf.transaction_date <= ?"
+                params.append(end_date)
+            
+            query += f" GROUP BY {date_field} ORDER BY period"
+            
+            cursor.execute(query, params)
+            data = [dict(row) for row in cursor.fetchall()]
+            
+            # Balance hesapla
+            for item in data:
+                item['balance'] = item['income'] - item['expense']
+            
         return data
     except sqlite3.Error:
         return []
@@ -1919,23 +4228,22 @@ def get_cash_flow_by_date(start_date: str = None, end_date: str = None,
 def get_categories(category_type: str = None, active_only: bool = True) -> List[Dict]:
     """Kategorileri listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM categories WHERE 1=1"
-        params = []
-        
-        if category_type:
-            query += " AND type = ?"
-            params.append(category_type)
-        if active_only:
-            query += " AND is_active = 1"
-        
-        query += " ORDER BY sort_order, name"
-        
-        cursor.execute(query, params)
-        categories = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query = "SELECT * FROM categories WHERE 1=1"
+            params = []
+            
+            if category_type:
+                query += " AND type = ?"
+                params.append(category_type)
+            if active_only:
+                query += " AND is_active = 1"
+            
+            query += " ORDER BY sort_order, name"
+            
+            cursor.execute(query, params)
+            categories = [dict(row) for row in cursor.fetchall()]
         return categories
     except sqlite3.Error:
         return []
@@ -1944,14 +4252,13 @@ def add_category(name: str, category_type: str, icon: str = "",
                  color: str = "#6c757d", parent_id: int = None) -> Tuple[bool, str]:
     """Yeni kategori ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO categories (name, type, parent_id, icon, color)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (name, category_type, parent_id, icon, color))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO categories (name, type, parent_id, icon, color)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (name, category_type, parent_id, icon, color))
+            conn.commit()
         return True, "Kategori eklendi!"
     except sqlite3.IntegrityError:
         return False, "Bu kategori zaten mevcut!"
@@ -1961,13 +4268,12 @@ def add_category(name: str, category_type: str, icon: str = "",
 def update_category(category_id: int, **kwargs) -> Tuple[bool, str]:
     """Kategori günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [category_id]
-        cursor.execute(f"UPDATE categories SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [category_id]
+            cursor.execute(f"UPDATE categories SET {fields} WHERE id = ?", values)
+            conn.commit()
         return True, "Kategori güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -1975,85 +4281,193 @@ def update_category(category_id: int, **kwargs) -> Tuple[bool, str]:
 def delete_category(category_id: int) -> Tuple[bool, str]:
     """Kategori siler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Varsayılan kategoriler silinemez
-        cursor.execute("SELECT is_default FROM categories WHERE id = ?", (category_id,))
-        result = cursor.fetchone()
-        if result and result['is_default']:
-            conn.close()
-            return False, "Varsayılan kategoriler silinemez!"
-        
-        # Kullanımda mı kontrol et
-        cursor.execute("SELECT COUNT(*) as c FROM cash_flow WHERE category = (SELECT name FROM categories WHERE id = ?)", (category_id,))
-        if cursor.fetchone()['c'] > 0:
-            # Soft delete
-            cursor.execute("UPDATE categories SET is_active = 0 WHERE id = ?", (category_id,))
-        else:
-            cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-        
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Varsayılan kategoriler silinemez
+            cursor.execute("SELECT is_default FROM categories WHERE id = ?", (category_id,))
+            result = cursor.fetchone()
+            if result and result['is_default']:
+                return False, "Varsayılan kategoriler silinemez!"
+            
+            # Kullanımda mı kontrol et
+            cursor.execute("SELECT COUNT(*) as c FROM cash_flow WHERE category = (SELECT name FROM categories WHERE id = ?)", (category_id,))
+            if cursor.fetchone()['c'] > 0:
+                # Soft delete
+                cursor.execute("UPDATE categories SET is_active = 0 WHERE id = ?", (category_id,))
+            else:
+                cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
+            
+            conn.commit()
         return True, "Kategori silindi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+# ============================================================================
+# VADE TAKVİMİ SERVİSİ
+# ============================================================================
+# due_calendar (bkz. VADE TAKVİMİ) mutlak günleri tuttuğu için gece yarısı
+# satır taşımak gerekmez: 'vadesi geçmiş/bugün/yarın/bu hafta' dilimleri
+# DUE_PERIODS aralıklarıyla takvimden (tür başına birkaç yüz satır) toplanır.
+# Sonuç (alan sayaçları, gün) anahtarıyla önbelleğe alınır; gün değişince
+# (gece yarısı, UTC) ya da yazmadan sonra yeniden hesaplanır. Başka süreçten
+# yapılan yazmalar için kayıt en fazla DUE_CALENDAR_MAX_AGE saniye yaşar.
+# ============================================================================
+
+DUE_CALENDAR_KINDS = ('check_incoming', 'check_outgoing', 'reminder', 'task')
+DUE_CALENDAR_DOMAINS = ('checks', 'reminders', 'notes')
+DUE_CALENDAR_MAX_AGE = 60
+
+_due_calendar_snapshot = {'key': None, 'created': 0.0, 'buckets': None}
+
+def _compute_due_calendar(bounds: Dict[str, str]) -> Dict[str, Dict]:
+    """Tür başına toplam ve DUE_PERIODS dilimlerinin adet/tutarları."""
+    columns, params = [], []
+    for period in DUE_PERIODS:
+        clause, extra = due_period_sql('day', period, bounds)
+        for field, expr in (('count', 'item_count'), ('amount', 'amount')):
+            # Vadesiz kayıtlar ('' günü) sadece toplamda sayılır
+            columns.append(f"COALESCE(SUM({expr}) FILTER (WHERE day != '' AND {clause}), 0) "
+                           f"AS {period}_{field}")
+            params.extend(extra)
+    with db_connection(readonly=True) as conn:
+        rows = conn.execute(f'''
+            SELECT kind, SUM(item_count) AS total_count, SUM(amount) AS total_amount, {', '.join(columns)}
+            FROM due_calendar GROUP BY kind
+        ''', params).fetchall()
+    
+    periods = ('total',) + tuple(DUE_PERIODS)
+    buckets = {kind: {period: {'count': 0, 'amount': 0} for period in periods}
+               for kind in DUE_CALENDAR_KINDS}
+    for row in rows:
+        if row['kind'] not in buckets:
+            continue
+        for period in periods:
+            # Artımlı toplamalardaki kayan nokta artıkları kuruşa yuvarlanır
+            buckets[row['kind']][period] = {'count': row[f'{period}_count'],
+                                            'amount': round(row[f'{period}_amount'], 2)}
+    return buckets
+
+def get_due_calendar() -> Dict[str, Dict]:
+    """
+    Vade takvimi özeti: {tür: {dönem: {'count', 'amount'}}}.
+    Türler DUE_CALENDAR_KINDS, dönemler 'total' ve DUE_PERIODS anahtarlarıdır.
+    """
+    bounds = date_bounds()
+    key = (cache_generation(*DUE_CALENDAR_DOMAINS), bounds['today'])
+    now = time.monotonic()
+    
+    with _cache_lock:
+        snapshot = dict(_due_calendar_snapshot)
+    if snapshot['key'] == key and now - snapshot['created'] < DUE_CALENDAR_MAX_AGE:
+        return copy.deepcopy(snapshot['buckets'])
+    
+    buckets = _compute_due_calendar(bounds)
+    with _cache_lock:
+        _due_calendar_snapshot.update(key=key, created=now, buckets=buckets)
+    return copy.deepcopy(buckets)
+
+def get_due_calendar_days(kinds: Tuple[str, ...] = DUE_CALENDAR_KINDS, start_date: str = None,
+                          end_date: str = None) -> List[Dict]:
+    """Gün bazında takvim satırları (start_date dahil, end_date dahil)."""
+    try:
+        query = '''
+            SELECT day, kind, item_count, amount FROM due_calendar
+            WHERE kind IN ({}) AND day != ''
+        '''.format(', '.join('?' * len(kinds)))
+        params = list(kinds)
+        if start_date:
+            query += " AND day >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND day <= ?"
+            params.append(end_date)
+        with db_connection(readonly=True) as conn:
+            return [dict(row) for row in conn.execute(query + " ORDER BY day, kind", params)]
+    except sqlite3.Error:
+        return []
+
+def rebuild_due_calendar() -> Dict:
+    """Takvimi kaynak tablolardan yeniden kurar (tetikleyiciler dışı yazmalar ya da kayma için)."""
+    started = time.perf_counter()
+    with transaction(*DUE_CALENDAR_DOMAINS) as cursor:
+        cursor.execute("DELETE FROM due_calendar")
+        for table in _DUE_CALENDAR_SOURCES:
+            cursor.execute(_due_calendar_backfill(table)['sql'], (0, sys.maxsize))
+        days = cursor.execute("SELECT COUNT(*) FROM due_calendar").fetchone()[0]
+    return {'rows': days, 'elapsed': round(time.perf_counter() - started, 3)}
+
 # ============================================================================
 # FİNANSAL ÖZET (DASHBOARD İÇİN)
 # ============================================================================
 
+# Dashboard anlık görüntüsü; (alan sayaçları, gün) anahtarı değişmedikçe
+# yeniden hesaplanmaz. Başka bir süreçten (ör. ikinci uygulama) yapılan
+# yazmalar sayaçlara yansımadığı için kayıt en fazla MAX_AGE saniye yaşar.
+DASHBOARD_CACHE_DOMAINS = ('customers', 'checks', 'cash', 'reminders', 'notes')
+DASHBOARD_CACHE_MAX_AGE = 60
+
+_dashboard_snapshot = {'key': None, 'created': 0.0, 'stats': None}
+
 def get_dashboard_stats() -> Dict:
-    """Dashboard için özet istatistikler."""
+    """Dashboard için özet istatistikler (önbellekli anlık görüntü)."""
+    key = (cache_generation(*DASHBOARD_CACHE_DOMAINS), datetime.now().strftime('%Y-%m-%d'))
+    now = time.monotonic()
+    
+    with _cache_lock:
+        snapshot = dict(_dashboard_snapshot)
+    if snapshot['key'] == key and now - snapshot['created'] < DASHBOARD_CACHE_MAX_AGE:
+        return copy.deepcopy(snapshot['stats'])
+    
+    stats = _compute_dashboard_stats()
+    if stats:
+        with _cache_lock:
+            _dashboard_snapshot.update(key=key, created=now, stats=stats)
+    return copy.deepcopy(stats)
+
+def _compute_dashboard_stats() -> Dict:
+    """Dashboard istatistiklerini veritabanından hesaplar."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        stats = {}
-        
-        # Müşteri sayıları
-        cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1")
-        stats['total_customers'] = cursor.fetchone()['c']
-        
-        cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1 AND customer_type = 'customer'")
-        stats['customer_count'] = cursor.fetchone()['c']
-        
-        cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1 AND customer_type = 'supplier'")
-        stats['supplier_count'] = cursor.fetchone()['c']
-        
-        # Kasa
-        cash = get_cash_balance()
-        stats['cash_balance'] = cash['balance']
-        stats['today_income'] = cash['today_income']
-        stats['today_expense'] = cash['today_expense']
-        stats['month_income'] = cash['month_income']
-        stats['month_expense'] = cash['month_expense']
-        
-        # Alacak/Borç
-        cursor.execute("SELECT COALESCE(SUM(balance), 0) as t FROM customers WHERE balance > 0 AND is_active = 1")
-        stats['total_receivables'] = cursor.fetchone()['t']
-        
-        cursor.execute("SELECT COALESCE(SUM(ABS(balance)), 0) as t FROM customers WHERE balance < 0 AND is_active = 1")
-        stats['total_payables'] = cursor.fetchone()['t']
-        
-        # Çek özeti
-        check_summary = get_checks_summary()
-        stats['check_summary'] = check_summary
-        
-        # Bugünkü hatırlatıcılar
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM reminders 
-            WHERE status = 'pending' AND date(due_date) <= date('now')
-        ''')
-        stats['pending_reminders'] = cursor.fetchone()['c']
-        
-        # Bugünkü görevler
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM notes 
-            WHERE is_task = 1 AND task_status = 'pending' AND date(task_due_date) <= date('now')
-        ''')
-        stats['pending_tasks'] = cursor.fetchone()['c']
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            stats = {}
+            
+            # Müşteri sayıları
+            cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1")
+            stats['total_customers'] = cursor.fetchone()['c']
+            
+            cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1 AND customer_type = 'customer'")
+            stats['customer_count'] = cursor.fetchone()['c']
+            
+            cursor.execute("SELECT COUNT(*) as c FROM customers WHERE is_active = 1 AND customer_type = 'supplier'")
+            stats['supplier_count'] = cursor.fetchone()['c']
+            
+            # Kasa
+            cash = get_cash_balance()
+            stats['cash_balance'] = cash['balance']
+            stats['today_income'] = cash['today_income']
+            stats['today_expense'] = cash['today_expense']
+            stats['month_income'] = cash['month_income']
+            stats['month_expense'] = cash['month_expense']
+            
+            # Alacak/Borç
+            cursor.execute("SELECT COALESCE(SUM(balance), 0) as t FROM customers WHERE balance > 0 AND is_active = 1")
+            stats['total_receivables'] = cursor.fetchone()['t']
+            
+            cursor.execute("SELECT COALESCE(SUM(ABS(balance)), 0) as t FROM customers WHERE balance < 0 AND is_active = 1")
+            stats['total_payables'] = cursor.fetchone()['t']
+            
+            # Çek özeti
+            check_summary = get_checks_summary()
+            stats['check_summary'] = check_summary
+            
+            # Bugünkü hatırlatıcılar
+            calendar = get_due_calendar()
+            stats['pending_reminders'] = calendar['reminder']['until_today']['count']
+            
+            # Bugünkü görevler
+            stats['pending_tasks'] = calendar['task']['until_today']['count']
+            
         return stats
     except sqlite3.Error as e:
         print(f"❌ Dashboard stats hatası: {e}")
@@ -2136,25 +4550,21 @@ def add_reminder(title: str, due_date: str, description: str = "",
                  notify_via_whatsapp: int = 0, created_by: int = 1) -> Tuple[bool, str, int]:
     """Yeni hatırlatıcı ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO reminders (
-                title, description, reminder_type, priority, due_date, due_time,
-                is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
-                related_customer_id, related_check_id, notify_before_days,
-                notify_via_whatsapp, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (title, description, reminder_type, priority, due_date, due_time,
-              is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
-              related_customer_id, related_check_id, notify_before_days,
-              notify_via_whatsapp, created_by))
-        
-        reminder_id = cursor.lastrowid
-        conn.commit()
-        log_activity(created_by, 'create', 'reminder', reminder_id)
-        conn.close()
+        with transaction('reminders') as cursor:
+            cursor.execute('''
+                INSERT INTO reminders (
+                    title, description, reminder_type, priority, due_date, due_time,
+                    is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
+                    related_customer_id, related_check_id, notify_before_days,
+                    notify_via_whatsapp, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (title, description, reminder_type, priority, due_date, due_time,
+                  is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
+                  related_customer_id, related_check_id, notify_before_days,
+                  notify_via_whatsapp, created_by))
+            
+            reminder_id = cursor.lastrowid
+            log_activity(created_by, 'create', 'reminder', reminder_id)
         return True, "Hatırlatıcı eklendi!", reminder_id
     except sqlite3.Error as e:
         return False, f"Hata: {e}", 0
@@ -2162,16 +4572,16 @@ def add_reminder(title: str, due_date: str, description: str = "",
 def update_reminder(reminder_id: int, **kwargs) -> Tuple[bool, str]:
     """Hatırlatıcı günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [reminder_id]
-        
-        cursor.execute(f"UPDATE reminders SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [reminder_id]
+            
+            cursor.execute(f"UPDATE reminders SET {fields} WHERE id = ?", values)
+            conn.commit()
+            _invalidate('reminders')
         return True, "Hatırlatıcı güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2179,102 +4589,129 @@ def update_reminder(reminder_id: int, **kwargs) -> Tuple[bool, str]:
 def delete_reminder(reminder_id: int) -> Tuple[bool, str]:
     """Hatırlatıcı siler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM reminders WHERE id = ?", (reminder_id,))
+            conn.commit()
+            _invalidate('reminders')
         return True, "Hatırlatıcı silindi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+# Hatırlatıcı sayfaları: vade, öncelik (azalan), saat, id
+REMINDER_PAGE_KEYS = [('r.due_date', 'due_date', False, None),
+                      ("COALESCE(r.priority, '')", 'priority', True, ''),
+                      ("COALESCE(r.due_time, '')", 'due_time', False, ''),
+                      ('r.id', 'id', False, None)]
+
+def _reminder_list_query(status: str = None, reminder_type: str = None,
+                         priority: str = None, start_date: str = None,
+                         end_date: str = None, related_customer_id: int = None,
+                         include_completed: bool = False) -> Tuple[str, List]:
+    """Hatırlatıcı listesi sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    bounds = date_bounds()
+    query = '''
+        SELECT r.*, 
+               c.name as customer_name, c.phone as customer_phone,
+               ch.check_number, ch.amount as check_amount,
+               CASE 
+                   WHEN r.status = 'pending' AND r.due_date < ? THEN 'overdue'
+                   WHEN r.status = 'pending' AND r.due_date < ? THEN 'today'
+                   WHEN r.status = 'pending' AND r.due_date < ? THEN 'tomorrow'
+                   ELSE r.status
+               END as display_status,
+               CAST(julianday(r.due_date) - julianday('now') AS INTEGER) as days_left
+        FROM reminders r
+        LEFT JOIN customers c ON r.related_customer_id = c.id
+        LEFT JOIN checks ch ON r.related_check_id = ch.id
+        WHERE 1=1
+    '''
+    # display_status: bugünden önce / bugün / yarın (üst sınırlar sırayla denenir)
+    params = [bounds['today'], bounds['tomorrow'], bounds['day_after']]
+    
+    if not include_completed:
+        query += " AND r.status != 'completed'"
+    
+    if status:
+        if status in ('overdue', 'today', 'tomorrow', 'upcoming'):
+            period = 'after_today' if status == 'upcoming' else status
+            clause, extra = due_period_sql('r.due_date', period, bounds)
+            query += f" AND r.status = 'pending' AND {clause}"
+            params.extend(extra)
+        else:
+            query += " AND r.status = ?"
+            params.append(status)
+    
+    if reminder_type:
+        query += " AND r.reminder_type = ?"
+        params.append(reminder_type)
+    
+    if priority:
+        query += " AND r.priority = ?"
+        params.append(priority)
+    
+    if start_date:
+        query += " AND r.due_date >= ?"
+        params.append(start_date)
+    
+    if end_date:
+        query += " AND r.due_date <= ?"
+        params.append(end_date)
+    
+    if related_customer_id:
+        query += " AND r.related_customer_id = ?"
+        params.append(related_customer_id)
+    
+    return query, params
+
 def get_reminders(status: str = None, reminder_type: str = None,
                   priority: str = None, start_date: str = None,
                   end_date: str = None, related_customer_id: int = None,
                   include_completed: bool = False) -> List[Dict]:
     """Hatırlatıcıları listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT r.*, 
-                   c.name as customer_name, c.phone as customer_phone,
-                   ch.check_number, ch.amount as check_amount,
-                   CASE 
-                       WHEN r.status = 'pending' AND date(r.due_date) < date('now') THEN 'overdue'
-                       WHEN r.status = 'pending' AND date(r.due_date) = date('now') THEN 'today'
-                       WHEN r.status = 'pending' AND date(r.due_date) = date('now', '+1 day') THEN 'tomorrow'
-                       ELSE r.status
-                   END as display_status,
-                   CAST(julianday(r.due_date) - julianday('now') AS INTEGER) as days_left
-            FROM reminders r
-            LEFT JOIN customers c ON r.related_customer_id = c.id
-            LEFT JOIN checks ch ON r.related_check_id = ch.id
-            WHERE 1=1
-        '''
-        params = []
-        
-        if not include_completed:
-            query += " AND r.status != 'completed'"
-        
-        if status:
-            if status == 'overdue':
-                query += " AND r.status = 'pending' AND date(r.due_date) < date('now')"
-            elif status == 'today':
-                query += " AND r.status = 'pending' AND date(r.due_date) = date('now')"
-            elif status == 'tomorrow':
-                query += " AND r.status = 'pending' AND date(r.due_date) = date('now', '+1 day')"
-            elif status == 'upcoming':
-                query += " AND r.status = 'pending' AND date(r.due_date) > date('now')"
-            else:
-                query += " AND r.status = ?"
-                params.append(status)
-        
-        if reminder_type:
-            query += " AND r.reminder_type = ?"
-            params.append(reminder_type)
-        
-        if priority:
-            query += " AND r.priority = ?"
-            params.append(priority)
-        
-        if start_date:
-            query += " AND r.due_date >= ?"
-            params.append(start_date)
-        
-        if end_date:
-            query += " AND r.due_date <= ?"
-            params.append(end_date)
-        
-        if related_customer_id:
-            query += " AND r.related_customer_id = ?"
-            params.append(related_customer_id)
-        
-        query += " ORDER BY r.due_date ASC, r.priority DESC, r.due_time ASC"
-        
-        cursor.execute(query, params)
-        reminders = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _reminder_list_query(status, reminder_type, priority, start_date,
+                                                 end_date, related_customer_id, include_completed)
+            query += " ORDER BY r.due_date ASC, r.priority DESC, r.due_time ASC"
+            
+            cursor.execute(query, params)
+            reminders = [dict(row) for row in cursor.fetchall()]
         return reminders
     except sqlite3.Error as e:
         print(f"❌ Hatırlatıcı listeleme hatası: {e}")
         return []
 
+def get_reminders_page(status: str = None, reminder_type: str = None,
+                       priority: str = None, start_date: str = None,
+                       end_date: str = None, related_customer_id: int = None,
+                       include_completed: bool = False, cursor: str = None,
+                       page_size: int = None) -> Dict:
+    """Hatırlatıcıları vadeye göre sayfa sayfa listeler (bkz. _fetch_page)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            query, params = _reminder_list_query(status, reminder_type, priority, start_date,
+                                                 end_date, related_customer_id, include_completed)
+            return _fetch_page(conn, query, params, REMINDER_PAGE_KEYS, cursor, page_size)
+    except sqlite3.Error as e:
+        print(f"❌ Hatırlatıcı listeleme hatası: {e}")
+        return _empty_page(page_size)
+
 def get_reminder_by_id(reminder_id: int) -> Optional[Dict]:
     """ID ile hatırlatıcı getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.*, c.name as customer_name, ch.check_number
-            FROM reminders r
-            LEFT JOIN customers c ON r.related_customer_id = c.id
-            LEFT JOIN checks ch ON r.related_check_id = ch.id
-            WHERE r.id = ?
-        ''', (reminder_id,))
-        reminder = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT r.*, c.name as customer_name, ch.check_number
+                FROM reminders r
+                LEFT JOIN customers c ON r.related_customer_id = c.id
+                LEFT JOIN checks ch ON r.related_check_id = ch.id
+                WHERE r.id = ?
+            ''', (reminder_id,))
+            reminder = cursor.fetchone()
         return dict_from_row(reminder)
     except sqlite3.Error:
         return None
@@ -2282,64 +4719,59 @@ def get_reminder_by_id(reminder_id: int) -> Optional[Dict]:
 def complete_reminder(reminder_id: int, created_by: int = 1) -> Tuple[bool, str]:
     """Hatırlatıcıyı tamamlar ve tekrarlayan ise yenisini oluşturur."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        
-        # Mevcut hatırlatıcıyı getir
-        cursor.execute('SELECT * FROM reminders WHERE id = ?', (reminder_id,))
-        reminder = cursor.fetchone()
-        if not reminder:
-            conn.close()
-            return False, "Hatırlatıcı bulunamadı!"
-        reminder = dict(reminder)
-        
-        # Tamamla
-        cursor.execute('''
-            UPDATE reminders SET status = 'completed', completed_at = ?, updated_at = ?
-            WHERE id = ?
-        ''', (now, now, reminder_id))
-        
-        # Tekrarlayan ise yeni oluştur
-        if reminder['is_recurring'] and reminder['recurrence_type']:
-            old_date = datetime.strptime(reminder['due_date'], '%Y-%m-%d')
-            interval = reminder['recurrence_interval'] or 1
-            
-            if reminder['recurrence_type'] == 'daily':
-                new_date = old_date + timedelta(days=interval)
-            elif reminder['recurrence_type'] == 'weekly':
-                new_date = old_date + timedelta(weeks=interval)
-            elif reminder['recurrence_type'] == 'monthly':
-                new_date = old_date + timedelta(days=30*interval)
-            elif reminder['recurrence_type'] == 'yearly':
-                new_date = old_date + timedelta(days=365*interval)
-            else:
-                new_date = None
+        with transaction('reminders') as cursor:
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             
-            # Bitiş tarihi kontrolü
-            if new_date:
-                end_date = reminder.get('recurrence_end_date')
-                if end_date and new_date > datetime.strptime(end_date, '%Y-%m-%d'):
+            # Mevcut hatırlatıcıyı getir
+            cursor.execute('SELECT * FROM reminders WHERE id = ?', (reminder_id,))
+            reminder = cursor.fetchone()
+            if not reminder:
+                return False, "Hatırlatıcı bulunamadı!"
+            reminder = dict(reminder)
+            
+            # Tamamla
+            cursor.execute('''
+                UPDATE reminders SET status = 'completed', completed_at = ?, updated_at = ?
+                WHERE id = ?
+            ''', (now, now, reminder_id))
+            
+            # Tekrarlayan ise yeni oluştur
+            if reminder['is_recurring'] and reminder['recurrence_type']:
+                old_date = datetime.strptime(reminder['due_date'], '%Y-%m-%d')
+                interval = reminder['recurrence_interval'] or 1
+                
+                if reminder['recurrence_type'] == 'daily':
+                    new_date = old_date + timedelta(days=interval)
+                elif reminder['recurrence_type'] == 'weekly':
+                    new_date = old_date + timedelta(weeks=interval)
+                elif reminder['recurrence_type'] == 'monthly':
+                    new_date = old_date + timedelta(days=30*interval)
+                elif reminder['recurrence_type'] == 'yearly':
+                    new_date = old_date + timedelta(days=365*interval)
+                else:
                     new_date = None
+                
+                # Bitiş tarihi kontrolü
+                if new_date:
+                    end_date = reminder.get('recurrence_end_date')
+                    if end_date and new_date > datetime.strptime(end_date, '%Y-%m-%d'):
+                        new_date = None
+                
+                if new_date:
+                    cursor.execute('''
+                        INSERT INTO reminders (
+                            title, description, reminder_type, priority, due_date, due_time,
+                            is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
+                            related_customer_id, related_check_id, notify_before_days,
+                            notify_via_whatsapp, created_by
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (reminder['title'], reminder['description'], reminder['reminder_type'],
+                          reminder['priority'], new_date.strftime('%Y-%m-%d'), reminder['due_time'],
+                          1, reminder['recurrence_type'], interval, reminder['recurrence_end_date'],
+                          reminder['related_customer_id'], reminder['related_check_id'],
+                          reminder['notify_before_days'], reminder['notify_via_whatsapp'], created_by))
             
-            if new_date:
-                cursor.execute('''
-                    INSERT INTO reminders (
-                        title, description, reminder_type, priority, due_date, due_time,
-                        is_recurring, recurrence_type, recurrence_interval, recurrence_end_date,
-                        related_customer_id, related_check_id, notify_before_days,
-                        notify_via_whatsapp, created_by
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (reminder['title'], reminder['description'], reminder['reminder_type'],
-                      reminder['priority'], new_date.strftime('%Y-%m-%d'), reminder['due_time'],
-                      1, reminder['recurrence_type'], interval, reminder['recurrence_end_date'],
-                      reminder['related_customer_id'], reminder['related_check_id'],
-                      reminder['notify_before_days'], reminder['notify_via_whatsapp'], created_by))
-        
-        conn.commit()
-        log_activity(created_by, 'complete', 'reminder', reminder_id)
-        conn.close()
+            log_activity(created_by, 'complete', 'reminder', reminder_id)
         return True, "Hatırlatıcı tamamlandı!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2347,14 +4779,14 @@ def complete_reminder(reminder_id: int, created_by: int = 1) -> Tuple[bool, str]
 def snooze_reminder(reminder_id: int, snooze_until: str) -> Tuple[bool, str]:
     """Hatırlatıcıyı erteler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE reminders SET snoozed_until = ?, updated_at = ?
-            WHERE id = ?
-        ''', (snooze_until, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), reminder_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE reminders SET snoozed_until = ?, updated_at = ?
+                WHERE id = ?
+            ''', (snooze_until, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), reminder_id))
+            conn.commit()
+            _invalidate('reminders')
         return True, "Hatırlatıcı ertelendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2375,42 +4807,14 @@ def get_upcoming_reminders(days: int = 7) -> List[Dict]:
 def get_reminders_summary() -> Dict:
     """Hatırlatıcı özeti."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        summary = {}
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM reminders 
-            WHERE status = 'pending' AND date(due_date) < date('now')
-        ''')
-        summary['overdue'] = cursor.fetchone()['c']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM reminders 
-            WHERE status = 'pending' AND date(due_date) = date('now')
-        ''')
-        summary['today'] = cursor.fetchone()['c']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM reminders 
-            WHERE status = 'pending' AND date(due_date) = date('now', '+1 day')
-        ''')
-        summary['tomorrow'] = cursor.fetchone()['c']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM reminders 
-            WHERE status = 'pending' AND date(due_date) > date('now') 
-            AND date(due_date) <= date('now', '+7 days')
-        ''')
-        summary['this_week'] = cursor.fetchone()['c']
-        
-        cursor.execute("SELECT COUNT(*) as c FROM reminders WHERE status = 'pending'")
-        summary['total_pending'] = cursor.fetchone()['c']
-        
-        conn.close()
-        return summary
+        calendar = get_due_calendar()['reminder']
     except sqlite3.Error:
         return {}
+    summary = {key: calendar[period]['count']
+               for key, period in (('overdue', 'overdue'), ('today', 'today'),
+                                   ('tomorrow', 'tomorrow'), ('this_week', 'rest_of_week'))}
+    summary['total_pending'] = calendar['total']['count']
+    return summary
 
 # ============================================================================
 # NOT DEFTERİ / GÖREV LİSTESİ YÖNETİMİ
@@ -2423,25 +4827,21 @@ def add_note(title: str, content: str = "", note_type: str = "note",
              tags: List[str] = None, created_by: int = 1) -> Tuple[bool, str, int]:
     """Yeni not veya görev ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        tags_json = json.dumps(tags) if tags else None
-        
-        cursor.execute('''
-            INSERT INTO notes (
-                title, content, note_type, category, color, is_pinned,
-                is_task, task_priority, task_due_date, related_customer_id,
-                tags, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (title, content, note_type, category, color, is_pinned,
-              is_task, task_priority, task_due_date, related_customer_id,
-              tags_json, created_by))
-        
-        note_id = cursor.lastrowid
-        conn.commit()
-        log_activity(created_by, 'create', 'note', note_id)
-        conn.close()
+        with transaction('notes') as cursor:
+            tags_json = json.dumps(tags) if tags else None
+            
+            cursor.execute('''
+                INSERT INTO notes (
+                    title, content, note_type, category, color, is_pinned,
+                    is_task, task_priority, task_due_date, related_customer_id,
+                    tags, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (title, content, note_type, category, color, is_pinned,
+                  is_task, task_priority, task_due_date, related_customer_id,
+                  tags_json, created_by))
+            
+            note_id = cursor.lastrowid
+            log_activity(created_by, 'create', 'note', note_id)
         return True, "Not eklendi!", note_id
     except sqlite3.Error as e:
         return False, f"Hata: {e}", 0
@@ -2449,19 +4849,19 @@ def add_note(title: str, content: str = "", note_type: str = "note",
 def update_note(note_id: int, **kwargs) -> Tuple[bool, str]:
     """Not/görev günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if 'tags' in kwargs and isinstance(kwargs['tags'], list):
-            kwargs['tags'] = json.dumps(kwargs['tags'])
-        
-        kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [note_id]
-        
-        cursor.execute(f"UPDATE notes SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            if 'tags' in kwargs and isinstance(kwargs['tags'], list):
+                kwargs['tags'] = json.dumps(kwargs['tags'])
+            
+            kwargs['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [note_id]
+            
+            cursor.execute(f"UPDATE notes SET {fields} WHERE id = ?", values)
+            conn.commit()
+            _invalidate('notes')
         return True, "Not güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2469,103 +4869,132 @@ def update_note(note_id: int, **kwargs) -> Tuple[bool, str]:
 def delete_note(note_id: int) -> Tuple[bool, str]:
     """Not siler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+            conn.commit()
+            _invalidate('notes')
         return True, "Not silindi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
 
+# Not sayfaları: sabitlenenler önce, sonra en son eklenen
+NOTE_PAGE_KEYS = [('COALESCE(n.is_pinned, 0)', 'is_pinned', True, 0), ('n.id', 'id', True, None)]
+
+def _note_list_query(note_type: str = None, is_task: int = None, task_status: str = None,
+                     category: str = None, is_pinned: int = None, is_archived: int = 0,
+                     related_customer_id: int = None, search: str = None) -> Tuple[str, List]:
+    """Not listesi sorgusunu ve parametrelerini (ORDER BY hariç) oluşturur."""
+    bounds = date_bounds()
+    query = '''
+        SELECT n.*, c.name as customer_name,
+               CASE 
+                   WHEN n.is_task = 1 AND n.task_status = 'pending' AND n.task_due_date < ? THEN 'overdue'
+                   WHEN n.is_task = 1 AND n.task_status = 'pending' AND n.task_due_date < ? THEN 'due_today'
+                   ELSE n.task_status
+               END as display_status
+        FROM notes n
+        LEFT JOIN customers c ON n.related_customer_id = c.id
+        WHERE n.is_archived = ?
+    '''
+    params = [bounds['today'], bounds['tomorrow'], is_archived]
+    
+    if note_type:
+        query += " AND n.note_type = ?"
+        params.append(note_type)
+    
+    if is_task is not None:
+        query += " AND n.is_task = ?"
+        params.append(is_task)
+    
+    if task_status:
+        if task_status in ('overdue', 'due_today'):
+            period = 'overdue' if task_status == 'overdue' else 'today'
+            clause, extra = due_period_sql('n.task_due_date', period, bounds)
+            query += f" AND n.is_task = 1 AND n.task_status = 'pending' AND {clause}"
+            params.extend(extra)
+        else:
+            query += " AND n.task_status = ?"
+            params.append(task_status)
+    
+    if category:
+        query += " AND n.category = ?"
+        params.append(category)
+    
+    if is_pinned is not None:
+        query += " AND n.is_pinned = ?"
+        params.append(is_pinned)
+    
+    if related_customer_id:
+        query += " AND n.related_customer_id = ?"
+        params.append(related_customer_id)
+    
+    match = fts_query(search)
+    if match:
+        query += " AND " + _fts_filter('notes_fts', 'n.id')
+        params.append(match)
+    
+    return query, params
+
+def _parse_note_tags(notes: List[Dict]) -> List[Dict]:
+    """Tags JSON'dan listeye çevir."""
+    for note in notes:
+        if note.get('tags'):
+            try:
+                note['tags'] = json.loads(note['tags'])
+            except:
+                note['tags'] = []
+    return notes
+
 def get_notes(note_type: str = None, is_task: int = None, task_status: str = None,
               category: str = None, is_pinned: int = None, is_archived: int = 0,
               related_customer_id: int = None, search: str = None,
               order_by: str = 'is_pinned DESC, created_at DESC') -> List[Dict]:
     """Notları/görevleri listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT n.*, c.name as customer_name,
-                   CASE 
-                       WHEN n.is_task = 1 AND n.task_status = 'pending' AND date(n.task_due_date) < date('now') THEN 'overdue'
-                       WHEN n.is_task = 1 AND n.task_status = 'pending' AND date(n.task_due_date) = date('now') THEN 'due_today'
-                       ELSE n.task_status
-                   END as display_status
-            FROM notes n
-            LEFT JOIN customers c ON n.related_customer_id = c.id
-            WHERE n.is_archived = ?
-        '''
-        params = [is_archived]
-        
-        if note_type:
-            query += " AND n.note_type = ?"
-            params.append(note_type)
-        
-        if is_task is not None:
-            query += " AND n.is_task = ?"
-            params.append(is_task)
-        
-        if task_status:
-            if task_status == 'overdue':
-                query += " AND n.is_task = 1 AND n.task_status = 'pending' AND date(n.task_due_date) < date('now')"
-            elif task_status == 'due_today':
-                query += " AND n.is_task = 1 AND n.task_status = 'pending' AND date(n.task_due_date) = date('now')"
-            else:
-                query += " AND n.task_status = ?"
-                params.append(task_status)
-        
-        if category:
-            query += " AND n.category = ?"
-            params.append(category)
-        
-        if is_pinned is not None:
-            query += " AND n.is_pinned = ?"
-            params.append(is_pinned)
-        
-        if related_customer_id:
-            query += " AND n.related_customer_id = ?"
-            params.append(related_customer_id)
-        
-        if search:
-            query += " AND (n.title LIKE ? OR n.content LIKE ? OR n.tags LIKE ?)"
-            search_param = f"%{search}%"
-            params.extend([search_param, search_param, search_param])
-        
-        query += f" ORDER BY {order_by}"
-        
-        cursor.execute(query, params)
-        notes = [dict(row) for row in cursor.fetchall()]
-        
-        # Tags JSON'dan listeye çevir
-        for note in notes:
-            if note.get('tags'):
-                try:
-                    note['tags'] = json.loads(note['tags'])
-                except:
-                    note['tags'] = []
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _note_list_query(note_type, is_task, task_status, category,
+                                             is_pinned, is_archived, related_customer_id, search)
+            query += f" ORDER BY {order_by}"
+            
+            cursor.execute(query, params)
+            notes = _parse_note_tags([dict(row) for row in cursor.fetchall()])
+            
         return notes
     except sqlite3.Error as e:
         print(f"❌ Not listeleme hatası: {e}")
         return []
 
+def get_notes_page(note_type: str = None, is_task: int = None, task_status: str = None,
+                   category: str = None, is_pinned: int = None, is_archived: int = 0,
+                   related_customer_id: int = None, search: str = None,
+                   cursor: str = None, page_size: int = None) -> Dict:
+    """Notları/görevleri sayfa sayfa listeler (bkz. _fetch_page)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            query, params = _note_list_query(note_type, is_task, task_status, category,
+                                             is_pinned, is_archived, related_customer_id, search)
+            page = _fetch_page(conn, query, params, NOTE_PAGE_KEYS, cursor, page_size)
+        _parse_note_tags(page['items'])
+        return page
+    except sqlite3.Error as e:
+        print(f"❌ Not listeleme hatası: {e}")
+        return _empty_page(page_size)
+
 def get_note_by_id(note_id: int) -> Optional[Dict]:
     """ID ile not getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT n.*, c.name as customer_name
-            FROM notes n
-            LEFT JOIN customers c ON n.related_customer_id = c.id
-            WHERE n.id = ?
-        ''', (note_id,))
-        note = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT n.*, c.name as customer_name
+                FROM notes n
+                LEFT JOIN customers c ON n.related_customer_id = c.id
+                WHERE n.id = ?
+            ''', (note_id,))
+            note = cursor.fetchone()
         
         if note:
             note = dict(note)
@@ -2582,15 +5011,15 @@ def get_note_by_id(note_id: int) -> Optional[Dict]:
 def complete_task(note_id: int) -> Tuple[bool, str]:
     """Görevi tamamlar."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        cursor.execute('''
-            UPDATE notes SET task_status = 'completed', task_completed_at = ?, updated_at = ?
-            WHERE id = ? AND is_task = 1
-        ''', (now, now, note_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            cursor.execute('''
+                UPDATE notes SET task_status = 'completed', task_completed_at = ?, updated_at = ?
+                WHERE id = ? AND is_task = 1
+            ''', (now, now, note_id))
+            conn.commit()
+            _invalidate('notes')
         return True, "Görev tamamlandı!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2598,14 +5027,14 @@ def complete_task(note_id: int) -> Tuple[bool, str]:
 def toggle_pin_note(note_id: int) -> Tuple[bool, str]:
     """Not sabitleme durumunu değiştirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE notes SET is_pinned = CASE WHEN is_pinned = 1 THEN 0 ELSE 1 END, updated_at = ?
-            WHERE id = ?
-        ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE notes SET is_pinned = CASE WHEN is_pinned = 1 THEN 0 ELSE 1 END, updated_at = ?
+                WHERE id = ?
+            ''', (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note_id))
+            conn.commit()
+            _invalidate('notes')
         return True, "Not güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2613,13 +5042,13 @@ def toggle_pin_note(note_id: int) -> Tuple[bool, str]:
 def archive_note(note_id: int, archive: bool = True) -> Tuple[bool, str]:
     """Notu arşivler/arşivden çıkarır."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE notes SET is_archived = ?, updated_at = ? WHERE id = ?
-        ''', (1 if archive else 0, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note_id))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE notes SET is_archived = ?, updated_at = ? WHERE id = ?
+            ''', (1 if archive else 0, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note_id))
+            conn.commit()
+            _invalidate('notes')
         return True, "Arşivlendi!" if archive else "Arşivden çıkarıldı!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2627,29 +5056,17 @@ def archive_note(note_id: int, archive: bool = True) -> Tuple[bool, str]:
 def get_tasks_summary() -> Dict:
     """Görev özeti."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        summary = {}
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM notes 
-            WHERE is_task = 1 AND task_status = 'pending' AND date(task_due_date) < date('now')
-        ''')
-        summary['overdue'] = cursor.fetchone()['c']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as c FROM notes 
-            WHERE is_task = 1 AND task_status = 'pending' AND date(task_due_date) = date('now')
-        ''')
-        summary['due_today'] = cursor.fetchone()['c']
-        
-        cursor.execute("SELECT COUNT(*) as c FROM notes WHERE is_task = 1 AND task_status = 'pending'")
-        summary['pending'] = cursor.fetchone()['c']
-        
-        cursor.execute("SELECT COUNT(*) as c FROM notes WHERE is_task = 1 AND task_status = 'completed'")
-        summary['completed'] = cursor.fetchone()['c']
-        
-        conn.close()
+        # Bekleyen görev sayıları vade takviminden okunur
+        calendar = get_due_calendar()['task']
+        summary = {'overdue': calendar['overdue']['count'],
+                   'due_today': calendar['today']['count'],
+                   'pending': calendar['total']['count']}
+        
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) as c FROM notes WHERE is_task = 1 AND task_status = 'completed'")
+            summary['completed'] = cursor.fetchone()['c']
+            
         return summary
     except sqlite3.Error:
         return {}
@@ -2691,14 +5108,13 @@ def generate_whatsapp_link(phone: str, message: str) -> str:
 def generate_whatsapp_message(template_type: str, variables: Dict) -> str:
     """Şablondan mesaj oluşturur."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT content FROM whatsapp_templates 
-            WHERE template_type = ? AND is_active = 1
-        ''', (template_type,))
-        result = cursor.fetchone()
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT content FROM whatsapp_templates 
+                WHERE template_type = ? AND is_active = 1
+            ''', (template_type,))
+            result = cursor.fetchone()
         
         if not result:
             return ""
@@ -2716,23 +5132,22 @@ def generate_whatsapp_message(template_type: str, variables: Dict) -> str:
 def get_whatsapp_templates(active_only: bool = True) -> List[Dict]:
     """WhatsApp şablonlarını listeler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = "SELECT * FROM whatsapp_templates"
-        if active_only:
-            query += " WHERE is_active = 1"
-        query += " ORDER BY template_type, name"
-        cursor.execute(query)
-        templates = [dict(row) for row in cursor.fetchall()]
-        
-        for template in templates:
-            if template.get('variables'):
-                try:
-                    template['variables'] = json.loads(template['variables'])
-                except:
-                    template['variables'] = []
-        
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            query = "SELECT * FROM whatsapp_templates"
+            if active_only:
+                query += " WHERE is_active = 1"
+            query += " ORDER BY template_type, name"
+            cursor.execute(query)
+            templates = [dict(row) for row in cursor.fetchall()]
+            
+            for template in templates:
+                if template.get('variables'):
+                    try:
+                        template['variables'] = json.loads(template['variables'])
+                    except:
+                        template['variables'] = []
+            
         return templates
     except sqlite3.Error:
         return []
@@ -2741,15 +5156,14 @@ def add_whatsapp_template(name: str, template_type: str, content: str,
                           variables: List[str] = None) -> Tuple[bool, str]:
     """Yeni WhatsApp şablonu ekler."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        vars_json = json.dumps(variables) if variables else None
-        cursor.execute('''
-            INSERT INTO whatsapp_templates (name, template_type, content, variables)
-            VALUES (?, ?, ?, ?)
-        ''', (name, template_type, content, vars_json))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            vars_json = json.dumps(variables) if variables else None
+            cursor.execute('''
+                INSERT INTO whatsapp_templates (name, template_type, content, variables)
+                VALUES (?, ?, ?, ?)
+            ''', (name, template_type, content, vars_json))
+            conn.commit()
         return True, "Şablon eklendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2757,17 +5171,16 @@ def add_whatsapp_template(name: str, template_type: str, content: str,
 def update_whatsapp_template(template_id: int, **kwargs) -> Tuple[bool, str]:
     """WhatsApp şablonu günceller."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if 'variables' in kwargs and isinstance(kwargs['variables'], list):
-            kwargs['variables'] = json.dumps(kwargs['variables'])
-        
-        fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
-        values = list(kwargs.values()) + [template_id]
-        cursor.execute(f"UPDATE whatsapp_templates SET {fields} WHERE id = ?", values)
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            if 'variables' in kwargs and isinstance(kwargs['variables'], list):
+                kwargs['variables'] = json.dumps(kwargs['variables'])
+            
+            fields = ', '.join([f"{k} = ?" for k in kwargs.keys()])
+            values = list(kwargs.values()) + [template_id]
+            cursor.execute(f"UPDATE whatsapp_templates SET {fields} WHERE id = ?", values)
+            conn.commit()
         return True, "Şablon güncellendi!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2778,18 +5191,17 @@ def log_whatsapp_message(customer_id: int, phone_number: str, message_content: s
                          status: str = "sent", created_by: int = 1) -> Tuple[bool, str]:
     """WhatsApp mesaj loglar."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO whatsapp_messages (
-                customer_id, phone_number, message_type, message_template,
-                message_content, related_type, related_id, status, sent_at, created_by
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (customer_id, phone_number, message_type, message_template,
-              message_content, related_type, related_id, status,
-              datetime.now().strftime('%Y-%m-%d %H:%M:%S'), created_by))
-        conn.commit()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO whatsapp_messages (
+                    customer_id, phone_number, message_type, message_template,
+                    message_content, related_type, related_id, status, sent_at, created_by
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (customer_id, phone_number, message_type, message_template,
+                  message_content, related_type, related_id, status,
+                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'), created_by))
+            conn.commit()
         return True, "Mesaj loglandı!"
     except sqlite3.Error as e:
         return False, f"Hata: {e}"
@@ -2798,33 +5210,32 @@ def get_whatsapp_messages(customer_id: int = None, start_date: str = None,
                           end_date: str = None, limit: int = 100) -> List[Dict]:
     """WhatsApp mesaj geçmişini getirir."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT wm.*, c.name as customer_name, u.full_name as sent_by_name
-            FROM whatsapp_messages wm
-            LEFT JOIN customers c ON wm.customer_id = c.id
-            LEFT JOIN users u ON wm.created_by = u.id
-            WHERE 1=1
-        '''
-        params = []
-        
-        if customer_id:
-            query += " AND wm.customer_id = ?"
-            params.append(customer_id)
-        if start_date:
-            query += " AND date(wm.created_at) >= ?"
-            params.append(start_date)
-        if end_date:
-            query += " AND date(wm.created_at) <= ?"
-            params.append(end_date)
-        
-        query += f" ORDER BY wm.created_at DESC LIMIT {limit}"
-        
-        cursor.execute(query, params)
-        messages = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query = '''
+                SELECT wm.*, c.name as customer_name, u.full_name as sent_by_name
+                FROM whatsapp_messages wm
+                LEFT JOIN customers c ON wm.customer_id = c.id
+                LEFT JOIN users u ON wm.created_by = u.id
+                WHERE 1=1
+            '''
+            params = []
+            
+            if customer_id:
+                query += " AND wm.customer_id = ?"
+                params.append(customer_id)
+            if start_date:
+                query += " AND date(wm.created_at) >= ?"
+                params.append(start_date)
+            if end_date:
+                query += " AND date(wm.created_at) <= ?"
+                params.append(end_date)
+            
+            query += f" ORDER BY wm.created_at DESC LIMIT {limit}"
+            
+            cursor.execute(query, params)
+            messages = [dict(row) for row in cursor.fetchall()]
         return messages
     except sqlite3.Error:
         return []
@@ -2886,41 +5297,45 @@ def prepare_payment_reminder_message(customer_id: int) -> Dict:
 # RAPORLAR VE EXPORT
 # ============================================================================
 
+def _customer_balance_query(balance_type: str = None, min_balance: float = None,
+                            order_by: str = 'balance DESC') -> Tuple[str, List]:
+    """Cari bakiye raporu sorgusunu ve parametrelerini oluşturur."""
+    query = '''
+        SELECT id, name, customer_type, phone, email, balance,
+               CASE 
+                   WHEN balance > 0 THEN 'receivable'
+                   WHEN balance < 0 THEN 'payable'
+                   ELSE 'zero'
+               END as balance_type
+        FROM customers WHERE is_active = 1
+    '''
+    params = []
+    
+    if balance_type == 'receivable':
+        query += " AND balance > 0"
+    elif balance_type == 'payable':
+        query += " AND balance < 0"
+    elif balance_type == 'non_zero':
+        query += " AND balance != 0"
+    
+    if min_balance:
+        query += " AND ABS(balance) >= ?"
+        params.append(min_balance)
+    
+    query += f" ORDER BY {order_by}"
+    return query, params
+
 def get_report_customer_balances(balance_type: str = None, 
                                   min_balance: float = None,
                                   order_by: str = 'balance DESC') -> List[Dict]:
     """Müşteri bakiye raporu."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-            SELECT id, name, customer_type, phone, email, balance,
-                   CASE 
-                       WHEN balance > 0 THEN 'receivable'
-                       WHEN balance < 0 THEN 'payable'
-                       ELSE 'zero'
-                   END as balance_type
-            FROM customers WHERE is_active = 1
-        '''
-        params = []
-        
-        if balance_type == 'receivable':
-            query += " AND balance > 0"
-        elif balance_type == 'payable':
-            query += " AND balance < 0"
-        elif balance_type == 'non_zero':
-            query += " AND balance != 0"
-        
-        if min_balance:
-            query += " AND ABS(balance) >= ?"
-            params.append(min_balance)
-        
-        query += f" ORDER BY {order_by}"
-        
-        cursor.execute(query, params)
-        data = [dict(row) for row in cursor.fetchall()]
-        conn.close()
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            
+            query, params = _customer_balance_query(balance_type, min_balance, order_by)
+            cursor.execute(query, params)
+            data = [dict(row) for row in cursor.fetchall()]
         return data
     except sqlite3.Error:
         return []
@@ -2993,57 +5408,232 @@ def get_report_customer_statement(customer_id: int, start_date: str = None,
     """Müşteri hesap ekstresi raporu."""
     return get_customer_statement(customer_id, start_date, end_date)
 
-def get_report_aging(as_of_date: str = None) -> Dict:
-    """Yaşlandırma raporu (Alacak/Borç vadelerine göre)."""
+# ----------------------------------------------------------------------------
+# Yaşlandırma (tek geçişli)
+# ----------------------------------------------------------------------------
+#
+# Bekleyen çekler (kalan tutar) ve vadeli açık cari hareketler tek sorguda,
+# her tablo bir kez taranarak gruplanır; dilim, satır başına julianday() yerine
+# önceden hesaplanmış sınır tarihleriyle (due_date >= 'YYYY-MM-DD') CASE içinde
+# seçilir. Cari hesapta ödeme kalem bazında eşleşmediği için açık kalem
+# bakiye-ileri (FIFO) varsayımıyla bulunur: ödemeler en eski borcu kapatır,
+# tarih itibarıyla bakiye en yeni vadeli hareketlerden geriye dağıtılır.
+# Bakiye > 0 alacak ('incoming'), < 0 borç ('outgoing') tarafına yazılır.
+#
+# as_of_date anlık görüntüsü: o tarihe kadar düzenlenmiş çekler ve işlemiş
+# cari hareketler alınır; tarih itibarıyla bakiye, güncel bakiyeden sonraki
+# hareketler düşülerek idx_account_tx_customer_date üzerinden bulunur.
+# Çek durumu tarihçeli tutulmadığı için geçmiş tarihte bekleyip sonradan
+# tahsil edilen çekler görüntüye girmez. Açık kalem taraması vadeli cari
+# hareketleri kapsayan idx_account_tx_due (sürüm 10) üzerinden yapılır.
+
+AGING_BUCKETS = (30, 60, 90)    # gün sınırları; son sınırın üstü 'over_<n>' dilimidir
+
+def _aging_bucket_names(buckets) -> List[str]:
+    names, low = ['current'], 1
+    for high in buckets:
+        names.append(f"{low}_{high}")
+        low = high + 1
+    names.append(f"over_{buckets[-1]}")
+    return names
+
+def _parse_aging_buckets(buckets=None) -> Tuple[int, ...]:
+    """Dilim sınırlarını doğrular ('30,60,90' metni ya da sayı listesi)."""
+    if not buckets:
+        return AGING_BUCKETS
+    if isinstance(buckets, str):
+        buckets = [part for part in buckets.split(',') if part.strip()]
+    try:
+        parsed = tuple(int(b) for b in buckets)
+    except (TypeError, ValueError):
+        raise ValueError(f"Geçersiz yaşlandırma dilimleri: {buckets!r}")
+    if not parsed or parsed[0] < 1 or any(a >= b for a, b in zip(parsed, parsed[1:])):
+        raise ValueError(f"Yaşlandırma dilimleri artan pozitif gün sayıları olmalı: {buckets!r}")
+    return parsed
+
+def _aging_grouped_query(as_of_date: str, buckets, by_customer: bool = False) -> Tuple[str, List]:
+    """
+    Dilim toplamlarını (side, source, [customer_id,] bucket, amount, count) üreten
+    sorgu. Her kaynak kendi içinde gruplanır; çek tarafı müşteri istenmediğinde
+    idx_checks_summary'den (kapsayan) okunur.
+    bucket: 0 vadesi gelmemiş, i. sınıra kadar i, son sınırın üstü len(buckets)+1.
+    """
+    as_of = datetime.strptime(as_of_date, '%Y-%m-%d')
+    bounds = [(as_of - timedelta(days=days)).strftime('%Y-%m-%d') for days in buckets]
+    bucket_case = "CASE WHEN due_date >= ? THEN 0 "
+    bucket_case += ''.join(f"WHEN due_date >= ? THEN {i} " for i in range(1, len(bounds) + 1))
+    bucket_case += f"ELSE {len(bounds) + 1} END"
+    # Düzenleme tarihi süzgeci sadece geçmiş tarihli anlık görüntüde eklenir
+    snapshot = as_of_date < datetime.now().strftime('%Y-%m-%d')
+    issued = " AND (issue_date IS NULL OR issue_date <= ?)" if snapshot else ""
+    key = "customer_id, " if by_customer else ""
+    if by_customer:
+        checks = ("SELECT check_type, customer_id, due_date, amount - paid_amount AS amount, "
+                  f"1 AS count FROM checks WHERE status = 'pending'{issued}")
+    else:
+        # Önce gün bazında (indeks sırasıyla, sıralamasız) toplanır; CASE satır
+        # başına değil vade günü başına hesaplanır
+        checks = ("SELECT check_type, due_date, SUM(amount - paid_amount) AS amount, "
+                  f"COUNT(*) AS count FROM checks WHERE status = 'pending'{issued} "
+                  "GROUP BY check_type, due_date")
+    query = f'''
+        WITH balances AS MATERIALIZED (
+            SELECT c.id AS customer_id,
+                   c.balance - COALESCE((SELECT SUM({_LEDGER_SIGNED_AMOUNT})
+                                         FROM account_transactions
+                                         WHERE customer_id = c.id AND transaction_date > ?), 0) AS balance
+            FROM customers c
+        ),
+        dated AS (
+            -- +transaction_date: tarih indeksi yerine kapsayan idx_account_tx_due seçilsin
+            SELECT id, customer_id, due_date, {_LEDGER_SIGNED_AMOUNT} AS delta
+            FROM account_transactions
+            WHERE due_date IS NOT NULL AND +transaction_date <= ?
+        ),
+        account_items AS (
+            -- CROSS JOIN sırayı sabitler: hareketler idx_account_tx_due sırasıyla
+            -- okunur, bakiye her satır için aranır (bakiyeye göre sıralanmış ara tablo yok)
+            SELECT d.customer_id, d.due_date, b.balance, ABS(d.delta) AS amount,
+                   SUM(ABS(d.delta)) OVER (
+                       PARTITION BY d.customer_id ORDER BY d.due_date DESC, d.id DESC
+                       ROWS UNBOUNDED PRECEDING) AS covered
+            FROM dated d
+            CROSS JOIN balances b ON b.customer_id = d.customer_id
+            WHERE ABS(b.balance) >= {LEDGER_TOLERANCE} AND (d.delta > 0) = (b.balance > 0)
+        )
+        SELECT check_type AS side, 'checks' AS source, {key}{bucket_case} AS bucket,
+               SUM(amount) AS amount, SUM(count) AS count
+        FROM ({checks})
+        GROUP BY check_type, {key}bucket
+        UNION ALL
+        SELECT CASE WHEN balance > 0 THEN 'incoming' ELSE 'outgoing' END AS side, 'accounts',
+               {key}{bucket_case} AS bucket,
+               SUM(MIN(amount, ABS(balance) - (covered - amount))), COUNT(*)
+        FROM account_items
+        WHERE covered - amount < ABS(balance)
+        GROUP BY side, {key}bucket
+    '''
+    bucket_params = [as_of_date] + bounds
+    params = [as_of_date, as_of_date] + bucket_params + ([as_of_date] if snapshot else [])
+    return query, params + bucket_params
+
+def get_report_aging(as_of_date: str = None, buckets=None) -> Dict:
+    """
+    Yaşlandırma raporu (Alacak/Borç vadelerine göre): bekleyen çekler ve vadeli
+    açık cari kalemler tek sorguda dilimlenir.
+
+    Dönüş: {'incoming': {dilim: {'amount', 'count'}}, 'outgoing': {...},
+    'by_source': {'checks'|'accounts': {taraf: {dilim: ...}}}, 'buckets', 'as_of_date'}
+    """
     try:
         if not as_of_date:
             as_of_date = datetime.now().strftime('%Y-%m-%d')
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Çek bazlı yaşlandırma
-        aging_ranges = [
-            ('current', 0, 0),
-            ('1_30', 1, 30),
-            ('31_60', 31, 60),
-            ('61_90', 61, 90),
-            ('over_90', 91, 9999)
-        ]
-        
-        result = {'incoming': {}, 'outgoing': {}}
-        
-        for check_type in ['incoming', 'outgoing']:
-            for range_name, min_days, max_days in aging_ranges:
-                if range_name == 'current':
-                    cursor.execute('''
-                        SELECT COALESCE(SUM(amount - paid_amount), 0) as total, COUNT(*) as count
-                        FROM checks 
-                        WHERE check_type = ? AND status = 'pending' AND date(due_date) >= date(?)
-                    ''', (check_type, as_of_date))
-                else:
-                    cursor.execute('''
-                        SELECT COALESCE(SUM(amount - paid_amount), 0) as total, COUNT(*) as count
-                        FROM checks 
-                        WHERE check_type = ? AND status = 'pending' 
-                        AND julianday(?) - julianday(due_date) BETWEEN ? AND ?
-                    ''', (check_type, as_of_date, min_days, max_days))
-                
-                row = cursor.fetchone()
-                result[check_type][range_name] = {
-                    'amount': row['total'],
-                    'count': row['count']
-                }
-        
-        conn.close()
+        buckets = _parse_aging_buckets(buckets)
+        names = _aging_bucket_names(buckets)
+        
+        def empty():
+            return {side: {name: {'amount': 0, 'count': 0} for name in names}
+                    for side in ('incoming', 'outgoing')}
+        
+        result = empty()
+        by_source = {'checks': empty(), 'accounts': empty()}
+        
+        with db_connection(readonly=True) as conn:
+            query, params = _aging_grouped_query(as_of_date, buckets)
+            rows = conn.execute(query, params).fetchall()
+        
+        for row in rows:
+            if row['side'] not in result:
+                continue
+            name = names[row['bucket']]
+            by_source[row['source']][row['side']][name] = {'amount': row['amount'], 'count': row['count']}
+            cell = result[row['side']][name]
+            cell['amount'] += row['amount']
+            cell['count'] += row['count']
+        
+        result.update(by_source=by_source, buckets=names, as_of_date=as_of_date)
         return result
-    except sqlite3.Error:
+    except (sqlite3.Error, ValueError):
         return {}
 
+def _aging_customer_query(as_of_date: str = None, buckets=None) -> Tuple[str, List, List[str], Dict[str, str]]:
+    """Müşteri/taraf bazında yaşlandırma dökümü sorgusu (ORDER BY dahil)."""
+    if not as_of_date:
+        as_of_date = datetime.now().strftime('%Y-%m-%d')
+    buckets = _parse_aging_buckets(buckets)
+    names = _aging_bucket_names(buckets)
+    grouped, params = _aging_grouped_query(as_of_date, buckets, by_customer=True)
+    sums = ', '.join(f'SUM(CASE WHEN g.bucket = {i} THEN g.amount ELSE 0.0 END) AS "{name}"'
+                     for i, name in enumerate(names))
+    query = f'''
+        SELECT g.customer_id, COALESCE(c.name, '-') AS customer_name, g.side, {sums},
+               SUM(g.amount) AS total, SUM(g.count) AS item_count
+        FROM ({grouped}) g
+        LEFT JOIN customers c ON c.id = g.customer_id
+        GROUP BY g.customer_id, g.side
+        ORDER BY total DESC, g.customer_id
+    '''
+    columns = ['customer_id', 'customer_name', 'side'] + names + ['total', 'item_count']
+    return query, params, columns, _export_column_types(columns, dict.fromkeys(names, 'REAL'))
+
+def get_report_aging_by_customer(as_of_date: str = None, buckets=None) -> List[Dict]:
+    """Müşteri bazında yaşlandırma (her müşteri/taraf için dilim tutarları)."""
+    try:
+        query, params, *_ = _aging_customer_query(as_of_date, buckets)
+        with db_connection(readonly=True) as conn:
+            return [dict(row) for row in conn.execute(query, params).fetchall()]
+    except (sqlite3.Error, ValueError):
+        return []
+
 # ============================================================================
 # EXPORT FONKSİYONLARI
 # ============================================================================
 
+EXPORT_CHUNK_ROWS = 500       # akışlı export'ta her parçadaki satır sayısı
+EXPORT_COLUMNAR_BATCH_ROWS = 65_536   # Parquet/Arrow'da kayıt grubu (row group) boyutu
+
+CUSTOMER_EXPORT_COLUMNS = ['id', 'name', 'customer_type', 'phone', 'email', 'balance', 'balance_type']
+CHECK_EXPORT_COLUMNS = ['id', 'check_type', 'payment_type', 'check_number', 'customer_name',
+                        'bank_name', 'amount', 'paid_amount', 'remaining_amount', 'due_date', 'status']
+CASH_FLOW_EXPORT_COLUMNS = ['id', 'transaction_date', 'transaction_type', 'category', 'amount',
+                            'description', 'customer_name', 'payment_method']
+STATEMENT_EXPORT_COLUMNS = ['id', 'transaction_date', 'transaction_type', 'amount',
+                            'balance_after', 'description', 'reference_type']
+# Analiz tarafına ham (kolonlu) döküm verilebilecek defter tabloları
+LEDGER_EXPORT_TABLES = ('account_transactions', 'cash_flow', 'checks', 'check_transactions')
+
+# Rapor kolonlarının bildirilen SQLite türleri (kolonlu dökümlerin şeması);
+# burada olmayan kolonlar TEXT sayılır.
+EXPORT_COLUMN_TYPES = {
+    'id': 'INTEGER', 'customer_id': 'INTEGER', 'item_count': 'INTEGER',
+    'balance': 'REAL', 'amount': 'REAL', 'paid_amount': 'REAL', 'remaining_amount': 'REAL',
+    'balance_after': 'REAL', 'total': 'REAL',
+}
+
+def _export_column_types(columns: List[str], declared: Dict[str, str] = None) -> Dict[str, str]:
+    """Kolon adı -> bildirilen SQLite türü (declared, EXPORT_COLUMN_TYPES'ı ezer)."""
+    declared = declared or {}
+    return {name: declared.get(name) or EXPORT_COLUMN_TYPES.get(name, 'TEXT') for name in columns}
+
+# Biçim adı -> {'name', 'label', 'extension', 'mimetype', 'available', 'writer'}
+# writer(query, params, columns, title, column_types) str/bytes parçaları üreten
+# bir üreticidir; column_types (kolon -> SQLite türü) yalnız kolonlu biçimlerde kullanılır.
+EXPORT_FORMATS: Dict[str, Dict] = {}
+
+def register_export_format(name: str, label: str, extension: str, mimetype: str,
+                           available: bool = True):
+    """Export biçimi kaydeden decorator (opsiyonel bağımlılıklar için available=False)."""
+    def decorator(writer):
+        EXPORT_FORMATS[name] = {'name': name, 'label': label, 'extension': extension,
+                                'mimetype': mimetype, 'available': available, 'writer': writer}
+        return writer
+    return decorator
+
+def get_export_formats() -> List[Dict]:
+    """Kullanılabilir export biçimlerini (writer hariç) döndürür."""
+    return [{k: v for k, v in fmt.items() if k != 'writer'}
+            for fmt in EXPORT_FORMATS.values() if fmt['available']]
+
 def export_to_csv(data: List[Dict], columns: List[str] = None) -> str:
     """Veriyi CSV formatına çevirir."""
     if not data:
@@ -3062,36 +5652,578 @@ def export_to_csv(data: List[Dict], columns: List[str] = None) -> str:
     
     return output.getvalue()
 
+def _iter_query_batches(query: str, params: List, size: int):
+    """Sorgu sonucunu size'lık satır listeleri hâlinde okur (bağlantı üretici boyunca tutulur)."""
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    break
+                yield rows
+    except sqlite3.Error as e:
+        # Başlıklar gönderildikten sonra hata durumu dönülemez; dosya eksik kalır
+        print(f"❌ Export hatası: {e}")
+
+class _ExportSink(io.RawIOBase):
+    """zipfile/pyarrow'un yazdığı baytları biriktirir; üretici her parçadan sonra drain() eder."""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+@register_export_format('csv', 'CSV', 'csv', 'text/csv')
+def iter_query_csv(query: str, params: List, columns: List[str], title: str = '',
+                   column_types: Dict[str, str] = None):
+    """
+    Sorgu sonucunu CSV parçaları olarak üretir (Flask Response'a doğrudan verilir).
+    
+    Satırlar listeye alınmadan imleçten EXPORT_CHUNK_ROWS'luk parçalarla
+    okunur; bellek kullanımı satır sayısından bağımsızdır. Başlık satırı
+    sorgu çalışmadan önce üretilir, böylece ilk baytlar hemen gider.
+    Bağlantı üretici bitene (ya da istemci koptuğunda kapatılana) kadar tutulur.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+    
+    writer.writerow(columns)
+    yield flush()
+    
+    row_values = operator.itemgetter(*columns)
+    for rows in _iter_query_batches(query, params, EXPORT_CHUNK_ROWS):
+        writer.writerows(map(row_values, rows))
+        yield flush()
+
+# ----------------------------------------------------------------------------
+# XLSX: paylaşılan metin tablosu (sharedStrings) yerine satır içi metin
+# kullanılır, böylece hiçbir şey satır sayısıyla büyümez; sayfa XML'i zip
+# girdisine parça parça yazılır ve sıkıştırılmış baytlar hemen gönderilir.
+# ----------------------------------------------------------------------------
+
+_XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'),
+    # Stiller: 0 varsayılan, 1 kalın başlık, 2 tarih, 3 tutar (#,##0.00)
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'),
+}
+_XLSX_SHEET_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+                    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews><sheetData>')
+_XLSX_SHEET_TAIL = '</sheetData></worksheet>'
+# XML kaçışı ve XML 1.0'da geçersiz kontrol karakterlerinin silinmesi tek translate ile
+_XLSX_TEXT_TABLE = {ord('&'): '&amp;', ord('<'): '&lt;', ord('>'): '&gt;',
+                    **{c: None for c in (*range(0, 9), 11, 12, *range(14, 32))}}
+_EXCEL_EPOCH_ORDINAL = datetime(1899, 12, 30).toordinal()
+
+def _xlsx_column_letter(index: int) -> str:
+    """0 tabanlı kolon sırasını Excel harfine çevirir: 0 -> A, 27 -> AB."""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def _xlsx_row(row_number: int, letters: List[str], values) -> str:
+    """Tek satırın XML'ini üretir (boş hücreler atlanır)."""
+    cells = []
+    for letter, value in zip(letters, values):
+        kind = type(value)
+        if kind is str:
+            if not value:
+                continue
+            # 'YYYY-MM-DD' metinleri Excel tarihine çevrilir
+            if len(value) == 10 and value[4] == '-' and value[7] == '-':
+                try:
+                    serial = datetime.fromisoformat(value).toordinal() - _EXCEL_EPOCH_ORDINAL
+                    cells.append(f'<c r="{letter}{row_number}" s="2"><v>{serial}</v></c>')
+                    continue
+                except ValueError:
+                    pass
+            cells.append(f'<c r="{letter}{row_number}" t="inlineStr"><is><t xml:space="preserve">'
+                         f'{value.translate(_XLSX_TEXT_TABLE)}</t></is></c>')
+        elif kind is float:
+            cells.append(f'<c r="{letter}{row_number}" s="3"><v>{value!r}</v></c>')
+        elif kind is int:
+            cells.append(f'<c r="{letter}{row_number}"><v>{value}</v></c>')
+        elif value is not None:
+            cells.append(f'<c r="{letter}{row_number}" t="inlineStr"><is><t xml:space="preserve">'
+                         f'{str(value).translate(_XLSX_TEXT_TABLE)}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'
+
+@register_export_format('xlsx', 'Excel (XLSX)', 'xlsx',
+                        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+def iter_query_xlsx(query: str, params: List, columns: List[str], title: str = '',
+                    column_types: Dict[str, str] = None):
+    """
+    Sorgu sonucunu tek sayfalı XLSX olarak akışlı üretir (sabit bellek).
+    Tarih kolonları (YYYY-MM-DD) Excel tarihine, ondalıklı sayılar tutar
+    biçimine çevrilir; başlık satırı kalın ve dondurulmuştur.
+    """
+    sheet_name = re.sub(r'[\[\]:*?/\\]', ' ', title or 'Rapor')[:31]
+    letters = [_xlsx_column_letter(i) for i in range(len(columns))]
+    sink = _ExportSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{xml_escape(sheet_name, {chr(34): "&quot;"})}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'))
+        
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            header = ''.join(f'<c r="{letter}1" t="inlineStr" s="1"><is><t>{str(col).translate(_XLSX_TEXT_TABLE)}</t></is></c>'
+                             for letter, col in zip(letters, columns))
+            sheet.write(f'{_XLSX_SHEET_HEAD}<row r="1">{header}</row>'.encode('utf-8'))
+            yield sink.drain()
+            
+            row_values = operator.itemgetter(*columns)
+            row_number = 1
+            for rows in _iter_query_batches(query, params, EXPORT_CHUNK_ROWS):
+                parts = []
+                for row in rows:
+                    row_number += 1
+                    parts.append(_xlsx_row(row_number, letters, row_values(row)))
+                sheet.write(''.join(parts).encode('utf-8'))
+                yield sink.drain()
+            sheet.write(_XLSX_SHEET_TAIL.encode('utf-8'))
+    yield sink.drain()
+
+# ----------------------------------------------------------------------------
+# Kolonlu dökümler (Parquet / Arrow IPC): opsiyonel pyarrow ile. Şema, ilk
+# kayıt grubundaki değerlerden değil bildirilen kolon türlerinden kurulur
+# (SUM(... ELSE 0) gibi ifadeler aynı kolonda int ve float döndürebilir).
+# ----------------------------------------------------------------------------
+
+def _arrow_type(declared: str) -> 'pyarrow.DataType':
+    """SQLite bildirilen türü -> Arrow türü (SQLite tür yakınlığı kurallarına göre)."""
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return pyarrow.int64()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB', 'NUMERIC', 'DECIMAL')):
+        return pyarrow.float64()
+    if 'BLOB' in declared:
+        return pyarrow.binary()
+    # DATE/TIMESTAMP dahil geri kalan her şey metin olarak yazılır
+    return pyarrow.string()
+
+def _arrow_schema(columns: List[str], column_types: Dict[str, str] = None) -> 'pyarrow.Schema':
+    column_types = column_types or _export_column_types(columns)
+    return pyarrow.schema([pyarrow.field(name, _arrow_type(column_types.get(name)))
+                           for name in columns])
+
+def _arrow_value(value, arrow_type):
+    """Değeri kolon türüne kayıpsız çevirir; kayıplı çevirmede ValueError yükseltir."""
+    if value is None:
+        return None
+    if pyarrow.types.is_string(arrow_type):
+        return value if isinstance(value, str) else str(value)
+    if pyarrow.types.is_float64(arrow_type) and isinstance(value, (int, float)):
+        return float(value)
+    if pyarrow.types.is_int64(arrow_type):
+        if isinstance(value, int):
+            return value
+    if pyarrow.types.is_binary(arrow_type) and isinstance(value, bytes):
+        return value
+    raise ValueError(f"{value!r} değeri {arrow_type} kolonuna yazılamaz")
+
+def _arrow_batch(schema, rows) -> 'pyarrow.RecordBatch':
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [_arrow_value(row[index], field.type) for row in rows]
+        arrays.append(pyarrow.array(values, type=field.type))
+    return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _iter_query_columnar(query: str, params: List, columns: List[str],
+                         column_types: Dict[str, str], open_writer):
+    sink = _ExportSink()
+    schema = _arrow_schema(columns, column_types)
+    writer = open_writer(sink, schema)
+    for rows in _iter_query_batches(query, params, EXPORT_COLUMNAR_BATCH_ROWS):
+        writer.write_batch(_arrow_batch(schema, rows))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+@register_export_format('parquet', 'Parquet', 'parquet', 'application/vnd.apache.parquet',
+                        available=pyarrow is not None)
+def iter_query_parquet(query: str, params: List, columns: List[str], title: str = '',
+                       column_types: Dict[str, str] = None):
+    """Sorgu sonucunu Parquet olarak akışlı üretir (her kayıt grubu ayrı row group)."""
+    return _iter_query_columnar(query, params, columns, column_types,
+                                lambda sink, schema: pyarrow.parquet.ParquetWriter(sink, schema))
+
+@register_export_format('arrow', 'Arrow IPC', 'arrows', 'application/vnd.apache.arrow.stream',
+                        available=pyarrow is not None)
+def iter_query_arrow(query: str, params: List, columns: List[str], title: str = '',
+                     column_types: Dict[str, str] = None):
+    """Sorgu sonucunu Arrow IPC akış biçiminde üretir."""
+    return _iter_query_columnar(query, params, columns, column_types, pyarrow.ipc.new_stream)
+
+# ----------------------------------------------------------------------------
+# Rapor -> sorgu eşlemesi (route'lar ?export=<biçim> ile buradan geçer)
+# ----------------------------------------------------------------------------
+
+def _customers_export_query(balance_type: str = None) -> Tuple[str, List, List[str], Dict[str, str]]:
+    query, params = _customer_balance_query(balance_type)
+    return query, params, CUSTOMER_EXPORT_COLUMNS, _export_column_types(CUSTOMER_EXPORT_COLUMNS)
+
+def _checks_export_query(start_date: str = None, end_date: str = None,
+                         check_type: str = None, status: str = None) -> Tuple[str, List, List[str], Dict[str, str]]:
+    # Vade sırası; idx_checks_due ile sıralama adımı yok
+    query, params = _check_list_query(check_type, status, None, start_date, end_date)
+    return (query + " ORDER BY c.due_date, c.id", params, CHECK_EXPORT_COLUMNS,
+            _export_column_types(CHECK_EXPORT_COLUMNS))
+
+def _cash_flow_export_query(start_date: str = None, end_date: str = None,
+                            transaction_type: str = None) -> Tuple[str, List, List[str], Dict[str, str]]:
+    # En yeni önce, indeks sırasıyla
+    query, params = _cash_flow_list_query(start_date, end_date, transaction_type=transaction_type)
+    return (query + " ORDER BY cf.transaction_date DESC, cf.id DESC", params, CASH_FLOW_EXPORT_COLUMNS,
+            _export_column_types(CASH_FLOW_EXPORT_COLUMNS))
+
+def _statement_export_query(customer_id: int, start_date: str = None,
+                            end_date: str = None) -> Tuple[str, List, List[str], Dict[str, str]]:
+    query, params = _customer_transactions_query(customer_id, start_date, end_date)
+    return (query + " ORDER BY at.created_at DESC", params, STATEMENT_EXPORT_COLUMNS,
+            _export_column_types(STATEMENT_EXPORT_COLUMNS))
+
+def _ledger_export_query(table: str) -> Tuple[str, List, List[str], Dict[str, str]]:
+    if table not in LEDGER_EXPORT_TABLES:
+        raise ValueError(f"Bilinmeyen tablo: {table}")
+    with db_connection(readonly=True) as conn:
+        declared = {row['name']: row['type'] for row in conn.execute(f"PRAGMA table_info({table})")}
+    columns = list(declared)
+    return f"SELECT {', '.join(columns)} FROM {table} ORDER BY id", [], columns, declared
+
+REPORT_EXPORTS = {
+    'customers': (_customers_export_query, 'Cari Bakiyeler'),
+    'checks': (_checks_export_query, 'Çek-Senet'),
+    'cash_flow': (_cash_flow_export_query, 'Kasa Hareketleri'),
+    'statement': (_statement_export_query, 'Hesap Ekstresi'),
+    'ledger': (_ledger_export_query, None),
+    'aging': (_aging_customer_query, 'Yaşlandırma'),
+}
+
+def iter_report_export(report: str, fmt: str, **filters):
+    """
+    Raporu istenen biçimde akışlı üretir. Bilinmeyen rapor ya da kullanılamayan
+    biçim için (ör. pyarrow kurulu değilken parquet) hemen ValueError yükseltir.
+    """
+    exporter = EXPORT_FORMATS.get(fmt)
+    if not exporter or not exporter['available']:
+        raise ValueError(f"Desteklenmeyen export biçimi: {fmt}")
+    if report not in REPORT_EXPORTS:
+        raise ValueError(f"Bilinmeyen rapor: {report}")
+    build, title = REPORT_EXPORTS[report]
+    query, params, columns, column_types = build(**filters)
+    return exporter['writer'](query, params, columns, title or filters.get('table', report),
+                              column_types)
+
+def iter_customers_csv(balance_type: str = None):
+    """Müşteri listesini akışlı CSV olarak üretir."""
+    return iter_report_export('customers', 'csv', balance_type=balance_type)
+
+def iter_checks_csv(start_date: str = None, end_date: str = None,
+                    check_type: str = None, status: str = None):
+    """Çek listesini akışlı CSV olarak üretir."""
+    return iter_report_export('checks', 'csv', start_date=start_date, end_date=end_date,
+                              check_type=check_type, status=status)
+
+def iter_cash_flow_csv(start_date: str = None, end_date: str = None,
+                       transaction_type: str = None):
+    """Kasa hareketlerini akışlı CSV olarak üretir."""
+    return iter_report_export('cash_flow', 'csv', start_date=start_date, end_date=end_date,
+                              transaction_type=transaction_type)
+
+def iter_customer_statement_csv(customer_id: int, start_date: str = None,
+                                end_date: str = None):
+    """Müşteri ekstresini akışlı CSV olarak üretir."""
+    return iter_report_export('statement', 'csv', customer_id=customer_id,
+                              start_date=start_date, end_date=end_date)
+
 def export_customers_csv(balance_type: str = None) -> str:
     """Müşteri listesini CSV olarak export eder."""
-    data = get_report_customer_balances(balance_type)
-    columns = ['id', 'name', 'customer_type', 'phone', 'email', 'balance', 'balance_type']
-    return export_to_csv(data, columns)
+    return ''.join(iter_customers_csv(balance_type))
 
 def export_checks_csv(start_date: str = None, end_date: str = None,
                        check_type: str = None, status: str = None) -> str:
     """Çek listesini CSV olarak export eder."""
-    report = get_report_checks(start_date, end_date, check_type, status)
-    columns = ['id', 'check_type', 'payment_type', 'check_number', 'customer_name',
-               'bank_name', 'amount', 'paid_amount', 'remaining_amount', 'due_date', 'status']
-    return export_to_csv(report['data'], columns)
+    return ''.join(iter_checks_csv(start_date, end_date, check_type, status))
 
 def export_cash_flow_csv(start_date: str = None, end_date: str = None) -> str:
     """Kasa hareketlerini CSV olarak export eder."""
-    transactions = get_cash_flow(start_date=start_date, end_date=end_date)
-    columns = ['id', 'transaction_date', 'transaction_type', 'category', 'amount',
-               'description', 'customer_name', 'payment_method']
-    return export_to_csv(transactions, columns)
+    return ''.join(iter_cash_flow_csv(start_date, end_date))
 
 def export_customer_statement_csv(customer_id: int, start_date: str = None,
                                    end_date: str = None) -> str:
     """Müşteri ekstresini CSV olarak export eder."""
-    statement = get_customer_statement(customer_id, start_date, end_date)
-    if not statement or 'transactions' not in statement:
-        return ""
-    columns = ['id', 'transaction_date', 'transaction_type', 'amount', 
-               'balance_after', 'description', 'reference_type']
-    return export_to_csv(statement['transactions'], columns)
+    return ''.join(iter_customer_statement_csv(customer_id, start_date, end_date))
+
+# ============================================================================
+# CARİ BAKİYE BÜTÜNLÜK KONTROLÜ
+# ============================================================================
+#
+# customers.balance ve her hareketteki balance_after oku-değiştir-yaz ile
+# güncellendiği için (ör. add_cash_transaction bakiyeyi transaction() dışında
+# okur) eşzamanlı yazmalarda kayma olabilir. Doğrulama bakiyeyi hareketlerden
+# pencere fonksiyonlu kümülatif toplamla yeniden hesaplar (created_at, id sırası):
+#
+#   açılış_n = balance_after_n - SUM(işaretli_tutar)(1..n)
+#
+# Zincir sağlamsa açılış_n her harekette aynıdır (add_customer'a verilen ilk
+# bakiye hareket yazmaz); beklenen bakiye açılış + toplam tutardır. Hareket
+# yönü tek tip değildir: kasa hareketlerinde (reference_type = 'cash_flow')
+# 'credit' bakiyeyi düşürür, diğer kaynaklarda (_apply_customer_balance) artırır.
+#
+# Tam tarama tek sorgudur; sıralama idx_account_tx_customer (customer_id,
+# created_at) indeksinden okunur, ek sıralama yapılmaz (tabloyu sırayla okuyup
+# sıralamak DB_PROFILE ayarlarıyla daha yavaş ölçüldü). Ayrıntı (bozuk hareket
+# sayısı, ilk bozuk hareket) ve yeniden kurma sadece uyumsuz müşteriler için,
+# id listesiyle indeksten okunur. Yeniden kurma her partiyi kendi
+# transaction'ında yazar; yazıcı kilidi partiler arasında serbest kalır
+# (uygulama açıkken çalıştırılabilir).
+
+LEDGER_BATCH_CUSTOMERS = 500    # ayrıntı sorgusu / yeniden kurma transaction'ı başına müşteri
+LEDGER_TOLERANCE = 0.005        # kuruş altı yuvarlama farkları kayma sayılmaz
+LEDGER_MAX_REPORT = 1000        # sonuçta saklanan uyumsuz müşteri (mismatch_count hepsini sayar)
+
+_LEDGER_SIGNED_AMOUNT = ("CASE WHEN (COALESCE(reference_type, '') = 'cash_flow') "
+                         "= (transaction_type = 'credit') THEN -amount ELSE amount END")
+_LEDGER_WINDOW = "PARTITION BY customer_id ORDER BY created_at, id ROWS UNBOUNDED PRECEDING"
+
+# Müşteri başına özet ({where}: boş ya da müşteri id filtresi)
+_LEDGER_SCAN_SQL = f'''
+    SELECT l.customer_id, c.name, c.balance AS stored_balance, l.tx_count,
+           l.null_count, l.opening_min, l.opening_max, l.total
+    FROM (SELECT customer_id, COUNT(*) AS tx_count, SUM(balance_after IS NULL) AS null_count,
+                 MIN(opening) AS opening_min, MAX(opening) AS opening_max, SUM(delta) AS total
+          FROM (SELECT customer_id, delta, balance_after,
+                       balance_after - SUM(delta) OVER ({_LEDGER_WINDOW}) AS opening
+                FROM (SELECT customer_id, id, created_at, balance_after,
+                             {_LEDGER_SIGNED_AMOUNT} AS delta
+                      FROM account_transactions {{where}}))
+          GROUP BY customer_id) l
+    JOIN customers c ON c.id = l.customer_id
+'''
+
+# Hareket başına beklenen bakiye; açılış ilk hareketten alınır ({ids}: yer tutucular)
+_LEDGER_RUNNING_SQL = f'''
+    SELECT customer_id, id, balance_after, delta,
+           FIRST_VALUE(COALESCE(balance_after, 0) - delta) OVER w AS opening,
+           FIRST_VALUE(COALESCE(balance_after, 0) - delta) OVER w
+               + SUM(delta) OVER w AS expected_after
+    FROM (SELECT customer_id, id, created_at, balance_after,
+                 {_LEDGER_SIGNED_AMOUNT} AS delta
+          FROM account_transactions
+          WHERE customer_id IN ({{ids}}))
+    WINDOW w AS ({_LEDGER_WINDOW})
+'''
+
+_LEDGER_BROKEN = f"(balance_after IS NULL OR ABS(balance_after - expected_after) > {LEDGER_TOLERANCE})"
+
+_LEDGER_DETAIL_SQL = f'''
+    SELECT customer_id, MAX(opening) + SUM(delta) AS expected_balance,
+           SUM({_LEDGER_BROKEN}) AS broken_movements,
+           MIN(CASE WHEN {_LEDGER_BROKEN} THEN id END) AS first_broken_id
+    FROM ({_LEDGER_RUNNING_SQL})
+    GROUP BY customer_id
+'''
+
+def _ledger_scan(cursor, customer_ids: List[int] = None):
+    """Müşteri başına özet satırlarını ve uyumsuzluk bayrağını üretir."""
+    if customer_ids:
+        ids = sorted(set(customer_ids))
+        slices = [ids[i:i + LEDGER_BATCH_CUSTOMERS]
+                  for i in range(0, len(ids), LEDGER_BATCH_CUSTOMERS)]
+    else:
+        slices = [None]
+    for part in slices:
+        if part is None:
+            cursor.execute(_LEDGER_SCAN_SQL.format(where=''))
+        else:
+            cursor.execute(_LEDGER_SCAN_SQL.format(
+                where=f"WHERE customer_id IN ({', '.join('?' * len(part))})"), part)
+        for row in cursor:
+            row = dict(row)
+            stored = row['stored_balance'] or 0
+            mismatch = (row['null_count'] > 0
+                        or row['opening_max'] - row['opening_min'] > LEDGER_TOLERANCE
+                        or abs(stored - row['opening_min'] - row['total']) > LEDGER_TOLERANCE)
+            yield row, mismatch
+
+def _ledger_details(cursor, customer_ids: List[int]) -> Dict[int, Dict]:
+    """Verilen müşterilerin beklenen bakiyesi ve bozuk hareket bilgisi (tek sorgu)."""
+    placeholders = ', '.join('?' * len(customer_ids))
+    cursor.execute(_LEDGER_DETAIL_SQL.format(ids=placeholders), customer_ids)
+    return {row['customer_id']: dict(row) for row in cursor.fetchall()}
+
+def verify_customer_ledger(customer_ids: List[int] = None) -> Dict:
+    """
+    Cari bakiyeleri hareketlerden yeniden hesaplayıp saklananlarla karşılaştırır
+    (sadece okur). customer_ids verilmezse tüm müşteriler taranır; hareketi
+    olmayan müşteriler karşılaştırılacak bir şey olmadığından sayılmaz.
+    
+    Uyumsuzluk: customers.balance beklenen son bakiyeden farklıysa ya da bir
+    hareketin balance_after'ı kümülatif toplamla tutmuyorsa (kayıp güncelleme;
+    sonraki hareketler de kaymış bakiyeden devam ettiği için bozuk sayılır).
+    
+    Sonuç: {'customers_checked', 'movements_checked', 'mismatch_count',
+            'mismatches': [{'customer_id', 'name', 'stored_balance',
+                            'expected_balance', 'difference', 'tx_count',
+                            'broken_movements', 'first_broken_id'}],
+            'elapsed'}
+    """
+    started = time.perf_counter()
+    result = {'customers_checked': 0, 'movements_checked': 0, 'mismatch_count': 0,
+              'mismatches': [], 'elapsed': 0.0}
+    try:
+        with db_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            flagged = []
+            for row, mismatch in _ledger_scan(cursor, customer_ids):
+                result['customers_checked'] += 1
+                result['movements_checked'] += row['tx_count']
+                if mismatch:
+                    result['mismatch_count'] += 1
+                    if len(flagged) < LEDGER_MAX_REPORT:
+                        flagged.append(row)
+            
+            for i in range(0, len(flagged), LEDGER_BATCH_CUSTOMERS):
+                part = flagged[i:i + LEDGER_BATCH_CUSTOMERS]
+                details = _ledger_details(cursor, [row['customer_id'] for row in part])
+                for row in part:
+                    detail = details[row['customer_id']]
+                    expected = round(detail['expected_balance'], 2)
+                    result['mismatches'].append({
+                        'customer_id': row['customer_id'],
+                        'name': row['name'],
+                        'stored_balance': row['stored_balance'],
+                        'expected_balance': expected,
+                        'difference': round((row['stored_balance'] or 0) - expected, 2),
+                        'tx_count': row['tx_count'],
+                        'broken_movements': detail['broken_movements'],
+                        'first_broken_id': detail['first_broken_id'],
+                    })
+    except sqlite3.Error as e:
+        print(f"❌ Cari bakiye doğrulama hatası: {e}")
+        result['error'] = str(e)
+    result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
+
+def rebuild_customer_balances(customer_ids: List[int] = None, created_by: int = 1) -> Dict:
+    """
+    Kaymış cari bakiyeleri hareketlerden yeniden kurar: bozuk balance_after
+    değerleri ve customers.balance kümülatif toplamla düzeltilir, hareket
+    tutarlarına dokunulmaz. Önce (okuma bağlantısında) uyumsuz müşteriler
+    bulunur; her parti BEGIN IMMEDIATE ile ayrı transaction'da yeniden
+    hesaplanıp yazılır, böylece hesap ile yazma arasına başka yazıcı giremez.
+    
+    Sonuç: {'customers_checked', 'customers_fixed', 'movements_fixed', 'elapsed'}
+    """
+    started = time.perf_counter()
+    result = {'customers_checked': 0, 'customers_fixed': 0, 'movements_fixed': 0,
+              'elapsed': 0.0}
+    try:
+        with db_connection(readonly=True) as conn:
+            flagged = []
+            for row, mismatch in _ledger_scan(conn.cursor(), customer_ids):
+                result['customers_checked'] += 1
+                if mismatch:
+                    flagged.append(row['customer_id'])
+        
+        for i in range(0, len(flagged), LEDGER_BATCH_CUSTOMERS):
+            part = flagged[i:i + LEDGER_BATCH_CUSTOMERS]
+            placeholders = ', '.join('?' * len(part))
+            with transaction('customers') as cursor:
+                cursor.execute(f"SELECT id, expected_after FROM ({_LEDGER_RUNNING_SQL}) "
+                               f"WHERE {_LEDGER_BROKEN}".format(ids=placeholders), part)
+                movements = [(round(row['expected_after'], 2), row['id'])
+                             for row in cursor.fetchall()]
+                details = _ledger_details(cursor, part)
+                cursor.execute(f"SELECT id, balance FROM customers WHERE id IN ({placeholders})",
+                               part)
+                now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                customers = [(round(details[row['id']]['expected_balance'], 2), now, row['id'])
+                             for row in cursor.fetchall()
+                             if abs((row['balance'] or 0) - details[row['id']]['expected_balance'])
+                             > LEDGER_TOLERANCE]
+                if movements:
+                    cursor.executemany("UPDATE account_transactions SET balance_after = ? "
+                                       "WHERE id = ?", movements)
+                if customers:
+                    cursor.executemany("UPDATE customers SET balance = ?, updated_at = ? "
+                                       "WHERE id = ?", customers)
+                if movements or customers:
+                    _write_activity(cursor, created_by, 'rebuild', 'customer_balance', None,
+                                    new_values={'customers': [c[2] for c in customers],
+                                                'movements': len(movements)})
+            result['customers_fixed'] += len(customers)
+            result['movements_fixed'] += len(movements)
+    except sqlite3.Error as e:
+        print(f"❌ Cari bakiye yeniden kurma hatası: {e}")
+        result['error'] = str(e)
+    result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
 
 # ============================================================================
 # YEDEKLEME
@@ -3104,11 +6236,12 @@ def backup_database(backup_path: str = None) -> Tuple[bool, str]:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_path = f"backup_{DB_NAME}_{timestamp}"
         
-        conn = get_db_connection()
-        backup_conn = sqlite3.connect(backup_path)
-        conn.backup(backup_conn)
-        backup_conn.close()
-        conn.close()
+        # Tampondaki aktivite kayıtları yedeğe dahil edilir
+        activity_writer.flush()
+        with db_connection(readonly=True) as conn:
+            backup_conn = sqlite3.connect(backup_path)
+            conn.backup(backup_conn)
+            backup_conn.close()
         
         return True, f"Yedek oluşturuldu: {backup_path}"
     except Exception as e:
@@ -3120,11 +6253,17 @@ def restore_database(backup_path: str) -> Tuple[bool, str]:
         if not os.path.exists(backup_path):
             return False, "Yedek dosyası bulunamadı!"
         
+        # Eski veritabanına ait kayıtlar geri yüklenen dosyaya yazılmasın
+        activity_writer.flush()
         backup_conn = sqlite3.connect(backup_path)
-        conn = get_db_connection()
-        backup_conn.backup(conn)
-        conn.close()
+        with db_connection() as conn:
+            backup_conn.backup(conn)
         backup_conn.close()
+        close_db_connections()
+        
+        # Eski sürüm yedekler güncel şemaya yükseltilir
+        run_migrations()
+        _invalidate(*CACHE_DOMAINS)
         
         return True, "Veritabanı geri yüklendi!"
     except Exception as e:
@@ -0,0 +1,1562 @@
+# ============================================================================
+# BENCHMARK.PY - PERFORMANS ÖLÇÜMLERİ
+# ============================================================================
+# Geçici bir klasörde sentetik veritabanı oluşturur ve backend fonksiyonlarını
+# ölçer. Gerçek borc_takip.db dosyasına dokunmaz.
+#
+# Kullanım:
+#   python benchmark.py indexes --rows 1000000
+#   python benchmark.py checks_summary --rows 1000000
+#   python benchmark.py cash_balance --rows 1000000
+#   python benchmark.py dashboard --rows 1000000
+#   python benchmark.py settings
+#   python benchmark.py customers --rows 1000000
+#   python benchmark.py pagination --rows 1000000
+#   python benchmark.py search --rows 1000000
+#   python benchmark.py autocomplete --rows 1000000
+#   python benchmark.py payments --rows 20000
+#   python benchmark.py check_import --rows 100000
+#   python benchmark.py cash_import --rows 100000
+#   python benchmark.py export --rows 1000000
+#   python benchmark.py statement --rows 100000
+#   python benchmark.py ledger --rows 1000000
+#   python benchmark.py activity_log --rows 20000
+#   python benchmark.py activity_partitions --rows 1000000
+#   python benchmark.py aging --rows 1000000
+#   python benchmark.py date_predicates --rows 1000000
+#   python benchmark.py due_calendar --rows 1000000
+# ============================================================================
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tracemalloc
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# ============================================================================
+# YARDIMCI FONKSİYONLAR
+# ============================================================================
+
+def load_backend(workdir: str):
+    """backend modülünü geçici klasördeki veritabanı ile yükler."""
+    os.chdir(workdir)
+    sys.path.insert(0, ROOT)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import backend
+        backend.init_db()
+    return backend
+
+def timed(fn, repeat: int = 5) -> float:
+    """Fonksiyonu tekrar tekrar çalıştırır, medyan süreyi (ms) döndürür."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def print_table(title: str, rows):
+    """Önce/sonra sonuçlarını tablo olarak yazdırır."""
+    print("=" * 78)
+    print(title)
+    print("=" * 78)
+    print(f"{'Sorgu':<44}{'Önce (ms)':>11}{'Sonra (ms)':>11}{'Hız':>10}")
+    for name, before, after in rows:
+        speedup = before / after if after else float('inf')
+        print(f"{name:<44}{before:>11.2f}{after:>11.2f}{speedup:>9.1f}x")
+
+def populate(backend, rows: int, seed: int = 42):
+    """Sentetik müşteri, çek, kasa, cari hareket ve hatırlatıcı verisi üretir."""
+    rnd = random.Random(seed)
+    today = date.today()
+    n_customers = max(10, rows // 100)
+    categories = ['Satış', 'Tahsilat', 'Kira', 'Fatura', 'Maaş/Personel', 'Vergi', 'Ulaşım']
+
+    def day(offset_range):
+        return (today + timedelta(days=rnd.randint(*offset_range))).strftime('%Y-%m-%d')
+
+    with backend.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO customers (name, phone, customer_type, balance) VALUES (?, ?, ?, 0)",
+            ((f"Müşteri {i}", f"05{rnd.randint(100000000, 999999999)}",
+              'customer' if i % 4 else 'supplier') for i in range(n_customers)))
+        conn.executemany(
+            "INSERT INTO checks (check_type, payment_type, customer_id, check_number, amount, "
+            "paid_amount, due_date, status) VALUES (?, 'check', ?, ?, ?, 0, ?, ?)",
+            (('incoming' if rnd.random() < 0.6 else 'outgoing', rnd.randint(1, n_customers),
+              f"C-{i}", round(rnd.uniform(100, 50000), 2), day((-720, 360)),
+              rnd.choice(('pending', 'pending', 'cashed', 'endorsed', 'returned')))
+             for i in range(rows)))
+        conn.executemany(
+            "INSERT INTO cash_flow (transaction_type, category, amount, description, customer_id, "
+            "transaction_date) VALUES (?, ?, ?, ?, ?, ?)",
+            ((rnd.choice(('income', 'expense')), rnd.choice(categories),
+              round(rnd.uniform(10, 10000), 2), f"Hareket {i}",
+              rnd.randint(1, n_customers) if rnd.random() < 0.5 else None, day((-1080, 0)))
+             for i in range(rows)))
+        conn.executemany(
+            "INSERT INTO account_transactions (customer_id, transaction_type, amount, balance_after, "
+            "description, transaction_date, created_at) VALUES (?, ?, ?, 0, ?, ?, ?)",
+            ((rnd.randint(1, n_customers), rnd.choice(('debit', 'credit')),
+              round(rnd.uniform(10, 10000), 2), f"Hareket {i}", d, d + ' 12:00:00')
+             for i, d in ((i, day((-1080, 0))) for i in range(rows))))
+        conn.executemany(
+            "INSERT INTO reminders (title, due_date, status) VALUES (?, ?, ?)",
+            ((f"Hatırlatma {i}", day((-360, 360)), rnd.choice(('pending', 'completed')))
+             for i in range(rows // 5)))
+        conn.commit()
+    return n_customers
+
+def drop_indexes(backend, version: int = 0):
+    """Ölçüm öncesi durumu için verilen sürümden sonraki indeksleri kaldırır."""
+    keep = {name for name, _ in backend.DB_INDEXES} if version >= 1 else set()
+    with backend.db_connection() as conn:
+        names = [row['name'] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")]
+        for name in names:
+            if name not in keep:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.execute(f"PRAGMA user_version = {version}")
+        conn.commit()
+
+# ============================================================================
+# SENARYOLAR
+# ============================================================================
+
+def bench_indexes(backend, rows: int):
+    """Sıcak filtre kolonlarındaki indekslerin etkisini ölçer."""
+    drop_indexes(backend)
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    n_customers = populate(backend, rows)
+
+    today = date.today()
+    week_start = today.strftime('%Y-%m-%d')
+    week_end = (today + timedelta(days=7)).strftime('%Y-%m-%d')
+    month_start = (today - timedelta(days=30)).strftime('%Y-%m-%d')
+    customer_id = n_customers // 2
+
+    queries = [
+        ('get_all_checks(customer_id, pending)',
+         lambda: backend.get_all_checks(customer_id=customer_id, status='pending')),
+        ('get_all_checks(pending, due this week)',
+         lambda: backend.get_all_checks(status='pending', start_date=week_start, end_date=week_end)),
+        ('get_cash_flow(last 30 days, category)',
+         lambda: backend.get_cash_flow(start_date=month_start, end_date=week_start, category='Kira')),
+        ('get_cash_flow(last 30 days, income)',
+         lambda: backend.get_cash_flow(start_date=month_start, end_date=week_start,
+                                       transaction_type='income')),
+        ('get_customer_transactions(limit 20)',
+         lambda: backend.get_customer_transactions(customer_id, limit=20)),
+        ('get_reminders(pending, due this week)',
+         lambda: backend.get_reminders(status='pending', start_date=week_start, end_date=week_end)),
+    ]
+
+    before = [timed(fn) for _, fn in queries]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations(target_version=1)
+    build_seconds = time.perf_counter() - start
+    after = [timed(fn) for _, fn in queries]
+
+    print_table(f"İNDEKS SETİ ({rows:,} satır/tablo, indeks oluşturma {build_seconds:.1f} sn)",
+                [(name, b, a) for (name, _), b, a in zip(queries, before, after)])
+
+# Tek sorguya geçilmeden önceki get_checks_summary() sorguları (karşılaştırma için)
+LEGACY_CHECKS_SUMMARY_QUERIES = [
+    ('incoming_pending', "SELECT COALESCE(SUM(amount - paid_amount), 0) as amount, COUNT(*) as count "
+                         "FROM checks WHERE check_type = 'incoming' AND status = 'pending'"),
+    ('outgoing_pending', "SELECT COALESCE(SUM(amount - paid_amount), 0) as amount, COUNT(*) as count "
+                         "FROM checks WHERE check_type = 'outgoing' AND status = 'pending'"),
+    ('overdue', "SELECT COALESCE(SUM(amount - paid_amount), 0) as amount, COUNT(*) as count "
+                "FROM checks WHERE status = 'pending' AND date(due_date) < date('now')"),
+    ('this_week', "SELECT COALESCE(SUM(amount - paid_amount), 0) as amount, COUNT(*) as count "
+                  "FROM checks WHERE status = 'pending' AND date(due_date) >= date('now') "
+                  "AND date(due_date) <= date('now', '+7 days')"),
+    ('this_month', "SELECT COALESCE(SUM(amount - paid_amount), 0) as amount, COUNT(*) as count "
+                   "FROM checks WHERE status = 'pending' "
+                   "AND strftime('%Y-%m', due_date) = strftime('%Y-%m', 'now')"),
+    ('endorsed', "SELECT COALESCE(SUM(amount), 0) as amount, COUNT(*) as count "
+                 "FROM checks WHERE status = 'endorsed'"),
+]
+
+def legacy_checks_summary(conn) -> dict:
+    """Eski çok sorgulu özet; her filtre için tabloyu ayrı ayrı tarar."""
+    summary = {}
+    for key, sql in LEGACY_CHECKS_SUMMARY_QUERIES:
+        row = conn.execute(sql).fetchone()
+        summary[f'{key}_amount'] = row['amount']
+        summary[f'{key}_count'] = row['count']
+    return summary
+
+def count_plan_scans(conn, sqls) -> int:
+    """EXPLAIN QUERY PLAN çıktısındaki checks tablosu/indeksi tarama adımlarını sayar."""
+    scans = 0
+    for sql in sqls:
+        sql, params = sql if isinstance(sql, tuple) else (sql, ())
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            words = row['detail'].split()
+            if words[0] in ('SCAN', 'SEARCH') and words[1] in ('checks', 'c'):
+                scans += 1
+    return scans
+
+def bench_checks_summary(backend, rows: int):
+    """get_checks_summary() için çok sorgu ve tek geçiş karşılaştırması."""
+    drop_indexes(backend, version=1)
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with backend.db_connection() as conn:
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    with backend.db_connection(readonly=True) as conn:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        legacy = legacy_checks_summary(conn)
+        conn.set_trace_callback(None)
+        legacy_statements = len(statements)
+        legacy_scans = count_plan_scans(conn, [sql for _, sql in LEGACY_CHECKS_SUMMARY_QUERIES])
+        before = timed(lambda: legacy_checks_summary(conn))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+
+    with backend.db_connection(readonly=True) as conn:
+        statements = []
+        conn.set_trace_callback(statements.append)
+        current = backend.get_checks_summary()
+        conn.set_trace_callback(None)
+        current_statements = len(statements)
+        current_scans = count_plan_scans(conn, [(backend.CHECKS_SUMMARY_SQL, backend.date_bounds())])
+    after = timed(backend.get_checks_summary)
+
+    mismatches = [key for key in legacy if abs(legacy[key] - current[key]) > 0.005]
+    print_table(f"ÇEK ÖZETİ ({rows:,} çek)", [('get_checks_summary()', before, after)])
+    print(f"{'SQL ifadesi':<44}{legacy_statements:>11}{current_statements:>11}")
+    print(f"{'checks taraması (EXPLAIN QUERY PLAN)':<44}{legacy_scans:>11}{current_scans:>11}")
+    print("✅ Sonuçlar birebir aynı" if not mismatches else f"❌ Farklı alanlar: {mismatches}")
+
+# Günlük toplam tablosundan önceki get_cash_balance() sorguları (karşılaştırma için)
+LEGACY_CASH_BALANCE_QUERIES = [
+    ('total', "1=1"),
+    ('today', "transaction_date = date('now')"),
+    ('month', "strftime('%Y-%m', transaction_date) = strftime('%Y-%m', 'now')"),
+    ('week', "transaction_date >= date('now', '-7 days')"),
+]
+
+def legacy_cash_balance(conn) -> dict:
+    """Eski dört sorgulu kasa özeti; her dönem için cash_flow tablosunu tarar."""
+    balance = {}
+    for key, where in LEGACY_CASH_BALANCE_QUERIES:
+        row = conn.execute(f'''
+            SELECT
+                COALESCE(SUM(CASE WHEN transaction_type = 'income' THEN amount ELSE 0 END), 0) as income,
+                COALESCE(SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END), 0) as expense
+            FROM cash_flow WHERE {where}
+        ''').fetchone()
+        balance[f'{key}_income'] = row['income']
+        balance[f'{key}_expense'] = row['expense']
+    return balance
+
+def bench_cash_balance(backend, rows: int):
+    """get_cash_balance() için cash_flow taraması ve günlük toplam tablosu karşılaştırması."""
+    with backend.db_connection() as conn:
+        conn.execute("DROP TABLE IF EXISTS cash_flow_daily")
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+
+    with backend.db_connection(readonly=True) as conn:
+        legacy = legacy_cash_balance(conn)
+        before = timed(lambda: legacy_cash_balance(conn))
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+    build_seconds = time.perf_counter() - start
+
+    # Yazma yolu: yeni hareketler günlük toplamlara anında yansımalı
+    backend.add_cash_transaction('income', 'Satış', 1234.5, 'Ölçüm')
+    backend.add_cash_transaction('expense', 'Kira', 500.0, 'Ölçüm')
+    with backend.db_connection(readonly=True) as conn:
+        legacy = legacy_cash_balance(conn)
+        rollup_rows = conn.execute("SELECT COUNT(*) FROM cash_flow_daily").fetchone()[0]
+    current = backend.get_cash_balance()
+    after = timed(backend.get_cash_balance)
+
+    mismatches = [key for key in legacy if abs(legacy[key] - current[key]) > 0.005]
+    print_table(f"KASA BAKİYESİ ({rows:,} hareket → {rollup_rows:,} günlük satır, "
+                f"doldurma {build_seconds:.1f} sn)",
+                [('get_cash_balance()', before, after)])
+    print("✅ Sonuçlar birebir aynı" if not mismatches else f"❌ Farklı alanlar: {mismatches}")
+
+def bench_dashboard(backend, rows: int):
+    """get_dashboard_stats() için önbelleksiz hesaplama ve anlık görüntü karşılaştırması."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+    backend._invalidate(*backend.CACHE_DOMAINS)
+
+    before = timed(backend._compute_dashboard_stats)
+    backend.get_dashboard_stats()
+    after = timed(backend.get_dashboard_stats, repeat=50)
+
+    # Yazma yolları anlık görüntüyü bayatlatmalı
+    checks = []
+    stats = backend.get_dashboard_stats()
+    backend.add_cash_transaction('income', 'Satış', 1000.0, 'Ölçüm')
+    checks.append(('add_cash_transaction', backend.get_dashboard_stats()['today_income'],
+                   stats['today_income'] + 1000.0))
+    backend.add_customer('Ölçüm Müşterisi')
+    checks.append(('add_customer', backend.get_dashboard_stats()['total_customers'],
+                   stats['total_customers'] + 1))
+    _, _, reminder_id = backend.add_reminder('Ölçüm', date.today().strftime('%Y-%m-%d'))
+    checks.append(('add_reminder', backend.get_dashboard_stats()['pending_reminders'],
+                   stats['pending_reminders'] + 1))
+    backend.complete_reminder(reminder_id)
+    checks.append(('complete_reminder', backend.get_dashboard_stats()['pending_reminders'],
+                   stats['pending_reminders']))
+
+    print_table(f"DASHBOARD ({rows:,} satır/tablo)", [('get_dashboard_stats()', before, after)])
+    for name, got, expected in checks:
+        mark = '✅' if abs(got - expected) < 0.005 else '❌'
+        print(f"{mark} {name} sonrası güncel: {got} (beklenen {expected})")
+
+def legacy_get_setting(backend, category: str, key: str, default=None):
+    """Önbelleksiz get_setting(): her çağrıda bağlantı + sorgu."""
+    with backend.db_connection(readonly=True) as conn:
+        row = conn.execute(
+            "SELECT setting_value, setting_type FROM settings WHERE category = ? AND setting_key = ?",
+            (category, key)).fetchone()
+    if not row:
+        return default
+    value = backend._convert_setting_value(row['setting_value'], row['setting_type'])
+    return default if value is None else value
+
+def bench_settings(backend, rows: int):
+    """İstek başına okunan ayarlar için önbelleksiz/önbellekli get_setting() karşılaştırması."""
+    keys = [('company', 'name', 'Firmamız'), ('whatsapp', 'enabled', False),
+            ('reminder', 'auto_create_check_reminder', True), ('reminder', 'check_reminder_days', 3)]
+
+    def read_all(getter):
+        for _ in range(250):
+            for category, key, default in keys:
+                getter(category, key, default)
+
+    before = timed(lambda: read_all(lambda c, k, d: legacy_get_setting(backend, c, k, d)))
+    after = timed(lambda: read_all(backend.get_setting))
+    mismatches = [(c, k) for c, k, d in keys
+                  if legacy_get_setting(backend, c, k, d) != backend.get_setting(c, k, d)]
+
+    # Başka süreçten yapılan yazma: sürüm tablosu üzerinden fark edilmeli
+    with backend.db_connection() as conn:
+        conn.execute("UPDATE settings SET setting_value = 'Dış Süreç' "
+                     "WHERE category = 'company' AND setting_key = 'name'")
+        backend._bump_cache_version(conn.cursor(), 'settings')
+        conn.commit()
+    backend.SETTINGS_CACHE_CHECK_INTERVAL = 0
+    external_seen = backend.get_setting('company', 'name') == 'Dış Süreç'
+
+    print_table("AYARLAR (1.000 get_setting çağrısı)", [('get_setting() x1000', before, after)])
+    print("✅ Sonuçlar birebir aynı" if not mismatches else f"❌ Farklı ayarlar: {mismatches}")
+    print("✅ Süreçler arası sürüm değişikliği algılandı" if external_seen
+          else "❌ Süreçler arası sürüm değişikliği algılanmadı")
+
+# İlişkili alt sorgulu eski get_all_customers() sorgusu (karşılaştırma için)
+LEGACY_ALL_CUSTOMERS_SQL = '''
+    SELECT c.*,
+           (SELECT COUNT(*) FROM checks WHERE customer_id = c.id AND status = 'pending') as pending_checks,
+           (SELECT COALESCE(SUM(amount - paid_amount), 0) FROM checks
+            WHERE customer_id = c.id AND check_type = 'incoming' AND status = 'pending') as incoming_checks_total,
+           (SELECT COALESCE(SUM(amount - paid_amount), 0) FROM checks
+            WHERE customer_id = c.id AND check_type = 'outgoing' AND status = 'pending') as outgoing_checks_total
+    FROM customers c WHERE c.is_active = 1 ORDER BY c.name
+'''
+
+def bench_customers(backend, rows: int):
+    """get_all_customers() için ilişkili alt sorgular ve gruplanmış ön toplama karşılaştırması."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+
+    def legacy():
+        with backend.db_connection(readonly=True) as conn:
+            return [dict(row) for row in conn.execute(LEGACY_ALL_CUSTOMERS_SQL)]
+
+    expected = {c['id']: c for c in legacy()}
+    current = {c['id']: c for c in backend.get_all_customers()}
+    fields = ('pending_checks', 'incoming_checks_total', 'outgoing_checks_total')
+    mismatches = [cid for cid, c in expected.items()
+                  if cid not in current or any(abs(c[f] - current[cid][f]) > 0.005 for f in fields)]
+
+    before = timed(legacy)
+    after = timed(backend.get_all_customers)
+    choices = timed(backend.get_customer_choices)
+    print_table(f"MÜŞTERİ LİSTESİ ({len(expected):,} müşteri, {rows:,} çek)", [
+        ('get_all_customers()', before, after),
+        ('açılır liste (get_customer_choices)', before, choices),
+    ])
+    print("✅ Sonuçlar birebir aynı" if not mismatches else f"❌ Farklı müşteriler: {mismatches[:10]}")
+
+def bench_pagination(backend, rows: int):
+    """Tüm listeyi okumak ile keyset sayfalarını (ilk ve derin sayfa) karşılaştırır."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with backend.db_connection() as conn:
+        # NULL sıralama anahtarları (COALESCE'li anahtarlar atlamadan geçmeli)
+        conn.executemany("INSERT INTO cash_flow (transaction_type, category, amount, transaction_date) "
+                         "VALUES ('income', 'Satış', 1, NULL)", [()] * max(10, rows // 100))
+        conn.executemany("INSERT INTO notes (title, is_pinned) VALUES (?, ?)",
+                         ((f"Not {i}", None if i % 7 == 0 else i % 2) for i in range(rows // 5)))
+        conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+
+    def deep_cursor(page_fn, fraction: float = 0.5):
+        """Listenin yaklaşık ortasındaki sayfanın imlecini sayfaları gezerek bulur."""
+        page = page_fn(page_size=backend.PAGE_SIZE_MAX)
+        total, cursor = len(page['items']), page['next_cursor']
+        target = int(rows * fraction)
+        while page['has_more'] and total < target:
+            cursor = page['next_cursor']
+            page = page_fn(cursor=cursor, page_size=backend.PAGE_SIZE_MAX)
+            total += len(page['items'])
+        return cursor
+
+    table = []
+    missing = []
+    for name, list_fn, page_fn in [
+        ('müşteriler', backend.get_all_customers, backend.get_customers_page),
+        ('çekler', backend.get_all_checks, backend.get_checks_page),
+        ('kasa', backend.get_cash_flow, backend.get_cash_flow_page),
+        ('hatırlatıcılar', backend.get_reminders, backend.get_reminders_page),
+        ('notlar', backend.get_notes, backend.get_notes_page),
+    ]:
+        # Sayfaların hepsi birlikte tam listeyi eksiksiz ve tekrarsız vermeli
+        seen, page = [], page_fn(page_size=backend.PAGE_SIZE_MAX)
+        seen.extend(r['id'] for r in page['items'])
+        while page['has_more']:
+            page = page_fn(cursor=page['next_cursor'], page_size=backend.PAGE_SIZE_MAX)
+            seen.extend(r['id'] for r in page['items'])
+        full = list_fn()
+        if len(seen) != len(set(seen)) or set(seen) != {r['id'] for r in full}:
+            missing.append(name)
+
+        cursor = deep_cursor(page_fn)
+        before = timed(list_fn, repeat=3)
+        table.append((f"{name}: ilk sayfa", before, timed(page_fn)))
+        table.append((f"{name}: orta sayfa", before, timed(lambda: page_fn(cursor=cursor))))
+
+    print_table(f"KEYSET SAYFALAMA ({rows:,} satır, sayfa = {backend.PAGE_SIZE_DEFAULT})", table)
+    print("✅ Sayfalar tam listeyi eksiksiz ve tekrarsız veriyor" if not missing
+          else f"❌ Sayfalama tutarsız: {missing}")
+
+# FTS5 öncesi LIKE '%q%' aramaları (karşılaştırma için)
+LEGACY_SEARCH_SQL = {
+    'customers': '''
+        SELECT id FROM customers
+        WHERE is_active = 1 AND (name LIKE ? OR phone LIKE ? OR short_name LIKE ?)
+        ORDER BY name LIMIT 10
+    ''',
+    'checks': '''
+        SELECT c.id FROM checks c LEFT JOIN customers cu ON c.customer_id = cu.id
+        WHERE c.check_number LIKE ? OR c.bank_name LIKE ? OR cu.name LIKE ?
+    ''',
+    'cash_flow': '''
+        SELECT cf.id FROM cash_flow cf LEFT JOIN customers c ON cf.customer_id = c.id
+        WHERE cf.description LIKE ? OR cf.reference_no LIKE ? OR c.name LIKE ?
+    ''',
+}
+
+def bench_search(backend, rows: int):
+    """LIKE '%q%' taramaları ile FTS5 aramalarını karşılaştırır."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+
+    def legacy(name, text):
+        like = f"%{text}%"
+        with backend.db_connection(readonly=True) as conn:
+            return [row[0] for row in conn.execute(LEGACY_SEARCH_SQL[name], (like, like, like))]
+
+    # Kelime başıyla eşleşen aramalarda iki yöntem aynı satırları bulmalı
+    cases = [
+        ('search_customers("Müşteri 12")', 'customers', 'Müşteri 12',
+         lambda: backend.search_customers('Müşteri 12')),
+        ('get_all_checks(search="C-4242")', 'checks', 'C-4242',
+         lambda: backend.get_all_checks(search='C-4242')),
+        ('get_cash_flow(search="Hareket 777")', 'cash_flow', 'Hareket 777',
+         lambda: backend.get_cash_flow(search='Hareket 777')),
+    ]
+    table = []
+    mismatches = []
+    for label, name, text, fn in cases:
+        expected, found = legacy(name, text), [r['id'] for r in fn()]
+        if name == 'customers':
+            expected, found = sorted(expected), sorted(found)
+        if set(expected) != set(found):
+            mismatches.append(label)
+        table.append((label, timed(lambda: legacy(name, text)), timed(fn)))
+
+    print_table(f"TAM METİN ARAMA ({rows:,} satır)", table)
+    print("✅ Sonuçlar birebir aynı" if not mismatches else f"❌ Farklı sonuçlar: {mismatches}")
+
+def bench_autocomplete(backend, rows: int):
+    """Müşteri otomatik tamamlama: LIKE taraması, FTS5 ve bellek içi önek indeksi."""
+    n_customers = max(1000, rows // 10)
+    rnd = random.Random(7)
+    first = ['Ahmet', 'Ayşe', 'Işık', 'İsmail', 'Çağla', 'Şükrü', 'Gökhan', 'Özge', 'Ümit', 'Mehmet']
+    last = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Öztürk', 'Aydın', 'Arslan', 'Doğan']
+    print(f"⏳ {n_customers:,} müşteri oluşturuluyor...")
+    with backend.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO customers (name, short_name, phone, customer_type, balance) "
+            "VALUES (?, ?, ?, 'customer', 0)",
+            ((f"{rnd.choice(first)} {rnd.choice(last)} {i}", f"M{i}",
+              f"05{rnd.randint(100000000, 999999999)}") for i in range(n_customers)))
+        conn.commit()
+    with contextlib.redirect_stdout(io.StringIO()):
+        backend.run_migrations()
+
+    def legacy(text):
+        like = f"%{text}%"
+        with backend.db_connection(readonly=True) as conn:
+            return conn.execute(LEGACY_SEARCH_SQL['customers'], (like, like, like)).fetchall()
+
+    start = time.perf_counter()
+    backend.customer_index.load()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    table = []
+    for text in ('ış', 'çağla yıl', 'Şükrü Doğan 4242', '0532'):
+        before = timed(lambda: legacy(text), repeat=20)
+        table.append((f'"{text}" LIKE -> önek indeksi', before,
+                      timed(lambda: backend.autocomplete_customers(text), repeat=200)))
+        table.append((f'"{text}" FTS5 -> önek indeksi',
+                      timed(lambda: backend.search_customers(text), repeat=20),
+                      timed(lambda: backend.autocomplete_customers(text), repeat=200)))
+    print_table(f"OTOMATİK TAMAMLAMA ({n_customers:,} müşteri, indeks kurulumu {load_ms:.0f} ms)", table)
+
+    # Artımlı yenileme: eklenen/güncellenen/silinen müşteri hemen görünmeli
+    _, _, cid = backend.add_customer('Zeynep Karadeniz Benchmark')
+    added = any(c['id'] == cid for c in backend.autocomplete_customers('karaden bench'))
+    backend.update_customer(cid, name='Zerrin Akdeniz Benchmark')
+    updated = (any(c['id'] == cid for c in backend.autocomplete_customers('akdeniz bench'))
+               and not backend.autocomplete_customers('karaden bench'))
+    backend.delete_customer(cid)
+    deleted = not backend.autocomplete_customers('akdeniz bench')
+    print("✅ Ekleme/güncelleme/silme indekse anında yansıdı" if added and updated and deleted
+          else f"❌ Artımlı yenileme hatalı (ekle={added}, güncelle={updated}, sil={deleted})")
+
+def _pay_checks(args):
+    """Ayrı süreçte verilen çekleri tahsil eder (payments senaryosu için)."""
+    workdir, check_ids = args
+    backend = load_backend(workdir)
+    errors = [msg for ok, msg in (backend.process_check_payment(cid, status='cashed')
+                                  for cid in check_ids) if not ok]
+    return len(check_ids), errors
+
+def bench_payments(backend, rows: int):
+    """Çek tahsilatı: tek commit'li birim iş, süreçler arası eşzamanlı yük altında."""
+    n_checks = max(100, rows)
+    workers = 4
+    with backend.db_connection() as conn:
+        conn.executemany("INSERT INTO customers (name, balance) VALUES (?, 0)",
+                         ((f"Müşteri {i}",) for i in range(100)))
+        conn.executemany(
+            "INSERT INTO checks (check_type, payment_type, customer_id, check_number, amount, "
+            "paid_amount, due_date, status) VALUES ('incoming', 'check', ?, ?, 1000, 0, ?, 'pending')",
+            ((i % 100 + 1, f"C-{i}", date.today().isoformat()) for i in range(n_checks)))
+        conn.commit()
+        check_ids = [row[0] for row in conn.execute("SELECT id FROM checks ORDER BY id")]
+
+    # Tek süreç: tahsilat başına süre
+    sample = check_ids[:n_checks // 5]
+    start = time.perf_counter()
+    for cid in sample:
+        backend.process_check_payment(cid, status='cashed')
+    single_ms = (time.perf_counter() - start) * 1000 / len(sample)
+
+    # Çok süreç: aynı veritabanına eşzamanlı tahsilatlar
+    rest = check_ids[len(sample):]
+    chunks = [(os.getcwd(), rest[i::workers]) for i in range(workers)]
+    start = time.perf_counter()
+    with multiprocessing.get_context('spawn').Pool(workers) as pool:
+        results = pool.map(_pay_checks, chunks)
+    elapsed = time.perf_counter() - start
+    errors = [e for _, chunk_errors in results for e in chunk_errors]
+
+    with backend.db_connection(readonly=True) as conn:
+        paid = conn.execute("SELECT COUNT(*) FROM checks WHERE status = 'cashed'").fetchone()[0]
+        ledger = conn.execute("SELECT COUNT(*) FROM account_transactions").fetchone()[0]
+        cash = conn.execute("SELECT COUNT(*) FROM cash_flow").fetchone()[0]
+        balance = conn.execute("SELECT SUM(balance) FROM customers").fetchone()[0]
+
+    print("=" * 78)
+    print(f"ÇEK TAHSİLATI ({n_checks:,} çek, {workers} süreç)")
+    print("=" * 78)
+    print(f"Tek süreç, tahsilat başına        : {single_ms:.2f} ms (1 commit)")
+    print(f"{workers} süreç eşzamanlı               : {len(rest) / elapsed:,.0f} tahsilat/sn")
+    print(f"Hatalar (ör. database is locked)  : {len(errors)} {errors[:3] if errors else ''}")
+    consistent = paid == ledger == cash == n_checks and abs(balance - n_checks * 1000) < 0.01
+    print("✅ Çek, cari hareket, kasa ve bakiye tutarlı" if consistent
+          else f"❌ Tutarsız: çek={paid}, cari={ledger}, kasa={cash}, bakiye={balance}")
+
+def _check_import_rows(n: int, prefix: str):
+    """check_import senaryosu için dosyadan okunmuş gibi satırlar üretir."""
+    due = date.today() + timedelta(days=30)
+    return [{'check_type': 'incoming', 'payment_type': 'check', 'check_number': f"{prefix}-{i}",
+             'amount': f"{1000 + i % 500},50", 'due_date': due.strftime('%d.%m.%Y'),
+             'customer_id': str(i % 100 + 1), 'bank_name': 'Ziraat'} for i in range(n)]
+
+def bench_check_import(backend, rows: int):
+    """Toplu çek aktarımı: satır satır add_check'e karşı import_checks."""
+    n_rows = max(1000, rows)
+    with backend.db_connection() as conn:
+        conn.executemany("INSERT INTO customers (name, balance) VALUES (?, 0)",
+                         ((f"Müşteri {i}",) for i in range(100)))
+        conn.commit()
+
+    # Önce: her satır için ayrı add_check (ayar okuması + 3 commit)
+    legacy_rows = min(n_rows, 2000)
+    due = (date.today() + timedelta(days=30)).isoformat()
+    start = time.perf_counter()
+    for i in range(legacy_rows):
+        backend.add_check('incoming', 'check', f"L-{i}", 1000.5, due,
+                          customer_id=i % 100 + 1, bank_name='Ziraat')
+    legacy_per_row = (time.perf_counter() - start) / legacy_rows
+
+    # Sonra: tek transaction, executemany, toplu hatırlatıcı
+    batch = _check_import_rows(n_rows, 'B')
+    start = time.perf_counter()
+    result = backend.import_checks(batch)
+    batch_elapsed = time.perf_counter() - start
+
+    with backend.db_connection(readonly=True) as conn:
+        checks = conn.execute("SELECT COUNT(*) FROM checks WHERE check_number LIKE 'B-%'").fetchone()[0]
+        txs = conn.execute("SELECT COUNT(*) FROM check_transactions t JOIN checks c ON c.id = t.check_id "
+                           "WHERE c.check_number LIKE 'B-%'").fetchone()[0]
+        reminders = conn.execute("SELECT COUNT(*) FROM reminders r JOIN checks c ON c.id = r.related_check_id "
+                                 "WHERE c.check_number LIKE 'B-%'").fetchone()[0]
+        backend.activity_writer.flush()
+        audits = conn.execute("SELECT COUNT(*) FROM activity_logs a JOIN checks c ON c.id = a.entity_id "
+                              "WHERE a.entity_type = 'check' AND a.action = 'create' "
+                              "AND c.check_number LIKE 'B-%'").fetchone()[0]
+
+    print("=" * 78)
+    print(f"TOPLU ÇEK AKTARIMI ({n_rows:,} satır)")
+    print("=" * 78)
+    print(f"add_check, satır başına            : {legacy_per_row * 1000:.3f} ms "
+          f"(≈ {legacy_per_row * n_rows:.1f} sn toplam)")
+    print(f"import_checks, toplam              : {batch_elapsed:.2f} sn "
+          f"({n_rows / batch_elapsed:,.0f} satır/sn)")
+    print(f"Hız                                : {legacy_per_row * n_rows / batch_elapsed:.1f}x")
+    consistent = (result['imported'] == checks == txs == reminders == audits == n_rows
+                  and not result['errors'])
+    print("✅ Çek, çek hareketi, hatırlatıcı ve denetim kaydı sayıları tutarlı" if consistent
+          else f"❌ Tutarsız: aktarılan={result['imported']}, çek={checks}, hareket={txs}, "
+               f"hatırlatıcı={reminders}, denetim={audits}, hata={result['errors'][:3]}")
+
+def bench_cash_import(backend, rows: int):
+    """Banka ekstresi aktarımı: satır satır add_cash_transaction'a karşı akışlı import."""
+    n_rows = max(1000, rows)
+    with backend.db_connection() as conn:
+        conn.executemany("INSERT INTO customers (name, balance) VALUES (?, 0)",
+                         ((f"Müşteri {i}",) for i in range(100)))
+        conn.commit()
+
+    # Önce: her satır için ayrı add_cash_transaction (+ ayrı log_activity commit'i)
+    legacy_rows = min(n_rows, 2000)
+    start = time.perf_counter()
+    for i in range(legacy_rows):
+        backend.add_cash_transaction('income' if i % 2 else 'expense', 'Diğer Gelir', 100.0,
+                                     f"Havale {i}", customer_id=i % 100 + 1,
+                                     transaction_date=date.today().isoformat())
+    legacy_per_row = (time.perf_counter() - start) / legacy_rows
+
+    # Sonra: diskteki CSV dosyasından akışlı okuma, parça başına tek transaction
+    path = os.path.join(os.getcwd(), 'ekstre.csv')
+    with open(path, 'w', encoding='cp1254', newline='') as f:
+        f.write("Hesap No;TR00 0000 0000\n\nİşlem Tarihi;Açıklama;Borç;Alacak;Dekont No;Karşı Taraf\n")
+        for i in range(n_rows):
+            f.write(f"{(i % 28) + 1:02d}.01.2026;Havale {i};{'' if i % 2 else '100,00'};"
+                    f"{'100,00' if i % 2 else ''};D{i};Müşteri {i % 100}\n")
+    with backend.db_connection(readonly=True) as conn:
+        before = conn.execute("SELECT COUNT(*) FROM account_transactions").fetchone()[0]
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        result = backend.import_cash_transactions(
+            backend.iter_bank_statement(backend.open_import_text(f)))
+    batch_elapsed = time.perf_counter() - start
+
+    # Web yüklemesiyle aynı yol: FileStorage + SpooledTemporaryFile akışı
+    from werkzeug.datastructures import FileStorage
+    upload_rows = []
+    for max_size in (1 << 30, 1024):  # bellekte kalan ve diske taşan geçici dosya
+        spooled = tempfile.SpooledTemporaryFile(max_size=max_size, mode='rb+')
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, spooled)
+        spooled.seek(0)
+        upload = FileStorage(stream=spooled, filename='ekstre.csv')
+        upload_rows.append(sum(1 for _ in backend.iter_bank_statement(
+            backend.open_import_text(upload.stream))))
+
+    with backend.db_connection(readonly=True) as conn:
+        cash = conn.execute("SELECT COUNT(*) FROM cash_flow WHERE reference_no LIKE 'D%'").fetchone()[0]
+        ledger = conn.execute("SELECT COUNT(*) FROM account_transactions").fetchone()[0] - before
+        # Her carinin son hareketindeki bakiye, cari bakiyesiyle aynı olmalı
+        drift = conn.execute('''
+            SELECT COUNT(*) FROM customers c
+            WHERE ABS(c.balance - (SELECT balance_after FROM account_transactions t
+                                   WHERE t.customer_id = c.id ORDER BY t.id DESC LIMIT 1)) > 0.005
+        ''').fetchone()[0]
+
+    print("=" * 78)
+    print(f"BANKA EKSTRESİ AKTARIMI ({n_rows:,} satır)")
+    print("=" * 78)
+    print(f"add_cash_transaction, satır başına : {legacy_per_row * 1000:.3f} ms "
+          f"(≈ {legacy_per_row * n_rows:.1f} sn toplam)")
+    print(f"import_cash_transactions, toplam   : {batch_elapsed:.2f} sn "
+          f"({n_rows / batch_elapsed:,.0f} satır/sn)")
+    print(f"Hız                                : {legacy_per_row * n_rows / batch_elapsed:.1f}x")
+    consistent = result['imported'] == cash == ledger == n_rows and not drift and not result['errors']
+    print("✅ Kasa, cari hareket ve bakiyeler tutarlı" if consistent
+          else f"❌ Tutarsız: aktarılan={result['imported']}, kasa={cash}, cari={ledger}, "
+               f"bakiye farkı={drift}, hata={result['errors'][:3]}")
+    print("✅ FileStorage/SpooledTemporaryFile yüklemesi aynı satırları okuyor"
+          if upload_rows == [n_rows, n_rows] else f"❌ Yükleme akışı farklı: {upload_rows}")
+
+def bench_export(backend, rows: int):
+    """Kasa export'u: tüm satırları StringIO'da toplamaya karşı akışlı CSV ve XLSX üreticileri."""
+    populate(backend, rows)
+
+    def measure(produce):
+        tracemalloc.start()
+        start = time.perf_counter()
+        first = None
+        size = 0
+        for chunk in produce():
+            if first is None:
+                first = time.perf_counter() - start
+            size += len(chunk)
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return first * 1000, total, peak / 1e6, size
+
+    # Önce: get_cash_flow listeyi, export_to_csv tek metni üretir; Response onu tek parça yollar
+    legacy = measure(lambda: [backend.export_to_csv(backend.get_cash_flow(),
+                                                    backend.CASH_FLOW_EXPORT_COLUMNS)])
+    streamed = measure(backend.iter_cash_flow_csv)
+    xlsx = measure(lambda: backend.iter_report_export('cash_flow', 'xlsx'))
+
+    print("=" * 78)
+    print(f"KASA EXPORT ({rows:,} satır, tracemalloc açık)")
+    print("=" * 78)
+    print(f"{'':<24}{'İlk bayt (ms)':>16}{'Toplam (sn)':>14}{'Tepe bellek (MB)':>20}")
+    for name, (first, total, peak, _) in (('Önce (StringIO)', legacy), ('Sonra (akışlı)', streamed),
+                                          ('XLSX (akışlı)', xlsx)):
+        print(f"{name:<24}{first:>16.1f}{total:>14.2f}{peak:>20.1f}")
+    print("✅ Çıktı boyutları aynı" if legacy[3] == streamed[3]
+          else f"❌ Çıktı boyutu farklı: {legacy[3]} / {streamed[3]}")
+
+    if backend.pyarrow is None:
+        return
+    # Kolonlu döküm: tek satırlık kayıt grupları; ilk grupta int (ELSE 0) gelen
+    # kolonlar sonraki gruplarda ondalıklı değerleri kesmemeli
+    batch_rows, backend.EXPORT_COLUMNAR_BATCH_ROWS = backend.EXPORT_COLUMNAR_BATCH_ROWS, 1
+    mismatched = {}
+    try:
+        for report in ('aging', 'customers'):
+            query, params, columns, _ = backend.REPORT_EXPORTS[report][0]()
+            with backend.db_connection(readonly=True) as conn:
+                expected = [tuple(row) for row in conn.execute(query, params)]
+            table = backend.pyarrow.parquet.read_table(
+                io.BytesIO(b''.join(backend.iter_report_export(report, 'parquet'))))
+            actual = [tuple(row[name] for name in columns) for row in table.to_pylist()]
+            mismatched[report] = sum(a != e for row_a, row_e in zip(actual, expected)
+                                     for a, e in zip(row_a, row_e)) + abs(len(actual) - len(expected))
+    finally:
+        backend.EXPORT_COLUMNAR_BATCH_ROWS = batch_rows
+    print("✅ Parquet (1 satırlık kayıt grupları) sorgu sonucuyla hücre hücre aynı"
+          if not any(mismatched.values()) else f"❌ Parquet hücre farkı: {mismatched}")
+
+def legacy_customer_statement(backend, conn, customer_id: int, start_date: str, end_date: str) -> dict:
+    """Kontrol noktalarından önceki ekstre: created_at sıralı açılış + tüm hareketler üzerinde toplam."""
+    opening = 0
+    if start_date:
+        opening = conn.execute('''
+            SELECT COALESCE(
+                (SELECT balance_after FROM account_transactions
+                 WHERE customer_id = ? AND transaction_date < ?
+                 ORDER BY created_at DESC LIMIT 1), 0)
+        ''', (customer_id, start_date)).fetchone()[0]
+    transactions = backend.get_customer_transactions(customer_id, start_date, end_date)
+    return {'opening_balance': opening,
+            'total_debit': sum(t['amount'] for t in transactions if t['transaction_type'] == 'debit'),
+            'total_credit': sum(t['amount'] for t in transactions if t['transaction_type'] == 'credit')}
+
+def migration_race_diff(backend, version: int, write_sql: str, table: str) -> list:
+    """
+    Geçişi yeniden çalıştırır; tetikleyiciler kurulduktan sonra, backfill
+    satırlara ulaşmadan önce başka bir süreçten write_sql yazılır. Yazma
+    kilitliyse (geçiş transaction'ı sürüyor) geçiş bitince uygulanır. Sonra
+    tetikleyici bakımlı tablo sıfırdan kurulanla karşılaştırılır; farklı
+    satırlar döner.
+    """
+    step = next(m for m in backend.MIGRATIONS if m['version'] == version)
+    run_backfill = backend._run_backfill
+    deferred = []
+
+    def racing_backfill(job, upper, batch_size, conn=None):
+        if not racing_backfill.done:
+            racing_backfill.done = True
+            other = backend.sqlite3.connect(backend.DB_NAME, timeout=0)
+            try:
+                other.execute(write_sql)
+                other.commit()
+            except backend.sqlite3.OperationalError:
+                deferred.append(write_sql)
+            finally:
+                other.close()
+        return run_backfill(job, upper, batch_size, conn)
+    racing_backfill.done = False
+
+    with backend.db_connection() as conn:
+        conn.execute(f"PRAGMA user_version = {version - 1}")
+        conn.commit()
+    backend._run_backfill = racing_backfill
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            backend.run_migrations(target_version=version, batch_size=100)
+    finally:
+        backend._run_backfill = run_backfill
+    with backend.db_connection() as conn:
+        for sql in deferred:
+            conn.execute(sql)
+        conn.commit()
+        select = f"SELECT * FROM {table}"
+
+        def snapshot():
+            # Toplama sırasından gelen kayan nokta farkları yok sayılır
+            return {tuple(round(v, 2) if isinstance(v, float) else v for v in row)
+                    for row in conn.execute(select)}
+        maintained = snapshot()
+        conn.execute(f"DELETE FROM {table}")
+        for job in step['backfill']:
+            conn.execute(job['sql'], (0, sys.maxsize))
+        rebuilt = snapshot()
+        conn.rollback()
+        version_now = max(m['version'] for m in backend.MIGRATIONS)
+        conn.execute(f"PRAGMA user_version = {version_now}")
+        conn.commit()
+    return sorted(maintained ^ rebuilt)
+
+def bench_statement(backend, rows: int):
+    """Cari ekstre: çok hareketli bir cari için açılış bakiyesi ve dönem toplamları."""
+    n_moves = max(10_000, rows)
+    rnd = random.Random(7)
+    today = date.today()
+    with backend.db_connection() as conn:
+        conn.execute("INSERT INTO customers (name, balance) VALUES ('Yoğun Cari', 0)")
+        customer_id = conn.execute("SELECT MAX(id) FROM customers").fetchone()[0]
+        days = sorted(today - timedelta(days=rnd.randint(0, 5 * 365)) for _ in range(n_moves))
+        balance = 0.0
+        moves = []
+        for i, day in enumerate(days):
+            amount = round(rnd.uniform(10, 5000), 2)
+            kind = rnd.choice(('debit', 'credit'))
+            balance += amount if kind == 'credit' else -amount
+            # Aynı gündeki hareketler için ayrık saat (eski sorgu created_at eşitliğinde belirsiz)
+            moves.append((customer_id, kind, amount, balance, day.isoformat(),
+                          f"{day.isoformat()} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"))
+        conn.executemany(
+            "INSERT INTO account_transactions (customer_id, transaction_type, amount, balance_after, "
+            "transaction_date, created_at) VALUES (?, ?, ?, ?, ?, ?)", moves)
+        conn.commit()
+
+    periods = [((today - timedelta(days=d)).replace(day=1).isoformat(),
+                (today - timedelta(days=d - 30)).isoformat()) for d in (60, 400, 1500)]
+    periods += [((today - timedelta(days=3 * 365)).isoformat(), None), (None, None)]
+    # Ters aralık (başlangıç bitişten sonra, farklı aylar): toplamlar sıfır olmalı
+    periods.append(((today - timedelta(days=30)).isoformat(), (today - timedelta(days=90)).isoformat()))
+    results = []
+    for start, end in periods:
+        query, params = backend._statement_summary_query(customer_id, start, end)
+        with backend.db_connection(readonly=True) as conn:
+            legacy = legacy_customer_statement(backend, conn, customer_id, start, end)
+            before = timed(lambda: legacy_customer_statement(backend, conn, customer_id, start, end))
+            summary = dict(conn.execute(query, params).fetchone())
+            after = timed(lambda: conn.execute(query, params).fetchone())
+        ok = all(abs(summary[k] - legacy[k]) < 0.01 for k in legacy)
+        results.append((f"{start or '…'} → {end or '…'} {'✅' if ok else '❌'}", before, after))
+    print_table(f"CARİ EKSTRE ÖZETİ ({n_moves:,} hareketli cari)", results)
+
+    # Geçiş sırasında (tetikleyiciler kurulu, backfill satıra ulaşmamış) güncellenen hareketler
+    diff = migration_race_diff(backend, 8, "UPDATE account_transactions SET amount = amount + 1 "
+                               "WHERE id > (SELECT MAX(id) - 50 FROM account_transactions)",
+                               'account_balance_checkpoints')
+    print("✅ Geçiş sırasındaki yazmalar kontrol noktalarında bir kez sayıldı" if not diff
+          else f"❌ Kontrol noktası farkı ({len(diff)} satır): {diff[:3]}")
+
+def legacy_ledger_check(conn) -> int:
+    """Müşteri başına hareketleri çekip sadece son bakiyeyi Python'da karşılaştırır (referans)."""
+    mismatches = 0
+    for customer in conn.execute("SELECT id, balance FROM customers").fetchall():
+        balance = None
+        for row in conn.execute("SELECT transaction_type, reference_type, amount, balance_after "
+                                "FROM account_transactions WHERE customer_id = ? "
+                                "ORDER BY created_at, id", (customer['id'],)):
+            negative = (row['reference_type'] == 'cash_flow') == (row['transaction_type'] == 'credit')
+            delta = -row['amount'] if negative else row['amount']
+            balance = row['balance_after'] if balance is None else balance + delta
+        if balance is not None and abs(balance - customer['balance']) > 0.005:
+            mismatches += 1
+    return mismatches
+
+def bench_ledger(backend, rows: int):
+    """Cari bakiye doğrulama: kümülatif pencere toplamı ve partili yeniden kurma."""
+    n_customers = max(100, rows // 100)
+    rnd = random.Random(11)
+    with backend.db_connection() as conn:
+        conn.executemany("INSERT INTO customers (id, name, balance) VALUES (?, ?, 0)",
+                         ((i, f"Müşteri {i}") for i in range(1, n_customers + 1)))
+        balances = [0.0] * (n_customers + 1)
+        moves = []
+        for i in range(rows):
+            customer_id = rnd.randint(1, n_customers)
+            amount = rnd.randint(100, 500_000) / 100
+            cash, credit = rnd.random() < 0.5, rnd.random() < 0.5
+            balances[customer_id] += -amount if cash == credit else amount
+            moves.append((customer_id, 'credit' if credit else 'debit', amount,
+                          round(balances[customer_id], 2), 'cash_flow' if cash else 'check',
+                          '2025-01-01', "2025-01-01 00:00:00"))
+        conn.executemany(
+            "INSERT INTO account_transactions (customer_id, transaction_type, amount, balance_after, "
+            "reference_type, transaction_date, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)", moves)
+        conn.executemany("UPDATE customers SET balance = ? WHERE id = ?",
+                         ((round(balances[i], 2), i) for i in range(1, n_customers + 1)))
+        # Kayıp güncelleme: bir hareketten sonrası eski bakiyeden devam etmiş gibi kayar
+        drifted = rnd.sample(range(1, n_customers + 1), max(1, n_customers // 1000))
+        for customer_id in drifted:
+            conn.execute("UPDATE account_transactions SET balance_after = balance_after - 250 "
+                         "WHERE customer_id = ? AND id >= (SELECT MAX(id) FROM account_transactions "
+                         "WHERE customer_id = ?)", (customer_id, customer_id))
+            conn.execute("UPDATE customers SET balance = balance - 250 WHERE id = ?", (customer_id,))
+        conn.commit()
+
+    with backend.db_connection(readonly=True) as conn:
+        start = time.perf_counter()
+        legacy = legacy_ledger_check(conn)
+        legacy_elapsed = time.perf_counter() - start
+    report = backend.verify_customer_ledger()
+    rebuilt = backend.rebuild_customer_balances()
+    after = backend.verify_customer_ledger()
+
+    print("=" * 78)
+    print(f"CARİ BAKİYE DOĞRULAMA ({rows:,} hareket, {n_customers:,} cari)")
+    print("=" * 78)
+    print(f"Cari başına sorgu (son bakiye)    : {legacy_elapsed:.2f} sn, {legacy} uyumsuz")
+    print(f"verify_customer_ledger            : {report['elapsed']:.2f} sn, "
+          f"{report['mismatch_count']} uyumsuz ({rows / max(report['elapsed'], 1e-9):,.0f} hareket/sn)")
+    print(f"rebuild_customer_balances         : {rebuilt['elapsed']:.2f} sn, "
+          f"{rebuilt['customers_fixed']} cari / {rebuilt['movements_fixed']} hareket düzeltildi")
+    ok = (report['mismatch_count'] == legacy == len(drifted)
+          and {m['customer_id'] for m in report['mismatches']} == set(drifted)
+          and after['mismatch_count'] == 0)
+    print("✅ Kaymalar bulundu ve yeniden kurma sonrası bakiyeler tutarlı" if ok
+          else f"❌ Beklenen {len(drifted)} uyumsuz, bulunan {report['mismatch_count']}, "
+               f"yeniden kurma sonrası {after['mismatch_count']}")
+
+def bench_activity_log(backend, rows: int):
+    """Aktivite log: çağrı başına commit'e karşı arka planda partili yazıcı."""
+    n_calls = max(1000, rows)
+    threads = 4
+
+    def run(label):
+        def worker(offset):
+            for i in range(offset, n_calls, threads):
+                backend.log_activity(1, label, 'check', i)
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+        caller = time.perf_counter() - start
+        backend.activity_writer.flush(timeout=600)
+        return caller, time.perf_counter() - start
+
+    backend.ACTIVITY_LOG_STRICT = True
+    strict = run('strict')
+    # Sıkı mod: log yazılamazsa iş değişikliği de geri alınmalı
+    def settings_write(key):
+        with backend.transaction('settings') as cursor:
+            cursor.execute("INSERT INTO settings (category, setting_key, setting_value) "
+                           "VALUES ('bench', ?, '1')", (key,))
+            backend.log_activity(1, 'strict_audit', 'settings')
+
+    customer_id = backend.add_customer('Denetim Cari')[2]
+    audited_writers = [
+        ('transaction()', settings_write,
+         "SELECT COUNT(*) FROM settings WHERE category = 'bench' AND setting_key = ?"),
+        ('add_customer', backend.add_customer, "SELECT COUNT(*) FROM customers WHERE name = ?"),
+        ('update_customer', lambda key: backend.update_customer(customer_id, name=key),
+         "SELECT COUNT(*) FROM customers WHERE name = ?"),
+        ('add_reminder', lambda key: backend.add_reminder(key, date.today().isoformat()),
+         "SELECT COUNT(*) FROM reminders WHERE title = ?"),
+        ('add_note', backend.add_note, "SELECT COUNT(*) FROM notes WHERE title = ?"),
+    ]
+
+    def audited_write(write, check_sql, key):
+        try:
+            write(key)
+        except backend.sqlite3.Error:
+            pass
+        with backend.db_connection(readonly=True) as conn:
+            return conn.execute(check_sql, (key,)).fetchone()[0] == 1
+
+    committed = [name for name, write, sql in audited_writers
+                 if audited_write(write, sql, f"{name} kayıtlı")]
+    with backend.db_connection() as conn:
+        conn.execute("CREATE TEMP TRIGGER fail_activity BEFORE INSERT ON main.activity_logs "
+                     "BEGIN SELECT RAISE(ABORT, 'denetim kaydı yazılamadı'); END")
+    try:
+        leaked = [name for name, write, sql in audited_writers
+                  if audited_write(write, sql, f"{name} kayıtsız")]
+    finally:
+        with backend.db_connection() as conn:
+            conn.execute("DROP TRIGGER temp.fail_activity")
+    rolled_back = len(committed) == len(audited_writers) and not leaked
+    backend.ACTIVITY_LOG_STRICT = False
+    batched = run('batched')
+    stats = backend.get_activity_log_stats()
+    with backend.db_connection(readonly=True) as conn:
+        counts = dict(conn.execute("SELECT action, COUNT(*) FROM activity_logs "
+                                   "WHERE action IN ('strict', 'batched') GROUP BY action").fetchall())
+
+    print("=" * 78)
+    print(f"AKTİVİTE LOG ({n_calls:,} çağrı, {threads} thread)")
+    print("=" * 78)
+    print(f"{'':<28}{'Çağıran (sn)':>14}{'Yazıldı (sn)':>14}{'Çağrı başına (µs)':>20}")
+    for name, (caller, total) in (('Eşzamanlı (sıkı mod)', strict), ('Partili (varsayılan)', batched)):
+        print(f"{name:<28}{caller:>14.2f}{total:>14.2f}{caller / n_calls * 1e6:>20.1f}")
+    print(f"Parti: {stats['batches']} yazım, tepe bekleyen {stats['max_pending']}, "
+          f"eşzamanlı yazıma düşen {stats['sync_writes']}")
+    print("✅ Tüm kayıtlar yazıldı" if counts.get('strict') == counts.get('batched') == n_calls
+          else f"❌ Eksik kayıt: {counts}")
+    print("✅ Sıkı modda log yazılamayınca iş değişikliği geri alındı" if rolled_back
+          else f"❌ Sıkı modda log yazılamadığı hâlde commit edildi: {leaked} "
+               f"(kontrol yazmaları: {committed})")
+
+# Bölümlemeden önceki get_activity_logs sorgusu (created_at indeksi yokken)
+LEGACY_ACTIVITY_SQL = '''
+    SELECT al.*, u.full_name as user_name
+    FROM activity_logs al
+    LEFT JOIN users u ON al.user_id = u.id
+    WHERE 1=1{where}
+    ORDER BY al.created_at DESC LIMIT 100
+'''
+
+def bench_activity_partitions(backend, rows: int):
+    """Aktivite raporu: tek büyük tabloya karşı aylık bölümler ve arşiv."""
+    rnd = random.Random(5)
+    current = time.strftime('%Y-%m', time.gmtime())
+    periods = [backend._shift_period(current, -i) for i in range(24)]
+    with backend.db_connection() as conn:
+        conn.execute("DROP INDEX IF EXISTS idx_activity_logs_created")
+        conn.executemany(
+            "INSERT INTO activity_logs (user_id, action, entity_type, entity_id, created_at) "
+            "VALUES (1, ?, ?, ?, ?)",
+            ((rnd.choice(('create', 'update', 'login')), rnd.choice(('check', 'customer', 'user')),
+              i, f"{rnd.choice(periods)}-{rnd.randint(1, 28):02d} {rnd.randint(0, 23):02d}:"
+                 f"{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d}") for i in range(rows)))
+        conn.commit()
+
+    month = periods[6]
+    month_range = (f"{month}-01", f"{month}-28")
+    queries = [
+        ('son 100 kayıt', "", [], {}),
+        (f'{month} ayı, ilk 100', " AND al.created_at >= ? AND al.created_at < date(?, '+1 day')",
+         list(month_range), {'start_date': month_range[0], 'end_date': month_range[1]}),
+    ]
+    with backend.db_connection(readonly=True) as conn:
+        before = [timed(lambda: conn.execute(LEGACY_ACTIVITY_SQL.format(where=where), params).fetchall())
+                  for _, where, params, _ in queries]
+
+    with backend.db_connection() as conn:
+        conn.execute(backend._ACTIVITY_PARTITION_STEPS[0])
+        conn.commit()
+    start = time.perf_counter()
+    result = backend.maintain_activity_logs()
+    maintenance = time.perf_counter() - start
+    after = [timed(lambda: backend.get_activity_logs(limit=100, **kwargs))
+             for _, _, _, kwargs in queries]
+
+    print_table(f"AKTİVİTE RAPORU ({rows:,} kayıt, 24 ay; bakım {maintenance:.1f} sn: "
+                f"{len(result['rotated'])} ay taşındı, {len(result['compacted'])} ay arşivlendi)",
+                [(name, b, a) for (name, *_), b, a in zip(queries, before, after)])
+    archive = sum(os.path.getsize(os.path.join(backend.ACTIVITY_ARCHIVE_DIR, f))
+                  for f in os.listdir(backend.ACTIVITY_ARCHIVE_DIR))
+    print(f"Arşiv dosyaları: {archive / 1e6:.1f} MB")
+
+LEGACY_AGING_RANGES = [('current', 0, 0), ('1_30', 1, 30), ('31_60', 31, 60),
+                       ('61_90', 61, 90), ('over_90', 91, 9999)]
+
+def legacy_aging(conn, as_of_date: str) -> dict:
+    """Eski on sorgulu yaşlandırma (sadece çekler, satır başına julianday)."""
+    result = {'incoming': {}, 'outgoing': {}}
+    for check_type in ('incoming', 'outgoing'):
+        for name, min_days, max_days in LEGACY_AGING_RANGES:
+            if name == 'current':
+                row = conn.execute('''
+                    SELECT COALESCE(SUM(amount - paid_amount), 0), COUNT(*) FROM checks
+                    WHERE check_type = ? AND status = 'pending' AND date(due_date) >= date(?)
+                ''', (check_type, as_of_date)).fetchone()
+            else:
+                row = conn.execute('''
+                    SELECT COALESCE(SUM(amount - paid_amount), 0), COUNT(*) FROM checks
+                    WHERE check_type = ? AND status = 'pending'
+                    AND julianday(?) - julianday(due_date) BETWEEN ? AND ?
+                ''', (check_type, as_of_date, min_days, max_days)).fetchone()
+            result[check_type][name] = {'amount': row[0], 'count': row[1]}
+    return result
+
+def reference_account_aging(conn, as_of_date: str) -> dict:
+    """Açık cari kalemlerin Python'da FIFO ile hesaplanması (doğrulama için)."""
+    as_of = date.fromisoformat(as_of_date)
+    balances = {row[0]: row[1] for row in conn.execute("SELECT id, balance FROM customers")}
+    moves = {}
+    for customer_id, kind, ref, amount, tx_date, due in conn.execute(
+            "SELECT customer_id, transaction_type, reference_type, amount, transaction_date, "
+            "due_date FROM account_transactions ORDER BY due_date DESC, id DESC"):
+        delta = -amount if (ref == 'cash_flow') == (kind == 'credit') else amount
+        if tx_date > as_of_date:
+            balances[customer_id] -= delta
+        elif due:
+            moves.setdefault(customer_id, []).append((delta, due))
+    result = {side: {name: {'amount': 0, 'count': 0} for name, _, _ in LEGACY_AGING_RANGES}
+              for side in ('incoming', 'outgoing')}
+    for customer_id, items in moves.items():
+        remaining = abs(balances[customer_id])
+        if remaining < 0.005:
+            continue
+        side = 'incoming' if balances[customer_id] > 0 else 'outgoing'
+        for delta, due in items:
+            if remaining <= 0 or (delta > 0) != (side == 'incoming'):
+                continue
+            amount = min(abs(delta), remaining)
+            remaining -= amount
+            age = (as_of - date.fromisoformat(due)).days
+            name = next(n for n, lo, hi in LEGACY_AGING_RANGES if age <= hi)
+            result[side][name]['amount'] += amount
+            result[side][name]['count'] += 1
+    return result
+
+def _aging_diff(expected: dict, actual: dict) -> list:
+    return [(side, name) for side in expected for name in expected[side]
+            if abs(expected[side][name]['amount'] - actual[side][name]['amount']) > 0.01
+            or expected[side][name]['count'] != actual[side][name]['count']]
+
+def bench_aging(backend, rows: int):
+    """Yaşlandırma: on ayrı sorguya karşı çek + açık cari kalemlerde tek sorgu."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    with backend.db_connection() as conn:
+        conn.execute("ANALYZE")
+        conn.commit()
+    today = date.today().strftime('%Y-%m-%d')
+    snapshot = (date.today() - timedelta(days=180)).strftime('%Y-%m-%d')
+
+    # Önce sadece çekler (eski raporun kapsamı): vadeli cari hareket yok
+    with backend.db_connection(readonly=True) as conn:
+        before = timed(lambda: legacy_aging(conn, today))
+        legacy = legacy_aging(conn, today)
+    checks_only = timed(backend.get_report_aging)
+    mismatches = _aging_diff(legacy, backend.get_report_aging()['by_source']['checks'])
+
+    rnd = random.Random(23)
+    with backend.db_connection() as conn:
+        # Cari hareketlerin bir kısmı vadeli; bakiyeler hareketlerden kurulur
+        ids = [row[0] for row in conn.execute("SELECT id FROM account_transactions")
+               if rnd.random() < 0.3]
+        conn.executemany("UPDATE account_transactions SET due_date = date(transaction_date, ?) "
+                         "WHERE id = ?", ((f"+{rnd.randint(0, 120)} days", i) for i in ids))
+        conn.execute(f'''
+            UPDATE customers SET balance = COALESCE((
+                SELECT SUM({backend._LEDGER_SIGNED_AMOUNT}) FROM account_transactions
+                WHERE customer_id = customers.id), 0)
+        ''')
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    with backend.db_connection(readonly=True) as conn:
+        reference = {d: reference_account_aging(conn, d) for d in (today, snapshot)}
+    after = timed(backend.get_report_aging)
+    after_snapshot = timed(lambda: backend.get_report_aging(snapshot))
+    by_customer = timed(backend.get_report_aging_by_customer, repeat=3)
+    mismatches += (_aging_diff(reference[today], backend.get_report_aging()['by_source']['accounts'])
+                   + _aging_diff(reference[snapshot],
+                                 backend.get_report_aging(snapshot)['by_source']['accounts']))
+
+    print_table(f"YAŞLANDIRMA ({rows:,} çek, {len(ids):,} vadeli cari hareket)", [
+        ('get_report_aging() (sadece çekler)', before, checks_only),
+        ('get_report_aging() (çek + cari)', before, after),
+        (f'get_report_aging({snapshot!r})', before, after_snapshot),
+        ('get_report_aging_by_customer()', before, by_customer),
+    ])
+    print("✅ Çekler eski sorgularla, cari kalemler FIFO referansıyla aynı" if not mismatches
+          else f"❌ Farklı dilimler: {mismatches}")
+
+# Fonksiyona sarılı eski tarih koşulları (karşılaştırma için). Liste sorguları
+# (id, display_status) döndürür; yeni fonksiyonların satırlarıyla birebir
+# karşılaştırılır (hem süzgeç hem görüntü durumu).
+LEGACY_CHECK_STATUS = ("CASE WHEN status = 'pending' AND date(due_date) < date('now') THEN 'overdue' "
+                       "WHEN status = 'pending' AND date(due_date) <= date('now', '+7 days') "
+                       "THEN 'upcoming' ELSE status END")
+LEGACY_REMINDER_STATUS = ("CASE WHEN status = 'pending' AND date(due_date) < date('now') THEN 'overdue' "
+                          "WHEN status = 'pending' AND date(due_date) = date('now') THEN 'today' "
+                          "WHEN status = 'pending' AND date(due_date) = date('now', '+1 day') "
+                          "THEN 'tomorrow' ELSE status END")
+LEGACY_TASK_STATUS = ("CASE WHEN is_task = 1 AND task_status = 'pending' AND date(task_due_date) < date('now') "
+                      "THEN 'overdue' WHEN is_task = 1 AND task_status = 'pending' "
+                      "AND date(task_due_date) = date('now') THEN 'due_today' ELSE task_status END")
+
+LEGACY_DATE_LISTS = [
+    ("get_all_checks(status='overdue')", lambda b: b.get_all_checks(status='overdue'),
+     f"SELECT id, {LEGACY_CHECK_STATUS} FROM checks "
+     "WHERE status = 'pending' AND date(due_date) < date('now')"),
+    ("get_all_checks(status='upcoming')", lambda b: b.get_all_checks(status='upcoming'),
+     f"SELECT id, {LEGACY_CHECK_STATUS} FROM checks WHERE status = 'pending' "
+     "AND date(due_date) >= date('now') AND date(due_date) <= date('now', '+7 days')"),
+    ("get_reminders(status='overdue')", lambda b: b.get_reminders(status='overdue'),
+     f"SELECT id, {LEGACY_REMINDER_STATUS} FROM reminders "
+     "WHERE status = 'pending' AND date(due_date) < date('now')"),
+    ("get_reminders(status='today')", lambda b: b.get_reminders(status='today'),
+     f"SELECT id, {LEGACY_REMINDER_STATUS} FROM reminders "
+     "WHERE status = 'pending' AND date(due_date) = date('now')"),
+    ("get_reminders(status='tomorrow')", lambda b: b.get_reminders(status='tomorrow'),
+     f"SELECT id, {LEGACY_REMINDER_STATUS} FROM reminders "
+     "WHERE status = 'pending' AND date(due_date) = date('now', '+1 day')"),
+    ("get_reminders(status='upcoming')", lambda b: b.get_reminders(status='upcoming'),
+     f"SELECT id, {LEGACY_REMINDER_STATUS} FROM reminders "
+     "WHERE status = 'pending' AND date(due_date) > date('now')"),
+    ("get_notes(task_status='overdue')", lambda b: b.get_notes(is_task=1, task_status='overdue'),
+     f"SELECT id, {LEGACY_TASK_STATUS} FROM notes WHERE is_archived = 0 AND is_task = 1 "
+     "AND task_status = 'pending' AND date(task_due_date) < date('now')"),
+    ("get_notes(task_status='due_today')", lambda b: b.get_notes(is_task=1, task_status='due_today'),
+     f"SELECT id, {LEGACY_TASK_STATUS} FROM notes WHERE is_archived = 0 AND is_task = 1 "
+     "AND task_status = 'pending' AND date(task_due_date) = date('now')"),
+]
+
+# Sayım karşılaştırması: (ad, tablo, ortak koşul, eski tarih koşulu, kolon, dönem)
+LEGACY_DATE_COUNTS = [
+    ('çek: vadesi geçmiş', 'checks', "status = 'pending'",
+     "date(due_date) < date('now')", 'due_date', 'overdue'),
+    ('çek: 7 gün içinde', 'checks', "status = 'pending'",
+     "date(due_date) >= date('now') AND date(due_date) <= date('now', '+7 days')",
+     'due_date', 'next_7_days'),
+    ('hatırlatıcı: bugün', 'reminders', "status = 'pending'",
+     "date(due_date) = date('now')", 'due_date', 'today'),
+    ('hatırlatıcı: bugünden sonra', 'reminders', "status = 'pending'",
+     "date(due_date) > date('now')", 'due_date', 'after_today'),
+    ('görev: bugüne kadar', 'notes', "is_task = 1 AND task_status = 'pending'",
+     "date(task_due_date) <= date('now')", 'task_due_date', 'until_today'),
+]
+
+LEGACY_REMINDERS_SUMMARY_QUERIES = [
+    ('overdue', "date(due_date) < date('now')"),
+    ('today', "date(due_date) = date('now')"),
+    ('tomorrow', "date(due_date) = date('now', '+1 day')"),
+    ('this_week', "date(due_date) > date('now') AND date(due_date) <= date('now', '+7 days')"),
+    ('total_pending', "1=1"),
+]
+LEGACY_TASKS_SUMMARY_QUERIES = [
+    ('overdue', "task_status = 'pending' AND date(task_due_date) < date('now')"),
+    ('due_today', "task_status = 'pending' AND date(task_due_date) = date('now')"),
+    ('pending', "task_status = 'pending'"),
+    ('completed', "task_status = 'completed'"),
+]
+
+def legacy_reminders_summary(conn) -> dict:
+    return {key: conn.execute("SELECT COUNT(*) FROM reminders WHERE status = 'pending' "
+                              f"AND {where}").fetchone()[0]
+            for key, where in LEGACY_REMINDERS_SUMMARY_QUERIES}
+
+def legacy_tasks_summary(conn) -> dict:
+    return {key: conn.execute(f"SELECT COUNT(*) FROM notes WHERE is_task = 1 AND {where}").fetchone()[0]
+            for key, where in LEGACY_TASKS_SUMMARY_QUERIES}
+
+def date_predicate_plans(backend) -> list:
+    """Yeni tarih koşullu sorgular ve EXPLAIN QUERY PLAN'da beklenen indeks aralığı."""
+    bounds = backend.date_bounds()
+    plans = []
+    for status in ('overdue', 'upcoming'):
+        query, params = backend._check_list_query(status=status)
+        plans.append((f"çek listesi ({status})", query, params, 'due_date'))
+    for status in ('overdue', 'today', 'tomorrow', 'upcoming'):
+        query, params = backend._reminder_list_query(status=status)
+        plans.append((f"hatırlatıcı listesi ({status})", query, params, 'due_date'))
+    for status in ('overdue', 'due_today'):
+        query, params = backend._note_list_query(is_task=1, task_status=status)
+        plans.append((f"görev listesi ({status})", query, params, 'task_due_date'))
+    for period in ('overdue', 'today', 'tomorrow', 'rest_of_week', 'until_today'):
+        clause, params = backend.due_period_sql('due_date', period, bounds)
+        plans.append((f"hatırlatıcı sayımı ({period})",
+                      f"SELECT COUNT(*) FROM reminders WHERE status = 'pending' AND {clause}",
+                      params, 'due_date'))
+    for period in ('overdue', 'today', 'until_today'):
+        clause, params = backend.due_period_sql('task_due_date', period, bounds)
+        plans.append((f"görev sayımı ({period})",
+                      "SELECT COUNT(*) FROM notes WHERE is_task = 1 "
+                      f"AND task_status = 'pending' AND {clause}", params, 'task_due_date'))
+    return plans
+
+def bench_date_predicates(backend, rows: int):
+    """Fonksiyona sarılı tarih koşullarına karşı ham kolon aralıkları (sonuç + plan kontrolü)."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    rnd = random.Random(5)
+    today = date.today()
+
+    def near(days):
+        # Bugünün çevresinde yoğun; bir kısmı saatli (date() ile kesilen değerler)
+        value = (today + timedelta(days=rnd.randint(-days, days))).strftime('%Y-%m-%d')
+        return value + ' 09:30:00' if rnd.random() < 0.1 else value
+
+    with backend.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO reminders (title, due_date, status) VALUES (?, ?, ?)",
+            ((f"Yakın hatırlatma {i}", near(10), rnd.choice(('pending', 'pending', 'completed')))
+             for i in range(rows // 20)))
+        conn.executemany(
+            "INSERT INTO notes (title, is_task, task_status, task_due_date) VALUES (?, 1, ?, ?)",
+            ((f"Görev {i}", rnd.choice(('pending', 'pending', 'completed')),
+              near(10) if i % 4 else near(360)) for i in range(rows // 5)))
+        conn.executemany("UPDATE checks SET due_date = ? WHERE id = ?",
+                         ((near(10), rnd.randint(1, rows)) for _ in range(rows // 20)))
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    mismatches = []
+    rows_out = []
+    with backend.db_connection(readonly=True) as conn:
+        for name, fn, legacy_sql in LEGACY_DATE_LISTS:
+            expected = {tuple(row) for row in conn.execute(legacy_sql)}
+            actual = {(item['id'], item['display_status']) for item in fn(backend)}
+            if expected != actual:
+                mismatches.append(name)
+
+        bounds = backend.date_bounds()
+        for name, table, where, legacy_where, column, period in LEGACY_DATE_COUNTS:
+            clause, params = backend.due_period_sql(column, period, bounds)
+            legacy_sql = f"SELECT COUNT(*) FROM {table} WHERE {where} AND {legacy_where}"
+            sql = f"SELECT COUNT(*) FROM {table} WHERE {where} AND {clause}"
+            if conn.execute(legacy_sql).fetchone()[0] != conn.execute(sql, params).fetchone()[0]:
+                mismatches.append(name)
+            rows_out.append((name, timed(lambda: conn.execute(legacy_sql).fetchone()),
+                             timed(lambda: conn.execute(sql, params).fetchone())))
+
+        for name, legacy_fn, fn in (('get_reminders_summary()', legacy_reminders_summary,
+                                     backend.get_reminders_summary),
+                                    ('get_tasks_summary()', legacy_tasks_summary,
+                                     backend.get_tasks_summary)):
+            expected, actual = legacy_fn(conn), fn()
+            if expected != actual:
+                mismatches.append(name)
+            rows_out.append((name, timed(lambda: legacy_fn(conn)), timed(fn)))
+
+        # Çek özeti zaten tek sorgu; sadece sınırların Python'a taşınması doğrulanır
+        expected, actual = legacy_checks_summary(conn), backend.get_checks_summary()
+        if any(abs(expected[f'{key}_{field}'] - actual[f'{key}_{field}']) > 0.005
+               for key in ('overdue', 'this_week', 'this_month') for field in ('count', 'amount')):
+            mismatches.append('get_checks_summary()')
+
+        unindexed = []
+        for name, sql, params, column in date_predicate_plans(backend):
+            details = [row['detail'] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+            if not any(f"{column}<" in d or f"{column}>" in d for d in details):
+                unindexed.append((name, details))
+
+    print_table(f"SARGABLE TARİH KOŞULLARI ({rows:,} satır)", rows_out)
+    print("✅ Sonuçlar (süzgeç + display_status) eski sorgularla birebir aynı" if not mismatches
+          else f"❌ Farklı sonuçlar: {mismatches}")
+    if unindexed:
+        for name, details in unindexed:
+            print(f"❌ İndeks aralığı kullanılmıyor: {name}: {details}")
+    else:
+        print(f"✅ {len(date_predicate_plans(backend))} sorgunun planında vade kolonu indeks aralığıyla aranıyor")
+
+LEGACY_DASHBOARD_DUE_COUNTERS = [
+    ('pending_reminders', "SELECT COUNT(*) FROM reminders "
+                          "WHERE status = 'pending' AND date(due_date) <= date('now')"),
+    ('pending_tasks', "SELECT COUNT(*) FROM notes "
+                      "WHERE is_task = 1 AND task_status = 'pending' AND date(task_due_date) <= date('now')"),
+]
+
+def legacy_upcoming_checks(conn, days: int = 7) -> list:
+    today = date.today()
+    return [row[0] for row in conn.execute(
+        "SELECT id FROM checks WHERE status = 'pending' AND due_date <= ? AND due_date >= ? "
+        "ORDER BY due_date ASC, id",
+        ((today + timedelta(days=days)).strftime('%Y-%m-%d'), today.strftime('%Y-%m-%d')))]
+
+def due_calendar_rows(conn) -> dict:
+    return {(row['kind'], row['day']): (row['item_count'], round(row['amount'], 2))
+            for row in conn.execute("SELECT kind, day, item_count, amount FROM due_calendar")}
+
+def _due_calendar_mismatches(backend, conn) -> list:
+    """Takvim destekli özetleri eski doğrudan sorgularla karşılaştırır."""
+    mismatches = []
+    if legacy_reminders_summary(conn) != backend.get_reminders_summary():
+        mismatches.append('get_reminders_summary()')
+    if legacy_tasks_summary(conn) != backend.get_tasks_summary():
+        mismatches.append('get_tasks_summary()')
+    stats = backend._compute_dashboard_stats()
+    for key, sql in LEGACY_DASHBOARD_DUE_COUNTERS:
+        if conn.execute(sql).fetchone()[0] != stats[key]:
+            mismatches.append(f"dashboard {key}")
+    for days in (7, 30):
+        actual = sorted((c['due_date'], c['id']) for c in backend.get_upcoming_checks(days))
+        if [c_id for _, c_id in actual] != legacy_upcoming_checks(conn, days):
+            mismatches.append(f"get_upcoming_checks({days})")
+    return mismatches
+
+def bench_due_calendar(backend, rows: int):
+    """Günlük vade takvimi: tetikleyici bakımı, özetler ve yeniden kurma tutarlılığı."""
+    print(f"⏳ {rows:,} satırlık sentetik veri oluşturuluyor...")
+    populate(backend, rows)
+    rnd = random.Random(11)
+    today = date.today()
+
+    def near(days):
+        value = (today + timedelta(days=rnd.randint(-days, days))).strftime('%Y-%m-%d')
+        return value + ' 09:30:00' if rnd.random() < 0.1 else value
+
+    with backend.db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO notes (title, is_task, task_status, task_due_date) VALUES (?, 1, ?, ?)",
+            ((f"Görev {i}", rnd.choice(('pending', 'pending', 'completed')),
+              near(30) if i % 10 else None) for i in range(rows // 5)))
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    rows_out = []
+    with backend.db_connection(readonly=True) as conn:
+        mismatches = _due_calendar_mismatches(backend, conn)
+
+        def cold(fn):
+            # Anlık görüntü boşaltılır: takvim tablosundan yeniden toplama
+            backend._due_calendar_snapshot.update(key=None)
+            return fn()
+
+        for name, legacy_fn, fn in (
+                ('get_reminders_summary()', legacy_reminders_summary, backend.get_reminders_summary),
+                ('get_tasks_summary()', legacy_tasks_summary, backend.get_tasks_summary)):
+            rows_out.append((f"{name} (soğuk)", timed(lambda: legacy_fn(conn)), timed(lambda: cold(fn))))
+            rows_out.append((f"{name} (sıcak)", timed(lambda: legacy_fn(conn)), timed(fn)))
+        rows_out.append(("dashboard bekleyen sayaçlar (soğuk)",
+                         timed(lambda: [conn.execute(sql).fetchone() for _, sql in LEGACY_DASHBOARD_DUE_COUNTERS]),
+                         timed(lambda: cold(backend.get_due_calendar))))
+
+    # Rastgele yazmalar: tetikleyiciler takvimi her satırda güncel tutmalı
+    n = max(100, rows // 100)
+    started = time.perf_counter()
+    with backend.transaction(*backend.DUE_CALENDAR_DOMAINS) as cursor:
+        for _ in range(n):
+            op = rnd.random()
+            if op < 0.25:
+                cursor.execute("UPDATE checks SET status = ? WHERE id = ?",
+                               (rnd.choice(('pending', 'cashed', 'returned')), rnd.randint(1, rows)))
+            elif op < 0.4:
+                cursor.execute("UPDATE checks SET paid_amount = amount * ?, due_date = ? WHERE id = ?",
+                               (rnd.random(), near(10), rnd.randint(1, rows)))
+            elif op < 0.5:
+                cursor.execute("UPDATE checks SET check_type = CASE check_type WHEN 'incoming' "
+                               "THEN 'outgoing' ELSE 'incoming' END WHERE id = ?", (rnd.randint(1, rows),))
+            elif op < 0.6:
+                cursor.execute("DELETE FROM reminders WHERE id = ?", (rnd.randint(1, rows // 5),))
+            elif op < 0.7:
+                cursor.execute("INSERT INTO reminders (title, due_date, status) VALUES (?, ?, 'pending')",
+                               ("Yeni hatırlatma", near(10)))
+            elif op < 0.8:
+                cursor.execute("UPDATE reminders SET status = 'completed' WHERE id = ?",
+                               (rnd.randint(1, rows // 5),))
+            elif op < 0.9:
+                cursor.execute("UPDATE notes SET task_status = ?, task_due_date = ? WHERE id = ?",
+                               (rnd.choice(('pending', 'completed')), near(10), rnd.randint(1, rows // 5)))
+            else:
+                cursor.execute("DELETE FROM notes WHERE id = ?", (rnd.randint(1, rows // 5),))
+    write_elapsed = time.perf_counter() - started
+
+    with backend.db_connection(readonly=True) as conn:
+        mismatches += [f"{name} (yazmalardan sonra)" for name in _due_calendar_mismatches(backend, conn)]
+        maintained = due_calendar_rows(conn)
+    result = backend.rebuild_due_calendar()
+    with backend.db_connection(readonly=True) as conn:
+        rebuilt = due_calendar_rows(conn)
+
+    print_table(f"VADE TAKVİMİ ({rows:,} çek, {rows // 5:,} hatırlatıcı, {rows // 5:,} görev)", rows_out)
+    print(f"ℹ️  {n:,} rastgele yazma (tetikleyicilerle): {write_elapsed * 1000:.1f} ms; "
+          f"takvim {result['rows']:,} satır, yeniden kurma {result['elapsed'] * 1000:.1f} ms")
+    print("✅ Özetler, dashboard sayaçları ve yaklaşan çekler eski sorgularla aynı" if not mismatches
+          else f"❌ Farklı sonuçlar: {mismatches}")
+    diff = set(maintained.items()) ^ set(rebuilt.items())
+    print("✅ Tetikleyicilerle güncellenen takvim yeniden kurulanla aynı" if not diff
+          else f"❌ Takvim farkı ({len(diff)} satır): {sorted(diff)[:5]}")
+
+    diff = migration_race_diff(backend, 11, "UPDATE checks SET amount = amount + 1 WHERE status = 'pending' "
+                               "AND id > (SELECT MAX(id) - 50 FROM checks)", 'due_calendar')
+    print("✅ Geçiş sırasındaki yazmalar takvimde bir kez sayıldı" if not diff
+          else f"❌ Geçiş sonrası takvim farkı ({len(diff)} satır): {diff[:3]}")
+
+BENCHMARKS = {
+    'indexes': bench_indexes,
+    'checks_summary': bench_checks_summary,
+    'cash_balance': bench_cash_balance,
+    'dashboard': bench_dashboard,
+    'settings': bench_settings,
+    'customers': bench_customers,
+    'pagination': bench_pagination,
+    'search': bench_search,
+    'autocomplete': bench_autocomplete,
+    'payments': bench_payments,
+    'check_import': bench_check_import,
+    'cash_import': bench_cash_import,
+    'export': bench_export,
+    'statement': bench_statement,
+    'ledger': bench_ledger,
+    'activity_log': bench_activity_log,
+    'activity_partitions': bench_activity_partitions,
+    'aging': bench_aging,
+    'date_predicates': bench_date_predicates,
+    'due_calendar': bench_due_calendar,
+}
+
+# ============================================================================
+# ÇALIŞTIRMA
+# ============================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Borç Takip performans ölçümleri')
+    parser.add_argument('scenario', choices=sorted(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='borc_takip_bench_')
+    try:
+        backend = load_backend(workdir)
+        BENCHMARKS[args.scenario](backend, args.rows)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -5,12 +5,14 @@
 # DictLoader mimarisi ile TemplateNotFound hatası YOK
 # ============================================================================
 
-from flask import Flask, request, redirect, url_for, session, flash, render_template, jsonify, Response
+from flask import Flask, request, redirect, url_for, session, flash, render_template, jsonify, Response, g
 import jinja2
 import backend
 from datetime import datetime, timedelta
 from functools import wraps
 import json
+import threading
+import time
 
 # ============================================================================
 # FLASK UYGULAMASI
@@ -35,6 +37,13 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _page_args():
+    """Liste route'ları için imleç (cursor) ve sayfa boyutu parametreleri."""
+    return {
+        'cursor': request.args.get('cursor'),
+        'page_size': request.args.get('per_page'),
+    }
+
 def format_currency(value):
     """Para birimi formatlar."""
     try:
@@ -1071,6 +1080,8 @@ CUSTOMERS_HTML = '''
     </div>
 </div>
 
+{% include 'pagination.html' %}
+
 <!-- FAB BUTTON -->
 <a href="{{ url_for('customer_add') }}" class="fab">
     <i class="bi bi-plus-lg"></i>
@@ -1427,6 +1438,9 @@ CHECKS_HTML = '''
 {% block mobile_title %}Çek/Senet{% endblock %}
 
 {% block header_actions %}
+<a href="{{ url_for('check_import') }}" class="btn btn-outline-secondary me-1">
+    <i class="bi bi-upload me-1"></i>İçe Aktar
+</a>
 <a href="{{ url_for('check_add') }}" class="btn btn-primary">
     <i class="bi bi-plus-lg me-1"></i>Yeni Ekle
 </a>
@@ -1664,6 +1678,8 @@ CHECKS_HTML = '''
     </div>
 </div>
 
+{% include 'pagination.html' %}
+
 <!-- FAB -->
 <a href="{{ url_for('check_add') }}" class="fab"><i class="bi bi-plus-lg"></i></a>
 
@@ -2204,6 +2220,9 @@ CASHFLOW_HTML = '''
 {% block mobile_title %}Kasa{% endblock %}
 
 {% block header_actions %}
+<a href="{{ url_for('cash_flow_import') }}" class="btn btn-outline-secondary me-1">
+    <i class="bi bi-upload me-1"></i>Ekstre Aktar
+</a>
 <div class="btn-group">
     <a href="{{ url_for('cash_flow_add') }}?type=income" class="btn btn-success">
         <i class="bi bi-plus-lg me-1"></i>Gelir
@@ -2367,6 +2386,8 @@ CASHFLOW_HTML = '''
     </div>
 </div>
 
+{% include 'pagination.html' %}
+
 <!-- FAB -->
 <button class="fab" data-bs-toggle="modal" data-bs-target="#quickAddModal">
     <i class="bi bi-plus-lg"></i>
@@ -2640,6 +2661,8 @@ REMINDERS_HTML = '''
     </div>
 </div>
 
+{% include 'pagination.html' %}
+
 <!-- FAB -->
 <a href="{{ url_for('reminder_add') }}" class="fab"><i class="bi bi-plus-lg"></i></a>
 {% endblock %}
@@ -2948,6 +2971,8 @@ NOTES_HTML = '''
     {% endfor %}
 </div>
 
+{% include 'pagination.html' %}
+
 <!-- FAB -->
 <button class="fab" data-bs-toggle="modal" data-bs-target="#quickNoteModal">
     <i class="bi bi-plus-lg"></i>
@@ -3190,6 +3215,19 @@ REPORTS_HTML = '''
                     <span><i class="bi bi-activity me-2"></i>Aktivite Raporu</span>
                     <i class="bi bi-chevron-right"></i>
                 </a>
+                <div class="list-group-item">
+                    <div class="mb-1"><i class="bi bi-database-down me-2"></i>Ham Veri Dökümü</div>
+                    {% for table, label in [('account_transactions', 'Cari Hareketler'), ('cash_flow', 'Kasa'), ('checks', 'Çek/Senet'), ('check_transactions', 'Çek Hareketleri')] %}
+                    <div class="d-flex justify-content-between align-items-center small py-1">
+                        <span>{{ label }}</span>
+                        <span>
+                            {% for fmt in export_formats() %}
+                            <a href="{{ url_for('report_ledger_export', table=table, export=fmt.name) }}" class="badge bg-light text-dark text-decoration-none">{{ fmt.extension }}</a>
+                            {% endfor %}
+                        </span>
+                    </div>
+                    {% endfor %}
+                </div>
             </div>
         </div>
     </div>
@@ -3211,6 +3249,16 @@ REPORT_VIEW_HTML = '''
     <a href="{{ export_url }}" class="btn btn-success">
         <i class="bi bi-download me-1"></i>CSV İndir
     </a>
+    {% if export_url != '#' %}
+    <button type="button" class="btn btn-success dropdown-toggle dropdown-toggle-split" data-bs-toggle="dropdown" aria-expanded="false">
+        <span class="visually-hidden">Diğer biçimler</span>
+    </button>
+    <ul class="dropdown-menu dropdown-menu-end">
+        {% for fmt in export_formats() if fmt.name != 'csv' %}
+        <li><a class="dropdown-item" href="{{ export_url_for(fmt.name) }}">{{ fmt.label }} İndir</a></li>
+        {% endfor %}
+    </ul>
+    {% endif %}
     <button onclick="window.print()" class="btn btn-outline-secondary">
         <i class="bi bi-printer me-1"></i>Yazdır
     </button>
@@ -3584,6 +3632,20 @@ SETTINGS_HTML = '''
                                 <input type="checkbox" name="backup.auto_backup" class="form-check-input" id="autoBackup" {% if settings.backup and settings.backup.auto_backup.value %}checked{% endif %}>
                                 <label class="form-check-label" for="autoBackup">Otomatik yedekleme aktif</label>
                             </div>
+                            <hr>
+                            <h6>Aktivite Kayıtları</h6>
+                            <div class="row g-3">
+                                <div class="col-md-6">
+                                    <label class="form-label">Veritabanında Tutulan Ay</label>
+                                    <input type="number" min="1" name="activity_log.hot_months" class="form-control" value="{{ settings.activity_log.hot_months.value if settings.activity_log else 3 }}">
+                                    <small class="text-muted">Daha eski aylar sıkıştırılmış arşiv dosyalarına taşınır</small>
+                                </div>
+                                <div class="col-md-6">
+                                    <label class="form-label">Log Saklama (Ay)</label>
+                                    <input type="number" min="0" name="activity_log.retention_months" class="form-control" value="{{ settings.activity_log.retention_months.value if settings.activity_log else 0 }}">
+                                    <small class="text-muted">Daha eski kayıtlar silinir (0 = sınırsız)</small>
+                                </div>
+                            </div>
                         </div>
                     </div>
                 </div>
@@ -3672,6 +3734,91 @@ function deleteCategory(id) {
 {% endblock %}
 '''
 
+# ----------------------------------------------------------------------------
+# 19. SAYFALAMA PARÇASI (LİSTE SAYFALARINA INCLUDE EDİLİR)
+# ----------------------------------------------------------------------------
+PAGINATION_HTML = '''
+{% if page and (page.has_more or request.args.get('cursor')) %}
+<div class="d-flex justify-content-between align-items-center mt-3">
+    {% if request.args.get('cursor') %}
+        <a href="{{ page_url(None) }}" class="btn btn-sm btn-outline-secondary">
+            <i class="bi bi-chevron-double-left me-1"></i>İlk Sayfa
+        </a>
+    {% else %}
+        <span></span>
+    {% endif %}
+    {% if page.has_more %}
+        <a href="{{ page_url(page.next_cursor) }}" class="btn btn-sm btn-outline-primary">
+            Sonraki Sayfa<i class="bi bi-chevron-right ms-1"></i>
+        </a>
+    {% endif %}
+</div>
+{% endif %}
+'''
+
+# ----------------------------------------------------------------------------
+# 20. TOPLU İÇE AKTARMA SAYFASI (ÇEK/SENET, KASA)
+# ----------------------------------------------------------------------------
+IMPORT_HTML = '''
+{% extends "base.html" %}
+{% block title %}{{ import_title }}{% endblock %}
+{% block page_title %}{{ import_title }}{% endblock %}
+{% block mobile_title %}İçe Aktar{% endblock %}
+
+{% block content %}
+<div class="row justify-content-center">
+    <div class="col-12 col-lg-8">
+        <div class="card mb-3">
+            <div class="card-body">
+                <form method="POST" enctype="multipart/form-data">
+                    <div class="mb-3">
+                        <label class="form-label">Dosya (CSV veya JSON) *</label>
+                        <input type="file" name="file" class="form-control" accept=".csv,.json,.txt" required>
+                        <div class="form-text">
+                            Kolonlar: {% for col in import_columns %}<code>{{ col }}</code>{% if not loop.last %}, {% endif %}{% endfor %}
+                        </div>
+                    </div>
+                    <div class="form-check mb-3">
+                        <input class="form-check-input" type="checkbox" name="dry_run" value="1" id="dryRun">
+                        <label class="form-check-label" for="dryRun">Sadece doğrula (kaydetme)</label>
+                    </div>
+                    <button type="submit" class="btn btn-primary">
+                        <i class="bi bi-upload me-1"></i>Yükle
+                    </button>
+                    <a href="{{ back_url }}" class="btn btn-outline-secondary">Geri</a>
+                </form>
+            </div>
+        </div>
+        
+        {% if result %}
+        <div class="card">
+            <div class="card-body">
+                <div class="d-flex gap-4 mb-3">
+                    <div><small class="text-muted d-block">Toplam Satır</small><strong>{{ result.total }}</strong></div>
+                    <div><small class="text-muted d-block">Geçerli</small><strong class="text-success">{{ result.valid }}</strong></div>
+                    <div><small class="text-muted d-block">Kaydedilen</small><strong>{{ result.imported }}</strong></div>
+                    <div><small class="text-muted d-block">Hatalı</small><strong class="text-danger">{{ result.error_count if result.error_count is defined else result.errors|length }}</strong></div>
+                </div>
+                {% if result.errors %}
+                <div class="table-responsive">
+                    <table class="table table-sm mb-0">
+                        <thead><tr><th>Satır</th><th>Hata</th></tr></thead>
+                        <tbody>
+                            {% for err in result.errors[:500] %}
+                            <tr><td>{{ err.row or '-' }}</td><td>{{ err.error }}</td></tr>
+                            {% endfor %}
+                        </tbody>
+                    </table>
+                </div>
+                {% endif %}
+            </div>
+        </div>
+        {% endif %}
+    </div>
+</div>
+{% endblock %}
+'''
+
 # ============================================================================
 # TEMPLATE SÖZLÜĞÜ
 # ============================================================================
@@ -3695,6 +3842,8 @@ TEMPLATES = {
     'reports.html': REPORTS_HTML,
     'report_view.html': REPORT_VIEW_HTML,
     'settings.html': SETTINGS_HTML,
+    'pagination.html': PAGINATION_HTML,
+    'import.html': IMPORT_HTML,
 }
 
 # DictLoader ayarla
@@ -3704,20 +3853,71 @@ app.jinja_loader = jinja2.DictLoader(TEMPLATES)
 # CONTEXT PROCESSORS
 # ============================================================================
 
+# Şablon globalleri (firma adı, WhatsApp durumu, bekleyen hatırlatıcı sayısı)
+# her render_template çağrısında gerekir. Aynı istek içinde flask.g üzerinden,
+# istekler arasında kısa ömürlü süreç önbelleğinden verilir. Önbellek anahtarı
+# backend'in 'settings'/'reminders' sayaçlarını içerir; ayar ve hatırlatıcı
+# yazma yolları bu sayaçları artırdığı için kayıt anında bayatlar.
+GLOBALS_CACHE_TTL = 5  # saniye (başka süreçlerden gelen değişiklikler için üst sınır)
+
+_globals_lock = threading.Lock()
+_globals_cache = {'key': None, 'expires': 0.0, 'values': None}
+globals_cache_stats = {'request_hits': 0, 'process_hits': 0, 'misses': 0}
+
+def _count_globals(event):
+    with _globals_lock:
+        globals_cache_stats[event] += 1
+
+def _load_globals():
+    """Önbellekten ya da backend'den şablon globallerini döndürür."""
+    # Hatırlatıcı sayısı yalnız giriş yapmış kullanıcıya gösterilir; giriş
+    # sayfası gibi anonim render'larda özet sorgusu çalıştırılmaz
+    logged_in = 'user' in session
+    
+    def usable(values):
+        return values is not None and (not logged_in or 'pending_reminders' in values)
+    
+    if usable(g.get('_template_globals')):
+        _count_globals('request_hits')
+        return g._template_globals
+    
+    key = (backend.cache_generation('settings', 'reminders'), datetime.now().strftime('%Y-%m-%d'))
+    now = time.monotonic()
+    with _globals_lock:
+        cached = dict(_globals_cache)
+    
+    if cached['key'] == key and now < cached['expires'] and usable(cached['values']):
+        _count_globals('process_hits')
+        values = cached['values']
+    else:
+        _count_globals('misses')
+        values = {
+            'company_name': backend.get_setting('company', 'name', 'ERP Sistemi'),
+            'whatsapp_enabled': backend.is_whatsapp_enabled(),
+        }
+        if logged_in:
+            summary = backend.get_reminders_summary()
+            values['pending_reminders'] = summary.get('overdue', 0) + summary.get('today', 0)
+        with _globals_lock:
+            _globals_cache.update(key=key, expires=now + GLOBALS_CACHE_TTL, values=values)
+    
+    g._template_globals = values
+    return values
+
 @app.context_processor
 def inject_globals():
     """Tüm template'lerde kullanılacak global değişkenler."""
+    cached = _load_globals()
     context = {
         'now': datetime.now(),
         'today': datetime.now().strftime('%Y-%m-%d'),
-        'company_name': backend.get_setting('company', 'name', 'ERP Sistemi'),
-        'whatsapp_enabled': backend.is_whatsapp_enabled(),
+        'company_name': cached['company_name'],
+        'whatsapp_enabled': cached['whatsapp_enabled'],
     }
     
     if 'user' in session:
         # Bekleyen hatırlatıcı sayısı
-        summary = backend.get_reminders_summary()
-        context['pending_reminders'] = summary.get('overdue', 0) + summary.get('today', 0)
+        context['pending_reminders'] = cached['pending_reminders']
     
     return context
 
@@ -3763,7 +3963,8 @@ def logout():
 @login_required
 def dashboard():
     stats = backend.get_dashboard_stats()
-    check_summary = backend.get_checks_summary()
+    # Çek özeti dashboard istatistikleriyle birlikte hesaplanıyor
+    check_summary = stats.get('check_summary') or backend.get_checks_summary()
     upcoming_checks = backend.get_upcoming_checks(7)
     upcoming_reminders = backend.get_upcoming_reminders(7)
     
@@ -3794,14 +3995,18 @@ def customers():
     balance_type = request.args.get('balance')
     search = request.args.get('search')
     
-    customers = backend.get_all_customers(customer_type=customer_type, search=search)
-    
-    if balance_type == 'receivable':
-        customers = [c for c in customers if c['balance'] > 0]
-    elif balance_type == 'payable':
-        customers = [c for c in customers if c['balance'] < 0]
+    page = backend.get_customers_page(customer_type=customer_type, search=search,
+                                      balance_type=balance_type, **_page_args())
     
-    return render_template('customers.html', customers=customers)
+    return render_template('customers.html', customers=page['items'], page=page)
+
+@app.route('/api/customers/autocomplete')
+@login_required
+def customer_autocomplete():
+    """Müşteri otomatik tamamlama (bellek içi önek indeksi)."""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify(backend.autocomplete_customers(query, limit))
 
 @app.route('/customers/add', methods=['GET', 'POST'])
 @login_required
@@ -3865,13 +4070,12 @@ def customer_statement(id):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    statement = backend.get_customer_statement(id, start_date, end_date)
+    # Export için (akışlı; ekstre belleğe alınmaz)
+    if request.args.get('export'):
+        return _export_response('statement', f'ekstre_{id}', customer_id=id,
+                                start_date=start_date, end_date=end_date)
     
-    # Export için
-    if request.args.get('export') == 'csv':
-        csv_data = backend.export_customer_statement_csv(id, start_date, end_date)
-        return Response(csv_data, mimetype='text/csv',
-            headers={'Content-Disposition': f'attachment; filename=ekstre_{id}.csv'})
+    statement = backend.get_customer_statement(id, start_date, end_date)
     
     return render_template('report_view.html',
         report_title=f'{customer["name"]} - Hesap Ekstresi',
@@ -3903,10 +4107,11 @@ def checks():
     status = request.args.get('status')
     search = request.args.get('search')
     
-    checks = backend.get_all_checks(check_type=check_type, status=status, search=search)
+    page = backend.get_checks_page(check_type=check_type, status=status, search=search,
+                                   **_page_args())
     summary = backend.get_checks_summary()
     
-    return render_template('checks.html', checks=checks, summary=summary)
+    return render_template('checks.html', checks=page['items'], page=page, summary=summary)
 
 @app.route('/checks/add', methods=['GET', 'POST'])
 @login_required
@@ -3934,9 +4139,47 @@ def check_add():
         if success:
             return redirect(url_for('checks'))
     
-    customers = backend.get_all_customers()
+    customers = backend.get_customer_choices()
     return render_template('check_form.html', check=None, customers=customers)
 
+CHECK_IMPORT_COLUMNS = ['check_type', 'payment_type', 'check_number', 'amount', 'due_date',
+                        'customer_id / customer_name', 'bank_name', 'bank_branch', 'iban',
+                        'issue_date', 'drawer_name', 'notes']
+
+@app.route('/checks/import', methods=['GET', 'POST'])
+@login_required
+def check_import():
+    """CSV/JSON dosyasından (ya da JSON gövdesinden) toplu çek/senet ekler."""
+    result = None
+    if request.method == 'POST':
+        created_by = session['user']['id']
+        if request.is_json:
+            # Dosya yüklemesiyle aynı doğrulama: nesne listesi, satır sınırı, başlık katlama
+            try:
+                rows = backend.read_import_file(request.get_data(), 'rows.json')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            dry_run = request.args.get('dry_run') == '1'
+            return jsonify(backend.import_checks(rows, created_by, dry_run=dry_run))
+        
+        upload = request.files.get('file')
+        try:
+            rows = backend.read_import_file(upload.read(), upload.filename) if upload else []
+        except ValueError as e:
+            flash(f'Dosya okunamadı: {e}', 'danger')
+            rows = None
+        if rows is not None:
+            result = backend.import_checks(rows, created_by, dry_run=bool(request.form.get('dry_run')))
+            if result['imported']:
+                flash(f"{result['imported']} çek/senet içe aktarıldı.", 'success')
+            elif result['errors'] and not result['valid']:
+                flash('Geçerli satır bulunamadı.', 'warning')
+    
+    return render_template('import.html', result=result,
+        import_title='Çek/Senet İçe Aktar',
+        import_columns=CHECK_IMPORT_COLUMNS,
+        back_url=url_for('checks'))
+
 @app.route('/checks/<int:id>')
 @login_required
 def check_detail(id):
@@ -4008,12 +4251,13 @@ def cash_flow():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    transactions = backend.get_cash_flow(start_date, end_date, category, trans_type)
+    page = backend.get_cash_flow_page(start_date, end_date, category, trans_type, **_page_args())
     balance = backend.get_cash_balance()
     categories = backend.get_categories()
     
     return render_template('cash_flow.html',
-        transactions=transactions,
+        transactions=page['items'],
+        page=page,
         balance=balance,
         categories=categories
     )
@@ -4040,7 +4284,7 @@ def cash_flow_add():
             return redirect(url_for('cash_flow'))
     
     categories = backend.get_categories(category_type=trans_type)
-    customers = backend.get_all_customers()
+    customers = backend.get_customer_choices()
     
     return render_template('cash_flow_form.html',
         trans_type=trans_type,
@@ -4048,6 +4292,49 @@ def cash_flow_add():
         customers=customers
     )
 
+CASH_IMPORT_COLUMNS = ['tarih', 'açıklama', 'tutar (ya da borç / alacak)', 'dekont no',
+                       'karşı taraf', 'vkn/tckn', 'kategori']
+
+@app.route('/cash-flow/import', methods=['GET', 'POST'])
+@login_required
+def cash_flow_import():
+    """Banka ekstresi (CSV, akışlı) ya da JSON'dan toplu kasa hareketi ekler."""
+    result = None
+    if request.method == 'POST':
+        created_by = session['user']['id']
+        if request.is_json:
+            # Dosya yüklemesiyle aynı doğrulama: nesne listesi, satır sınırı, başlık katlama
+            try:
+                rows = backend.read_import_file(request.get_data(), 'rows.json')
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            dry_run = request.args.get('dry_run') == '1'
+            return jsonify(backend.import_cash_transactions(rows, created_by, dry_run=dry_run))
+        
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Dosya seçilmedi.', 'danger')
+        else:
+            if upload.filename.lower().endswith('.json'):
+                try:
+                    rows = backend.read_import_file(upload.read(), upload.filename)
+                except ValueError as e:
+                    rows = []
+                    flash(f'Dosya okunamadı: {e}', 'danger')
+            else:
+                rows = backend.iter_bank_statement(backend.open_import_text(upload.stream))
+            result = backend.import_cash_transactions(rows, created_by,
+                                                      dry_run=bool(request.form.get('dry_run')))
+            if result['imported']:
+                flash(f"{result['imported']} kasa hareketi içe aktarıldı.", 'success')
+            elif result['errors'] and not result['valid']:
+                flash('Geçerli satır bulunamadı.', 'warning')
+    
+    return render_template('import.html', result=result,
+        import_title='Banka Ekstresi İçe Aktar',
+        import_columns=CASH_IMPORT_COLUMNS,
+        back_url=url_for('cash_flow'))
+
 # ============================================================================
 # ROUTE'LAR - HATIRLATICILAR
 # ============================================================================
@@ -4060,11 +4347,12 @@ def reminders():
     priority = request.args.get('priority')
     include_completed = request.args.get('status') == 'completed'
     
-    reminders = backend.get_reminders(status=status, reminder_type=reminder_type,
-                                       priority=priority, include_completed=include_completed)
+    page = backend.get_reminders_page(status=status, reminder_type=reminder_type,
+                                      priority=priority, include_completed=include_completed,
+                                      **_page_args())
     summary = backend.get_reminders_summary()
     
-    return render_template('reminders.html', reminders=reminders, summary=summary)
+    return render_template('reminders.html', reminders=page['items'], page=page, summary=summary)
 
 @app.route('/reminders/add', methods=['GET', 'POST'])
 @login_required
@@ -4088,7 +4376,7 @@ def reminder_add():
         if success:
             return redirect(url_for('reminders'))
     
-    customers = backend.get_all_customers()
+    customers = backend.get_customer_choices()
     return render_template('reminder_form.html', customers=customers)
 
 @app.route('/reminders/complete', methods=['POST'])
@@ -4124,10 +4412,10 @@ def notes():
     elif tab == 'pinned':
         is_pinned = 1
     
-    notes = backend.get_notes(is_task=is_task, is_pinned=is_pinned)
+    page = backend.get_notes_page(is_task=is_task, is_pinned=is_pinned, **_page_args())
     task_summary = backend.get_tasks_summary()
     
-    return render_template('notes.html', notes=notes, task_summary=task_summary)
+    return render_template('notes.html', notes=page['items'], page=page, task_summary=task_summary)
 
 @app.route('/notes/add', methods=['GET', 'POST'])
 @login_required
@@ -4152,7 +4440,7 @@ def note_add():
         if success:
             return redirect(url_for('notes'))
     
-    customers = backend.get_all_customers()
+    customers = backend.get_customer_choices()
     return render_template('note_form.html', note=None, is_task=is_task, customers=customers)
 
 @app.route('/notes/<int:id>/edit', methods=['GET', 'POST'])
@@ -4178,7 +4466,7 @@ def note_edit(id):
         if success:
             return redirect(url_for('notes'))
     
-    customers = backend.get_all_customers()
+    customers = backend.get_customer_choices()
     return render_template('note_form.html', note=note, is_task=note.get('is_task'), customers=customers)
 
 @app.route('/notes/complete', methods=['POST'])
@@ -4211,16 +4499,40 @@ def note_delete():
 def reports():
     return render_template('reports.html')
 
+def _export_response(report, filename, **filters):
+    """?export=<biçim> isteğini akışlı dosya yanıtına çevirir (csv, xlsx, parquet, arrow)."""
+    fmt = request.args.get('export')
+    try:
+        chunks = backend.iter_report_export(report, fmt, **filters)
+    except ValueError as e:
+        flash(str(e), 'warning')
+        return redirect(export_url_for(None))
+    exporter = backend.EXPORT_FORMATS[fmt]
+    return Response(chunks, mimetype=exporter['mimetype'],
+        headers={'Content-Disposition': f"attachment; filename={filename}.{exporter['extension']}"})
+
+@app.route('/reports/ledger-export')
+@login_required
+def report_ledger_export():
+    """Defter tablolarının ham dökümü (analiz için; varsayılan Parquet, yoksa CSV)."""
+    table = request.args.get('table', 'account_transactions')
+    if table not in backend.LEDGER_EXPORT_TABLES:
+        flash('Bilinmeyen tablo.', 'warning')
+        return redirect(url_for('reports'))
+    if not request.args.get('export'):
+        fmt = 'parquet' if backend.EXPORT_FORMATS['parquet']['available'] else 'csv'
+        return redirect(url_for('report_ledger_export', table=table, export=fmt))
+    return _export_response('ledger', table, table=table)
+
 @app.route('/reports/customer-balances')
 @login_required
 def report_customer_balances():
     balance_type = request.args.get('type')
-    data = backend.get_report_customer_balances(balance_type=balance_type)
     
-    if request.args.get('export') == 'csv':
-        csv_data = backend.export_customers_csv(balance_type)
-        return Response(csv_data, mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=cari_bakiyeler.csv'})
+    if request.args.get('export'):
+        return _export_response('customers', 'cari_bakiyeler', balance_type=balance_type)
+    
+    data = backend.get_report_customer_balances(balance_type=balance_type)
     
     # Toplamlar
     total_receivable = sum(c['balance'] for c in data if c['balance'] > 0)
@@ -4256,12 +4568,11 @@ def report_checks():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    report = backend.get_report_checks(start_date, end_date, check_type, status)
+    if request.args.get('export'):
+        return _export_response('checks', 'cek_senet', start_date=start_date, end_date=end_date,
+                                check_type=check_type, status=status)
     
-    if request.args.get('export') == 'csv':
-        csv_data = backend.export_checks_csv(start_date, end_date, check_type, status)
-        return Response(csv_data, mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=cek_senet.csv'})
+    report = backend.get_report_checks(start_date, end_date, check_type, status)
     
     return render_template('report_view.html',
         report_title='Çek/Senet Raporu',
@@ -4303,12 +4614,11 @@ def report_cashflow():
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    report = backend.get_report_cash_flow(start_date, end_date)
+    if request.args.get('export'):
+        return _export_response('cash_flow', 'kasa_hareketleri', start_date=start_date,
+                                end_date=end_date, transaction_type=trans_type)
     
-    if request.args.get('export') == 'csv':
-        csv_data = backend.export_cash_flow_csv(start_date, end_date)
-        return Response(csv_data, mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=kasa_hareketleri.csv'})
+    report = backend.get_report_cash_flow(start_date, end_date)
     
     # Filtrele
     data = report.get('data', [])
@@ -4343,53 +4653,38 @@ def report_cashflow():
 @app.route('/reports/aging')
 @login_required
 def report_aging():
-    aging = backend.get_report_aging()
+    as_of_date = request.args.get('as_of_date') or None
+    buckets = request.args.get('buckets') or None
+    
+    if request.args.get('export'):
+        # Dışa aktarım müşteri bazında döküm verir
+        return _export_response('aging', 'yaslandirma', as_of_date=as_of_date, buckets=buckets)
+    
+    aging = backend.get_report_aging(as_of_date, buckets)
+    
+    labels = {'current': 'Vadesi Gelmemiş'}
+    data = []
+    for name in aging.get('buckets', []):
+        low, _, high = name.partition('_')
+        if name not in labels:
+            labels[name] = f"{high}+ Gün" if low == 'over' else f"{low}-{high} Gün"
+        data.append({
+            'period': labels[name],
+            'incoming': aging.get('incoming', {}).get(name, {}).get('amount', 0),
+            'incoming_count': aging.get('incoming', {}).get(name, {}).get('count', 0),
+            'outgoing': aging.get('outgoing', {}).get(name, {}).get('amount', 0),
+            'outgoing_count': aging.get('outgoing', {}).get(name, {}).get('count', 0),
+        })
     
     return render_template('report_view.html',
         report_title='Yaşlandırma Analizi',
-        export_url='#',
-        data=[
-            {
-                'period': 'Vadesi Gelmemiş',
-                'incoming': aging.get('incoming', {}).get('current', {}).get('amount', 0),
-                'incoming_count': aging.get('incoming', {}).get('current', {}).get('count', 0),
-                'outgoing': aging.get('outgoing', {}).get('current', {}).get('amount', 0),
-                'outgoing_count': aging.get('outgoing', {}).get('current', {}).get('count', 0),
-            },
-            {
-                'period': '1-30 Gün',
-                'incoming': aging.get('incoming', {}).get('1_30', {}).get('amount', 0),
-                'incoming_count': aging.get('incoming', {}).get('1_30', {}).get('count', 0),
-                'outgoing': aging.get('outgoing', {}).get('1_30', {}).get('amount', 0),
-                'outgoing_count': aging.get('outgoing', {}).get('1_30', {}).get('count', 0),
-            },
-            {
-                'period': '31-60 Gün',
-                'incoming': aging.get('incoming', {}).get('31_60', {}).get('amount', 0),
-                'incoming_count': aging.get('incoming', {}).get('31_60', {}).get('count', 0),
-                'outgoing': aging.get('outgoing', {}).get('31_60', {}).get('amount', 0),
-                'outgoing_count': aging.get('outgoing', {}).get('31_60', {}).get('count', 0),
-            },
-            {
-                'period': '61-90 Gün',
-                'incoming': aging.get('incoming', {}).get('61_90', {}).get('amount', 0),
-                'incoming_count': aging.get('incoming', {}).get('61_90', {}).get('count', 0),
-                'outgoing': aging.get('outgoing', {}).get('61_90', {}).get('amount', 0),
-                'outgoing_count': aging.get('outgoing', {}).get('61_90', {}).get('count', 0),
-            },
-            {
-                'period': '90+ Gün',
-                'incoming': aging.get('incoming', {}).get('over_90', {}).get('amount', 0),
-                'incoming_count': aging.get('incoming', {}).get('over_90', {}).get('count', 0),
-                'outgoing': aging.get('outgoing', {}).get('over_90', {}).get('amount', 0),
-                'outgoing_count': aging.get('outgoing', {}).get('over_90', {}).get('count', 0),
-            },
-        ],
+        export_url=url_for('report_aging', export='csv', as_of_date=as_of_date, buckets=buckets),
+        data=data,
         columns=[
             {'key': 'period', 'label': 'Dönem'},
-            {'key': 'incoming', 'label': 'Alınan Tutar', 'type': 'currency', 'class': 'text-end'},
+            {'key': 'incoming', 'label': 'Alacak Tutar', 'type': 'currency', 'class': 'text-end'},
             {'key': 'incoming_count', 'label': 'Adet', 'class': 'text-end'},
-            {'key': 'outgoing', 'label': 'Verilen Tutar', 'type': 'currency', 'class': 'text-end'},
+            {'key': 'outgoing', 'label': 'Borç Tutar', 'type': 'currency', 'class': 'text-end'},
             {'key': 'outgoing_count', 'label': 'Adet', 'class': 'text-end'},
         ]
     )
@@ -4397,11 +4692,14 @@ def report_aging():
 @app.route('/reports/activity')
 @login_required
 def report_activity():
-    logs = backend.get_activity_logs(limit=100)
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    logs = backend.get_activity_logs(limit=100, start_date=start_date, end_date=end_date)
     
     return render_template('report_view.html',
         report_title='Aktivite Raporu',
         export_url='#',
+        show_date_filter=True,
         data=logs,
         columns=[
             {'key': 'created_at', 'label': 'Tarih'},
@@ -4520,6 +4818,71 @@ def backup_download():
         flash(message, 'danger')
         return redirect(url_for('settings'))
 
+# ============================================================================
+# ROUTE'LAR - SİSTEM
+# ============================================================================
+
+@app.route('/api/cache-stats')
+@login_required
+def cache_stats():
+    """Şablon globalleri önbelleğinin isabet sayaçları."""
+    with _globals_lock:
+        stats = dict(globals_cache_stats)
+    total = sum(stats.values())
+    hits = stats['request_hits'] + stats['process_hits']
+    stats['hit_rate'] = round(hits / total, 4) if total else 0.0
+    return jsonify(stats)
+
+@app.route('/api/activity-log-stats')
+@login_required
+def activity_log_stats():
+    """Arka plan aktivite log yazıcısının tampon ve parti sayaçları."""
+    return jsonify(backend.get_activity_log_stats())
+
+@app.route('/api/activity-log-maintenance', methods=['POST'])
+@login_required
+def activity_log_maintenance():
+    """Kapanmış ayları bölümlere taşır, eskileri arşivler ve saklama süresini uygular."""
+    return jsonify(backend.maintain_activity_logs())
+
+@app.route('/api/aging')
+@login_required
+def aging_by_customer():
+    """Müşteri bazında yaşlandırma (?as_of_date=YYYY-MM-DD&buckets=30,60,90)."""
+    return jsonify(backend.get_report_aging_by_customer(request.args.get('as_of_date') or None,
+                                                        request.args.get('buckets') or None))
+
+@app.route('/api/ledger-check')
+@login_required
+def ledger_check():
+    """Cari bakiye bütünlük raporu (?customer_id=... ile belirli cariler)."""
+    customer_ids = request.args.getlist('customer_id', type=int)
+    return jsonify(backend.verify_customer_ledger(customer_ids or None))
+
+@app.route('/api/ledger-rebuild', methods=['POST'])
+@login_required
+def ledger_rebuild():
+    """Kaymış cari bakiyelerini hareketlerden yeniden kurar."""
+    customer_ids = request.form.getlist('customer_id', type=int)
+    return jsonify(backend.rebuild_customer_balances(customer_ids or None,
+                                                     created_by=session['user']['id']))
+
+@app.route('/api/due-calendar')
+@login_required
+def due_calendar():
+    """Bekleyen vade özeti; ?start_date=&end_date= ile gün bazında satırlar."""
+    start_date = request.args.get('start_date') or None
+    end_date = request.args.get('end_date') or None
+    if start_date or end_date:
+        return jsonify(backend.get_due_calendar_days(start_date=start_date, end_date=end_date))
+    return jsonify(backend.get_due_calendar())
+
+@app.route('/api/due-calendar/rebuild', methods=['POST'])
+@login_required
+def due_calendar_rebuild():
+    """Vade takvimini kaynak tablolardan yeniden kurar."""
+    return jsonify(backend.rebuild_due_calendar())
+
 # ============================================================================
 # HATA SAYFALARI
 # ============================================================================
@@ -4544,6 +4907,29 @@ def currency_filter(value):
 def date_filter(value, fmt='%d/%m/%Y'):
     return format_date(value, fmt)
 
+@app.template_global()
+def export_formats():
+    """Kullanılabilir export biçimleri (opsiyonel bağımlılığı eksik olanlar hariç)."""
+    return backend.get_export_formats()
+
+@app.template_global()
+def export_url_for(fmt):
+    """Mevcut sayfanın filtreleriyle verilen biçimdeki export adresi (None: export'suz)."""
+    args = request.args.to_dict()
+    args.pop('export', None)
+    if fmt:
+        args['export'] = fmt
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+@app.template_global()
+def page_url(cursor=None):
+    """Mevcut filtreleri koruyarak verilen imleçli sayfanın adresini döndürür."""
+    args = request.args.to_dict()
+    args.pop('cursor', None)
+    if cursor:
+        args['cursor'] = cursor
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
 # ============================================================================
 # UYGULAMA BAŞLATMA
 # ============================================================================
@@ -4551,6 +4937,10 @@ def date_filter(value, fmt='%d/%m/%Y'):
 if __name__ == '__main__':
     # Veritabanını başlat
     backend.init_db()
+    # Otomatik tamamlama indeksi ilk tuş vuruşunu beklemeden kurulur
+    backend.customer_index.load()
+    # Kapanmış aylar bölümlere taşınır (yapılacak iş yoksa hemen döner)
+    backend.maintain_activity_logs()
     
     print("=" * 70)
     print("🌐 ERP WEB UYGULAMASI BAŞLATILIYOR...")